@@ -19,15 +19,26 @@
 import sys
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
-from factor_analyzer import FactorAnalyzer
-from factor_analyzer.factor_analyzer import calculate_bartlett_sphericity, calculate_kmo
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
-from utils import setup_logger
+
+from utils import (
+    CorrelationFactorModel,
+    end_stages,
+    factorability,
+    load_dataset,
+    next_stage,
+    plots_enabled,
+    setup_logger,
+)
+
+# No plotting imports under --no-plots (see utils.figures)
+make_plots = plots_enabled()
+if make_plots:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
 logger = setup_logger(__name__)
 
@@ -43,7 +54,8 @@ if not data_path.exists():
     logger.info("Run 'fetch_educational.py' to generate the required data file")
     sys.exit(1)
 
-df = pd.read_csv(data_path)
+next_stage("load", logger)
+df = load_dataset(data_path)
 logger.info(
     f"Loaded dataset: {len(df)} students, {len(df.columns) - 1} assessment variables"
 )
@@ -62,6 +74,7 @@ logger.info(f"Data shape: {X.shape}")
 # to the factor solution, regardless of their original measurement scales.
 
 # %%
+next_stage("standardize", logger)
 scaler = StandardScaler()
 X_standardized = scaler.fit_transform(X)
 
@@ -74,9 +87,11 @@ logger.info("Data standardized: mean ≈ 0, std ≈ 1 for all variables")
 # key statistical assumptions for meaningful factor extraction.
 
 # %%
+next_stage("fit", logger)
 # Test statistical assumptions
-chi_square_value, p_value = calculate_bartlett_sphericity(X_standardized)
-kmo_all, kmo_model = calculate_kmo(X_standardized)
+diagnostics = factorability(X_standardized)
+chi_square_value, p_value = diagnostics.chi_square, diagnostics.p_value
+kmo_all, kmo_model = diagnostics.kmo_per_variable, diagnostics.kmo_total
 
 logger.info("Factor Analysis Assumptions Testing:")
 logger.info("\nBartlett's Test of Sphericity:")
@@ -132,8 +147,8 @@ else:
 # Determine number of factors to extract
 n_factors = 2  # Based on theoretical expectation of cognitive + social factors
 
-fa_unrotated = FactorAnalyzer(n_factors=n_factors, rotation="none", method="principal")
-fa_unrotated.fit(X_standardized)
+factor_model = CorrelationFactorModel.from_data(X_standardized, columns=variable_names)
+fa_unrotated = factor_model.fit(n_factors, method="principal")
 
 # Verify successful extraction
 if fa_unrotated.loadings_ is None:
@@ -189,8 +204,9 @@ logger.info(f"Average communality: {np.mean(communalities):.3f}")
 # Varimax rotation seeks "simple structure" where each variable loads primarily on one factor.
 
 # %%
-fa_rotated = FactorAnalyzer(n_factors=n_factors, rotation="varimax", method="principal")
-fa_rotated.fit(X_standardized)
+next_stage("rotate", logger)
+# Rotation only needs the unrotated loadings: no second model fit
+fa_rotated = fa_unrotated.rotate("varimax")
 
 loadings_unrotated = fa_unrotated.loadings_
 loadings_rotated = fa_rotated.loadings_
@@ -235,47 +251,49 @@ print(comparison_df.round(3))
 # Heatmaps provide visual comparison of loading patterns before and after rotation.
 
 # %%
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-
-# Unrotated loadings heatmap
-sns.heatmap(
-    loadings_unrotated.T,
-    annot=True,
-    fmt=".3f",
-    xticklabels=variable_names,
-    yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
-    cmap="RdBu_r",
-    center=0,
-    vmin=-1,
-    vmax=1,
-    ax=ax1,
-    cbar_kws={"shrink": 0.8},
-)
-ax1.set_title("Unrotated Factor Loadings")
-ax1.set_xlabel("Variables")
-
-# Rotated loadings heatmap
-sns.heatmap(
-    loadings_rotated.T,
-    annot=True,
-    fmt=".3f",
-    xticklabels=variable_names,
-    yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
-    cmap="RdBu_r",
-    center=0,
-    vmin=-1,
-    vmax=1,
-    ax=ax2,
-    cbar_kws={"shrink": 0.8},
-)
-ax2.set_title("Varimax Rotated Factor Loadings")
-ax2.set_xlabel("Variables")
+next_stage("plot", logger)
+if make_plots:
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Unrotated loadings heatmap
+    sns.heatmap(
+        loadings_unrotated.T,
+        annot=True,
+        fmt=".3f",
+        xticklabels=variable_names,
+        yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
+        cmap="RdBu_r",
+        center=0,
+        vmin=-1,
+        vmax=1,
+        ax=ax1,
+        cbar_kws={"shrink": 0.8},
+    )
+    ax1.set_title("Unrotated Factor Loadings")
+    ax1.set_xlabel("Variables")
+
+    # Rotated loadings heatmap
+    sns.heatmap(
+        loadings_rotated.T,
+        annot=True,
+        fmt=".3f",
+        xticklabels=variable_names,
+        yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
+        cmap="RdBu_r",
+        center=0,
+        vmin=-1,
+        vmax=1,
+        ax=ax2,
+        cbar_kws={"shrink": 0.8},
+    )
+    ax2.set_title("Varimax Rotated Factor Loadings")
+    ax2.set_xlabel("Variables")
 
-plt.tight_layout()
-loadings_path = script_dir / "fa_loadings.png"
-plt.savefig(loadings_path, dpi=150, bbox_inches="tight")
-logger.info(f"Factor loadings heatmap saved: {loadings_path}")
-plt.show()
+    plt.tight_layout()
+    loadings_path = script_dir / "fa_loadings.png"
+    plt.savefig(loadings_path, dpi=150, bbox_inches="tight")
+    logger.info(f"Factor loadings heatmap saved: {loadings_path}")
+    plt.show()
 
 # %% [markdown]
 # ## Factor Analysis vs PCA Comparison
@@ -284,6 +302,7 @@ plt.show()
 # to multivariate data analysis.
 
 # %%
+next_stage("fit", logger, model="pca")
 # Run PCA for comparison
 pca = PCA()
 pca_scores = pca.fit_transform(X_standardized)
@@ -324,53 +343,55 @@ print(comparison_detailed.round(3))
 # different approaches to variance decomposition.
 
 # %%
+next_stage("plot", logger)
 pca_eigenvalues = pca.explained_variance_
 fa_eigenvalues = fa_unrotated.get_eigenvalues()[0]
 
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-components = np.arange(1, len(pca_eigenvalues) + 1)
-
-# PCA scree plot
-ax1.plot(
-    components,
-    pca_eigenvalues,
-    "o-",
-    linewidth=2,
-    color="steelblue",
-    markersize=8,
-    label="PCA Eigenvalues",
-)
-ax1.axhline(y=1.0, color="red", linestyle="--", alpha=0.7, label="Kaiser criterion")
-ax1.set_xlabel("Component Number")
-ax1.set_ylabel("Eigenvalue")
-ax1.set_title("PCA Eigenvalues")
-ax1.set_xticks(components)
-ax1.grid(True, linestyle=":", alpha=0.7)
-ax1.legend()
-
-# FA scree plot
-ax2.plot(
-    components,
-    fa_eigenvalues,
-    "o-",
-    linewidth=2,
-    color="darkgreen",
-    markersize=8,
-    label="FA Eigenvalues",
-)
-ax2.axhline(y=1.0, color="red", linestyle="--", alpha=0.7, label="Kaiser criterion")
-ax2.set_xlabel("Factor Number")
-ax2.set_ylabel("Eigenvalue")
-ax2.set_title("Factor Analysis Eigenvalues")
-ax2.set_xticks(components)
-ax2.grid(True, linestyle=":", alpha=0.7)
-ax2.legend()
-
-plt.tight_layout()
-scree_path = script_dir / "fa_scree.png"
-plt.savefig(scree_path, dpi=150, bbox_inches="tight")
-logger.info(f"Eigenvalue comparison saved: {scree_path}")
-plt.show()
+if make_plots:
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
+    components = np.arange(1, len(pca_eigenvalues) + 1)
+
+    # PCA scree plot
+    ax1.plot(
+        components,
+        pca_eigenvalues,
+        "o-",
+        linewidth=2,
+        color="steelblue",
+        markersize=8,
+        label="PCA Eigenvalues",
+    )
+    ax1.axhline(y=1.0, color="red", linestyle="--", alpha=0.7, label="Kaiser criterion")
+    ax1.set_xlabel("Component Number")
+    ax1.set_ylabel("Eigenvalue")
+    ax1.set_title("PCA Eigenvalues")
+    ax1.set_xticks(components)
+    ax1.grid(True, linestyle=":", alpha=0.7)
+    ax1.legend()
+
+    # FA scree plot
+    ax2.plot(
+        components,
+        fa_eigenvalues,
+        "o-",
+        linewidth=2,
+        color="darkgreen",
+        markersize=8,
+        label="FA Eigenvalues",
+    )
+    ax2.axhline(y=1.0, color="red", linestyle="--", alpha=0.7, label="Kaiser criterion")
+    ax2.set_xlabel("Factor Number")
+    ax2.set_ylabel("Eigenvalue")
+    ax2.set_title("Factor Analysis Eigenvalues")
+    ax2.set_xticks(components)
+    ax2.grid(True, linestyle=":", alpha=0.7)
+    ax2.legend()
+
+    plt.tight_layout()
+    scree_path = script_dir / "fa_scree.png"
+    plt.savefig(scree_path, dpi=150, bbox_inches="tight")
+    logger.info(f"Eigenvalue comparison saved: {scree_path}")
+    plt.show()
 
 # %% [markdown]
 # **Eigenvalue pattern differences:**
@@ -463,3 +484,7 @@ else:
 # - Use confirmatory factor analysis to test specific theoretical models
 # - Apply to real datasets where factor structure is unknown
 # - Combine with other multivariate methods for comprehensive analysis
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
@@ -18,12 +18,23 @@
 import sys
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
-from utils import setup_logger
+
+from utils import (
+    end_stages,
+    fit_pca,
+    load_dataset,
+    next_stage,
+    plots_enabled,
+    setup_logger,
+)
+
+# No plotting imports under --no-plots (see utils.figures)
+make_plots = plots_enabled()
+if make_plots:
+    import matplotlib.pyplot as plt
 
 logger = setup_logger(__name__)
 
@@ -39,7 +50,8 @@ if not data_path.exists():
     logger.info("Run 'fetch_educational.py' to generate the required data file")
     sys.exit(2)
 
-df = pd.read_csv(data_path)
+next_stage("load", logger)
+df = load_dataset(data_path)
 logger.info(
     f"Loaded dataset: {len(df)} students, {len(df.columns) - 1} assessment variables"
 )
@@ -58,6 +70,7 @@ logger.info(f"Data shape: {X.shape}")
 # preventing variables with larger scales from dominating the principal components.
 
 # %%
+next_stage("standardize", logger)
 scaler = StandardScaler()
 X_standardized = scaler.fit_transform(X)
 
@@ -69,8 +82,11 @@ logger.info("Data standardized: mean ≈ 0, std ≈ 1 for all variables")
 # PCA identifies linear combinations of variables that capture maximum variance.
 
 # %%
-pca = PCA()
-Z = pca.fit_transform(X_standardized)
+next_stage("fit", logger)
+# All components are kept here; with n_components=k on a wide matrix fit_pca
+# switches to a truncated (randomized/ARPACK/incremental) solver
+pca, Z, solver = fit_pca(X_standardized)
+logger.info(f"PCA solver: {solver}")
 
 eigenvalues = pca.explained_variance_
 explained_ratio = pca.explained_variance_ratio_
@@ -104,30 +120,32 @@ logger.info(f"Cumulative variance: {np.round(cumulative_variance, 3)}")
 # Look for the "elbow" where the curve levels off, indicating diminishing returns.
 
 # %%
-fig, ax = plt.subplots(figsize=(8, 5))
-components = np.arange(1, len(eigenvalues) + 1)
-
-ax.plot(components, eigenvalues, "o-", linewidth=2, color="steelblue", markersize=8)
-ax.axhline(
-    y=1.0,
-    color="red",
-    linestyle="--",
-    alpha=0.7,
-    label="Kaiser criterion (eigenvalue = 1)",
-)
+next_stage("plot", logger)
+if make_plots:
+    fig, ax = plt.subplots(figsize=(8, 5))
+    components = np.arange(1, len(eigenvalues) + 1)
+
+    ax.plot(components, eigenvalues, "o-", linewidth=2, color="steelblue", markersize=8)
+    ax.axhline(
+        y=1.0,
+        color="red",
+        linestyle="--",
+        alpha=0.7,
+        label="Kaiser criterion (eigenvalue = 1)",
+    )
 
-ax.set_xticks(components)
-ax.set_xlabel("Principal Component")
-ax.set_ylabel("Eigenvalue")
-ax.set_title("Scree Plot: Eigenvalues by Component")
-ax.grid(True, linestyle=":", alpha=0.7)
-ax.legend()
+    ax.set_xticks(components)
+    ax.set_xlabel("Principal Component")
+    ax.set_ylabel("Eigenvalue")
+    ax.set_title("Scree Plot: Eigenvalues by Component")
+    ax.grid(True, linestyle=":", alpha=0.7)
+    ax.legend()
 
-plt.tight_layout()
-scree_path = script_dir / "pca_scree.png"
-plt.savefig(scree_path, dpi=150, bbox_inches="tight")
-logger.info(f"Scree plot saved: {scree_path}")
-plt.show()
+    plt.tight_layout()
+    scree_path = script_dir / "pca_scree.png"
+    plt.savefig(scree_path, dpi=150, bbox_inches="tight")
+    logger.info(f"Scree plot saved: {scree_path}")
+    plt.show()
 
 # %% [markdown]
 # **Scree plot interpretation:**
@@ -150,64 +168,65 @@ plt.show()
 # - Opposite arrows indicate negative correlation
 
 # %%
-fig, ax = plt.subplots(figsize=(10, 7))
-
-# Plot student scores
-pc1_scores = Z[:, 0]
-pc2_scores = Z[:, 1]
-
-scatter = ax.scatter(
-    pc1_scores,
-    pc2_scores,
-    c=pc1_scores,
-    cmap="viridis",
-    alpha=0.6,
-    s=40,
-    edgecolors="black",
-    linewidth=0.5,
-)
-colorbar = plt.colorbar(scatter, label="PC1 Score")
-
-# Plot variable loadings as arrows
-scale_factor = max(pc1_scores.std(), pc2_scores.std()) * 3.5
-
-for i, var_name in enumerate(variable_names):
-    loading_x = pca.components_[0, i] * scale_factor
-    loading_y = pca.components_[1, i] * scale_factor
-
-    ax.arrow(
-        0,
-        0,
-        loading_x,
-        loading_y,
-        color="red",
-        head_width=0.1,
-        alpha=0.8,
-        linewidth=2.5,
-        head_length=0.1,
-    )
-    ax.text(
-        loading_x * 1.15,
-        loading_y * 1.15,
-        var_name,
-        color="red",
-        fontweight="bold",
-        fontsize=11,
-        ha="center",
+if make_plots:
+    fig, ax = plt.subplots(figsize=(10, 7))
+
+    # Plot student scores
+    pc1_scores = Z[:, 0]
+    pc2_scores = Z[:, 1]
+
+    scatter = ax.scatter(
+        pc1_scores,
+        pc2_scores,
+        c=pc1_scores,
+        cmap="viridis",
+        alpha=0.6,
+        s=40,
+        edgecolors="black",
+        linewidth=0.5,
     )
-
-ax.set_xlabel(f"PC1 ({explained_ratio[0]:.1%} of variance)")
-ax.set_ylabel(f"PC2 ({explained_ratio[1]:.1%} of variance)")
-ax.set_title("PCA Biplot: Student Scores and Variable Loadings")
-ax.grid(True, linestyle=":", alpha=0.3)
-ax.axhline(y=0, color="black", linewidth=0.8)
-ax.axvline(x=0, color="black", linewidth=0.8)
-
-plt.tight_layout()
-biplot_path = script_dir / "pca_biplot.png"
-plt.savefig(biplot_path, dpi=150, bbox_inches="tight")
-logger.info(f"Biplot saved: {biplot_path}")
-plt.show()
+    colorbar = plt.colorbar(scatter, label="PC1 Score")
+
+    # Plot variable loadings as arrows
+    scale_factor = max(pc1_scores.std(), pc2_scores.std()) * 3.5
+
+    for i, var_name in enumerate(variable_names):
+        loading_x = pca.components_[0, i] * scale_factor
+        loading_y = pca.components_[1, i] * scale_factor
+
+        ax.arrow(
+            0,
+            0,
+            loading_x,
+            loading_y,
+            color="red",
+            head_width=0.1,
+            alpha=0.8,
+            linewidth=2.5,
+            head_length=0.1,
+        )
+        ax.text(
+            loading_x * 1.15,
+            loading_y * 1.15,
+            var_name,
+            color="red",
+            fontweight="bold",
+            fontsize=11,
+            ha="center",
+        )
+
+    ax.set_xlabel(f"PC1 ({explained_ratio[0]:.1%} of variance)")
+    ax.set_ylabel(f"PC2 ({explained_ratio[1]:.1%} of variance)")
+    ax.set_title("PCA Biplot: Student Scores and Variable Loadings")
+    ax.grid(True, linestyle=":", alpha=0.3)
+    ax.axhline(y=0, color="black", linewidth=0.8)
+    ax.axvline(x=0, color="black", linewidth=0.8)
+
+    plt.tight_layout()
+    biplot_path = script_dir / "pca_biplot.png"
+    plt.savefig(biplot_path, dpi=150, bbox_inches="tight")
+    logger.info(f"Biplot saved: {biplot_path}")
+    plt.show()
 
 # %% [markdown]
 # ## Component Loadings Analysis
@@ -295,7 +314,7 @@ for _, row in top_pc2.iterrows():
 logger.info("\nScore distribution summary:")
 logger.info(f"PC1 range: [{Z[:, 0].min():.2f}, {Z[:, 0].max():.2f}]")
 logger.info(f"PC2 range: [{Z[:, 1].min():.2f}, {Z[:, 1].max():.2f}]")
-logger.info(f"PC1-PC2 correlation: {np.corrcoef(Z[:, 0], Z[:, 1])[0,1]:.3f}")
+logger.info(f"PC1-PC2 correlation: {np.corrcoef(Z[:, 0], Z[:, 1])[0, 1]:.3f}")
 
 # %% [markdown]
 # ## Summary and Key Takeaways
@@ -325,3 +344,7 @@ logger.info(f"PC1-PC2 correlation: {np.corrcoef(Z[:, 0], Z[:, 1])[0,1]:.3f}")
 # - Explore discriminant analysis for classification tasks
 # - Apply cluster analysis to identify student groups
 # - Use canonical correlation to relate assessment domains
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
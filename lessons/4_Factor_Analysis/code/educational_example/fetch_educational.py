@@ -8,92 +8,122 @@ educational assessment data with known underlying factor structure.
 
 Usage:
     python fetch_educational.py
+    python fetch_educational.py -n 10000000 --output educational_large.csv
 
 Note: This generates synthetic but pedagogically useful data with known
 latent factors for method comparison.
 """
 
+import argparse
 import os
 
 import numpy as np
 import pandas as pd
 
-
-def main():
+from utils.synthetic import DEFAULT_CHUNKSIZE, write_chunked
+
+# Number of students in the classroom dataset
+N_STUDENTS = 100
+
+# Define factor loadings
+STRONG_LOADING = 0.85  # Strong relationship to latent factor
+MODERATE_LOADING = 0.80  # Moderate relationship to latent factor
+LOW_NOISE_LEVEL = 0.2  # Low measurement error
+MED_NOISE_LEVEL = 0.25  # Medium measurement error
+NOISE_VARIANCE_1 = 0.6  # Variance for first noise variable
+NOISE_VARIANCE_2 = 0.5  # Variance for second noise variable
+
+
+def make_chunk_factory(n_students):
+    """Return a `write_chunked` factory for `n_students` students."""
+    id_width = max(3, len(str(n_students)))
+
+    def make_chunk(rng, start, size):
+        """Synthetic assessment scores for students start + 1 .. start + size"""
+        # Generate student IDs
+        student_ids = "STUD_" + pd.Series(
+            np.arange(start + 1, start + size + 1)
+        ).astype(str).str.zfill(id_width)
+
+        # Two orthogonal latent factors, measurement noise and pure noise,
+        # drawn together as one (size x 6) block
+        (
+            intelligence_factor,  # Cognitive ability factor
+            personality_factor,  # Social/emotional factor
+            measurement_noise_low,  # Low noise (σ = 0.2)
+            measurement_noise_med,  # Medium noise (σ = 0.25)
+            pure_noise_1,  # Pure noise variable 1
+            pure_noise_2,  # Pure noise variable 2
+        ) = rng.standard_normal((6, size))
+
+        # Create observed variables with meaningful structure
+        math_test = (
+            STRONG_LOADING * intelligence_factor
+            + LOW_NOISE_LEVEL * measurement_noise_low
+        )
+        verbal_test = (
+            MODERATE_LOADING * intelligence_factor
+            + MED_NOISE_LEVEL * measurement_noise_med
+        )
+        social_skills = (
+            STRONG_LOADING * personality_factor
+            + LOW_NOISE_LEVEL * measurement_noise_low
+        )
+        leadership = (
+            MODERATE_LOADING * personality_factor
+            + MED_NOISE_LEVEL * measurement_noise_med
+        )
+        random_var1 = (
+            NOISE_VARIANCE_1 * pure_noise_1
+        )  # Pure noise (no latent structure)
+        random_var2 = (
+            NOISE_VARIANCE_2 * pure_noise_2
+        )  # Pure noise (no latent structure)
+
+        return pd.DataFrame(
+            {
+                "Student": student_ids.to_numpy(),
+                "MathTest": np.round(math_test, 2),
+                "VerbalTest": np.round(verbal_test, 2),
+                "SocialSkills": np.round(social_skills, 2),
+                "Leadership": np.round(leadership, 2),
+                "RandomVar1": np.round(random_var1, 2),
+                "RandomVar2": np.round(random_var2, 2),
+            }
+        )
+
+    return make_chunk
+
+
+def main(argv=None):
     """Generate synthetic educational assessment data"""
-    dst = os.path.join(os.path.dirname(__file__), "educational.csv")
-
-    # Set random seed for reproducible data
-    np.random.seed(42)
-
-    # Number of students
-    n_students = 100
-
-    # Generate student IDs
-    student_ids = [f"STUD_{i:03d}" for i in range(1, n_students + 1)]
-
-    # Generate two orthogonal latent factors
-    intelligence_factor = np.random.normal(
-        size=(n_students, 1)
-    )  # Cognitive ability factor
-    personality_factor = np.random.normal(
-        size=(n_students, 1)
-    )  # Social/emotional factor
-
-    # Define noise terms for measurement error
-    measurement_noise_low = np.random.normal(
-        size=(n_students, 1)
-    )  # Low noise (σ = 0.2)
-    measurement_noise_med = np.random.normal(
-        size=(n_students, 1)
-    )  # Medium noise (σ = 0.25)
-    pure_noise_1 = np.random.normal(size=(n_students, 1))  # Pure noise variable 1
-    pure_noise_2 = np.random.normal(size=(n_students, 1))  # Pure noise variable 2
-
-    # Define factor loadings
-    strong_loading = 0.85  # Strong relationship to latent factor
-    moderate_loading = 0.80  # Moderate relationship to latent factor
-    low_noise_level = 0.2  # Low measurement error
-    med_noise_level = 0.25  # Medium measurement error
-    noise_variance_1 = 0.6  # Variance for first noise variable
-    noise_variance_2 = 0.5  # Variance for second noise variable
-
-    # Create observed variables with meaningful structure
-    math_test = (
-        strong_loading * intelligence_factor + low_noise_level * measurement_noise_low
-    )
-    verbal_test = (
-        moderate_loading * intelligence_factor + med_noise_level * measurement_noise_med
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic educational assessment data."
     )
-    social_skills = (
-        strong_loading * personality_factor + low_noise_level * measurement_noise_low
+    parser.add_argument("-n", type=int, default=N_STUDENTS, help="number of students")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--output", default=os.path.join(os.path.dirname(__file__), "educational.csv")
     )
-    leadership = (
-        moderate_loading * personality_factor + med_noise_level * measurement_noise_med
-    )
-    random_var1 = noise_variance_1 * pure_noise_1  # Pure noise (no latent structure)
-    random_var2 = noise_variance_2 * pure_noise_2  # Pure noise (no latent structure)
-
-    # Create DataFrame
-    data = {
-        "Student": student_ids,
-        "MathTest": np.round(math_test.flatten(), 2),
-        "VerbalTest": np.round(verbal_test.flatten(), 2),
-        "SocialSkills": np.round(social_skills.flatten(), 2),
-        "Leadership": np.round(leadership.flatten(), 2),
-        "RandomVar1": np.round(random_var1.flatten(), 2),
-        "RandomVar2": np.round(random_var2.flatten(), 2),
-    }
-
-    df = pd.DataFrame(data)
+    args = parser.parse_args(argv)
+    dst = args.output
 
     # Save to CSV
-    df.to_csv(dst, index=False)
-    print(f"Generated {len(df)} student records")
+    n_rows = write_chunked(
+        dst,
+        make_chunk_factory(args.n),
+        args.n,
+        chunksize=args.chunksize,
+        random_state=args.seed,
+    )
+    print(f"Generated {n_rows} student records")
     print(f"Saved to {dst}")
 
-    # Print summary statistics
-    print("\nSummary statistics:")
+    # Print summary statistics (first chunk only for very large files)
+    df = pd.read_csv(dst, nrows=min(args.n, args.chunksize))
+    sample = "" if len(df) == n_rows else f" (first {len(df)} rows)"
+    print(f"\nSummary statistics{sample}:")
     print(df.describe().round(2))
 
     return 0
@@ -18,14 +18,28 @@
 # %%
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
-from factor_analyzer import FactorAnalyzer
-from factor_analyzer.factor_analyzer import calculate_bartlett_sphericity, calculate_kmo
 from sklearn.preprocessing import StandardScaler
-from utils import setup_logger
+
+from utils import (
+    CorrelationFactorModel,
+    FactorSolution,
+    ModelRegistry,
+    end_stages,
+    factorability,
+    load_dataset,
+    next_stage,
+    plots_enabled,
+    registry_key,
+    setup_logger,
+)
+
+# No plotting imports under --no-plots (see utils.figures)
+make_plots = plots_enabled()
+if make_plots:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
 # %%
 # Setup logging and paths
@@ -47,7 +61,8 @@ if not data_path.exists():
     print(f"Missing {data_path}. Run fetch_hospitals.py first to generate the data.")
     exit(1)
 
-df = pd.read_csv(data_path)
+next_stage("load", logger)
+df = load_dataset(data_path)
 print(f"Loaded {len(df)} hospitals with {len(df.columns)} health outcome metrics")
 
 # Get variable names (exclude hospital ID if present)
@@ -65,14 +80,18 @@ X = df[health_vars].values
 # ## Factor Analysis Assumptions Testing
 
 # %%
+next_stage("standardize", logger)
 # Standardize the data (important for healthcare metrics with different units)
 scaler = StandardScaler()
 Xs = scaler.fit_transform(X)
 
 print("\n--- Factor Analysis Assumptions for Healthcare Data ---")
 
+next_stage("fit", logger)
+diagnostics = factorability(Xs)
+
 # Bartlett's test of sphericity
-chi_square, p_value = calculate_bartlett_sphericity(Xs)
+chi_square, p_value = diagnostics.chi_square, diagnostics.p_value
 print("Bartlett's Test of Sphericity:")
 print(f"  Chi-square: {chi_square:.3f}")
 print(f"  p-value: {p_value:.6f}")
@@ -81,7 +100,7 @@ print(
 )
 
 # Kaiser-Meyer-Olkin (KMO) test
-kmo_all, kmo_model = calculate_kmo(Xs)
+kmo_all, kmo_model = diagnostics.kmo_per_variable, diagnostics.kmo_total
 print("\nKMO Test:")
 print(f"  Overall MSA: {kmo_model:.3f}")
 if kmo_model >= 0.8:
@@ -114,13 +133,19 @@ for i, var_name in enumerate(health_vars):
 # ## Factor Retention Analysis
 
 # %%
-# Exploratory factor analysis to determine number of factors
-fa_explore = FactorAnalyzer(
-    n_factors=len(health_vars), rotation=None, method="principal"
+# Correlation matrix computed once; its eigenvalues drive factor retention.
+# Fitted models are kept in a registry keyed by the data, features and
+# settings, so a rerun on unchanged data loads them instead of refitting.
+registry = ModelRegistry(script_dir / ".model_registry")
+model_entry = registry.get_or_fit(
+    registry_key(X, health_vars, preprocessing="StandardScaler", method="correlation"),
+    lambda: CorrelationFactorModel.from_data(Xs, columns=health_vars).to_arrays(),
+)
+factor_model = CorrelationFactorModel.from_arrays(
+    model_entry.arrays, model_entry.metadata
 )
-fa_explore.fit(Xs)
 
-eigenvalues = fa_explore.get_eigenvalues()[0]
+eigenvalues = factor_model.eigenvalues
 n_factors_kaiser = sum(eigenvalues > 1.0)
 
 print("\n--- Factor Retention Analysis ---")
@@ -149,16 +174,25 @@ n_factors = max(1, n_factors_kaiser) if n_factors_kaiser <= 2 else 2
 
 print(f"\n--- Factor Analysis: {n_factors}-Factor Healthcare Quality Model ---")
 
-# Unrotated factor analysis
-fa_unrotated = FactorAnalyzer(n_factors=n_factors, rotation=None, method="principal")
-fa_unrotated.fit(Xs)
+# Unrotated factor analysis (from the registry when the inputs are unchanged)
+fa_entry = registry.get_or_fit(
+    registry_key(
+        X,
+        health_vars,
+        preprocessing="StandardScaler",
+        method="principal",
+        params={"n_factors": int(n_factors)},
+    ),
+    lambda: factor_model.fit(n_factors, method="principal").to_arrays(),
+)
+fa_unrotated = factor_model.cache_solution(
+    FactorSolution.from_arrays(fa_entry.arrays, fa_entry.metadata)
+)
 
-# Rotated factor analysis (if more than 1 factor)
+next_stage("rotate", logger)
+# Rotated factor analysis (if more than 1 factor), reusing the unrotated loadings
 if n_factors > 1:
-    fa_rotated = FactorAnalyzer(
-        n_factors=n_factors, rotation="varimax", method="principal"
-    )
-    fa_rotated.fit(Xs)
+    fa_rotated = fa_unrotated.rotate("varimax")
     loadings_rotated = fa_rotated.loadings_
     rotation_label = "Varimax Rotated"
 else:
@@ -181,7 +215,9 @@ for i, var_name in enumerate(health_vars):
     h2_interp = (
         "High"
         if communalities[i] > 0.6
-        else "Medium" if communalities[i] > 0.3 else "Low"
+        else "Medium"
+        if communalities[i] > 0.3
+        else "Low"
     )
     print(
         f"{var_name:<20} {communalities[i]:<8.3f} {uniquenesses[i]:<8.3f} {h2_interp} common"
@@ -200,6 +236,7 @@ print(f"Proportion explained by factors: {variance_explained:.1%}")
 
 # %%
 print(f"\n--- Factor Loadings: {rotation_label} ---")
+next_stage("plot", logger)
 if n_factors == 1:
     print(f"{'Variable':<20} {'Factor 1':<10} {'|Loading|':<10}")
     print("-" * 40)
@@ -266,63 +303,64 @@ else:
 # ## Visualization: Factor Structure
 
 # %%
-# Create factor loadings visualization
-if n_factors == 1:
-    fig, ax = plt.subplots(1, 1, figsize=(8, 6))
+if make_plots:
+    # Create factor loadings visualization
+    if n_factors == 1:
+        fig, ax = plt.subplots(1, 1, figsize=(8, 6))
+
+        # Single factor bar plot
+        loadings_df = pd.DataFrame(
+            {"Variable": health_vars, "Loading": loadings_rotated[:, 0]}
+        )
+        loadings_df = loadings_df.sort_values("Loading", key=abs, ascending=False)
 
-    # Single factor bar plot
-    loadings_df = pd.DataFrame(
-        {"Variable": health_vars, "Loading": loadings_rotated[:, 0]}
-    )
-    loadings_df = loadings_df.sort_values("Loading", key=abs, ascending=False)
+        colors = ["red" if x < 0 else "blue" for x in loadings_df["Loading"]]
+        bars = ax.barh(
+            loadings_df["Variable"], loadings_df["Loading"], color=colors, alpha=0.7
+        )
 
-    colors = ["red" if x < 0 else "blue" for x in loadings_df["Loading"]]
-    bars = ax.barh(
-        loadings_df["Variable"], loadings_df["Loading"], color=colors, alpha=0.7
-    )
+        ax.set_xlabel("Factor Loading")
+        ax.set_title("Hospital Quality Factor Loadings")
+        ax.axvline(x=0, color="black", linestyle="-", alpha=0.3)
+        ax.grid(True, alpha=0.3)
+
+        # Add loading values on bars
+        for _i, (bar, loading) in enumerate(
+            zip(bars, loadings_df["Loading"], strict=False)
+        ):
+            ax.text(
+                loading + (0.02 if loading > 0 else -0.02),
+                bar.get_y() + bar.get_height() / 2,
+                f"{loading:.3f}",
+                ha="left" if loading > 0 else "right",
+                va="center",
+                fontsize=8,
+            )
 
-    ax.set_xlabel("Factor Loading")
-    ax.set_title("Hospital Quality Factor Loadings")
-    ax.axvline(x=0, color="black", linestyle="-", alpha=0.3)
-    ax.grid(True, alpha=0.3)
-
-    # Add loading values on bars
-    for _i, (bar, loading) in enumerate(
-        zip(bars, loadings_df["Loading"], strict=False)
-    ):
-        ax.text(
-            loading + (0.02 if loading > 0 else -0.02),
-            bar.get_y() + bar.get_height() / 2,
-            f"{loading:.3f}",
-            ha="left" if loading > 0 else "right",
-            va="center",
-            fontsize=8,
+    else:
+        fig, ax = plt.subplots(1, 1, figsize=(10, 6))
+
+        # Multiple factors heatmap
+        sns.heatmap(
+            loadings_rotated.T,
+            annot=True,
+            fmt=".3f",
+            xticklabels=health_vars,
+            yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
+            center=0,
+            cmap="RdBu_r",
+            ax=ax,
         )
+        ax.set_title(f"Hospital Quality Factor Loadings ({rotation_label})")
+        ax.set_xlabel("Health Outcome Variables")
 
-else:
-    fig, ax = plt.subplots(1, 1, figsize=(10, 6))
-
-    # Multiple factors heatmap
-    sns.heatmap(
-        loadings_rotated.T,
-        annot=True,
-        fmt=".3f",
-        xticklabels=health_vars,
-        yticklabels=[f"Factor {i+1}" for i in range(n_factors)],
-        center=0,
-        cmap="RdBu_r",
-        ax=ax,
-    )
-    ax.set_title(f"Hospital Quality Factor Loadings ({rotation_label})")
-    ax.set_xlabel("Health Outcome Variables")
-
-plt.tight_layout()
-loadings_out = script_dir / "hospitals_fa_loadings.png"
-loadings_out.parent.mkdir(parents=True, exist_ok=True)
-plt.savefig(loadings_out, dpi=150, bbox_inches="tight")
-plt.close()
+    plt.tight_layout()
+    loadings_out = script_dir / "hospitals_fa_loadings.png"
+    loadings_out.parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(loadings_out, dpi=150, bbox_inches="tight")
+    plt.close()
 
-print(f"Saved {loadings_out}")
+    print(f"Saved {loadings_out}")
 
 # %% [markdown]
 # ## Factor Scores and Hospital Rankings
@@ -346,13 +384,13 @@ if n_factors == 1:
     for i in range(min(5, len(sorted_indices))):
         idx = sorted_indices[i]
         score = factor_scores[idx, 0]
-        print(f"  Hospital {idx+1}: {score:.3f}")
+        print(f"  Hospital {idx + 1}: {score:.3f}")
 
     print("\nBottom 5 Quality Hospitals (Factor 1 scores):")
     for i in range(min(5, len(sorted_indices))):
         idx = sorted_indices[-(i + 1)]
         score = factor_scores[idx, 0]
-        print(f"  Hospital {idx+1}: {score:.3f}")
+        print(f"  Hospital {idx + 1}: {score:.3f}")
 
 # %% [markdown]
 # ## Model Validation and Quality Assessment
@@ -393,4 +431,13 @@ else:
     print("  △ Moderate quality structure, multiple dimensions may exist")
     print("  △ Consider domain-specific quality measures")
 
+registry_stats = registry.stats()
+logger.info(
+    f"Model registry: {registry_stats.hits} hits, {registry_stats.misses} misses, "
+    f"{registry_stats.entries} entries ({registry_stats.bytes / 1024:.1f} KiB)"
+)
 logger.info("Hospital Health Outcomes Factor Analysis completed successfully")
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
@@ -8,102 +8,127 @@ folder. Creates realistic time series with high correlations between indices.
 
 Usage:
     python fetch_invest.py
+    python fetch_invest.py -n 10000000 --output invest_large.csv
+
+Long series are generated in chunks; each chunk continues the price paths
+from the last level of the previous one.
 
 """
 
+import argparse
 import os
 import sys
 
 import numpy as np
 import pandas as pd
 
-
-def main():
+from utils.synthetic import DEFAULT_CHUNKSIZE, write_chunked
+
+# Parameters based on original EuStockMarkets data analysis
+N_DAYS = 1860  # Same number of observations as original
+
+# Starting values (approximate means from original data)
+START_VALUES = {"DAX": 2500, "SMI": 3400, "CAC": 2200, "FTSE": 3600}
+
+# Volatility of each index's individual noise (creates varied correlations)
+NOISE_SD = {"DAX": 0.008, "SMI": 0.006, "CAC": 0.010, "FTSE": 0.007}
+
+# Weight of market factor vs individual noise (creates high but realistic correlation)
+MARKET_WEIGHT = 0.75  # Reduced from 0.85
+INDIVIDUAL_WEIGHT = 0.25  # Increased from 0.15
+
+# Decimal places stored for each index
+PRECISION = {"DAX": 2, "SMI": 1, "CAC": 1, "FTSE": 1}
+
+
+def make_chunk_factory():
+    """Return a `write_chunked` factory that continues the price paths across chunks."""
+    last_prices = dict(START_VALUES)
+
+    def make_chunk(rng, start, size):
+        """Synthetic index levels for trading days start + 1 .. start + size"""
+        # Generate correlated random walks to simulate stock market behavior
+        # Create a common market factor that drives all indices
+        market_factor = rng.normal(0, 0.01, size)  # Daily market returns
+
+        # Add some regional factors to create more realistic correlation structure
+        european_factor = rng.normal(0, 0.008, size)  # European region factor
+        uk_factor = rng.normal(0, 0.006, size)  # UK-specific factor
+
+        # Individual noise for each index
+        individual_noise = {
+            index: rng.normal(0, sd, size) for index, sd in NOISE_SD.items()
+        }
+
+        data = {"rownames": np.arange(start + 1, start + size + 1)}
+        for index in START_VALUES:
+            # Different factor loadings for each index to create varied correlations
+            if index == "FTSE":
+                # FTSE gets less European factor, more UK factor
+                returns = (
+                    MARKET_WEIGHT * market_factor
+                    + 0.1 * european_factor
+                    + 0.15 * uk_factor
+                    + INDIVIDUAL_WEIGHT * individual_noise[index]
+                )
+            elif index == "CAC":
+                # CAC gets more individual noise, less correlated
+                returns = (
+                    0.65 * market_factor
+                    + 0.2 * european_factor
+                    + 0.15 * individual_noise[index]
+                )
+            else:
+                # DAX and SMI more European-focused
+                returns = (
+                    MARKET_WEIGHT * market_factor
+                    + 0.15 * european_factor
+                    + INDIVIDUAL_WEIGHT * individual_noise[index]
+                )
+
+            # Convert returns to price levels, continuing from the previous chunk
+            price_series = last_prices[index] * np.cumprod(1 + returns)
+            last_prices[index] = price_series[-1]
+            data[index] = np.round(price_series, PRECISION[index])
+
+        return pd.DataFrame(data)
+
+    return make_chunk
+
+
+def main(argv=None):
     """Generate synthetic European stock market indices data"""
-    dst = os.path.join(os.path.dirname(__file__), "invest.csv")
-
-    # Set random seed for reproducible data
-    np.random.seed(42)
-
-    # Parameters based on original EuStockMarkets data analysis
-    n_days = 1860  # Same number of observations as original
-
-    # Starting values (approximate means from original data)
-    start_values = {"DAX": 2500, "SMI": 3400, "CAC": 2200, "FTSE": 3600}
-
-    # Generate correlated random walks to simulate stock market behavior
-    # Create a common market factor that drives all indices
-    market_factor = np.random.normal(0, 0.01, n_days)  # Daily market returns
-
-    # Add some regional factors to create more realistic correlation structure
-    european_factor = np.random.normal(0, 0.008, n_days)  # European region factor
-    uk_factor = np.random.normal(0, 0.006, n_days)  # UK-specific factor
-
-    # Individual noise for each index (different volatilities to create varied correlations)
-    individual_noise = {
-        "DAX": np.random.normal(0, 0.008, n_days),
-        "SMI": np.random.normal(0, 0.006, n_days),  # SMI correlated but distinct
-        "CAC": np.random.normal(0, 0.010, n_days),  # CAC more independent
-        "FTSE": np.random.normal(0, 0.007, n_days),
-    }
-
-    # Weight of market factor vs individual noise (creates high but realistic correlation)
-    market_weight = 0.75  # Reduced from 0.85
-    individual_weight = 0.25  # Increased from 0.15
-
-    # Generate the time series
-    indices = {}
-    for index, start_val in start_values.items():
-        # Different factor loadings for each index to create varied correlations
-        if index == "FTSE":
-            # FTSE gets less European factor, more UK factor
-            returns = (
-                market_weight * market_factor
-                + 0.1 * european_factor
-                + 0.15 * uk_factor
-                + individual_weight * individual_noise[index]
-            )
-        elif index == "CAC":
-            # CAC gets more individual noise, less correlated
-            returns = (
-                0.65 * market_factor
-                + 0.2 * european_factor
-                + 0.15 * individual_noise[index]
-            )
-        else:
-            # DAX and SMI more European-focused
-            returns = (
-                market_weight * market_factor
-                + 0.15 * european_factor
-                + individual_weight * individual_noise[index]
-            )
-
-        # Convert returns to price levels using cumulative product
-        price_series = start_val * np.cumprod(1 + returns)
-        indices[index] = price_series
-
-    # Create DataFrame matching original structure
-    data = {
-        "rownames": range(1, n_days + 1),
-        "DAX": np.round(indices["DAX"], 2),
-        "SMI": np.round(indices["SMI"], 1),
-        "CAC": np.round(indices["CAC"], 1),
-        "FTSE": np.round(indices["FTSE"], 1),
-    }
-
-    df = pd.DataFrame(data)
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic European stock index data."
+    )
+    parser.add_argument("-n", type=int, default=N_DAYS, help="number of trading days")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--output", default=os.path.join(os.path.dirname(__file__), "invest.csv")
+    )
+    args = parser.parse_args(argv)
+    dst = args.output
 
     # Save to CSV
     try:
-        df.to_csv(dst, index=False)
-        print(f"Generated {len(df)} stock market observations")
+        n_rows = write_chunked(
+            dst,
+            make_chunk_factory(),
+            args.n,
+            chunksize=args.chunksize,
+            random_state=args.seed,
+        )
+        print(f"Generated {n_rows} stock market observations")
         print(f"Saved: {dst}")
 
-        # Print summary statistics
-        print("\nSummary statistics:")
+        # Print summary statistics (first chunk only for very large files)
+        df = pd.read_csv(dst, nrows=min(args.n, args.chunksize))
+        sample = "" if len(df) == n_rows else f" (first {len(df)} rows)"
+        print(f"\nSummary statistics{sample}:")
         print(df.iloc[:, 1:].describe().round(1))
 
-        print("\nCorrelation matrix:")
+        print(f"\nCorrelation matrix{sample}:")
         print(df.iloc[:, 1:].corr().round(3))
 
         return 0
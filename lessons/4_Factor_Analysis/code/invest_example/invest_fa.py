@@ -20,14 +20,28 @@
 # %%
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-import seaborn as sns
-from factor_analyzer import FactorAnalyzer
-from factor_analyzer.factor_analyzer import calculate_bartlett_sphericity, calculate_kmo
 from sklearn.preprocessing import StandardScaler
-from utils import setup_logger
+
+from utils import (
+    CorrelationFactorModel,
+    FactorScorer,
+    end_stages,
+    factorability,
+    load_dataset,
+    n_factors_parallel,
+    next_stage,
+    parallel_analysis,
+    plots_enabled,
+    rolling_factor_loadings,
+    setup_logger,
+)
+
+# No plotting imports under --no-plots (see utils.figures)
+make_plots = plots_enabled()
+if make_plots:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
 # %%
 # Setup logging and paths
@@ -55,8 +69,9 @@ if not data_file.exists():
     )
     exit(1)
 
+next_stage("load", logger)
 # Load data
-df = pd.read_csv(data_file, index_col=0)
+df = load_dataset(data_file, keep_index=True)  # rownames become the index
 print(f"Data loaded: {df.shape[0]} trading days × {df.shape[1]} market indices")
 print(f"Trading day range: Day {df.index.min()} to Day {df.index.max()}")
 print("\nMarket indices:", list(df.columns))
@@ -96,13 +111,16 @@ X = df.values
 X_clean = X[~np.isnan(X).any(axis=1)]  # Remove rows with any NaN
 print(f"Data after cleaning: {X_clean.shape[0]} complete observations")
 
+next_stage("standardize", logger)
 # Standardize the data
 scaler = StandardScaler()
 X_scaled = scaler.fit_transform(X_clean)
 
+next_stage("fit", logger)
 # Check Factor Analysis assumptions
-chi_square_value, p_value = calculate_bartlett_sphericity(X_scaled)
-kmo_all, kmo_model = calculate_kmo(X_scaled)
+diagnostics = factorability(X_scaled)
+chi_square_value, p_value = diagnostics.chi_square, diagnostics.p_value
+kmo_all, kmo_model = diagnostics.kmo_per_variable, diagnostics.kmo_total
 
 print("\n" + "=" * 50)
 print("FACTOR ANALYSIS ASSUMPTIONS")
@@ -149,11 +167,11 @@ for i, market in enumerate(df.columns):
 # - **Parallel Analysis**: Compare with random data eigenvalues
 
 # %%
-# Perform initial factor analysis to examine eigenvalues
-fa_explore = FactorAnalyzer(n_factors=df.shape[1], rotation=None, method="principal")
-fa_explore.fit(X_scaled)
+# Compute the correlation matrix once; every factor model below is fitted from it
+factor_model = CorrelationFactorModel.from_data(X_scaled, columns=df.columns)
 
-eigenvalues, _ = fa_explore.get_eigenvalues()
+# Eigenvalues of the correlation matrix (no exploratory full-rank fit needed)
+eigenvalues = factor_model.eigenvalues
 
 print("\n" + "=" * 50)
 print("FACTOR RETENTION ANALYSIS")
@@ -173,11 +191,21 @@ for i, eigenval in enumerate(eigenvalues):
         f"Factor {i + 1:<2} {eigenval:<12.3f} {var_explained:<12.1f} {cumulative_var:<12.1f}"
     )
 
+# Parallel analysis: keep factors whose eigenvalue beats the 95th percentile
+# of eigenvalues from random normal data with the same shape
+pa_mean, pa_threshold = parallel_analysis(
+    X_scaled.shape[0], X_scaled.shape[1], n_iter=500, percentile=95, random_state=42
+)
+n_factors_parallel_analysis = n_factors_parallel(eigenvalues, pa_threshold)
+
 print("\nFactor Retention Criteria:")
 print(f"  Kaiser criterion (eigenvalue > 1): {n_factors_kaiser} factors")
 print(
     f"  70% variance rule: {np.argmax(np.cumsum(eigenvalues) / np.sum(eigenvalues) >= 0.70) + 1} factors"
 )
+print(
+    f"  Parallel analysis (95th percentile of 500 random datasets): {n_factors_parallel_analysis} factors"
+)
 print("  Financial theory expectation: 1-2 common market factors")
 
 # %% [markdown]
@@ -197,12 +225,11 @@ print(f"FACTOR ANALYSIS: {n_factors}-FACTOR SOLUTION")
 print("=" * 50)
 
 # Unrotated solution
-fa_unrotated = FactorAnalyzer(n_factors=n_factors, rotation=None, method="principal")
-fa_unrotated.fit(X_scaled)
+fa_unrotated = factor_model.fit(n_factors, method="principal")
 
-# Varimax rotated solution
-fa_rotated = FactorAnalyzer(n_factors=n_factors, rotation="varimax", method="principal")
-fa_rotated.fit(X_scaled)
+next_stage("rotate", logger)
+# Varimax rotated solution (same correlation matrix, no pass over the rows)
+fa_rotated = factor_model.fit(n_factors, method="principal", rotation="varimax")
 
 # Extract results
 loadings_unrotated = getattr(fa_unrotated, "loadings_", None)
@@ -211,7 +238,9 @@ loadings_rotated = getattr(fa_rotated, "loadings_", None)
 # If unrotated loadings are not provided by the FactorAnalyzer implementation,
 # fall back to the rotated loadings for display purposes to avoid subscripting None.
 if loadings_unrotated is None:
-    logger.warning("Unrotated loadings are None; falling back to rotated loadings for display.")
+    logger.warning(
+        "Unrotated loadings are None; falling back to rotated loadings for display."
+    )
     loadings_unrotated = loadings_rotated
 
 # Ensure we have loadings to work with
@@ -300,122 +329,212 @@ poorly_explained = [
 print(f"  Highly integrated markets (h² > average): {', '.join(well_explained)}")
 print(f"  More idiosyncratic markets (h² ≤ average): {', '.join(poorly_explained)}")
 
+# %% [markdown]
+# ## Factor Scores for New Observations
+#
+# The scoring coefficients are computed once from the rotated solution and
+# the training scaler, so a new day of raw returns is scored with one matrix
+# product. The saved model (plain `.npy` arrays) scores files from a shell:
+#
+#     python -m utils.factor_scoring lessons/4_Factor_Analysis/code/invest_example/models/invest_fa new_returns.csv
+
+# %%
+next_stage("save", logger)
+scorer = FactorScorer.from_solution(fa_rotated, scaler, features=list(df.columns))
+model_dir = scorer.save(script_dir / "models" / "invest_fa")
+logger.info(f"Saved factor-score coefficients to {model_dir}")
+
+# Raw (unscaled) returns in, the same scores as transforming the scaled data
+factor_scores = scorer.transform(X_clean)
+max_diff = np.abs(factor_scores - fa_rotated.transform(X_scaled)).max()
+print(f"Factor scorer check: max score difference = {max_diff:.2e}")
+
+# Bartlett scores are unbiased for each factor; Anderson-Rubin scores are uncorrelated
+for method in ("bartlett", "anderson-rubin"):
+    method_scores = FactorScorer.from_solution(
+        fa_rotated, scaler, method=method
+    ).transform(X_clean)
+    score_corr = np.corrcoef(method_scores, rowvar=False)[0, 1]
+    print(
+        f"{method.capitalize()} scores: correlation between factors = {score_corr:.3f}"
+    )
+
 # %% [markdown]
 # ## Visualization: Factor Structure
 
 # %%
-# Create comprehensive factor analysis visualizations
-fig = plt.figure(figsize=(15, 10))
-
-# 1. Factor loadings heatmap comparison
-ax1 = plt.subplot(2, 3, 1)
-sns.heatmap(
-    loadings_unrotated.T,
-    annot=True,
-    fmt=".2f",
-    xticklabels=df.columns,
-    yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
-    cmap="RdYlGn_r",
-    center=0,
-    vmin=-1,
-    vmax=1,
-    cbar_kws={"shrink": 0.8},
-)
-ax1.set_title("Unrotated Factor Loadings")
-
-ax2 = plt.subplot(2, 3, 2)
-sns.heatmap(
-    loadings_rotated.T,
-    annot=True,
-    fmt=".2f",
-    xticklabels=df.columns,
-    yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
-    cmap="RdYlGn_r",
-    center=0,
-    vmin=-1,
-    vmax=1,
-    cbar_kws={"shrink": 0.8},
-)
-ax2.set_title("Varimax Rotated Loadings")
-
-# 2. Communalities bar chart
-ax3 = plt.subplot(2, 3, 3)
-bars = ax3.bar(df.columns, communalities, color="steelblue", alpha=0.7)
-ax3.set_title("Communalities by Market")
-ax3.set_ylabel("h² (Proportion of Variance Explained)")
-ax3.set_ylim(0, 1)
-ax3.tick_params(axis="x", rotation=45)
-ax3.axhline(
-    y=float(np.mean(communalities)),
-    color="red",
-    linestyle="--",
-    label=f"Average = {np.mean(communalities):.3f}",
-)
-ax3.legend()
-ax3.grid(True, alpha=0.3)
-
-# 3. Scree plot
-ax4 = plt.subplot(2, 3, 4)
-factors = np.arange(1, len(eigenvalues) + 1)
-ax4.plot(factors, eigenvalues, "o-", color="steelblue", markersize=8, linewidth=2)
-ax4.axhline(y=1.0, color="red", linestyle="--", alpha=0.7, label="Kaiser criterion")
-ax4.set_xlabel("Factor Number")
-ax4.set_ylabel("Eigenvalue")
-ax4.set_title("Scree Plot")
-ax4.grid(True, alpha=0.3)
-ax4.legend()
-ax4.set_xticks(factors)
-
-# 4. Factor scores scatter plot (first 100 observations)
-ax5 = plt.subplot(2, 3, 5)
-factor_scores = fa_rotated.transform(X_scaled)
-scatter = ax5.scatter(
-    factor_scores[:100, 0],
-    factor_scores[:100, 1],
-    c=np.arange(100),
-    cmap="viridis",
-    alpha=0.6,
-)
-ax5.set_xlabel("Factor 1 (Common Market)")
-ax5.set_ylabel("Factor 2 (Regional Differences)")
-ax5.set_title("Factor Scores (First 100 Days)")
-ax5.grid(True, alpha=0.3)
-plt.colorbar(scatter, ax=ax5, label="Trading Day")
-
-# 5. Uniquenesses vs Communalities
-ax6 = plt.subplot(2, 3, 6)
-x = np.arange(len(df.columns))
-width = 0.35
-ax6.bar(
-    x - width / 2,
-    communalities,
-    width,
-    label="Communalities (h²)",
-    color="steelblue",
-    alpha=0.7,
-)
-ax6.bar(
-    x + width / 2,
-    uniquenesses,
-    width,
-    label="Uniquenesses (u²)",
-    color="lightcoral",
-    alpha=0.7,
+next_stage("plot", logger)
+if make_plots:
+    # Create comprehensive factor analysis visualizations
+    fig = plt.figure(figsize=(15, 10))
+
+    # 1. Factor loadings heatmap comparison
+    ax1 = plt.subplot(2, 3, 1)
+    sns.heatmap(
+        loadings_unrotated.T,
+        annot=True,
+        fmt=".2f",
+        xticklabels=df.columns,
+        yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
+        cmap="RdYlGn_r",
+        center=0,
+        vmin=-1,
+        vmax=1,
+        cbar_kws={"shrink": 0.8},
+    )
+    ax1.set_title("Unrotated Factor Loadings")
+
+    ax2 = plt.subplot(2, 3, 2)
+    sns.heatmap(
+        loadings_rotated.T,
+        annot=True,
+        fmt=".2f",
+        xticklabels=df.columns,
+        yticklabels=[f"Factor {i + 1}" for i in range(n_factors)],
+        cmap="RdYlGn_r",
+        center=0,
+        vmin=-1,
+        vmax=1,
+        cbar_kws={"shrink": 0.8},
+    )
+    ax2.set_title("Varimax Rotated Loadings")
+
+    # 2. Communalities bar chart
+    ax3 = plt.subplot(2, 3, 3)
+    bars = ax3.bar(df.columns, communalities, color="steelblue", alpha=0.7)
+    ax3.set_title("Communalities by Market")
+    ax3.set_ylabel("h² (Proportion of Variance Explained)")
+    ax3.set_ylim(0, 1)
+    ax3.tick_params(axis="x", rotation=45)
+    ax3.axhline(
+        y=float(np.mean(communalities)),
+        color="red",
+        linestyle="--",
+        label=f"Average = {np.mean(communalities):.3f}",
+    )
+    ax3.legend()
+    ax3.grid(True, alpha=0.3)
+
+    # 3. Scree plot
+    ax4 = plt.subplot(2, 3, 4)
+    factors = np.arange(1, len(eigenvalues) + 1)
+    ax4.plot(factors, eigenvalues, "o-", color="steelblue", markersize=8, linewidth=2)
+    ax4.axhline(y=1.0, color="red", linestyle="--", alpha=0.7, label="Kaiser criterion")
+    ax4.plot(
+        factors,
+        pa_threshold,
+        "s--",
+        color="gray",
+        alpha=0.7,
+        label="Parallel analysis (95%)",
+    )
+    ax4.set_xlabel("Factor Number")
+    ax4.set_ylabel("Eigenvalue")
+    ax4.set_title("Scree Plot")
+    ax4.grid(True, alpha=0.3)
+    ax4.legend()
+    ax4.set_xticks(factors)
+
+    # 4. Factor scores scatter plot (first 100 observations)
+    ax5 = plt.subplot(2, 3, 5)
+    scatter = ax5.scatter(
+        factor_scores[:100, 0],
+        factor_scores[:100, 1],
+        c=np.arange(100),
+        cmap="viridis",
+        alpha=0.6,
+    )
+    ax5.set_xlabel("Factor 1 (Common Market)")
+    ax5.set_ylabel("Factor 2 (Regional Differences)")
+    ax5.set_title("Factor Scores (First 100 Days)")
+    ax5.grid(True, alpha=0.3)
+    plt.colorbar(scatter, ax=ax5, label="Trading Day")
+
+    # 5. Uniquenesses vs Communalities
+    ax6 = plt.subplot(2, 3, 6)
+    x = np.arange(len(df.columns))
+    width = 0.35
+    ax6.bar(
+        x - width / 2,
+        communalities,
+        width,
+        label="Communalities (h²)",
+        color="steelblue",
+        alpha=0.7,
+    )
+    ax6.bar(
+        x + width / 2,
+        uniquenesses,
+        width,
+        label="Uniquenesses (u²)",
+        color="lightcoral",
+        alpha=0.7,
+    )
+    ax6.set_xlabel("Markets")
+    ax6.set_ylabel("Proportion of Variance")
+    ax6.set_title("Variance Decomposition")
+    ax6.set_xticks(x)
+    ax6.set_xticklabels(df.columns, rotation=45)
+    ax6.legend()
+    ax6.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    loadings_out = script_dir / "invest_fa_loadings.png"
+    plt.savefig(loadings_out, dpi=150, bbox_inches="tight")
+    print(f"\nSaved comprehensive factor analysis plots: {loadings_out}")
+    logger.info(f"Saved factor analysis visualization: {loadings_out}")
+    plt.show()
+
+# %% [markdown]
+# ## Rolling-Window Factor Model: Loadings Over Time
+#
+# A single model over all trading days assumes the factor structure is
+# constant. Refitting on a sliding one-year window (250 trading days) shows
+# how market integration changes. The window's covariance is updated
+# incrementally as each day enters and leaves, so the whole path costs about
+# as much as a handful of full fits.
+
+# %%
+next_stage("fit", logger, model="rolling")
+rolling_window = 250
+rolling = rolling_factor_loadings(
+    df.dropna(),
+    n_factors,
+    window=rolling_window,
+    method="principal",
+    rotation="varimax",
 )
-ax6.set_xlabel("Markets")
-ax6.set_ylabel("Proportion of Variance")
-ax6.set_title("Variance Decomposition")
-ax6.set_xticks(x)
-ax6.set_xticklabels(df.columns, rotation=45)
-ax6.legend()
-ax6.grid(True, alpha=0.3)
-
-plt.tight_layout()
-loadings_out = script_dir / "invest_fa_loadings.png"
-plt.savefig(loadings_out, dpi=150, bbox_inches="tight")
-print(f"\nSaved comprehensive factor analysis plots: {loadings_out}")
-logger.info(f"Saved factor analysis visualization: {loadings_out}")
-plt.show()
+
+print("\n" + "=" * 50)
+print(f"ROLLING {rolling_window}-DAY FACTOR MODEL")
+print("=" * 50)
+print(f"Windows fitted: {len(rolling.index)}")
+print(f"{'Market':<8} {'Min h²':<8} {'Mean h²':<8} {'Max h²':<8}")
+print("-" * 34)
+for market in rolling.columns:
+    h2 = rolling.communalities[market]
+    print(f"{market:<8} {h2.min():<8.3f} {h2.mean():<8.3f} {h2.max():<8.3f}")
+
+next_stage("plot", logger)
+if make_plots:
+    fig, (ax_load, ax_comm) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    rolling.loadings_frame(0).plot(ax=ax_load)
+    ax_load.set_ylabel("Factor 1 loading")
+    ax_load.set_title(f"Rolling {rolling_window}-Day Varimax Loadings (Factor 1)")
+    ax_load.grid(True, alpha=0.3)
+    rolling.communalities.plot(ax=ax_comm)
+    ax_comm.set_xlabel("Trading Day (window end)")
+    ax_comm.set_ylabel("h²")
+    ax_comm.set_title("Rolling Communalities")
+    ax_comm.set_ylim(0, 1)
+    ax_comm.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    rolling_out = script_dir / "invest_fa_rolling.png"
+    plt.savefig(rolling_out, dpi=150, bbox_inches="tight")
+    print(f"\nSaved rolling factor model plot: {rolling_out}")
+    logger.info(f"Saved rolling factor model visualization: {rolling_out}")
+    plt.show()
 
 # %% [markdown]
 # ## Financial Risk and Portfolio Implications
@@ -573,3 +692,7 @@ print(f"\nFactor analysis completed. Results saved to: {script_dir}")
 # - **Higher-Frequency Analysis**: Intraday factor structures
 # - **Cross-Asset Applications**: Bonds, currencies, commodities factor analysis
 # - **Risk Attribution**: Performance attribution to systematic vs idiosyncratic sources
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
@@ -18,23 +18,34 @@
 # %%
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 
+from utils import (
+    end_stages,
+    fit_pca,
+    load_dataset,
+    next_stage,
+    plots_enabled,
+    setup_logger,
+)
+
+# No plotting imports under --no-plots (see utils.figures)
+make_plots = plots_enabled()
+if make_plots:
+    import matplotlib.pyplot as plt
+
 # %%
 # Simple behaviour: expect invest.csv in the same folder as this script
 # Use Path to make paths robust regardless of current working directory.
 script_dir = Path(__file__).resolve().parent
+logger = setup_logger("invest_pca")
 data_path = script_dir / "invest.csv"
-X = pd.read_csv(data_path)
-# If the CSV has a leading index-like column (common in some exports), drop it
+next_stage("load", logger)
+# load_dataset drops a leading index-like column (rownames/index) and caches
+# the parsed columns as memory-mapped .npy files for later runs
+X = load_dataset(data_path)
 cols = list(X.columns)
-if cols and cols[0].lower() in ("rownames", "index"):
-    X = X.iloc[:, 1:]
-    cols = list(X.columns)
 
 # %% [markdown]
 # ## Preprocessing and PCA
@@ -45,12 +56,16 @@ if cols and cols[0].lower() in ("rownames", "index"):
 # scale-invariant (e.g., asset returns).
 
 # %%
+next_stage("standardize", logger)
 # Standardize (use correlation-like behavior)
 Xs = StandardScaler().fit_transform(X.values)
 
+next_stage("fit", logger)
 # Fit PCA and extract scores and summaries
-pca = PCA()
-Z = pca.fit_transform(Xs)
+# All components are kept here; with n_components=k on a wide matrix fit_pca
+# switches to a truncated (randomized/ARPACK/incremental) solver
+pca, Z, solver = fit_pca(Xs)
+print(f"PCA solver: {solver}")
 
 eigenvalues = pca.explained_variance_
 explained_ratio = pca.explained_variance_ratio_
@@ -94,21 +109,23 @@ print("Cumulative:", np.round(np.cumsum(explained_ratio), 3))
 # with the printed cumulative explained-variance numbers above.
 
 # %%
+next_stage("plot", logger)
 # Scree plot
-plt.figure(figsize=(6, 3))
-components = np.arange(1, len(eigenvalues) + 1)
-plt.plot(components, eigenvalues, "o-", lw=2)
-plt.xticks(components)
-plt.xlabel("Component")
-plt.ylabel("Eigenvalue")
-plt.title("Invest example: Scree plot")
-plt.grid(True, ls=":")
-plt.tight_layout()
-# Ensure output directory exists and write the figure using Path
-scree_out = script_dir / "invest_scree.png"
-scree_out.parent.mkdir(parents=True, exist_ok=True)
-plt.savefig(scree_out, dpi=150)
-print(f"Saved {scree_out}")
+if make_plots:
+    plt.figure(figsize=(6, 3))
+    components = np.arange(1, len(eigenvalues) + 1)
+    plt.plot(components, eigenvalues, "o-", lw=2)
+    plt.xticks(components)
+    plt.xlabel("Component")
+    plt.ylabel("Eigenvalue")
+    plt.title("Invest example: Scree plot")
+    plt.grid(True, ls=":")
+    plt.tight_layout()
+    # Ensure output directory exists and write the figure using Path
+    scree_out = script_dir / "invest_scree.png"
+    scree_out.parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(scree_out, dpi=150)
+    print(f"Saved {scree_out}")
 
 # %% [markdown]
 # ### Biplot (first two components) — interpretation notes
@@ -120,23 +137,24 @@ print(f"Saved {scree_out}")
 
 # %%
 # Biplot (first two components)
-plt.figure(figsize=(5, 5))
-xs = Z[:, 0]
-ys = Z[:, 1]
-plt.scatter(xs, ys, alpha=0.6, s=20)
-for i, col in enumerate(cols):
-    vx, vy = pca.components_[:2, i] * max(xs.std(), ys.std()) * 3
-    plt.arrow(0, 0, vx, vy, color="r", head_width=0.05)
-    plt.text(vx * 1.05, vy * 1.05, col, color="r")
-plt.xlabel("PC1")
-plt.ylabel("PC2")
-plt.title("Invest example: Biplot (PC1 vs PC2)")
-plt.grid(True, ls=":")
-plt.tight_layout()
-biplot_out = script_dir / "invest_biplot.png"
-biplot_out.parent.mkdir(parents=True, exist_ok=True)
-plt.savefig(biplot_out, dpi=150)
-print(f"Saved {biplot_out}")
+if make_plots:
+    plt.figure(figsize=(5, 5))
+    xs = Z[:, 0]
+    ys = Z[:, 1]
+    plt.scatter(xs, ys, alpha=0.6, s=20)
+    for i, col in enumerate(cols):
+        vx, vy = pca.components_[:2, i] * max(xs.std(), ys.std()) * 3
+        plt.arrow(0, 0, vx, vy, color="r", head_width=0.05)
+        plt.text(vx * 1.05, vy * 1.05, col, color="r")
+    plt.xlabel("PC1")
+    plt.ylabel("PC2")
+    plt.title("Invest example: Biplot (PC1 vs PC2)")
+    plt.grid(True, ls=":")
+    plt.tight_layout()
+    biplot_out = script_dir / "invest_biplot.png"
+    biplot_out.parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(biplot_out, dpi=150)
+    print(f"Saved {biplot_out}")
 
 # %% [markdown]
 # ## Conclusion
@@ -191,3 +209,7 @@ print(f"Saved {biplot_out}")
 # - When one PC dominates, downstream statistical estimators (e.g., covariance
 #   inverses) can be unstable; use shrinkage or factor-based covariance
 #   estimation when building portfolio models.
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
@@ -8,121 +8,146 @@ in the same folder. Creates realistic orbital elements with appropriate correlat
 
 Usage:
     python fetch_kuiper.py
+    python fetch_kuiper.py -n 100000000 --output kuiper_large.csv
+
+Rows are generated and written in chunks, so the catalogue size is limited by
+disk space rather than memory.
 
 """
 
+import argparse
 import os
 import sys
 
 import numpy as np
 import pandas as pd
 
-
-def main():
+from utils.synthetic import DEFAULT_CHUNKSIZE, sample_populations, write_chunked
+
+# Number of objects in the original dataset
+N_OBJECTS = 98
+
+# Rough population fractions: classical, scattered disk, resonant
+POPULATION_FRACTIONS = (0.6, 0.3, 0.1)
+
+# 3:2, 2:1 and 5:3 resonances with Neptune (AU)
+RESONANCES = np.array([39.4, 47.8, 55.4])
+
+# Designations are drawn from the numbered-asteroid range of real Kuiper objects
+DESIGNATION_MIN, DESIGNATION_MAX = 15000, 100000
+
+
+def make_chunk_factory(n_objects):
+    """Return a `write_chunked` factory for a catalogue of `n_objects` objects."""
+    # Spread designations over the numbered range; beyond its size they keep
+    # increasing one by one so they stay unique and sorted
+    spacing = max((DESIGNATION_MAX - DESIGNATION_MIN) // n_objects, 1)
+
+    def make_chunk(rng, start, size):
+        """Synthetic Kuiper Belt orbital parameters for objects start .. start + size - 1"""
+        idx = np.arange(start, start + size)
+        designations = DESIGNATION_MIN + idx * spacing + rng.integers(0, spacing, size)
+
+        # Generate correlated orbital parameters
+        # Based on real Kuiper Belt object populations and dynamical groups
+        population = sample_populations(rng, size, POPULATION_FRACTIONS)
+        classical = population == 0
+        scattered = population == 1
+        resonant = population == 2
+        n_classical, n_scattered, n_resonant = (
+            int(classical.sum()),
+            int(scattered.sum()),
+            int(resonant.sum()),
+        )
+
+        a_values = np.empty(size)
+        e_values = np.empty(size)
+        i_values = np.empty(size)
+
+        # Classical Kuiper Belt: low eccentricity, low inclination, a ~ 39-48 AU
+        a_values[classical] = rng.normal(43, 3, n_classical)
+        e_values[classical] = rng.beta(2, 8, n_classical) * 0.3
+        i_values[classical] = rng.exponential(5, n_classical) + rng.normal(
+            0, 2, n_classical
+        )
+
+        # Scattered disk: high eccentricity, moderate inclination, a > 50 AU
+        a_values[scattered] = rng.exponential(30, n_scattered) + 50
+        e_values[scattered] = rng.beta(3, 4, n_scattered) * 0.8 + 0.2
+        i_values[scattered] = rng.gamma(2, 8, n_scattered)
+
+        # Resonant objects: various a values, moderate e and i
+        a_values[resonant] = rng.choice(RESONANCES, n_resonant) + rng.normal(
+            0, 1, n_resonant
+        )
+        e_values[resonant] = rng.beta(3, 5, n_resonant) * 0.5
+        i_values[resonant] = rng.gamma(1.5, 6, n_resonant)
+
+        # Apply realistic bounds
+        a_values = np.clip(a_values, 30, 150)  # Semi-major axis bounds
+        e_values = np.clip(
+            e_values, 0.01, 0.97
+        )  # Eccentricity bounds (avoid exactly 1)
+        i_values = np.clip(np.abs(i_values), 0.1, 50)  # Inclination bounds (most <50°)
+
+        # Distant objects tend to be more eccentric (observed in real data)
+        distant = a_values > 50
+        e_values[distant] = np.clip(
+            e_values[distant] + rng.normal(0, 0.1, int(distant.sum())), 0.01, 0.97
+        )
+
+        # Absolute magnitude H (brightness) - anticorrelated with size
+        # Typical range for Kuiper objects: 3-12 mag
+        # Earlier discoveries (lower designation numbers) tend to be brighter/larger
+        H_base = rng.normal(6.5, 1.5, size)
+        H_correction = -2.0 * (idx / n_objects) + 1.0
+        H_values = np.clip(H_base + H_correction + rng.normal(0, 0.5, size), 1.0, 12.5)
+
+        return pd.DataFrame(
+            {
+                "designation": designations.astype(str),
+                "a": np.round(a_values, 7),  # Match precision of original
+                "e": np.round(e_values, 7),
+                "i": np.round(i_values, 5),
+                "H": np.round(H_values, 2),
+            }
+        )
+
+    return make_chunk
+
+
+def main(argv=None):
     """Generate synthetic Kuiper Belt object orbital parameters"""
-    dst = os.path.join(os.path.dirname(__file__), "kuiper.csv")
-
-    # Set random seed for reproducible data
-    np.random.seed(42)
-
-    # Number of objects (matching original dataset)
-    n_objects = 98
-
-    # Generate object designations (using realistic numbering pattern)
-    # Mix of numbered asteroids (15000-100000 range) like real Kuiper objects
-    designations = []
-    base_numbers = np.random.choice(range(15000, 100000), size=n_objects, replace=False)
-    designations = [str(num) for num in sorted(base_numbers)]
-
-    # Generate correlated orbital parameters
-    # Based on real Kuiper Belt object populations and dynamical groups
-
-    # Semi-major axis (AU) - determines orbital period and classification
-    # Real Kuiper objects range from ~30 AU (classical) to >100 AU (scattered disk)
-    # Create different populations: classical (~40-45 AU), scattered (>50 AU), resonant
-
-    population_type = np.random.choice(
-        ["classical", "scattered", "resonant"], size=n_objects, p=[0.6, 0.3, 0.1]
-    )  # Rough population fractions
-
-    a_values = np.zeros(n_objects)
-    e_values = np.zeros(n_objects)
-    i_values = np.zeros(n_objects)
-
-    for idx in range(n_objects):
-        if population_type[idx] == "classical":
-            # Classical Kuiper Belt: low eccentricity, low inclination, a ~ 39-48 AU
-            a_values[idx] = np.random.normal(43, 3)  # Semi-major axis
-            e_values[idx] = np.random.beta(2, 8) * 0.3  # Low eccentricity (0-0.3)
-            i_values[idx] = np.random.exponential(5) + np.random.normal(
-                0, 2
-            )  # Low inclination
-
-        elif population_type[idx] == "scattered":
-            # Scattered disk: high eccentricity, moderate inclination, a > 50 AU
-            a_values[idx] = np.random.exponential(30) + 50  # Larger semi-major axis
-            e_values[idx] = (
-                np.random.beta(3, 4) * 0.8 + 0.2
-            )  # High eccentricity (0.2-1.0)
-            i_values[idx] = np.random.gamma(2, 8)  # Moderate to high inclination
-
-        else:  # resonant
-            # Resonant objects: various a values, moderate e and i
-            resonances = [39.4, 47.8, 55.4]  # 3:2, 2:1, 5:3 resonances with Neptune
-            a_values[idx] = np.random.choice(resonances) + np.random.normal(0, 1)
-            e_values[idx] = np.random.beta(3, 5) * 0.5  # Moderate eccentricity
-            i_values[idx] = np.random.gamma(1.5, 6)  # Moderate inclination
-
-    # Apply realistic bounds
-    a_values = np.clip(a_values, 30, 150)  # Semi-major axis bounds
-    e_values = np.clip(
-        e_values, 0.01, 0.97
-    )  # Eccentricity bounds (0-1, avoid exactly 1)
-    i_values = np.clip(
-        np.abs(i_values), 0.1, 50
-    )  # Inclination bounds (0-180°, but most <50°)
-
-    # Create correlation between a and e (observed in real data)
-    # Add some additional correlation structure
-    for idx in range(n_objects):
-        if a_values[idx] > 50:  # Distant objects tend to be more eccentric
-            e_values[idx] += np.random.normal(0, 0.1)
-            e_values[idx] = np.clip(e_values[idx], 0.01, 0.97)
-
-    # Absolute magnitude H (brightness) - anticorrelated with size
-    # Typical range for Kuiper objects: 3-12 mag
-    # Larger objects (brighter, lower H) tend to be found first (lower designation numbers)
-    H_base = np.random.normal(6.5, 1.5, n_objects)  # Base magnitude
-
-    # Add some correlation with designation (earlier discoveries tend to be brighter/larger)
-    designation_rank = np.argsort([int(d) for d in designations])
-    H_correction = -2.0 * (designation_rank / n_objects) + 1.0  # Earlier = brighter
-    H_values = H_base + H_correction + np.random.normal(0, 0.5, n_objects)
-    H_values = np.clip(H_values, 1.0, 12.5)
-
-    # Create DataFrame
-    data = {
-        "designation": designations,
-        "a": np.round(a_values, 7),  # Match precision of original
-        "e": np.round(e_values, 7),
-        "i": np.round(i_values, 5),
-        "H": np.round(H_values, 2),
-    }
-
-    df = pd.DataFrame(data)
+    parser = argparse.ArgumentParser(description="Generate synthetic Kuiper Belt data.")
+    parser.add_argument("-n", type=int, default=N_OBJECTS, help="number of objects")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--output", default=os.path.join(os.path.dirname(__file__), "kuiper.csv")
+    )
+    args = parser.parse_args(argv)
+    dst = args.output
 
     # Save to CSV
     try:
-        df.to_csv(dst, index=False)
-        print(f"Generated {len(df)} Kuiper Belt objects")
+        n_rows = write_chunked(
+            dst,
+            make_chunk_factory(args.n),
+            args.n,
+            chunksize=args.chunksize,
+            random_state=args.seed,
+        )
+        print(f"Generated {n_rows} Kuiper Belt objects")
         print(f"Saved: {dst}")
 
-        # Print summary statistics
-        print("\nSummary statistics:")
+        # Print summary statistics (first chunk only for very large files)
+        df = pd.read_csv(dst, nrows=min(args.n, args.chunksize))
+        sample = "" if len(df) == n_rows else f" (first {len(df)} rows)"
+        print(f"\nSummary statistics{sample}:")
         numeric_cols = ["a", "e", "i", "H"]
         print(df[numeric_cols].describe().round(2))
 
-        print("\nCorrelation matrix:")
+        print(f"\nCorrelation matrix{sample}:")
         print(df[numeric_cols].corr().round(3))
 
         return 0
@@ -19,17 +19,32 @@
 import sys
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
-from factor_analyzer import FactorAnalyzer
-from factor_analyzer.factor_analyzer import calculate_bartlett_sphericity, calculate_kmo
 from sklearn.preprocessing import StandardScaler
 
+from utils import (
+    CorrelationFactorModel,
+    bootstrap_loadings,
+    end_stages,
+    factorability,
+    load_dataset,
+    next_stage,
+    plots_enabled,
+    precision_drift,
+    setup_logger,
+)
+
+# No plotting imports under --no-plots (see utils.figures)
+make_plots = plots_enabled()
+if make_plots:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
 # %%
 # Simple behaviour: expect kuiper.csv in the same folder as this script
 script_dir: Path = Path(__file__).resolve().parent
+logger = setup_logger("kuiper_fa")
 data_path: Path = script_dir / "kuiper.csv"
 if not data_path.exists():
     print(
@@ -37,12 +52,11 @@ if not data_path.exists():
     )
     sys.exit(2)
 
-X: pd.DataFrame = pd.read_csv(data_path)
-# If the CSV has a leading index-like column (common in some exports), drop it
+next_stage("load", logger)
+# load_dataset drops a leading index-like column (rownames/index) and caches
+# the parsed columns as memory-mapped .npy files for later runs
+X: pd.DataFrame = load_dataset(data_path)
 cols: list[str] = list(X.columns)
-if cols and cols[0].lower() in ("rownames", "index"):
-    X = X.iloc[:, 1:]
-    cols = list(X.columns)
 
 print(
     f"Kuiper Belt Factor Analysis on {X.shape[0]} objects with {X.shape[1]} orbital parameters"
@@ -58,17 +72,19 @@ print("Variables:", cols)
 # - **Variable correlations**: Orbital elements should show meaningful relationships
 
 # %%
+next_stage("standardize", logger)
 # Standardize orbital parameters (different units: AU, degrees, etc.)
 Xs: np.ndarray = StandardScaler().fit_transform(X.values)
 
+next_stage("fit", logger)
 # Check Factor Analysis assumptions
-chi_square_value: float
-p_value: float
-chi_square_value, p_value = calculate_bartlett_sphericity(Xs)
+diagnostics = factorability(Xs)
 
-kmo_all: np.ndarray
-kmo_model: float
-kmo_all, kmo_model = calculate_kmo(Xs)
+chi_square_value: float = diagnostics.chi_square
+p_value: float = diagnostics.p_value
+
+kmo_all: np.ndarray = diagnostics.kmo_per_variable
+kmo_model: float = diagnostics.kmo_total
 
 print("--- Factor Analysis Assumptions for Orbital Data ---")
 print("Bartlett's Test of Sphericity:")
@@ -102,10 +118,11 @@ for i, param_name in enumerate(cols):
 # - **Resonance effects**: Dynamical resonances affecting multiple orbital elements
 
 # %%
+# Compute the correlation matrix once; all factor models below are fitted from it
+factor_model = CorrelationFactorModel.from_data(Xs, columns=cols)
+
 # Determine optimal number of factors using eigenvalue criterion
-fa_test = FactorAnalyzer(n_factors=len(cols), method="principal")
-fa_test.fit(Xs)
-eigenvalues_fa = fa_test.get_eigenvalues()[0]
+eigenvalues_fa = factor_model.eigenvalues
 
 # Kaiser criterion: factors with eigenvalue > 1.0
 n_factors_kaiser = int(np.sum(eigenvalues_fa > 1.0))
@@ -115,8 +132,26 @@ print(f"Kaiser criterion (eigenvalue > 1.0): {n_factors_kaiser} factors")
 
 # Use Kaiser criterion for factor extraction
 n_factors = max(n_factors_kaiser, 2)  # At least 2 factors for interpretation
-fa = FactorAnalyzer(n_factors=n_factors, method="principal")
-fa.fit(Xs)
+
+# Fit indices for k = 1..n_factors in one pass. The sweep uses MINRES, whose
+# chi-square and BIC come from an iterative fit, and starts each k from the
+# (k - 1)-factor uniquenesses instead of the SMC starting values
+sweep = factor_model.sweep(max_factors=n_factors, method="minres")
+print("\nMINRES fit indices per number of factors:")
+print(sweep.table.round(4))
+# BIC only compares identified models (dof >= 0); with 5 variables that is k <= 2
+identified = sweep.table[sweep.table["dof"] >= 0]
+print(
+    f"Lowest BIC among identified models: {identified['bic'].idxmin()} factors "
+    f"(for comparison; the extraction keeps the Kaiser choice of {n_factors})"
+)
+# The warm start moves where the optimizer begins, not the optimum it finds
+k_check = int(identified.index.max())
+cold = factor_model.fit(k_check, method="minres")
+warm_gap = np.abs(sweep.solutions[k_check].loadings_ - cold.loadings_).max()
+print(f"Max loading difference, warm vs cold start (k = {k_check}): {warm_gap:.1e}")
+
+fa = factor_model.fit(n_factors, method="principal")
 
 print(f"\nExtracting {n_factors} factors using Principal Axis Factoring")
 
@@ -162,9 +197,9 @@ print(f"Proportion explained by factors: {variance_explained:.1%}")
 # - Maintains orthogonality (factors remain independent)
 
 # %%
+next_stage("rotate", logger)
 # Apply Varimax rotation for clearer astronomical interpretation
-fa_rotated = FactorAnalyzer(n_factors=n_factors, rotation="varimax", method="principal")
-fa_rotated.fit(Xs)
+fa_rotated = factor_model.fit(n_factors, method="principal", rotation="varimax")
 
 loadings_unrotated = fa.loadings_
 loadings_rotated = fa_rotated.loadings_
@@ -188,6 +223,41 @@ else:
             )
         print()
 
+# %% [markdown]
+# ### Bootstrap Confidence Intervals for the Rotated Loadings
+#
+# Resampling objects with replacement and refitting shows how stable each
+# loading is. Every replicate is Procrustes-aligned to the full-sample solution
+# so factor order and sign flips do not widen the intervals. An interval that
+# excludes zero marks a loading that is reliably different from zero.
+
+# %%
+next_stage("cv", logger, method="bootstrap")
+# max_workers=1 keeps this top-level script safe on spawn platforms;
+# batch jobs can leave it at None to use every core
+boot = bootstrap_loadings(
+    Xs,
+    n_factors,
+    n_boot=200,
+    method="principal",
+    rotation="varimax",
+    max_workers=1,
+    random_state=42,
+)
+
+print("--- Bootstrap 95% CIs for Varimax Loadings (200 resamples) ---")
+print(f"{'Parameter':<15} {'Factor':<8} {'Loading':<9} {'95% CI':<18} {'SE':<6}")
+print("-" * 60)
+for i, param_name in enumerate(cols):
+    for j in range(n_factors):
+        ci = f"[{boot.lower[i, j]:.2f}, {boot.upper[i, j]:.2f}]"
+        marker = "*" if boot.lower[i, j] > 0 or boot.upper[i, j] < 0 else ""
+        print(
+            f"{param_name:<15} {'F' + str(j + 1):<8} {boot.reference[i, j]:<9.3f} "
+            f"{ci:<18} {boot.std_error[i, j]:<6.3f}{marker}"
+        )
+print("* interval excludes zero")
+
 # %% [markdown]
 # ## Factor Loading Visualization
 #
@@ -195,10 +265,11 @@ else:
 # the astronomical meaning of each latent dynamical factor.
 
 # %%
+next_stage("plot", logger)
 # Create factor loadings heatmap
 if loadings_unrotated is None or loadings_rotated is None:
     print("Error: Factor loadings could not be computed. Skipping visualization.")
-else:
+elif make_plots:
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
 
     # Unrotated loadings heatmap
@@ -253,7 +324,9 @@ print("--- Astronomical Factor Interpretation ---")
 loading_threshold = 0.4
 
 if loadings_rotated is None:
-    print("Error: Factor loadings could not be computed. Skipping factor interpretation.")
+    print(
+        "Error: Factor loadings could not be computed. Skipping factor interpretation."
+    )
 else:
     for factor_idx in range(n_factors):
         factor_name = f"Factor {factor_idx + 1}"
@@ -282,7 +355,9 @@ else:
         if not high_loadings:
             print("  Interpretation: Weak factor - mostly noise or specific variance")
         else:
-            print("  Astronomical interpretation: [Examine parameter combinations above]")
+            print(
+                "  Astronomical interpretation: [Examine parameter combinations above]"
+            )
 
 # %% [markdown]
 # ### Common Orbital Factor Patterns
@@ -304,38 +379,41 @@ else:
 factor_scores = fa_rotated.transform(Xs)
 
 # Create factor score scatter plot (first two factors)
-plt.figure(figsize=(10, 8))
-
-# Color points by one of the original variables for interpretation
-if len(cols) > 0:
-    # Use first column for coloring (often semi-major axis or similar)
-    color_var = X.iloc[:, 0]
-    scatter = plt.scatter(
-        factor_scores[:, 0],
-        factor_scores[:, 1],
-        c=color_var,
-        cmap="viridis",
-        alpha=0.7,
-        s=50,
-        edgecolors="black",
-        linewidth=0.5,
+if make_plots:
+    plt.figure(figsize=(10, 8))
+
+    # Color points by one of the original variables for interpretation
+    if len(cols) > 0:
+        # Use first column for coloring (often semi-major axis or similar)
+        color_var = X.iloc[:, 0]
+        scatter = plt.scatter(
+            factor_scores[:, 0],
+            factor_scores[:, 1],
+            c=color_var,
+            cmap="viridis",
+            alpha=0.7,
+            s=50,
+            edgecolors="black",
+            linewidth=0.5,
+        )
+        plt.colorbar(scatter, label=f"{cols[0]}")
+    else:
+        plt.scatter(factor_scores[:, 0], factor_scores[:, 1], alpha=0.7, s=50)
+
+    plt.xlabel(f"Factor 1 ({eigenvalues_fa[0]:.2f})")
+    plt.ylabel(f"Factor 2 ({eigenvalues_fa[1]:.2f})")
+    plt.title(
+        "Kuiper Belt Objects: Factor Scores\n(Classified by Dynamical Properties)"
     )
-    plt.colorbar(scatter, label=f"{cols[0]}")
-else:
-    plt.scatter(factor_scores[:, 0], factor_scores[:, 1], alpha=0.7, s=50)
+    plt.grid(True, ls=":", alpha=0.3)
+    plt.axhline(y=0, color="black", linewidth=0.5, alpha=0.5)
+    plt.axvline(x=0, color="black", linewidth=0.5, alpha=0.5)
 
-plt.xlabel(f"Factor 1 ({eigenvalues_fa[0]:.2f})")
-plt.ylabel(f"Factor 2 ({eigenvalues_fa[1]:.2f})")
-plt.title("Kuiper Belt Objects: Factor Scores\n(Classified by Dynamical Properties)")
-plt.grid(True, ls=":", alpha=0.3)
-plt.axhline(y=0, color="black", linewidth=0.5, alpha=0.5)
-plt.axvline(x=0, color="black", linewidth=0.5, alpha=0.5)
-
-plt.tight_layout()
-scores_out = script_dir / "kuiper_fa_scores.png"
-plt.savefig(scores_out, dpi=150, bbox_inches="tight")
-print(f"Saved {scores_out}")
-plt.show()
+    plt.tight_layout()
+    scores_out = script_dir / "kuiper_fa_scores.png"
+    plt.savefig(scores_out, dpi=150, bbox_inches="tight")
+    print(f"Saved {scores_out}")
+    plt.show()
 
 # Print extreme objects in factor space
 print("\n--- Extreme Objects in Factor Space ---")
@@ -388,13 +466,31 @@ else:
     )
 
     # Factor determinacy (reliability of factor scores)
-    factor_determinacy = np.diag(np.corrcoef(factor_scores.T, Xs.T)[:n_factors, n_factors:])
+    factor_determinacy = np.diag(
+        np.corrcoef(factor_scores.T, Xs.T)[:n_factors, n_factors:]
+    )
     print("\nFactor Score Determinacy:")
     for i, det in enumerate(factor_determinacy):
         print(
             f"  Factor {i + 1}: {det:.3f} ({'✓ Good' if det > 0.8 else '△ Acceptable' if det > 0.6 else '✗ Poor'} reliability)"
         )
 
+# %% [markdown]
+# ### Single-precision check
+#
+# Large matrices can be held in float32 (`load_dataset(..., dtype="float32")`)
+# to halve memory; moments are still accumulated in float64. Before relying on
+# it, measure the drift of the eigenvalues and loadings against float64.
+
+# %%
+next_stage("fit", logger, model="precision_drift")
+drift = precision_drift(X[cols], n_factors=n_factors, rotation="varimax")
+print("\n--- float32 vs float64 ---")
+print(f"Max eigenvalue error:  {drift.max_eigenvalue_error:.2e}")
+print(f"Max loading error:     {drift.max_loading_error:.2e}")
+print(f"Max PCA score error:   {drift.max_score_error:.2e}")
+print(f"Data memory (float32 / float64): {drift.memory_ratio:.2f}")
+
 # %% [markdown]
 # ## Conclusion: Factor Analysis for Orbital Dynamics
 #
@@ -413,3 +509,7 @@ else:
 #
 # # **Next steps**: Apply these factor interpretations to classify Kuiper Belt populations
 # and investigate the astronomical significance of high/low factor score objects.
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
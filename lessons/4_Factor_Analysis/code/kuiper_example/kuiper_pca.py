@@ -13,15 +13,27 @@
 import sys
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 
+from utils import (
+    end_stages,
+    fit_pca,
+    load_dataset,
+    next_stage,
+    plots_enabled,
+    setup_logger,
+)
+
+# No plotting imports under --no-plots (see utils.figures)
+make_plots = plots_enabled()
+if make_plots:
+    import matplotlib.pyplot as plt
+
 # %%
 # Simple behaviour: expect kuiper.csv in the same folder as this script
 script_dir = Path(__file__).resolve().parent
+logger = setup_logger("kuiper_pca")
 data_path = script_dir / "kuiper.csv"
 if not data_path.exists():
     print(
@@ -29,12 +41,11 @@ if not data_path.exists():
     )
     sys.exit(2)
 
-X = pd.read_csv(data_path)
-# If the CSV has a leading index-like column (common in some exports), drop it
+next_stage("load", logger)
+# load_dataset drops a leading index-like column (rownames/index) and caches
+# the parsed columns as memory-mapped .npy files for later runs
+X = load_dataset(data_path)
 cols = list(X.columns)
-if cols and cols[0].lower() in ("rownames", "index"):
-    X = X.iloc[:, 1:]
-    cols = list(X.columns)
 
 # %% [markdown]
 # ## Preprocessing and PCA
@@ -44,12 +55,16 @@ if cols and cols[0].lower() in ("rownames", "index"):
 # when variables have different units (e.g. AU vs degrees).
 
 # %%
+next_stage("standardize", logger)
 # Standardize (use correlation-like behaviour)
 Xs = StandardScaler().fit_transform(X.values)
 
+next_stage("fit", logger)
 # Fit PCA and extract scores and summaries
-pca = PCA()
-Z = pca.fit_transform(Xs)
+# All components are kept here; with n_components=k on a wide matrix fit_pca
+# switches to a truncated (randomized/ARPACK/incremental) solver
+pca, Z, solver = fit_pca(Xs)
+print(f"PCA solver: {solver}")
 
 eigenvalues = pca.explained_variance_
 explained_ratio = pca.explained_variance_ratio_
@@ -93,19 +108,21 @@ print("Cumulative:", np.round(np.cumsum(explained_ratio), 3))
 # values to choose how many components to retain (e.g., 80% coverage).
 
 # %%
-plt.figure(figsize=(6, 3))
-components = np.arange(1, len(eigenvalues) + 1)
-plt.plot(components, eigenvalues, "o-", lw=2)
-plt.xticks(components)
-plt.xlabel("Component")
-plt.ylabel("Eigenvalue")
-plt.title("Kuiper example: Scree plot")
-plt.grid(True, ls=":")
-plt.tight_layout()
-scree_out = script_dir / "kuiper_scree.png"
-scree_out.parent.mkdir(parents=True, exist_ok=True)
-plt.savefig(scree_out, dpi=150)
-print(f"Saved {scree_out}")
+next_stage("plot", logger)
+if make_plots:
+    plt.figure(figsize=(6, 3))
+    components = np.arange(1, len(eigenvalues) + 1)
+    plt.plot(components, eigenvalues, "o-", lw=2)
+    plt.xticks(components)
+    plt.xlabel("Component")
+    plt.ylabel("Eigenvalue")
+    plt.title("Kuiper example: Scree plot")
+    plt.grid(True, ls=":")
+    plt.tight_layout()
+    scree_out = script_dir / "kuiper_scree.png"
+    scree_out.parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(scree_out, dpi=150)
+    print(f"Saved {scree_out}")
 
 # %% [markdown]
 # The scree plot helps decide how many components to examine. For orbital
@@ -122,23 +139,24 @@ print(f"Saved {scree_out}")
 # positively correlated parameters; long arrows signal stronger influence.
 
 # %%
-plt.figure(figsize=(5, 5))
-xs = Z[:, 0]
-ys = Z[:, 1]
-plt.scatter(xs, ys, alpha=0.6, s=20)
-for i, col in enumerate(cols):
-    vx, vy = pca.components_[:2, i] * max(xs.std(), ys.std()) * 3
-    plt.arrow(0, 0, vx, vy, color="r", head_width=0.05)
-    plt.text(vx * 1.05, vy * 1.05, col, color="r")
-plt.xlabel("PC1")
-plt.ylabel("PC2")
-plt.title("Kuiper example: Biplot (PC1 vs PC2)")
-plt.grid(True, ls=":")
-plt.tight_layout()
-biplot_out = script_dir / "kuiper_biplot.png"
-biplot_out.parent.mkdir(parents=True, exist_ok=True)
-plt.savefig(biplot_out, dpi=150)
-print(f"Saved {biplot_out}")
+if make_plots:
+    plt.figure(figsize=(5, 5))
+    xs = Z[:, 0]
+    ys = Z[:, 1]
+    plt.scatter(xs, ys, alpha=0.6, s=20)
+    for i, col in enumerate(cols):
+        vx, vy = pca.components_[:2, i] * max(xs.std(), ys.std()) * 3
+        plt.arrow(0, 0, vx, vy, color="r", head_width=0.05)
+        plt.text(vx * 1.05, vy * 1.05, col, color="r")
+    plt.xlabel("PC1")
+    plt.ylabel("PC2")
+    plt.title("Kuiper example: Biplot (PC1 vs PC2)")
+    plt.grid(True, ls=":")
+    plt.tight_layout()
+    biplot_out = script_dir / "kuiper_biplot.png"
+    biplot_out.parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(biplot_out, dpi=150)
+    print(f"Saved {biplot_out}")
 
 # %% [markdown]
 # ## Conclusion
@@ -150,3 +168,7 @@ print(f"Saved {biplot_out}")
 #   need simpler factor-like interpretations.
 # - PCA is linear and can be sensitive to outliers; for robust inference,
 #   consider preprocessing and inspecting unusual observations.
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
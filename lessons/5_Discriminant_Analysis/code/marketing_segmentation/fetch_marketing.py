@@ -4,12 +4,21 @@
 # Generates synthetic customer behavior data for segmentation analysis
 
 # %%
+import argparse
+import sys
 import warnings
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+
 from utils import setup_logger
+from utils.synthetic import (
+    DEFAULT_CHUNKSIZE,
+    population_counts,
+    sample_gaussian_mixture,
+    write_chunked,
+)
 
 warnings.filterwarnings("ignore")
 
@@ -22,19 +31,17 @@ logger.info("Starting marketing segmentation data generation")
 
 # %%
 # Define customer segments with distinct behavioral patterns
-np.random.seed(42)  # For reproducibility
-
-n_samples = 1200
+# Dataset size and output are configurable from the command line (see `main`), e.g.
+#   python fetch_marketing.py -n 100000000 --output large.csv
+N_CUSTOMERS = 1200
 segments = ["High-Value", "Loyal", "Occasional"]
 
 # Segment proportions
-segment_sizes = {
-    "High-Value": int(0.3 * n_samples),  # 30% - Premium customers
-    "Loyal": int(0.4 * n_samples),  # 40% - Regular loyal customers
-    "Occasional": int(0.3 * n_samples),  # 30% - Infrequent buyers
-}
-
-logger.info(f"Generating {n_samples} customers across {len(segments)} segments")
+segment_proportions = [
+    0.3,  # 30% - Premium customers
+    0.4,  # 40% - Regular loyal customers
+    0.3,  # 30% - Infrequent buyers
+]
 
 # %%
 # Generate data for each segment with different multivariate distributions
@@ -121,76 +128,82 @@ occasional_cov = np.array(
 )
 
 # %%
-# Generate multivariate normal data for each segment
-data_frames = []
-
-for segment, size in segment_sizes.items():
-    if segment == "High-Value":
-        mean = high_value_mean
-        cov = high_value_cov
-    elif segment == "Loyal":
-        mean = loyal_mean
-        cov = loyal_cov
-    else:  # Occasional
-        mean = occasional_mean
-        cov = occasional_cov
-
-    # Generate data
-    segment_data = np.random.multivariate_normal(mean, cov, size)
-
-    # Create DataFrame
-    df_segment = pd.DataFrame(
-        segment_data,
-        columns=[
-            "purchase_freq",
-            "avg_order_value",
-            "browsing_time",
-            "cart_abandonment",
-            "email_open_rate",
-            "loyalty_points",
-            "support_tickets",
-            "social_engagement",
-        ],
-    )
-    df_segment["segment"] = segment
+# Generate multivariate normal data for every segment, one chunk at a time
+means = [high_value_mean, loyal_mean, occasional_mean]
+covs = [high_value_cov, loyal_cov, occasional_cov]
+
+# Realistic bounds (clip negative values, etc.)
+bounds = {
+    "purchase_freq": (0.5, None),
+    "avg_order_value": (10, None),
+    "browsing_time": (1, None),
+    "cart_abandonment": (0, 1),
+    "email_open_rate": (0, 1),
+    "loyalty_points": (0, None),
+    "support_tickets": (0, None),
+    "social_engagement": (0, None),
+}
+lower_bounds = np.array([-np.inf if lo is None else lo for lo, _ in bounds.values()])
+upper_bounds = np.array([np.inf if hi is None else hi for _, hi in bounds.values()])
+columns = list(bounds)
 
-    data_frames.append(df_segment)
-    logger.info(f"Generated {size} {segment} customers")
 
-# %%
-# Combine all segments
-df = pd.concat(data_frames, ignore_index=True)
-
-# Ensure realistic bounds (clip negative values, etc.)
-df["purchase_freq"] = df["purchase_freq"].clip(lower=0.5)
-df["avg_order_value"] = df["avg_order_value"].clip(lower=10)
-df["browsing_time"] = df["browsing_time"].clip(lower=1)
-df["cart_abandonment"] = df["cart_abandonment"].clip(0, 1)
-df["email_open_rate"] = df["email_open_rate"].clip(0, 1)
-df["loyalty_points"] = df["loyalty_points"].clip(lower=0)
-df["support_tickets"] = df["support_tickets"].clip(lower=0)
-df["social_engagement"] = df["social_engagement"].clip(lower=0)
-
-# Shuffle the data
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
+def make_chunk(rng, start, size):
+    """One chunk of rows: exact class proportions, shuffled, clipped to bounds."""
+    X, labels = sample_gaussian_mixture(rng, size, means, covs, segment_proportions)
+    df_chunk = pd.DataFrame(np.clip(X, lower_bounds, upper_bounds), columns=columns)
+    df_chunk["segment"] = np.asarray(segments)[labels]
+    return df_chunk
 
-# %%
-# Save the dataset
-df.to_csv(data_file, index=False)
-logger.info(f"Saved marketing segmentation data to {data_file}")
 
 # %%
-# Data summary
-print("=== Marketing Segmentation Dataset Generated ===")
-print(f"Total customers: {len(df)}")
-print(f"File saved: {data_file}")
-print("\nSegment distribution:")
-print(df["segment"].value_counts())
+def main(argv=None):
+    """Generate the marketing segmentation dataset and print a summary."""
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic customer segmentation data."
+    )
+    parser.add_argument("-n", type=int, default=N_CUSTOMERS, help="number of customers")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=42)  # For reproducibility
+    parser.add_argument("--output", type=Path, default=data_file)
+    args = parser.parse_args(argv)
+    logger.info(f"Generating {args.n} customers across {len(segments)} segments")
+
+    # Generate and save the dataset chunk by chunk (only one chunk is held in memory)
+    n_rows = write_chunked(
+        args.output,
+        make_chunk,
+        args.n,
+        chunksize=args.chunksize,
+        random_state=args.seed,
+    )
+    logger.info(f"Saved marketing segmentation data to {args.output}")
+
+    # Class totals follow from the per-chunk allocation; the feature summaries
+    # read the first chunk only, so they stay cheap for very large files
+    counts = population_counts(args.n, segment_proportions, args.chunksize)
+    df = pd.read_csv(args.output, nrows=min(args.n, args.chunksize))
+    sample = "" if len(df) == n_rows else f" (first {len(df)} rows)"
+
+    # Data summary
+    print("=== Marketing Segmentation Dataset Generated ===")
+    print(f"Total customers: {n_rows}")
+    print(f"File saved: {args.output}")
+    print("\nSegment distribution:")
+    distribution = pd.Series(
+        counts, index=pd.Index(segments, name="segment"), name="count"
+    )
+    print(distribution.sort_values(ascending=False, kind="stable"))
+
+    print(f"\nFeature summary{sample}:")
+    print(df.describe().round(2))
+
+    print(f"\nSegment means by feature{sample}:")
+    print(df.groupby("segment").mean().round(2))
 
-print("\nFeature summary:")
-print(df.describe().round(2))
+    logger.info("Marketing segmentation data generation completed")
+    return 0
 
-print("\nSegment means by feature:")
-print(df.groupby("segment").mean().round(2))
 
-logger.info("Marketing segmentation data generation completed")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,18 +7,28 @@
 import warnings
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
 from sklearn.discriminant_analysis import (
     LinearDiscriminantAnalysis,
     QuadraticDiscriminantAnalysis,
 )
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from utils import setup_logger
+
+from utils import (
+    ClassStatistics,
+    DiscriminantScorer,
+    FigureBatch,
+    compare_discriminants,
+    decision_regions,
+    end_stages,
+    load_dataset,
+    next_stage,
+    save_discriminant_model,
+    setup_logger,
+)
 
 warnings.filterwarnings("ignore")
 
@@ -34,7 +44,8 @@ logger.info("Starting marketing segmentation discriminant analysis")
 # %%
 # Load customer data
 logger.info("Loading customer segmentation data")
-df = pd.read_csv(data_file)
+next_stage("load", logger)
+df = load_dataset(data_file)
 logger.info(f"Dataset shape: {df.shape}")
 logger.info(f"Columns: {list(df.columns)}")
 
@@ -65,6 +76,7 @@ features = [
 X = df[features]
 y = df["segment"]
 
+next_stage("standardize", logger)
 # Standardize features
 scaler = StandardScaler()
 X_scaled = scaler.fit_transform(X)
@@ -82,6 +94,7 @@ X_train, X_test, y_train, y_test = train_test_split(
 logger.info(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
 
 # %%
+next_stage("fit", logger, model="lda")
 # Linear Discriminant Analysis
 logger.info("Fitting Linear Discriminant Analysis")
 lda = LinearDiscriminantAnalysis()
@@ -109,13 +122,16 @@ print(classification_report(y_test, y_pred_lda))
 
 print(f"LDA Accuracy: {lda_accuracy:.3f}")
 
-# Cross-validation
-cv_scores_lda = cross_val_score(lda, X_scaled, y, cv=5)
+next_stage("cv", logger)
+# Cross-validation: LDA and QDA share the same folds and per-fold class statistics
+cv_scores = compare_discriminants(X_scaled, y, cv=5)
+cv_scores_lda = cv_scores["LDA"].to_numpy()
 print(
     f"LDA Cross-validation accuracy: {cv_scores_lda.mean():.3f} (+/- {cv_scores_lda.std() * 2:.3f})"
 )
 
 # %%
+next_stage("fit", logger, model="qda")
 # Quadratic Discriminant Analysis
 logger.info("Fitting Quadratic Discriminant Analysis")
 qda = QuadraticDiscriminantAnalysis()
@@ -130,7 +146,7 @@ print(classification_report(y_test, y_pred_qda))
 
 print(f"QDA Accuracy: {qda_accuracy:.3f}")
 
-cv_scores_qda = cross_val_score(qda, X_scaled, y, cv=5)
+cv_scores_qda = cv_scores["QDA"].to_numpy()
 print(
     f"QDA Cross-validation accuracy: {cv_scores_qda.mean():.3f} (+/- {cv_scores_qda.std() * 2:.3f})"
 )
@@ -153,123 +169,113 @@ means_df = pd.DataFrame(lda.means_, index=lda.classes_, columns=features)
 print(means_df.round(3))
 
 # %%
-# Visualization: Discriminant scores
-plt.figure(figsize=(12, 8))
+next_stage("plot", logger)
+# Visualization: Discriminant scores (figures are recorded here and rendered at
+# the end; run with --no-plots to skip them)
+figures = FigureBatch()
 
-# Plot first two discriminant functions
+# Plot first two discriminant functions with the group centroids
 colors = ["red", "blue", "green"]
 segments = lda.classes_
-
-for i, segment in enumerate(segments):
-    mask = lda_scores_df["segment"] == segment
-    plt.scatter(
-        lda_scores_df.loc[mask, "LD1"],
-        lda_scores_df.loc[mask, "LD2"],
-        c=colors[i],
-        label=f"{segment} Customers",
-        alpha=0.7,
-        s=50,
-    )
-
-# Add group centroids
-centroids = lda.transform(lda.means_)
-for i, segment in enumerate(segments):
-    plt.scatter(
-        centroids[i, 0],
-        centroids[i, 1],
-        c=colors[i],
-        marker="x",
-        s=200,
-        linewidth=3,
-        label=f"{segment} Centroid",
-    )
-
-plt.xlabel("First Linear Discriminant (LD1)")
-plt.ylabel("Second Linear Discriminant (LD2)")
-plt.title("Customer Segmentation: Discriminant Function Scores")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(scores_plot, dpi=300, bbox_inches="tight")
-logger.info(f"Saved discriminant scores plot to {scores_plot}")
-plt.show()
+figures.add(
+    scores_plot,
+    "class_scatter",
+    figsize=(12, 8),
+    points=lda_scores_df[["LD1", "LD2"]].to_numpy(),
+    labels=lda_scores_df["segment"].to_numpy(),
+    classes=segments,
+    colors=colors,
+    legend_format="{} Customers",
+    centroids=lda.transform(lda.means_),
+    xlabel="First Linear Discriminant (LD1)",
+    ylabel="Second Linear Discriminant (LD2)",
+    title="Customer Segmentation: Discriminant Function Scores",
+)
 
 # %%
 # Decision boundaries visualization (simplified 2D view)
-# Note: Contour plotting can be complex with categorical predictions
-# Using scatter plot instead for clearer visualization
-
-plt.figure(figsize=(10, 8))
+# LDA regions for the two plotted features, computed in closed form from the
+# class statistics and refined only near the boundaries
 
 # Use first two features for visualization
-X_vis = X_scaled[["purchase_freq", "avg_order_value"]].values
+vis_features = ["purchase_freq", "avg_order_value"]
+X_vis = X_scaled[vis_features].values
 y_vis = y.values
 
-# Plot data points colored by actual segment
-colors = ["red", "blue", "green"]
-segments = np.unique(y_vis)
-
-for i, segment in enumerate(segments):
-    mask = y_vis == segment
-    plt.scatter(
-        X_vis[mask, 0],
-        X_vis[mask, 1],
-        c=colors[i],
-        label=f"{segment} Customers",
-        alpha=0.7,
-        edgecolors="black",
-        s=50,
-    )
-
-plt.xlabel("Purchase Frequency (standardized)")
-plt.ylabel("Average Order Value (standardized)")
-plt.title("Customer Segmentation: Feature Space Distribution")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(boundaries_plot, dpi=300, bbox_inches="tight")
-logger.info(f"Saved feature space plot to {boundaries_plot}")
-plt.show()
+stats = ClassStatistics.from_arrays(X_scaled, y)
+bounds = (
+    X_vis[:, 0].min() - 1,
+    X_vis[:, 0].max() + 1,
+    X_vis[:, 1].min() - 1,
+    X_vis[:, 1].max() + 1,
+)
+regions = decision_regions(
+    stats, bounds, kind="lda", pair=[features.index(name) for name in vis_features]
+)
+
+# Data points colored by actual segment
+figures.add(
+    boundaries_plot,
+    "class_scatter",
+    figsize=(10, 8),
+    points=X_vis,
+    labels=y_vis,
+    classes=np.unique(y_vis),
+    colors=colors,
+    legend_format="{} Customers",
+    regions=regions,
+    regions_alpha=0.2,
+    edgecolors="black",
+    xlabel="Purchase Frequency (standardized)",
+    ylabel="Average Order Value (standardized)",
+    title="Customer Segmentation: LDA Decision Regions (2D View)",
+)
 
 # %%
 # Confusion matrices
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-# LDA confusion matrix
 cm_lda = confusion_matrix(y_test, y_pred_lda)
-sns.heatmap(
-    cm_lda,
-    annot=True,
-    fmt="d",
-    cmap="Blues",
-    xticklabels=lda.classes_,
-    yticklabels=lda.classes_,
-    ax=ax1,
-)
-ax1.set_title(f"LDA Confusion Matrix\nAccuracy: {lda_accuracy:.3f}")
-ax1.set_ylabel("True Label")
-ax1.set_xlabel("Predicted Label")
-
-# QDA confusion matrix
 cm_qda = confusion_matrix(y_test, y_pred_qda)
-sns.heatmap(
-    cm_qda,
-    annot=True,
-    fmt="d",
-    cmap="Oranges",
-    xticklabels=qda.classes_,
-    yticklabels=qda.classes_,
-    ax=ax2,
+figures.add(
+    script_dir / "marketing_confusion_matrices.png",
+    "confusion_matrices",
+    figsize=(15, 6),
+    panels=[
+        {
+            "matrix": cm_lda,
+            "classes": lda.classes_,
+            "cmap": "Blues",
+            "title": f"LDA Confusion Matrix\nAccuracy: {lda_accuracy:.3f}",
+        },
+        {
+            "matrix": cm_qda,
+            "classes": qda.classes_,
+            "cmap": "Oranges",
+            "title": f"QDA Confusion Matrix\nAccuracy: {qda_accuracy:.3f}",
+        },
+    ],
 )
-ax2.set_title(f"QDA Confusion Matrix\nAccuracy: {qda_accuracy:.3f}")
-ax2.set_ylabel("True Label")
-ax2.set_xlabel("Predicted Label")
 
-plt.tight_layout()
-plt.savefig(
-    script_dir / "marketing_confusion_matrices.png", dpi=300, bbox_inches="tight"
+# %%
+# Render all figures on a process pool (Agg canvas); figures whose inputs are
+# unchanged since the last run are kept as they are
+for path, status in figures.render().items():
+    logger.info(f"{status.capitalize()}: {path}")
+
+# %%
+next_stage("save", logger)
+# Save the fitted scaler and model for batch scoring (see utils/scoring.py):
+#   python -m utils.scoring lessons/5_Discriminant_Analysis/code/marketing_segmentation/models/marketing_lda new_data.csv
+model_dir = save_discriminant_model(
+    script_dir / "models" / "marketing_lda", scaler, lda, features
 )
-plt.show()
+logger.info(f"Saved scaler and LDA parameters to {model_dir}")
+
+# The saved model scores raw (unscaled) rows and reproduces the fitted posteriors
+scorer = DiscriminantScorer.load(model_dir)
+max_diff = np.abs(
+    scorer.predict_proba(X.loc[X_test.index]) - lda.predict_proba(X_test)
+).max()
+print(f"\nSaved model check: max posterior difference = {max_diff:.2e}")
 
 # %%
 # Summary and interpretation
@@ -283,3 +289,7 @@ print("6. Second discriminant function distinguishes loyal from occasional buyer
 
 logger.info("Marketing segmentation discriminant analysis completed")
 print("\nAnalysis complete! Check generated plots and summary statistics.")
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
@@ -7,24 +7,25 @@
 import warnings
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-import numpy as np
 import pandas as pd
-import seaborn as sns
 from sklearn.discriminant_analysis import (
     LinearDiscriminantAnalysis,
     QuadraticDiscriminantAnalysis,
 )
-from sklearn.metrics import (
-    accuracy_score,
-    auc,
-    classification_report,
-    confusion_matrix,
-    roc_curve,
-)
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 from sklearn.model_selection import cross_val_score, train_test_split
 from sklearn.preprocessing import StandardScaler
-from utils import setup_logger
+
+from utils import (
+    ClassStatistics,
+    FigureBatch,
+    decision_regions,
+    end_stages,
+    load_dataset,
+    next_stage,
+    save_discriminant_model,
+    setup_logger,
+)
 
 warnings.filterwarnings("ignore")
 
@@ -40,7 +41,8 @@ logger.info("Starting marketing segmentation QDA analysis")
 # %%
 # Load customer data
 logger.info("Loading customer segmentation data")
-df = pd.read_csv(data_file)
+next_stage("load", logger)
+df = load_dataset(data_file)
 logger.info(f"Dataset shape: {df.shape}")
 
 # %%
@@ -59,6 +61,7 @@ features = [
 X = df[features]
 y = df["segment"]
 
+next_stage("standardize", logger)
 # Standardize features
 scaler = StandardScaler()
 X_scaled = scaler.fit_transform(X)
@@ -76,6 +79,7 @@ X_train, X_test, y_train, y_test = train_test_split(
 logger.info(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
 
 # %%
+next_stage("fit", logger, model="qda")
 # Quadratic Discriminant Analysis
 logger.info("Fitting Quadratic Discriminant Analysis")
 qda = QuadraticDiscriminantAnalysis()
@@ -96,6 +100,7 @@ print(classification_report(y_test, y_pred_qda))
 
 print(f"QDA Accuracy: {qda_accuracy:.3f}")
 
+next_stage("cv", logger)
 # Cross-validation
 cv_scores_qda = cross_val_score(qda, X_scaled, y, cv=5)
 print(
@@ -114,138 +119,107 @@ print("Sample posterior probabilities:")
 print(posterior_df.head(10))
 
 # %%
-# Confusion matrix
-plt.figure(figsize=(8, 6))
+next_stage("plot", logger)
+# Confusion matrix (figures are recorded here and rendered at the end)
+figures = FigureBatch()
 cm_qda = confusion_matrix(y_test, y_pred_qda)
-sns.heatmap(
-    cm_qda,
-    annot=True,
-    fmt="d",
-    cmap="Oranges",
-    xticklabels=qda.classes_,
-    yticklabels=qda.classes_,
+figures.add(
+    script_dir / "marketing_qda_confusion.png",
+    "confusion_matrices",
+    figsize=(8, 6),
+    panels=[
+        {
+            "matrix": cm_qda,
+            "classes": qda.classes_,
+            "cmap": "Oranges",
+            "title": f"QDA Confusion Matrix\nAccuracy: {qda_accuracy:.3f}",
+        }
+    ],
 )
-plt.title(f"QDA Confusion Matrix\nAccuracy: {qda_accuracy:.3f}")
-plt.ylabel("True Label")
-plt.xlabel("Predicted Label")
-plt.tight_layout()
-plt.savefig(script_dir / "marketing_qda_confusion.png", dpi=300, bbox_inches="tight")
-plt.show()
 
 # %%
 # Decision boundaries visualization (2D projection)
-plt.figure(figsize=(12, 8))
-
 # Use first two features for visualization
-X_vis = X_scaled[["purchase_freq", "avg_order_value"]].values
+vis_features = ["purchase_freq", "avg_order_value"]
+X_vis = X_scaled[vis_features].values
 y_vis = y.values
 
-# Fit QDA on 2D data for visualization
-qda_2d = QuadraticDiscriminantAnalysis()
-qda_2d.fit(X_vis, y_vis)
-
-# Create mesh grid
-x_min, x_max = X_vis[:, 0].min() - 1, X_vis[:, 0].max() + 1
-y_min, y_max = X_vis[:, 1].min() - 1, X_vis[:, 1].max() + 1
-xx, yy = np.meshgrid(np.arange(x_min, x_max, 0.1), np.arange(y_min, y_max, 0.1))
-
-# Predict on mesh
-Z = qda_2d.predict(np.c_[xx.ravel(), yy.ravel()])
-Z = Z.reshape(xx.shape)
+# QDA restricted to the two plotted features, from the class statistics of all
+# features (any other pair can be drawn from the same `stats`)
+stats = ClassStatistics.from_arrays(X_scaled, y)
+pair = [features.index(name) for name in vis_features]
+bounds = (
+    X_vis[:, 0].min() - 1,
+    X_vis[:, 0].max() + 1,
+    X_vis[:, 1].min() - 1,
+    X_vis[:, 1].max() + 1,
+)
 
-# Plot decision boundaries
-plt.contourf(xx, yy, Z, alpha=0.3, cmap="RdYlBu")
+# Discriminants are evaluated in closed form, refining only near boundaries
+regions = decision_regions(stats, bounds, kind="qda", pair=pair)
+logger.info(
+    f"Decision regions: {regions.n_evaluated} of {regions.labels.size} grid points evaluated"
+)
 
-# Plot data points
+# Decision boundaries with the data points
 colors = ["red", "blue", "green"]
 segments = qda.classes_
-
-for i, segment in enumerate(segments):
-    mask = y_vis == segment
-    plt.scatter(
-        X_vis[mask, 0],
-        X_vis[mask, 1],
-        c=colors[i],
-        label=f"{segment} Customers",
-        alpha=0.7,
-        edgecolors="black",
-        s=50,
-    )
-
-plt.xlabel("Purchase Frequency (standardized)")
-plt.ylabel("Average Order Value (standardized)")
-plt.title("Customer Segmentation: QDA Decision Boundaries (2D View)")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(qda_plot, dpi=300, bbox_inches="tight")
-logger.info(f"Saved QDA decision boundaries plot to {qda_plot}")
-plt.show()
+figures.add(
+    qda_plot,
+    "class_scatter",
+    figsize=(12, 8),
+    points=X_vis,
+    labels=y_vis,
+    classes=segments,
+    colors=colors,
+    legend_format="{} Customers",
+    regions=regions,
+    edgecolors="black",
+    xlabel="Purchase Frequency (standardized)",
+    ylabel="Average Order Value (standardized)",
+    title="Customer Segmentation: QDA Decision Boundaries (2D View)",
+)
 
 # %%
 # ROC Curves for multiclass classification
 # Convert to binary classification problems (One-vs-Rest)
-plt.figure(figsize=(10, 8))
-
-colors = ["red", "blue", "green"]
-segments = qda.classes_
-
-for i, segment in enumerate(segments):
-    # Create binary labels for this class
-    y_binary = (y_test == segment).astype(int)
-    y_prob_segment = y_prob_qda[:, i]
-
-    # Calculate ROC curve
-    fpr, tpr, _ = roc_curve(y_binary, y_prob_segment)
-    roc_auc = auc(fpr, tpr)
-
-    # Plot ROC curve
-    plt.plot(
-        fpr, tpr, color=colors[i], linewidth=2, label=f"{segment} (AUC = {roc_auc:.3f})"
-    )
-
-# Plot diagonal line
-plt.plot([0, 1], [0, 1], "k--", linewidth=2)
-
-plt.xlabel("False Positive Rate")
-plt.ylabel("True Positive Rate")
-plt.title("QDA ROC Curves: Customer Segmentation")
-plt.legend(loc="lower right")
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(roc_plot, dpi=300, bbox_inches="tight")
-logger.info(f"Saved ROC curves plot to {roc_plot}")
-plt.show()
+figures.add(
+    roc_plot,
+    "roc_curves",
+    figsize=(10, 8),
+    y_true=y_test.to_numpy(),
+    proba=y_prob_qda,
+    classes=segments,
+    colors=colors,
+    title="QDA ROC Curves: Customer Segmentation",
+)
 
 # %%
 # Posterior probability distributions
-plt.figure(figsize=(15, 5))
-
-for i, segment in enumerate(segments):
-    plt.subplot(1, 3, i + 1)
-
-    # Get posterior probabilities for this class
-    probs = y_prob_qda[:, i]
-
-    # Plot distribution
-    plt.hist(probs, bins=20, alpha=0.7, color=colors[i], edgecolor="black")
-    plt.axvline(
-        np.mean(probs),
-        color="red",
-        linestyle="--",
-        linewidth=2,
-        label=f"Mean: {np.mean(probs):.3f}",
-    )
+figures.add(
+    script_dir / "marketing_qda_posteriors.png",
+    "posterior_histograms",
+    figsize=(15, 5),
+    proba=y_prob_qda,
+    classes=segments,
+    colors=colors,
+    title_format="QDA Posterior Probabilities\n{} Customers",
+)
 
-    plt.xlabel("Posterior Probability")
-    plt.ylabel("Frequency")
-    plt.title(f"QDA Posterior Probabilities\n{segment} Customers")
-    plt.legend()
-    plt.grid(True, alpha=0.3)
+# %%
+# Render all figures on a process pool (Agg canvas); figures whose inputs are
+# unchanged since the last run are kept as they are
+for path, status in figures.render().items():
+    logger.info(f"{status.capitalize()}: {path}")
 
-plt.tight_layout()
-plt.savefig(script_dir / "marketing_qda_posteriors.png", dpi=300, bbox_inches="tight")
-plt.show()
+# %%
+next_stage("save", logger)
+# Save the fitted scaler and model for batch scoring (see utils/scoring.py):
+#   python -m utils.scoring lessons/5_Discriminant_Analysis/code/marketing_segmentation/models/marketing_qda new_data.csv
+model_dir = save_discriminant_model(
+    script_dir / "models" / "marketing_qda", scaler, qda, features
+)
+logger.info(f"Saved scaler and QDA parameters to {model_dir}")
 
 # %%
 # Summary and interpretation
@@ -260,6 +234,7 @@ print("6. Particularly useful when segments have different variability patterns"
 # %%
 # Compare with LDA (import and run LDA analysis)
 
+next_stage("fit", logger, model="lda")
 lda = LinearDiscriminantAnalysis()
 lda.fit(X_train, y_train)
 y_pred_lda = lda.predict(X_test)
@@ -281,3 +256,7 @@ else:
 
 logger.info("Marketing segmentation QDA analysis completed")
 print("\nQDA analysis complete! Check generated plots and summary statistics.")
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
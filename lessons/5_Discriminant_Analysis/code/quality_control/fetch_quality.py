@@ -4,12 +4,21 @@
 # Generates synthetic manufacturing quality control data
 
 # %%
+import argparse
+import sys
 import warnings
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+
 from utils import setup_logger
+from utils.synthetic import (
+    DEFAULT_CHUNKSIZE,
+    population_counts,
+    sample_gaussian_mixture,
+    write_chunked,
+)
 
 warnings.filterwarnings("ignore")
 
@@ -23,21 +32,17 @@ logger.info("Starting quality control data generation")
 # %%
 # Define product quality classes with distinct manufacturing
 # characteristics
-np.random.seed(42)  # For reproducibility
-
-n_samples = 800
+# Dataset size and output are configurable from the command line (see `main`), e.g.
+#   python fetch_quality.py -n 100000000 --output large.csv
+N_PRODUCTS = 800
 quality_classes = ["Acceptable", "Borderline", "Defective"]
 
 # Class proportions (realistic manufacturing distribution)
-class_sizes = {
-    "Acceptable": int(0.75 * n_samples),  # 75% - Good products
-    "Borderline": int(0.20 * n_samples),  # 20% - Marginal quality
-    "Defective": int(0.05 * n_samples),  # 5% - Defective products
-}
-
-logger.info(
-    f"Generating {n_samples} products across {len(quality_classes)} quality classes"
-)
+quality_class_proportions = [
+    0.75,  # 75% - Good products
+    0.20,  # 20% - Marginal quality
+    0.05,  # 5% - Defective products
+]
 
 # %%
 # Generate data for each quality class with different multivariate
@@ -113,72 +118,84 @@ defective_cov = np.array(
 )
 
 # %%
-# Generate multivariate normal data for each quality class
-data_frames = []
-
-for quality_class, size in class_sizes.items():
-    if quality_class == "Acceptable":
-        mean = acceptable_mean
-        cov = acceptable_cov
-    elif quality_class == "Borderline":
-        mean = borderline_mean
-        cov = borderline_cov
-    else:  # Defective
-        mean = defective_mean
-        cov = defective_cov
-
-    # Generate data
-    class_data = np.random.multivariate_normal(mean, cov, size)
-
-    # Create DataFrame
-    df_class = pd.DataFrame(
-        class_data,
-        columns=[
-            "dimension1",
-            "dimension2",
-            "thickness",
-            "surface_roughness",
-            "material_hardness",
-            "defect_density",
-        ],
+# Generate multivariate normal data for every quality class, one chunk at a time
+means = [acceptable_mean, borderline_mean, defective_mean]
+covs = [acceptable_cov, borderline_cov, defective_cov]
+
+# Realistic bounds
+bounds = {
+    "dimension1": (8.5, 12.0),
+    "dimension2": (3.5, 6.5),
+    "thickness": (1.8, 3.2),
+    "surface_roughness": (0.005, 0.2),
+    "material_hardness": (70, 120),
+    "defect_density": (0, 2.0),
+}
+lower_bounds = np.array([-np.inf if lo is None else lo for lo, _ in bounds.values()])
+upper_bounds = np.array([np.inf if hi is None else hi for _, hi in bounds.values()])
+columns = list(bounds)
+
+
+def make_chunk(rng, start, size):
+    """One chunk of rows: exact class proportions, shuffled, clipped to bounds."""
+    X, labels = sample_gaussian_mixture(
+        rng, size, means, covs, quality_class_proportions
     )
-    df_class["quality_class"] = quality_class
+    df_chunk = pd.DataFrame(np.clip(X, lower_bounds, upper_bounds), columns=columns)
+    df_chunk["quality_class"] = np.asarray(quality_classes)[labels]
+    return df_chunk
 
-    data_frames.append(df_class)
-    logger.info(f"Generated {size} {quality_class} products")
 
 # %%
-# Combine all classes
-df = pd.concat(data_frames, ignore_index=True)
-
-# Ensure realistic bounds
-df["dimension1"] = df["dimension1"].clip(8.5, 12.0)
-df["dimension2"] = df["dimension2"].clip(3.5, 6.5)
-df["thickness"] = df["thickness"].clip(1.8, 3.2)
-df["surface_roughness"] = df["surface_roughness"].clip(0.005, 0.2)
-df["material_hardness"] = df["material_hardness"].clip(70, 120)
-df["defect_density"] = df["defect_density"].clip(0, 2.0)
+def main(argv=None):
+    """Generate the quality control dataset and print a summary."""
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic quality control data."
+    )
+    parser.add_argument("-n", type=int, default=N_PRODUCTS, help="number of products")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=42)  # For reproducibility
+    parser.add_argument("--output", type=Path, default=data_file)
+    args = parser.parse_args(argv)
+    logger.info(
+        f"Generating {args.n} products across {len(quality_classes)} quality classes"
+    )
 
-# Shuffle the data
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
+    # Generate and save the dataset chunk by chunk (only one chunk is held in memory)
+    n_rows = write_chunked(
+        args.output,
+        make_chunk,
+        args.n,
+        chunksize=args.chunksize,
+        random_state=args.seed,
+    )
+    logger.info(f"Saved quality control data to {args.output}")
+
+    # Class totals follow from the per-chunk allocation; the feature summaries
+    # read the first chunk only, so they stay cheap for very large files
+    counts = population_counts(args.n, quality_class_proportions, args.chunksize)
+    df = pd.read_csv(args.output, nrows=min(args.n, args.chunksize))
+    sample = "" if len(df) == n_rows else f" (first {len(df)} rows)"
+
+    # Data summary
+    print("=== Quality Control Dataset Generated ===")
+    print(f"Total products: {n_rows}")
+    print(f"File saved: {args.output}")
+    print("\nQuality class distribution:")
+    distribution = pd.Series(
+        counts, index=pd.Index(quality_classes, name="quality_class"), name="count"
+    )
+    print(distribution.sort_values(ascending=False, kind="stable"))
 
-# %%
-# Save the dataset
-df.to_csv(data_file, index=False)
-logger.info(f"Saved quality control data to {data_file}")
+    print(f"\nFeature summary{sample}:")
+    print(df.describe().round(3))
 
-# %%
-# Data summary
-print("=== Quality Control Dataset Generated ===")
-print(f"Total products: {len(df)}")
-print(f"File saved: {data_file}")
-print("\nQuality class distribution:")
-print(df["quality_class"].value_counts())
+    print(f"\nClass means by feature{sample}:")
+    print(df.groupby("quality_class").mean().round(3))
 
-print("\nFeature summary:")
-print(df.describe().round(3))
+    logger.info("Quality control data generation completed")
+    return 0
 
-print("\nClass means by feature:")
-print(df.groupby("quality_class").mean().round(3))
 
-logger.info("Quality control data generation completed")
+if __name__ == "__main__":
+    sys.exit(main())
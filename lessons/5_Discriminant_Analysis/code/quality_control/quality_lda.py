@@ -7,19 +7,28 @@
 import warnings
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
 from sklearn.discriminant_analysis import (
     LinearDiscriminantAnalysis,
     QuadraticDiscriminantAnalysis,
 )
-from sklearn.feature_selection import SequentialFeatureSelector
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from utils import setup_logger
+
+from utils import (
+    FigureBatch,
+    class_statistics_from_csv,
+    compare_discriminants,
+    discriminant_from_statistics,
+    end_stages,
+    load_dataset,
+    next_stage,
+    save_discriminant_model,
+    setup_logger,
+    stepwise_discriminant,
+)
 
 warnings.filterwarnings("ignore")
 
@@ -36,7 +45,8 @@ logger.info("Starting quality control discriminant analysis")
 # %%
 # Load quality control data
 logger.info("Loading manufacturing quality data")
-df = pd.read_csv(data_file)
+next_stage("load", logger)
+df = load_dataset(data_file)
 logger.info(f"Dataset shape: {df.shape}")
 logger.info(f"Columns: {list(df.columns)}")
 
@@ -65,6 +75,7 @@ features = [
 X = df[features]
 y = df["quality_class"]
 
+next_stage("standardize", logger)
 # Standardize features
 scaler = StandardScaler()
 X_scaled = scaler.fit_transform(X)
@@ -82,6 +93,7 @@ X_train, X_test, y_train, y_test = train_test_split(
 logger.info(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
 
 # %%
+next_stage("fit", logger, model="lda")
 # Linear Discriminant Analysis
 logger.info("Fitting Linear Discriminant Analysis")
 lda = LinearDiscriminantAnalysis()
@@ -109,14 +121,17 @@ print(classification_report(y_test, y_pred_lda))
 
 print(f"LDA Accuracy: {lda_accuracy:.3f}")
 
-# Cross-validation
-cv_scores_lda = cross_val_score(lda, X_scaled, y, cv=5)
+next_stage("cv", logger)
+# Cross-validation: LDA and QDA share the same folds and per-fold class statistics
+cv_scores = compare_discriminants(X_scaled, y, cv=5)
+cv_scores_lda = cv_scores["LDA"].to_numpy()
 print(
     f"LDA Cross-validation accuracy: {cv_scores_lda.mean():.3f} "
     f"(+/- {cv_scores_lda.std() * 2:.3f})"
 )
 
 # %%
+next_stage("fit", logger, model="qda")
 # Quadratic Discriminant Analysis
 logger.info("Fitting Quadratic Discriminant Analysis")
 qda = QuadraticDiscriminantAnalysis()
@@ -131,7 +146,7 @@ print(classification_report(y_test, y_pred_qda))
 
 print(f"QDA Accuracy: {qda_accuracy:.3f}")
 
-cv_scores_qda = cross_val_score(qda, X_scaled, y, cv=5)
+cv_scores_qda = cv_scores["QDA"].to_numpy()
 print(
     f"QDA Cross-validation accuracy: {cv_scores_qda.mean():.3f} "
     f"(+/- {cv_scores_qda.std() * 2:.3f})"
@@ -157,13 +172,15 @@ print(means_df.round(3))
 # %%
 # Stepwise feature selection for LDA
 print("\n=== Stepwise Feature Selection ===")
-sfs = SequentialFeatureSelector(
-    lda, n_features_to_select="auto", direction="forward", cv=3
-)
-sfs.fit(X_train, y_train)
+next_stage("fit", logger, model="stepwise")
+# Wilks' lambda F-to-enter / F-to-remove computed from the within- and
+# total-scatter matrices; no classifier is refitted during the search
+stepwise = stepwise_discriminant(X_train, y_train, direction="both")
+print(stepwise.history.round(4).to_string(index=False))
 
-selected_features = X_train.columns[sfs.get_support()].tolist()
+selected_features = stepwise.selected
 print(f"Selected features: {selected_features}")
+print(f"Wilks' lambda of selected model: {stepwise.wilks_lambda:.4f}")
 print(f"Original features: {features}")
 
 # Fit LDA with selected features
@@ -178,97 +195,106 @@ selected_accuracy = accuracy_score(y_test, y_pred_selected)
 print(f"Accuracy with selected features: {selected_accuracy:.3f}")
 
 # %%
-# Visualization: Discriminant scores
-plt.figure(figsize=(12, 8))
+next_stage("plot", logger)
+# Visualization: Discriminant scores (figures are recorded here and rendered at
+# the end; run with --no-plots to skip them)
+figures = FigureBatch()
 
-# Plot first two discriminant functions
+# Plot first two discriminant functions with the group centroids
 colors = ["green", "orange", "red"]
 classes = lda.classes_
-
-for i, quality_class in enumerate(classes):
-    mask = lda_scores_df["quality_class"] == quality_class
-    plt.scatter(
-        lda_scores_df.loc[mask, "LD1"],
-        lda_scores_df.loc[mask, "LD2"],
-        c=colors[i],
-        label=f"{quality_class} Products",
-        alpha=0.7,
-        s=50,
-    )
-
-# Add group centroids
-centroids = lda.transform(lda.means_)
-for i, quality_class in enumerate(classes):
-    plt.scatter(
-        centroids[i, 0],
-        centroids[i, 1],
-        c=colors[i],
-        marker="x",
-        s=200,
-        linewidth=3,
-        label=f"{quality_class} Centroid",
-    )
-
-plt.xlabel("First Linear Discriminant (LD1)")
-plt.ylabel("Second Linear Discriminant (LD2)")
-plt.title("Quality Control: Discriminant Function Scores")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(scores_plot, dpi=300, bbox_inches="tight")
-logger.info(f"Saved discriminant scores plot to {scores_plot}")
-plt.show()
+figures.add(
+    scores_plot,
+    "class_scatter",
+    figsize=(12, 8),
+    points=lda_scores_df[["LD1", "LD2"]].to_numpy(),
+    labels=lda_scores_df["quality_class"].to_numpy(),
+    classes=classes,
+    colors=colors,
+    legend_format="{} Products",
+    centroids=lda.transform(lda.means_),
+    xlabel="First Linear Discriminant (LD1)",
+    ylabel="Second Linear Discriminant (LD2)",
+    title="Quality Control: Discriminant Function Scores",
+)
 
 # %%
 # Confusion matrices comparison
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-# LDA confusion matrix
 cm_lda = confusion_matrix(y_test, y_pred_lda)
-sns.heatmap(
-    cm_lda,
-    annot=True,
-    fmt="d",
-    cmap="Blues",
-    xticklabels=lda.classes_,
-    yticklabels=lda.classes_,
-    ax=ax1,
-)
-ax1.set_title(f"LDA Confusion Matrix\nAccuracy: {lda_accuracy:.3f}")
-ax1.set_ylabel("True Label")
-ax1.set_xlabel("Predicted Label")
-
-# QDA confusion matrix
 cm_qda = confusion_matrix(y_test, y_pred_qda)
-sns.heatmap(
-    cm_qda,
-    annot=True,
-    fmt="d",
-    cmap="Oranges",
-    xticklabels=qda.classes_,
-    yticklabels=qda.classes_,
-    ax=ax2,
+figures.add(
+    confusion_plot,
+    "confusion_matrices",
+    figsize=(15, 6),
+    panels=[
+        {
+            "matrix": cm_lda,
+            "classes": lda.classes_,
+            "cmap": "Blues",
+            "title": f"LDA Confusion Matrix\nAccuracy: {lda_accuracy:.3f}",
+        },
+        {
+            "matrix": cm_qda,
+            "classes": qda.classes_,
+            "cmap": "Oranges",
+            "title": f"QDA Confusion Matrix\nAccuracy: {qda_accuracy:.3f}",
+        },
+    ],
 )
-ax2.set_title(f"QDA Confusion Matrix\nAccuracy: {qda_accuracy:.3f}")
-ax2.set_ylabel("True Label")
-ax2.set_xlabel("Predicted Label")
-
-plt.tight_layout()
-plt.savefig(confusion_plot, dpi=300, bbox_inches="tight")
-plt.show()
 
 # %%
 # Feature importance analysis
-plt.figure(figsize=(10, 6))
 feature_importance = np.abs(lda.scalings_).mean(axis=1)
-plt.barh(features, feature_importance, color="skyblue")
-plt.xlabel("Mean Absolute Coefficient")
-plt.ylabel("Features")
-plt.title("Feature Importance in Quality Classification")
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(script_dir / "quality_feature_importance.png", dpi=300, bbox_inches="tight")
-plt.show()
+figures.add(
+    script_dir / "quality_feature_importance.png",
+    "horizontal_bars",
+    figsize=(10, 6),
+    labels=features,
+    values=feature_importance,
+    xlabel="Mean Absolute Coefficient",
+    ylabel="Features",
+    title="Feature Importance in Quality Classification",
+)
+
+# %%
+# Render all figures on a process pool (Agg canvas); figures whose inputs are
+# unchanged since the last run are kept as they are
+for path, status in figures.render().items():
+    logger.info(f"{status.capitalize()}: {path}")
+
+# %%
+next_stage("save", logger)
+# Save the fitted scaler and model for batch scoring (see utils/scoring.py):
+#   python -m utils.scoring lessons/5_Discriminant_Analysis/code/quality_control/models/quality_lda new_data.csv
+model_dir = save_discriminant_model(
+    script_dir / "models" / "quality_lda", scaler, lda, features
+)
+logger.info(f"Saved scaler and LDA parameters to {model_dir}")
+
+# %%
+next_stage("fit", logger, model="csv_statistics")
+# Training without loading the data: LDA and QDA only need per-class counts,
+# means and scatter matrices, which can be accumulated chunk by chunk (or from
+# several shard files in parallel with `class_statistics_from_shards`)
+stats = class_statistics_from_csv(data_file, features, "quality_class", chunksize=200)
+lda_stream = discriminant_from_statistics(stats, "lda", features=features)
+qda_stream = discriminant_from_statistics(stats, "qda", features=features)
+
+print("\n=== Models Trained from Streamed Class Statistics ===")
+print(f"Rows accumulated: {stats.n_obs} in chunks of 200")
+class_counts = dict(zip(stats.classes.tolist(), stats.counts.tolist(), strict=True))
+print(f"Class counts: {class_counts}")
+lda_full = LinearDiscriminantAnalysis(solver="eigen").fit(X, y)
+print(
+    "Agreement with in-memory LDA: "
+    f"{np.mean(lda_stream.predict(X) == lda_full.predict(X)):.3f}"
+)
+print(
+    f"Streamed LDA accuracy (all rows): {accuracy_score(y, lda_stream.predict(X)):.3f}"
+)
+print(
+    f"Streamed QDA accuracy (all rows): {accuracy_score(y, qda_stream.predict(X)):.3f}"
+)
 
 # %%
 # Summary and interpretation
@@ -283,3 +309,7 @@ print(f"7. Stepwise selection identified key features: {selected_features}")
 
 logger.info("Quality control discriminant analysis completed")
 print("\nAnalysis complete! Check generated plots and summary statistics.")
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
@@ -4,12 +4,21 @@
 # Generates synthetic athlete performance data for classification
 
 # %%
+import argparse
+import sys
 import warnings
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+
 from utils import setup_logger
+from utils.synthetic import (
+    DEFAULT_CHUNKSIZE,
+    population_counts,
+    sample_gaussian_mixture,
+    write_chunked,
+)
 
 warnings.filterwarnings("ignore")
 logger = setup_logger(__name__)
@@ -21,22 +30,17 @@ logger.info("Starting sports analytics data generation")
 
 # %%
 # Define athlete performance categories with distinct ability profiles
-np.random.seed(42)  # For reproducibility
-
-n_samples = 300
+# Dataset size and output are configurable from the command line (see `main`), e.g.
+#   python fetch_sports.py -n 100000000 --output large.csv
+N_ATHLETES = 300
 performance_categories = ["Elite", "Competitive", "Developing"]
 
 # Category proportions (realistic sports development distribution)
-category_sizes = {
-    "Elite": int(0.2 * n_samples),  # 20% - Top performers
-    "Competitive": int(0.5 * n_samples),  # 50% - Regular competitors
-    "Developing": int(0.3 * n_samples),  # 30% - Developing athletes
-}
-
-logger.info(
-    f"Generating {n_samples} athletes across "
-    f"{len(performance_categories)} performance categories"
-)
+performance_category_proportions = [
+    0.2,  # 20% - Top performers
+    0.5,  # 50% - Regular competitors
+    0.3,  # 30% - Developing athletes
+]
 
 # %%
 # Generate data for each performance category with different multivariate
@@ -118,74 +122,88 @@ developing_cov = np.array(
 )
 
 # %%
-# Generate multivariate normal data for each performance category
-data_frames = []
-
-for category, size in category_sizes.items():
-    if category == "Elite":
-        mean = elite_mean
-        cov = elite_cov
-    elif category == "Competitive":
-        mean = competitive_mean
-        cov = competitive_cov
-    else:  # Developing
-        mean = developing_mean
-        cov = developing_cov
-
-    # Generate data
-    category_data = np.random.multivariate_normal(mean, cov, size)
-
-    # Create DataFrame
-    df_category = pd.DataFrame(
-        category_data,
-        columns=[
-            "speed",
-            "endurance",
-            "strength",
-            "technique",
-            "agility",
-            "power",
-            "consistency",
-        ],
+# Generate multivariate normal data for every performance category, one chunk at a time
+means = [elite_mean, competitive_mean, developing_mean]
+covs = [elite_cov, competitive_cov, developing_cov]
+
+# Realistic bounds (performance metrics have natural limits)
+bounds = {
+    "speed": (85, 140),  # 100m time range
+    "endurance": (30, 100),  # VO2 max range
+    "strength": (40, 120),  # Strength % bodyweight
+    "technique": (30, 100),  # Skill score
+    "agility": (80, 130),  # T-test time
+    "power": (30, 110),  # Vertical jump
+    "consistency": (20, 100),  # Stability score
+}
+lower_bounds = np.array([-np.inf if lo is None else lo for lo, _ in bounds.values()])
+upper_bounds = np.array([np.inf if hi is None else hi for _, hi in bounds.values()])
+columns = list(bounds)
+
+
+def make_chunk(rng, start, size):
+    """One chunk of rows: exact class proportions, shuffled, clipped to bounds."""
+    X, labels = sample_gaussian_mixture(
+        rng, size, means, covs, performance_category_proportions
     )
-    df_category["performance_category"] = category
+    df_chunk = pd.DataFrame(np.clip(X, lower_bounds, upper_bounds), columns=columns)
+    df_chunk["performance_category"] = np.asarray(performance_categories)[labels]
+    return df_chunk
 
-    data_frames.append(df_category)
-    logger.info(f"Generated {size} {category} athletes")
 
 # %%
-# Combine all categories
-df = pd.concat(data_frames, ignore_index=True)
-
-# Ensure realistic bounds (performance metrics have natural limits)
-df["speed"] = df["speed"].clip(85, 140)  # 100m time range
-df["endurance"] = df["endurance"].clip(30, 100)  # VO2 max range
-df["strength"] = df["strength"].clip(40, 120)  # Strength % bodyweight
-df["technique"] = df["technique"].clip(30, 100)  # Skill score
-df["agility"] = df["agility"].clip(80, 130)  # T-test time
-df["power"] = df["power"].clip(30, 110)  # Vertical jump
-df["consistency"] = df["consistency"].clip(20, 100)  # Stability score
+def main(argv=None):
+    """Generate the sports analytics dataset and print a summary."""
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic sports analytics data."
+    )
+    parser.add_argument("-n", type=int, default=N_ATHLETES, help="number of athletes")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=42)  # For reproducibility
+    parser.add_argument("--output", type=Path, default=data_file)
+    args = parser.parse_args(argv)
+    logger.info(
+        f"Generating {args.n} athletes across "
+        f"{len(performance_categories)} performance categories"
+    )
 
-# Shuffle the data
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
+    # Generate and save the dataset chunk by chunk (only one chunk is held in memory)
+    n_rows = write_chunked(
+        args.output,
+        make_chunk,
+        args.n,
+        chunksize=args.chunksize,
+        random_state=args.seed,
+    )
+    logger.info(f"Saved sports analytics data to {args.output}")
+
+    # Class totals follow from the per-chunk allocation; the feature summaries
+    # read the first chunk only, so they stay cheap for very large files
+    counts = population_counts(args.n, performance_category_proportions, args.chunksize)
+    df = pd.read_csv(args.output, nrows=min(args.n, args.chunksize))
+    sample = "" if len(df) == n_rows else f" (first {len(df)} rows)"
+
+    # Data summary
+    print("=== Sports Analytics Dataset Generated ===")
+    print(f"Total athletes: {n_rows}")
+    print(f"File saved: {args.output}")
+    print("\nPerformance category distribution:")
+    distribution = pd.Series(
+        counts,
+        index=pd.Index(performance_categories, name="performance_category"),
+        name="count",
+    )
+    print(distribution.sort_values(ascending=False, kind="stable"))
 
-# %%
-# Save the dataset
-df.to_csv(data_file, index=False)
-logger.info(f"Saved sports analytics data to {data_file}")
+    print(f"\nFeature summary{sample}:")
+    print(df.describe().round(2))
 
-# %%
-# Data summary
-print("=== Sports Analytics Dataset Generated ===")
-print(f"Total athletes: {len(df)}")
-print(f"File saved: {data_file}")
-print("\nPerformance category distribution:")
-print(df["performance_category"].value_counts())
+    print(f"\nCategory means by feature{sample}:")
+    print(df.groupby("performance_category").mean().round(2))
 
-print("\nFeature summary:")
-print(df.describe().round(2))
+    logger.info("Sports analytics data generation completed")
+    return 0
 
-print("\nCategory means by feature:")
-print(df.groupby("performance_category").mean().round(2))
 
-logger.info("Sports analytics data generation completed")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,18 +7,28 @@
 import warnings
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-import numpy as np
 import pandas as pd
-import seaborn as sns
 from sklearn.discriminant_analysis import (
     LinearDiscriminantAnalysis,
     QuadraticDiscriminantAnalysis,
 )
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from utils import setup_logger
+
+from utils import (
+    FigureBatch,
+    ModelRegistry,
+    compare_discriminants,
+    end_stages,
+    estimator_state,
+    load_dataset,
+    next_stage,
+    registry_key,
+    restore_estimators,
+    save_discriminant_model,
+    setup_logger,
+)
 
 warnings.filterwarnings("ignore")
 
@@ -35,7 +45,8 @@ logger.info("Starting sports analytics discriminant analysis")
 # %%
 # Load athlete performance data
 logger.info("Loading athlete performance data")
-df = pd.read_csv(data_file)
+next_stage("load", logger)
+df = load_dataset(data_file)
 logger.info(f"Dataset shape: {df.shape}")
 logger.info(f"Columns: {list(df.columns)}")
 
@@ -65,6 +76,7 @@ features = [
 X = df[features]
 y = df["performance_category"]
 
+next_stage("standardize", logger)
 # Standardize features
 scaler = StandardScaler()
 X_scaled = scaler.fit_transform(X)
@@ -81,11 +93,36 @@ X_train, X_test, y_train, y_test = train_test_split(
 
 logger.info(f"Training set: {X_train.shape}, Test set: {X_test.shape}")
 
+# Fitted models are kept in a registry keyed by the data, features, split and
+# hyperparameters; a rerun on unchanged data loads them instead of refitting
+registry = ModelRegistry(script_dir / ".model_registry")
+split = {"test_size": 0.3, "random_state": 42, "stratify": True}
+
+
+def fit_discriminant(estimator):
+    """Registry entry for `estimator` fitted on the training split."""
+    key = registry_key(
+        (X, y),
+        features,
+        preprocessing="StandardScaler",
+        method=type(estimator).__name__,
+        params={**split, **estimator.get_params()},
+    )
+    entry = registry.get_or_fit(
+        key,
+        lambda: estimator_state(scaler=scaler, model=estimator.fit(X_train, y_train)),
+    )
+    logger.info(
+        f"{type(estimator).__name__}: registry {'hit' if entry.hit else 'miss'}"
+    )
+    return restore_estimators(entry.arrays, entry.metadata)["model"]
+
+
 # %%
+next_stage("fit", logger, model="lda")
 # Linear Discriminant Analysis
 logger.info("Fitting Linear Discriminant Analysis")
-lda = LinearDiscriminantAnalysis()
-lda.fit(X_train, y_train)
+lda = fit_discriminant(LinearDiscriminantAnalysis())
 
 # Get discriminant scores for training data
 X_lda = lda.transform(X_train)
@@ -109,18 +146,20 @@ print(classification_report(y_test, y_pred_lda))
 
 print(f"LDA Accuracy: {lda_accuracy:.3f}")
 
-# Cross-validation
-cv_scores_lda = cross_val_score(lda, X_scaled, y, cv=5)
+next_stage("cv", logger)
+# Cross-validation: LDA and QDA share the same folds and per-fold class statistics
+cv_scores = compare_discriminants(X_scaled, y, cv=5)
+cv_scores_lda = cv_scores["LDA"].to_numpy()
 print(
     f"LDA Cross-validation accuracy: {cv_scores_lda.mean():.3f} "
     f"(+/- {cv_scores_lda.std() * 2:.3f})"
 )
 
 # %%
+next_stage("fit", logger, model="qda")
 # Quadratic Discriminant Analysis
 logger.info("Fitting Quadratic Discriminant Analysis")
-qda = QuadraticDiscriminantAnalysis()
-qda.fit(X_train, y_train)
+qda = fit_discriminant(QuadraticDiscriminantAnalysis())
 
 y_pred_qda = qda.predict(X_test)
 qda_accuracy = accuracy_score(y_test, y_pred_qda)
@@ -131,7 +170,7 @@ print(classification_report(y_test, y_pred_qda))
 
 print(f"QDA Accuracy: {qda_accuracy:.3f}")
 
-cv_scores_qda = cross_val_score(qda, X_scaled, y, cv=5)
+cv_scores_qda = cv_scores["QDA"].to_numpy()
 print(
     f"QDA Cross-validation accuracy: {cv_scores_qda.mean():.3f} "
     f"(+/- {cv_scores_qda.std() * 2:.3f})"
@@ -168,140 +207,103 @@ print(f"Top contributors: {ld2_top.index.tolist()}")
 print(f"Coefficients: {ld2_top.values}")
 
 # %%
+next_stage("plot", logger)
 # Visualization: Discriminant scores
-plt.figure(figsize=(12, 8))
-
-# Plot first two discriminant functions
+# Figures are recorded as specs and rendered together at the end of the cell
+# sequence, on a process pool and only when their inputs changed
+figures = FigureBatch()
 colors = ["gold", "silver", "peru"]
 categories = lda.classes_
 
-for i, category in enumerate(categories):
-    mask = lda_scores_df["performance_category"] == category
-    plt.scatter(
-        lda_scores_df.loc[mask, "LD1"],
-        lda_scores_df.loc[mask, "LD2"],
-        c=colors[i],
-        label=f"{category} Athletes",
-        alpha=0.7,
-        s=50,
-        edgecolors="black",
-    )
-
-# Add group centroids
-centroids = lda.transform(lda.means_)
-for i, category in enumerate(categories):
-    plt.scatter(
-        centroids[i, 0],
-        centroids[i, 1],
-        c=colors[i],
-        marker="x",
-        s=200,
-        linewidth=3,
-        label=f"{category} Centroid",
-    )
-
-plt.xlabel("First Linear Discriminant (LD1)")
-plt.ylabel("Second Linear Discriminant (LD2)")
-plt.title("Athlete Performance: Discriminant Function Scores")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(scores_plot, dpi=300, bbox_inches="tight")
-logger.info(f"Saved discriminant scores plot to {scores_plot}")
-plt.show()
+figures.add(
+    scores_plot,
+    "class_scatter",
+    figsize=(12, 8),
+    points=lda_scores_df[["LD1", "LD2"]].to_numpy(),
+    labels=lda_scores_df["performance_category"].to_numpy(),
+    classes=categories,
+    colors=colors,
+    legend_format="{} Athletes",
+    centroids=lda.transform(lda.means_),
+    edgecolors="black",
+    xlabel="First Linear Discriminant (LD1)",
+    ylabel="Second Linear Discriminant (LD2)",
+    title="Athlete Performance: Discriminant Function Scores",
+)
 
 # %%
 # Discriminant function loadings visualization
-plt.figure(figsize=(10, 6))
 loadings = lda.scalings_
-
-# Plot loadings for first two discriminant functions
-x = np.arange(len(features))
-width = 0.35
-
-plt.bar(x - width / 2, loadings[:, 0], width, label="LD1", alpha=0.8, color="blue")
-plt.bar(x + width / 2, loadings[:, 1], width, label="LD2", alpha=0.8, color="red")
-
-plt.xlabel("Performance Metrics")
-plt.ylabel("Discriminant Loadings")
-plt.title("Discriminant Function Loadings: Performance Metrics")
-plt.xticks(x, [f.replace("_", "\n") for f in features], rotation=45, ha="right")
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(loadings_plot, dpi=300, bbox_inches="tight")
-logger.info(f"Saved loadings plot to {loadings_plot}")
-plt.show()
+figures.add(
+    loadings_plot,
+    "grouped_bars",
+    figsize=(10, 6),
+    values=loadings[:, :2].T,
+    group_labels=["LD1", "LD2"],
+    tick_labels=[f.replace("_", "\n") for f in features],
+    colors=["blue", "red"],
+    width=0.35,
+    xlabel="Performance Metrics",
+    ylabel="Discriminant Loadings",
+    title="Discriminant Function Loadings: Performance Metrics",
+    tick_rotation=45,
+)
 
 # %%
 # Group centroids visualization
-plt.figure(figsize=(12, 8))
-
 # Plot centroids in the original feature space (first 4 features for readability)
 centroids_original = scaler.inverse_transform(lda.means_)
 features_subset = features[:4]
-
-x = np.arange(len(features_subset))
-width = 0.25
-
-for i, category in enumerate(categories):
-    plt.bar(
-        x + i * width,
-        centroids_original[i, :4],
-        width,
-        label=f"{category} Athletes",
-        alpha=0.7,
-        color=colors[i],
-    )
-
-plt.xlabel("Performance Metrics")
-plt.ylabel("Mean Performance Values")
-plt.title("Group Centroids: Athlete Performance Categories")
-plt.xticks(x + width, [f.replace("_", "\n") for f in features_subset])
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig(centroids_plot, dpi=300, bbox_inches="tight")
-logger.info(f"Saved centroids plot to {centroids_plot}")
-plt.show()
+figures.add(
+    centroids_plot,
+    "grouped_bars",
+    figsize=(12, 8),
+    values=centroids_original[:, :4],
+    group_labels=[f"{category} Athletes" for category in categories],
+    tick_labels=[f.replace("_", "\n") for f in features_subset],
+    colors=colors,
+    width=0.25,
+    alpha=0.7,
+    xlabel="Performance Metrics",
+    ylabel="Mean Performance Values",
+    title="Group Centroids: Athlete Performance Categories",
+)
 
 # %%
 # Confusion matrices
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-# LDA confusion matrix
-cm_lda = confusion_matrix(y_test, y_pred_lda)
-sns.heatmap(
-    cm_lda,
-    annot=True,
-    fmt="d",
-    cmap="Blues",
-    xticklabels=lda.classes_,
-    yticklabels=lda.classes_,
-    ax=ax1,
+figures.add(
+    script_dir / "sports_confusion_matrices.png",
+    "confusion_matrices",
+    figsize=(15, 6),
+    panels=[
+        {
+            "matrix": confusion_matrix(y_test, y_pred_lda),
+            "classes": lda.classes_,
+            "cmap": "Blues",
+            "title": f"LDA Confusion Matrix\nAccuracy: {lda_accuracy:.3f}",
+        },
+        {
+            "matrix": confusion_matrix(y_test, y_pred_qda),
+            "classes": qda.classes_,
+            "cmap": "Oranges",
+            "title": f"QDA Confusion Matrix\nAccuracy: {qda_accuracy:.3f}",
+        },
+    ],
 )
-ax1.set_title(f"LDA Confusion Matrix\nAccuracy: {lda_accuracy:.3f}")
-ax1.set_ylabel("True Label")
-ax1.set_xlabel("Predicted Label")
-
-# QDA confusion matrix
-cm_qda = confusion_matrix(y_test, y_pred_qda)
-sns.heatmap(
-    cm_qda,
-    annot=True,
-    fmt="d",
-    cmap="Oranges",
-    xticklabels=qda.classes_,
-    yticklabels=qda.classes_,
-    ax=ax2,
-)
-ax2.set_title(f"QDA Confusion Matrix\nAccuracy: {qda_accuracy:.3f}")
-ax2.set_ylabel("True Label")
-ax2.set_xlabel("Predicted Label")
 
-plt.tight_layout()
-plt.savefig(script_dir / "sports_confusion_matrices.png", dpi=300, bbox_inches="tight")
-plt.show()
+# %%
+# Render all figures (Agg canvas, process pool, unchanged figures skipped)
+for path, status in figures.render().items():
+    logger.info(f"{status.capitalize()}: {path}")
+
+# %%
+next_stage("save", logger)
+# Save the fitted scaler and model for batch scoring (see utils/scoring.py):
+#   python -m utils.scoring lessons/5_Discriminant_Analysis/code/sports_analytics/models/sports_lda new_data.csv
+model_dir = save_discriminant_model(
+    script_dir / "models" / "sports_lda", scaler, lda, features
+)
+logger.info(f"Saved scaler and LDA parameters to {model_dir}")
 
 # %%
 # Summary and interpretation
@@ -314,5 +316,14 @@ print("5. First discriminant function separates elite from developing athletes")
 print("6. Second discriminant function distinguishes competitive athletes")
 print("7. Key performance metrics: speed, endurance, technique, and consistency")
 
+registry_stats = registry.stats()
+logger.info(
+    f"Model registry: {registry_stats.hits} hits, {registry_stats.misses} misses, "
+    f"hit rate {registry_stats.hit_rate:.0%}"
+)
 logger.info("Sports analytics discriminant analysis completed")
 print("\nAnalysis complete! Check generated plots and summary statistics.")
+
+# %%
+# Close the last timed stage and write the stage trace (see utils.logger)
+end_stages(logger)
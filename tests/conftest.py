@@ -0,0 +1,38 @@
+"""Shared synthetic data for the parity tests."""
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="session")
+def factor_data() -> np.ndarray:
+    """300 x 6 observations with a clear two-factor structure."""
+    rng = np.random.default_rng(0)
+    loadings = np.array(
+        [
+            [0.8, 0.1],
+            [0.7, 0.2],
+            [0.75, 0.0],
+            [0.1, 0.8],
+            [0.2, 0.7],
+            [0.0, 0.6],
+        ]
+    )
+    factors = rng.standard_normal((300, 2))
+    noise = rng.standard_normal((300, 6)) * np.sqrt(1 - np.sum(loadings**2, axis=1))
+    return factors @ loadings.T + noise
+
+
+@pytest.fixture(scope="session")
+def class_data() -> tuple[np.ndarray, np.ndarray]:
+    """Three Gaussian classes in four dimensions with different covariances."""
+    rng = np.random.default_rng(1)
+    blocks, labels = [], []
+    for k, (size, shift) in enumerate([(80, 0.0), (60, 1.5), (100, -1.0)]):
+        scale = np.diag([1.0, 0.5 + k, 1.0, 2.0 - 0.5 * k])
+        mixing = np.eye(4) + 0.3 * rng.standard_normal((4, 4))
+        blocks.append(
+            rng.standard_normal((size, 4)) @ scale @ mixing + shift * np.arange(1, 5)
+        )
+        labels.append(np.full(size, f"c{k}"))
+    return np.vstack(blocks), np.concatenate(labels)
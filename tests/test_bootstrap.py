@@ -0,0 +1,27 @@
+"""Input checks and in-process state of the loading bootstrap."""
+
+import numpy as np
+import pytest
+
+from utils import bootstrap_loadings
+from utils.bootstrap import _worker_data
+
+
+def test_bootstrap_in_process_is_reproducible(factor_data):
+    first = bootstrap_loadings(
+        factor_data, n_factors=2, n_boot=20, batch_size=8, max_workers=1, random_state=0
+    )
+    second = bootstrap_loadings(
+        factor_data, n_factors=2, n_boot=20, batch_size=8, max_workers=1, random_state=0
+    )
+
+    assert first.replicates.shape == (20, 6, 2)
+    np.testing.assert_array_equal(first.replicates, second.replicates)
+    assert np.all(first.lower <= first.upper)
+    assert not _worker_data
+
+
+@pytest.mark.parametrize("n_boot", [0, -5])
+def test_bootstrap_rejects_empty_runs(factor_data, n_boot):
+    with pytest.raises(ValueError, match="n_boot"):
+        bootstrap_loadings(factor_data, n_factors=2, n_boot=n_boot, max_workers=1)
@@ -0,0 +1,45 @@
+"""Shared-fold LDA/QDA comparisons against cross_val_score."""
+
+import numpy as np
+from sklearn.discriminant_analysis import (
+    LinearDiscriminantAnalysis,
+    QuadraticDiscriminantAnalysis,
+)
+from sklearn.model_selection import cross_val_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from utils import DiscriminantFolds, compare_discriminants
+
+
+def test_default_models_match_cross_val_score(class_data):
+    X, y = class_data
+
+    scores = compare_discriminants(X, y, cv=5)
+
+    np.testing.assert_allclose(
+        scores["LDA"], cross_val_score(LinearDiscriminantAnalysis(), X, y, cv=5)
+    )
+    np.testing.assert_allclose(
+        scores["QDA"], cross_val_score(QuadraticDiscriminantAnalysis(), X, y, cv=5)
+    )
+
+
+def test_per_fold_standardization_matches_a_pipeline(class_data):
+    X, y = class_data
+    X = X * [1.0, 10.0, 0.1, 5.0] + 3.0
+    folds = DiscriminantFolds(X, y, cv=4)
+
+    scores = folds.compare(
+        {
+            "LDA shrunk": ("lda", {"shrinkage": 0.3}),
+            "QDA reg": ("qda", {"reg_param": 0.2}),
+        },
+        standardize=True,
+    )
+
+    lda = LinearDiscriminantAnalysis(solver="lsqr", shrinkage=0.3)
+    qda = QuadraticDiscriminantAnalysis(reg_param=0.2)
+    for name, model in [("LDA shrunk", lda), ("QDA reg", qda)]:
+        reference = cross_val_score(make_pipeline(StandardScaler(), model), X, y, cv=4)
+        np.testing.assert_allclose(scores[name], reference)
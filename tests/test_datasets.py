@@ -0,0 +1,27 @@
+"""The cached CSV loader."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import load_dataset
+
+
+def test_float32_columns(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"name": ["a", "b"], "x": [0.5, 1.5], "n": [1, 2]}).to_csv(
+        path, index=False
+    )
+
+    frame = load_dataset(path, cache_root=tmp_path / "cache", dtype="float32")
+
+    assert frame["x"].dtype == np.float32
+    assert frame["n"].dtype == np.int64
+
+
+def test_unknown_dtype_is_rejected(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"x": [0.5, 1.5]}).to_csv(path, index=False)
+
+    with pytest.raises(ValueError, match="Unknown precision"):
+        load_dataset(path, cache_root=tmp_path / "cache", dtype="float16")
@@ -0,0 +1,148 @@
+"""Discriminant models built from class statistics against scikit-learn."""
+
+import numpy as np
+import pytest
+from sklearn.discriminant_analysis import (
+    LinearDiscriminantAnalysis,
+    QuadraticDiscriminantAnalysis,
+)
+
+from utils import (
+    ClassStatistics,
+    GaussianDiscriminant,
+    decision_regions,
+    discriminant_from_statistics,
+    stepwise_discriminant,
+)
+
+
+def _reference(kind, **params):
+    if kind == "lda":
+        shrinkage = params.get("shrinkage")
+        solver = "svd" if shrinkage is None else "lsqr"
+        return LinearDiscriminantAnalysis(solver=solver, shrinkage=shrinkage)
+    return QuadraticDiscriminantAnalysis(**params)
+
+
+@pytest.mark.parametrize(
+    "kind, params",
+    [
+        ("lda", {}),
+        ("lda", {"shrinkage": 0.3}),
+        ("qda", {}),
+        ("qda", {"reg_param": 0.2}),
+    ],
+)
+def test_gaussian_discriminant_matches_sklearn(class_data, kind, params):
+    X, y = class_data
+    reference = _reference(kind, **params).fit(X, y)
+
+    stats = ClassStatistics.from_arrays(X, y)
+    model = GaussianDiscriminant.from_statistics(stats, kind, **params)
+
+    np.testing.assert_allclose(
+        model.predict_proba(X), reference.predict_proba(X), atol=1e-8
+    )
+    np.testing.assert_array_equal(model.predict(X), reference.predict(X))
+
+
+@pytest.mark.parametrize(
+    "kind, params",
+    [
+        ("lda", {}),
+        ("lda", {"shrinkage": 0.3}),
+        ("qda", {}),
+        ("qda", {"reg_param": 0.2}),
+    ],
+)
+def test_discriminant_from_statistics_matches_sklearn(class_data, kind, params):
+    X, y = class_data
+    if kind == "lda":
+        reference = LinearDiscriminantAnalysis(solver="eigen", **params).fit(X, y)
+    else:
+        reference = QuadraticDiscriminantAnalysis(**params).fit(X, y)
+
+    # accumulated over chunks, as from a CSV file
+    stats = ClassStatistics.combine(
+        ClassStatistics.from_arrays(
+            X[start : start + 50], y[start : start + 50], np.unique(y)
+        )
+        for start in range(0, len(X), 50)
+    )
+    estimator = discriminant_from_statistics(stats, kind, **params)
+
+    np.testing.assert_allclose(
+        estimator.predict_proba(X), reference.predict_proba(X), atol=1e-8
+    )
+    np.testing.assert_array_equal(estimator.predict(X), reference.predict(X))
+    if kind == "lda":
+        np.testing.assert_allclose(
+            estimator.explained_variance_ratio_, reference.explained_variance_ratio_
+        )
+        # discriminant axes are defined up to sign
+        np.testing.assert_allclose(
+            np.abs(estimator.transform(X)), np.abs(reference.transform(X)), atol=1e-8
+        )
+
+
+def test_binary_lda_from_statistics(class_data):
+    X, y = class_data
+    keep = y != "c2"
+    X, y = X[keep], y[keep]
+    reference = LinearDiscriminantAnalysis(solver="eigen").fit(X, y)
+
+    estimator = discriminant_from_statistics(ClassStatistics.from_arrays(X, y), "lda")
+
+    np.testing.assert_allclose(
+        estimator.predict_proba(X), reference.predict_proba(X), atol=1e-8
+    )
+
+
+def test_stepwise_lambda_is_determinant_ratio(class_data):
+    X, y = class_data
+    result = stepwise_discriminant(X, y, direction="both", p_enter=0.2, p_remove=0.3)
+
+    stats = ClassStatistics.from_arrays(X, y)
+    within, total = stats.within_scatter(), stats.total_scatter()
+    index = [int(name[1:]) for name in result.selected]
+    expected = np.linalg.det(within[np.ix_(index, index)]) / np.linalg.det(
+        total[np.ix_(index, index)]
+    )
+
+    assert result.selected
+    assert result.wilks_lambda == pytest.approx(expected)
+    assert result.history["wilks_lambda"].iloc[-1] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("kind", ["lda", "qda"])
+def test_decision_regions_match_predict(class_data, kind):
+    X, y = class_data
+    pair = (0, 1)
+    bounds = (-4.0, 4.0, -4.0, 6.0)
+    regions = decision_regions(
+        ClassStatistics.from_arrays(X, y),
+        bounds,
+        kind=kind,
+        pair=pair,
+        resolution=64,
+        cache=False,
+    )
+
+    reference = _reference(kind).fit(X[:, pair], y)
+    xx, yy = np.meshgrid(regions.x, regions.y)
+    expected = reference.predict(np.c_[xx.ravel(), yy.ravel()]).reshape(xx.shape)
+
+    np.testing.assert_array_equal(regions.classes[regions.labels], expected)
+    assert regions.n_evaluated < xx.size
+
+
+def test_float32_statistics_match_float64(class_data):
+    X, y = class_data
+    expected = ClassStatistics.from_arrays(X.astype(np.float32).astype(np.float64), y)
+
+    stats = ClassStatistics.from_arrays(X.astype(np.float32), y)
+
+    assert stats.means.dtype == stats.scatter.dtype == np.float64
+    np.testing.assert_array_equal(stats.counts, expected.counts)
+    np.testing.assert_allclose(stats.means, expected.means)
+    np.testing.assert_allclose(stats.scatter, expected.scatter)
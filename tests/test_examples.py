@@ -0,0 +1,44 @@
+"""Smoke tests: the lazy `utils` exports and every example script, end to end."""
+
+import json
+import subprocess
+import sys
+import types
+
+import utils
+from utils.benchmark import REPO_ROOT
+from utils.logger import STAGE_MESSAGE_PREFIX
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True
+    )
+
+
+def test_exports_are_not_shadowed_by_submodules():
+    # a fresh interpreter: the first lookup imports the submodule
+    completed = _run(
+        "-c",
+        "from utils import n_factors_parallel, parallel_analysis; "
+        "assert callable(parallel_analysis), parallel_analysis",
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    for name in utils.__all__:
+        assert not isinstance(getattr(utils, name), types.ModuleType), name
+
+
+def test_every_example_runs(tmp_path):
+    report_path = tmp_path / "report.json"
+    completed = _run("-m", "utils.runner", "--output", str(report_path))
+    assert completed.returncode == 0, (
+        completed.stdout[-4000:] + completed.stderr[-4000:]
+    )
+
+    for result in json.loads(report_path.read_text())["examples"]:
+        assert STAGE_MESSAGE_PREFIX not in result["last_line"], result["example"]
+        assert result["stages"], result["example"]
+        for record in result["stages"]:
+            assert record["memory_source"] == "maxrss_growth"
+            assert record["peak_memory"] >= 0
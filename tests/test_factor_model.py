@@ -0,0 +1,89 @@
+"""CorrelationFactorModel, its sweep and factorability against factor_analyzer."""
+
+import numpy as np
+import pytest
+from factor_analyzer import FactorAnalyzer
+from factor_analyzer.factor_analyzer import (
+    calculate_bartlett_sphericity,
+    calculate_kmo,
+)
+
+from utils import CorrelationFactorModel, factorability
+
+
+@pytest.mark.parametrize("method", ["principal", "minres", "ml"])
+@pytest.mark.parametrize("rotation", [None, "varimax", "promax"])
+def test_fit_matches_factor_analyzer(factor_data, method, rotation):
+    reference = FactorAnalyzer(n_factors=2, method=method, rotation=rotation)
+    reference.fit(factor_data)
+
+    solution = CorrelationFactorModel.from_data(factor_data).fit(
+        2, method=method, rotation=rotation
+    )
+
+    np.testing.assert_allclose(solution.loadings_, reference.loadings_, atol=1e-4)
+    np.testing.assert_allclose(
+        solution.get_communalities(), reference.get_communalities(), atol=1e-4
+    )
+    if rotation == "promax":
+        np.testing.assert_allclose(solution.phi_, reference.phi_, atol=1e-4)
+        np.testing.assert_allclose(solution.structure_, reference.structure_, atol=1e-4)
+    np.testing.assert_allclose(
+        solution.transform(factor_data), reference.transform(factor_data), atol=1e-3
+    )
+
+
+def test_factorability_matches_factor_analyzer(factor_data):
+    diagnostics = factorability(factor_data)
+
+    chi_square, p_value = calculate_bartlett_sphericity(factor_data)
+    kmo_per_variable, kmo_total = calculate_kmo(factor_data)
+
+    assert diagnostics.chi_square == pytest.approx(chi_square)
+    assert diagnostics.p_value == pytest.approx(p_value, abs=1e-12)
+    np.testing.assert_allclose(diagnostics.kmo_per_variable, kmo_per_variable)
+    assert diagnostics.kmo_total == pytest.approx(kmo_total)
+
+
+def test_rotate_method_is_case_insensitive(factor_data):
+    unrotated = CorrelationFactorModel.from_data(factor_data).fit(2, method="minres")
+
+    upper, lower = unrotated.rotate("Promax"), unrotated.rotate("promax")
+
+    assert upper.rotation == "promax"
+    np.testing.assert_allclose(upper.rotation_matrix_, lower.rotation_matrix_)
+    np.testing.assert_allclose(upper.structure_, lower.structure_)
+
+
+@pytest.mark.parametrize("method", ["minres", "ml"])
+def test_warm_started_sweep_matches_cold_fits(factor_data, method):
+    model = CorrelationFactorModel.from_data(factor_data)
+
+    sweep = model.sweep(method=method)
+
+    assert list(sweep.table.columns) == ["rmsr", "chi_square", "dof", "p_value", "bic"]
+    assert list(sweep.table.index) == [1, 2, 3]
+    for k, solution in sweep.solutions.items():
+        np.testing.assert_allclose(
+            solution.loadings_, model.fit(k, method=method).loadings_, atol=1e-4
+        )
+
+
+def test_sweep_and_fit_do_not_depend_on_call_order(factor_data):
+    fit_first = CorrelationFactorModel.from_data(factor_data)
+    cold = fit_first.fit(2).loadings_
+    warm = fit_first.sweep().solutions[2].loadings_
+
+    sweep_first = CorrelationFactorModel.from_data(factor_data)
+    sweep_first.sweep()
+
+    np.testing.assert_array_equal(sweep_first.fit(2).loadings_, cold)
+    np.testing.assert_array_equal(sweep_first.sweep().solutions[2].loadings_, warm)
+
+
+def test_principal_sweep_shares_the_fit_cache(factor_data):
+    model = CorrelationFactorModel.from_data(factor_data)
+
+    sweep = model.sweep(method="principal")
+
+    assert sweep.solutions[2] is model.fit(2, method="principal")
@@ -0,0 +1,86 @@
+"""Precomputed factor-score coefficients against FactorAnalyzer.transform."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from factor_analyzer import FactorAnalyzer
+from sklearn.preprocessing import StandardScaler
+
+from utils import CorrelationFactorModel, FactorScorer
+
+FEATURES = [f"r{j}" for j in range(6)]
+
+
+def _raw(factor_data):
+    # returns-like raw columns: shifted and scaled per column
+    return factor_data * np.arange(1, 7) + np.linspace(-2, 3, 6)
+
+
+@pytest.mark.parametrize("rotation", [None, "varimax", "promax"])
+def test_regression_scores_match_factor_analyzer(factor_data, rotation):
+    raw = _raw(factor_data)
+    scaler = StandardScaler().fit(raw)
+    Xs = scaler.transform(raw)
+    reference = FactorAnalyzer(n_factors=2, method="principal", rotation=rotation)
+    reference.fit(Xs)
+
+    solution = CorrelationFactorModel.from_data(Xs).fit(
+        2, method="principal", rotation=rotation
+    )
+    scorer = FactorScorer.from_solution(solution, scaler, FEATURES)
+
+    np.testing.assert_allclose(
+        scorer.transform(raw), reference.transform(Xs), atol=1e-7
+    )
+    np.testing.assert_allclose(scorer.transform(raw), solution.transform(Xs), atol=1e-7)
+
+
+def test_bartlett_and_anderson_rubin_properties(factor_data):
+    Xs = StandardScaler().fit_transform(factor_data)
+    solution = CorrelationFactorModel.from_data(Xs).fit(2, rotation="varimax")
+
+    bartlett = FactorScorer.from_solution(solution, method="bartlett")
+    anderson_rubin = FactorScorer.from_solution(solution, method="anderson-rubin")
+
+    # Bartlett weights are conditionally unbiased: W'L = I
+    np.testing.assert_allclose(
+        bartlett.coefficients.T @ solution.loadings_, np.eye(2), atol=1e-10
+    )
+    # Anderson-Rubin scores are uncorrelated with unit variance
+    scores = anderson_rubin.transform(Xs)
+    np.testing.assert_allclose(scores.T @ scores / len(scores), np.eye(2), atol=1e-10)
+
+
+def test_saved_scorer_scores_files(factor_data, tmp_path):
+    raw = _raw(factor_data)
+    scaler = StandardScaler().fit(raw)
+    solution = CorrelationFactorModel.from_data(scaler.transform(raw)).fit(
+        2, rotation="varimax"
+    )
+    model_dir = FactorScorer.from_solution(solution, scaler, FEATURES).save(
+        tmp_path / "model"
+    )
+    scorer = FactorScorer.load(model_dir)
+    reference = solution.transform(scaler.transform(raw))
+
+    frame = pd.DataFrame(raw, columns=FEATURES)
+    frame.insert(0, "day", np.arange(len(frame)))
+    frame.to_csv(tmp_path / "returns.csv", index=False)
+    n_rows = scorer.score(
+        tmp_path / "returns.csv",
+        tmp_path / "scores.csv",
+        chunksize=70,
+        keep_columns=["day"],
+    )
+    scored = pd.read_csv(tmp_path / "scores.csv")
+
+    assert n_rows == len(raw)
+    assert list(scored.columns) == ["day", "Factor1", "Factor2"]
+    np.testing.assert_array_equal(scored["day"], np.arange(len(raw)))
+    np.testing.assert_allclose(scored[scorer.factors], reference, atol=1e-7)
+
+    np.save(tmp_path / "returns.npy", raw.astype(np.float32))
+    scorer.score_npy(tmp_path / "returns.npy", tmp_path / "scores.npy", block_rows=64)
+    scores32 = np.load(tmp_path / "scores.npy")
+    assert scores32.dtype == np.float32
+    np.testing.assert_allclose(scores32, reference, atol=1e-4)
@@ -0,0 +1,41 @@
+"""Batch rendering with and without forked workers."""
+
+import sys
+
+import numpy as np
+import pytest
+
+from utils import FigureBatch
+from utils.figures import fork_context
+
+
+@pytest.mark.parametrize("platform", ["linux", "darwin", "win32"])
+def test_fork_only_on_linux(monkeypatch, platform):
+    monkeypatch.setattr(sys, "platform", platform)
+
+    assert (fork_context() is not None) == (platform == "linux")
+
+
+@pytest.mark.parametrize("platform", ["linux", "darwin"])
+def test_render_and_skip_unchanged(monkeypatch, tmp_path, platform):
+    monkeypatch.setattr(sys, "platform", platform)
+    values = np.array([3.0, 1.0, 2.0])
+
+    def record() -> FigureBatch:
+        figures = FigureBatch(dpi=20, max_workers=2, enabled=True)
+        for name in ("a", "b"):
+            figures.add(
+                tmp_path / f"{name}.png",
+                "horizontal_bars",
+                (2, 2),
+                labels=list("xyz"),
+                values=values,
+            )
+        return figures
+
+    first = record().render()
+    second = record().render()
+
+    assert set(first.values()) == {"rendered"}
+    assert set(second.values()) == {"unchanged"}
+    assert (tmp_path / "a.png").stat().st_size > 0
@@ -0,0 +1,18 @@
+"""Stage records without tracemalloc."""
+
+import logging
+import tracemalloc
+
+from utils import stage
+
+
+def test_stage_reports_peak_rss_growth():
+    assert not tracemalloc.is_tracing()
+    logger = logging.getLogger("test_logger")
+
+    with stage("fit", logger) as timed:
+        pass
+
+    # growth of the process high-water mark, not the mark itself
+    assert timed.record.memory_source == "maxrss_growth"
+    assert timed.record.peak_memory == 0
@@ -0,0 +1,46 @@
+"""Parallel analysis thresholds, batch memory and worker independence."""
+
+import tracemalloc
+
+import numpy as np
+
+from utils import n_factors_parallel, parallel_analysis
+from utils.parallel_analysis import _default_batch_size
+
+
+def test_wide_batches_stay_within_the_memory_bound():
+    n_obs, n_features, max_batch_bytes = 100, 300, 8 * 1024**2
+    batch_size = _default_batch_size(n_obs, n_features, max_batch_bytes)
+    # the simulated data alone would allow 34 replicates per batch
+    assert 1 < batch_size < max_batch_bytes // (8 * n_obs * n_features)
+
+    tracemalloc.start()
+    try:
+        parallel_analysis(
+            n_obs, n_features, n_iter=batch_size, max_batch_bytes=max_batch_bytes
+        )
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak <= max_batch_bytes
+
+
+def test_workers_give_the_same_eigenvalues():
+    kwargs = {"n_iter": 30, "max_batch_bytes": 2 * 1024**2, "random_state": 7}
+
+    in_process = parallel_analysis(100, 150, **kwargs)
+    pooled = parallel_analysis(100, 150, max_workers=2, **kwargs)
+
+    np.testing.assert_array_equal(in_process[0], pooled[0])
+    np.testing.assert_array_equal(in_process[1], pooled[1])
+
+
+def test_random_eigenvalues_near_one_and_retention():
+    mean_eig, pct_eig = parallel_analysis(500, 5, n_iter=200, random_state=0)
+
+    assert np.all(np.diff(mean_eig) <= 0)
+    assert np.all(pct_eig >= mean_eig)
+    np.testing.assert_allclose(mean_eig.sum(), 5.0)
+    assert n_factors_parallel([2.5, 1.5, 0.5, 0.3, 0.2], pct_eig) == 2
+    assert n_factors_parallel([0.9, 0.8, 0.5, 0.3, 0.2], pct_eig) == 0
@@ -0,0 +1,36 @@
+"""Streaming PCA against scikit-learn's IncrementalPCA."""
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import IncrementalPCA
+from sklearn.preprocessing import StandardScaler
+
+from utils import stream_pca
+
+
+def test_stream_pca_matches_incremental_pca(factor_data, tmp_path):
+    columns = [f"x{j}" for j in range(factor_data.shape[1])]
+    path = tmp_path / "data.csv"
+    pd.DataFrame(factor_data, columns=columns).to_csv(path, index=False)
+
+    result = stream_pca(
+        path, n_components=3, scores_path=tmp_path / "scores.npy", chunksize=40
+    )
+
+    # same standardization and the same batches, in memory
+    Z = StandardScaler().fit_transform(factor_data)
+    reference = IncrementalPCA(n_components=3)
+    for start in range(0, len(Z), 40):
+        reference.partial_fit(Z[start : start + 40])
+
+    assert result.n_obs == len(factor_data)
+    np.testing.assert_allclose(result.mean, factor_data.mean(axis=0))
+    np.testing.assert_allclose(
+        result.model.explained_variance_, reference.explained_variance_, rtol=1e-8
+    )
+    np.testing.assert_allclose(
+        np.abs(result.model.components_), np.abs(reference.components_), atol=1e-8
+    )
+    np.testing.assert_allclose(
+        np.abs(np.load(result.scores_path)), np.abs(reference.transform(Z)), atol=1e-8
+    )
@@ -0,0 +1,76 @@
+"""Model registry keys and estimator round-trips."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.preprocessing import StandardScaler
+
+from utils import ModelRegistry, estimator_state, registry_key, restore_estimators
+
+
+def test_estimators_round_trip(class_data):
+    X, y = class_data
+    scaler = StandardScaler().fit(X)
+    lda = LinearDiscriminantAnalysis().fit(scaler.transform(X), y)
+
+    arrays, metadata = estimator_state(scaler=scaler, lda=lda)
+    restored = restore_estimators(arrays, metadata)
+
+    Z = restored["scaler"].transform(X)
+    np.testing.assert_allclose(Z, scaler.transform(X))
+    np.testing.assert_array_equal(restored["lda"].predict(Z), lda.predict(Z))
+
+
+@pytest.mark.parametrize(
+    "class_name",
+    ["os.system", "sklearnx.Estimator", "sklearn.utils.check_array"],
+)
+def test_only_sklearn_estimators_are_restored(class_name):
+    metadata = {
+        "estimators": {"model": {"class": class_name, "params": {}, "attributes": {}}}
+    }
+
+    with pytest.raises(ValueError, match="Refusing to restore model"):
+        restore_estimators({}, metadata)
+
+
+def test_registry_key_depends_on_content(class_data):
+    X, y = class_data
+
+    key = registry_key((X, y), ["a"], method="lda")
+
+    assert key == registry_key((X.copy(), y.copy()), ["a"], method="lda")
+    assert key != registry_key((X + 1e-9, y), ["a"], method="lda")
+    assert key != registry_key((X, y), ["a"], method="lda", params={"shrinkage": 0.1})
+
+
+def test_registry_key_hashes_files_by_content(class_data, tmp_path):
+    X, y = class_data
+    paths = [tmp_path / "train.csv", tmp_path / "labels.csv"]
+    pd.DataFrame(X).to_csv(paths[0], index=False)
+    pd.Series(y).to_csv(paths[1], index=False)
+    registry = ModelRegistry(tmp_path / "registry")
+
+    def fit():
+        return {"mean": pd.read_csv(paths[0]).to_numpy().mean(axis=0)}, {}
+
+    keys = [
+        registry_key(tuple(paths), method="lda"),
+        registry_key(tuple(str(path) for path in paths), method="lda"),
+        registry_key(X, params={"source": paths[0]}),
+    ]
+    first = registry.get_or_fit(keys[0], fit)
+    assert keys[1] == keys[0]
+
+    pd.DataFrame(X + 1).to_csv(paths[0], index=False)
+    edited = [
+        registry_key(tuple(paths), method="lda"),
+        registry_key(tuple(str(path) for path in paths), method="lda"),
+        registry_key(X, params={"source": paths[0]}),
+    ]
+    refit = registry.get_or_fit(edited[0], fit)
+
+    assert all(new != old for new, old in zip(edited, keys, strict=True))
+    assert not refit.hit
+    np.testing.assert_allclose(refit.arrays["mean"], first.arrays["mean"] + 1)
@@ -0,0 +1,47 @@
+"""Rolling-window factor loadings against a direct refit of every window."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from factor_analyzer import FactorAnalyzer
+
+from utils import rolling_factor_loadings
+from utils.rolling import _match_factors
+
+
+@pytest.mark.parametrize("method", ["principal", "minres"])
+@pytest.mark.parametrize("expanding", [False, True])
+def test_windows_match_direct_refit(factor_data, method, expanding):
+    X = pd.DataFrame(factor_data, columns=list("abcdef"))
+    result = rolling_factor_loadings(
+        X, 2, window=100, method=method, expanding=expanding, step=25, resync=3
+    )
+
+    ends = range(100, len(X) + 1, 25)
+    assert list(result.index) == [end - 1 for end in ends]
+    for i, end in enumerate(ends):
+        start = 0 if expanding else end - 100
+        reference = FactorAnalyzer(2, method=method, rotation="varimax")
+        reference.fit(factor_data[start:end])
+
+        np.testing.assert_allclose(
+            result.communalities.iloc[i], reference.get_communalities(), atol=1e-4
+        )
+        np.testing.assert_allclose(
+            _match_factors(reference.loadings_, result.loadings[i]),
+            result.loadings[i],
+            atol=1e-4,
+        )
+
+
+def test_factors_keep_their_order_and_sign(factor_data):
+    result = rolling_factor_loadings(factor_data, 2, window=100, step=10)
+
+    # consecutive windows share most rows, so matched loadings barely move
+    assert np.abs(np.diff(result.loadings, axis=0)).max() < 0.2
+    assert result.loadings_frame(0).shape == (len(result.index), 6)
+
+
+def test_window_must_exceed_the_variables(factor_data):
+    with pytest.raises(ValueError, match="window must exceed"):
+        rolling_factor_loadings(factor_data, 2, window=6)
@@ -0,0 +1,65 @@
+"""Memoized rotations against factor_analyzer's Rotator."""
+
+import numpy as np
+import pytest
+from factor_analyzer.rotator import Rotator
+
+from utils import clear_rotation_cache, rotate_loadings, rotation_cache_info
+from utils.rotation import _cache
+
+
+@pytest.fixture
+def loadings(factor_data):
+    clear_rotation_cache()
+    yield np.linalg.svd(np.corrcoef(factor_data, rowvar=False))[0][:, :2]
+    clear_rotation_cache()
+
+
+@pytest.mark.parametrize("method", ["varimax", "promax", "oblimin"])
+def test_rotation_matches_rotator(loadings, method):
+    result = rotate_loadings(loadings, method)
+
+    reference = Rotator(method=method)
+    np.testing.assert_allclose(result.loadings, reference.fit_transform(loadings))
+    np.testing.assert_allclose(result.rotation_matrix, reference.rotation_)
+    assert (result.phi is None) == (reference.phi_ is None)
+
+
+def test_repeated_rotation_is_a_cache_hit(loadings):
+    first = rotate_loadings(loadings, "promax", power=4)
+    # equal content in a new array, and a different method name case
+    second = rotate_loadings(loadings.copy(), "Promax", power=4)
+    other = rotate_loadings(loadings, "promax", power=3)
+
+    assert second is first
+    assert other is not first
+    assert rotation_cache_info()["hits"] == 1
+    assert rotation_cache_info()["misses"] == 2
+
+
+def test_cached_results_are_read_only(loadings):
+    result = rotate_loadings(loadings, "promax")
+
+    for array in (result.loadings, result.rotation_matrix, result.phi):
+        with pytest.raises(ValueError, match="read-only"):
+            array[0, 0] = 0.0
+    assert loadings.flags.writeable
+
+
+def test_least_recently_used_entry_is_evicted(loadings, monkeypatch):
+    monkeypatch.setattr(_cache, "maxsize", 2)
+    varimax = rotate_loadings(loadings, "varimax")
+    rotate_loadings(loadings, "quartimax")
+    rotate_loadings(loadings, "varimax")  # refreshes varimax
+    rotate_loadings(loadings, "equamax")  # evicts quartimax
+
+    assert rotate_loadings(loadings, "varimax") is varimax
+    misses = rotation_cache_info()["misses"]
+    rotate_loadings(loadings, "quartimax")
+    assert rotation_cache_info()["misses"] == misses + 1
+
+
+def test_uncached_rotation_leaves_the_cache_alone(loadings):
+    rotate_loadings(loadings, "varimax", cache=False)
+
+    assert rotation_cache_info()["hits"] == rotation_cache_info()["misses"] == 0
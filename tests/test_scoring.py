@@ -0,0 +1,96 @@
+"""Saved LDA/QDA models scored from CSV files against scikit-learn."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.discriminant_analysis import (
+    LinearDiscriminantAnalysis,
+    QuadraticDiscriminantAnalysis,
+)
+from sklearn.preprocessing import StandardScaler
+
+from utils import DiscriminantScorer, save_discriminant_model
+from utils.scoring import main
+
+FEATURES = ["a", "b", "c", "d"]
+
+
+def _fit(X, y, model):
+    scaler = StandardScaler().fit(X)
+    return scaler, model.fit(scaler.transform(X), y)
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        LinearDiscriminantAnalysis(),
+        LinearDiscriminantAnalysis(solver="lsqr", shrinkage=0.2),
+        QuadraticDiscriminantAnalysis(reg_param=0.1),
+    ],
+    ids=["lda", "lda-shrinkage", "qda"],
+)
+def test_score_matches_predict_proba(class_data, tmp_path, model):
+    X, y = class_data
+    scaler, model = _fit(X, y, model)
+    save_discriminant_model(tmp_path / "model", scaler, model, FEATURES)
+    frame = pd.DataFrame(X, columns=FEATURES)
+    frame.insert(0, "id", np.arange(len(frame)))
+    frame.to_csv(tmp_path / "rows.csv", index=False)
+
+    scorer = DiscriminantScorer.load(tmp_path / "model")
+    n_rows = scorer.score(tmp_path / "rows.csv", chunksize=70, keep_columns=["id"])
+
+    scored = pd.read_csv(tmp_path / "rows_scored.csv")
+    expected = model.predict_proba(scaler.transform(X))
+    assert n_rows == len(X)
+    assert list(scored.columns) == [
+        "id",
+        "predicted",
+        "proba_c0",
+        "proba_c1",
+        "proba_c2",
+    ]
+    np.testing.assert_array_equal(scored["id"], np.arange(len(X)))
+    np.testing.assert_allclose(scored.iloc[:, 2:].to_numpy(), expected, atol=1e-8)
+    np.testing.assert_array_equal(
+        scored["predicted"], model.predict(scaler.transform(X))
+    )
+
+
+def test_integer_labels_survive_the_round_trip(class_data, tmp_path):
+    X, y = class_data
+    labels = np.unique(y, return_inverse=True)[1]
+    keep = labels < 2
+    scaler, model = _fit(X[keep], labels[keep], LinearDiscriminantAnalysis())
+    save_discriminant_model(tmp_path / "model", scaler, model, FEATURES)
+
+    scorer = DiscriminantScorer.load(tmp_path / "model")
+
+    assert scorer.classes.dtype.kind == "i"
+    np.testing.assert_array_equal(
+        scorer.predict(X[keep]), model.predict(scaler.transform(X[keep]))
+    )
+    assert np.mean(scorer.predict(X[keep]) == labels[keep]) > 0.5
+
+
+def test_command_line(class_data, tmp_path, capsys):
+    X, y = class_data
+    scaler, model = _fit(X, y, QuadraticDiscriminantAnalysis())
+    save_discriminant_model(tmp_path / "model", scaler, model, FEATURES)
+    pd.DataFrame(X, columns=FEATURES).to_csv(tmp_path / "rows.csv", index=False)
+
+    main(
+        [
+            str(tmp_path / "model"),
+            str(tmp_path / "rows.csv"),
+            str(tmp_path / "out.csv"),
+            "--chunksize",
+            "50",
+        ]
+    )
+
+    assert capsys.readouterr().out.strip() == f"Scored {len(X)} rows"
+    scored = pd.read_csv(tmp_path / "out.csv")
+    np.testing.assert_array_equal(
+        scored["predicted"], model.predict(scaler.transform(X))
+    )
@@ -0,0 +1,62 @@
+"""Chunked moments and correlation against in-memory NumPy."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import RunningMoments, correlation_eigen, streaming_correlation
+
+
+def test_streaming_correlation_matches_corrcoef(factor_data, tmp_path):
+    frame = pd.DataFrame(factor_data, columns=[f"x{j}" for j in range(6)])
+    frame.iloc[[3, 50, 299], [0, 2, 5]] = np.nan
+    frame.insert(0, "rownames", [f"r{i}" for i in range(len(frame))])
+    path = tmp_path / "data.csv"
+    frame.to_csv(path, index=False)
+
+    corr, n_obs = streaming_correlation(path, chunksize=37)
+
+    complete = frame.iloc[:, 1:].dropna().to_numpy()
+    assert n_obs == len(complete) == 297
+    np.testing.assert_allclose(corr, np.corrcoef(complete, rowvar=False), atol=1e-12)
+
+
+def test_merge_and_rank_one_updates(factor_data):
+    whole = RunningMoments(6).update(factor_data)
+    merged = (
+        RunningMoments(6)
+        .update(factor_data[:120])
+        .merge(RunningMoments(6).update(factor_data[120:]))
+    )
+    rowwise = RunningMoments(6)
+    for row in factor_data[:50]:
+        rowwise.add(row)
+    for row in factor_data[:10]:
+        rowwise.remove(row)
+
+    np.testing.assert_allclose(merged.mean, factor_data.mean(axis=0))
+    np.testing.assert_allclose(merged.comoment, whole.comoment)
+    np.testing.assert_allclose(
+        merged.covariance(), np.cov(factor_data, rowvar=False), atol=1e-12
+    )
+    np.testing.assert_allclose(
+        rowwise.covariance(), np.cov(factor_data[10:50], rowvar=False), atol=1e-12
+    )
+
+
+def test_constant_column_has_no_correlation():
+    moments = RunningMoments(2).update(np.c_[np.arange(5.0), np.ones(5)])
+
+    with pytest.raises(ValueError, match="constant"):
+        moments.correlation()
+
+
+def test_correlation_eigen_is_descending(factor_data):
+    corr = np.corrcoef(factor_data, rowvar=False)
+
+    values, components = correlation_eigen(corr)
+
+    assert np.all(np.diff(values) <= 0)
+    np.testing.assert_allclose(
+        components @ corr @ components.T, np.diag(values), atol=1e-12
+    )
@@ -0,0 +1,63 @@
+"""Chunked synthetic data: reproducibility and exact class proportions."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.synthetic import (
+    allocate,
+    population_counts,
+    sample_gaussian_mixture,
+    write_chunked,
+)
+
+PROPORTIONS = [0.75, 0.2, 0.05]
+
+
+def _make_chunk(rng, start, size):
+    means = [np.zeros(2), np.ones(2), np.full(2, 3.0)]
+    covs = [np.eye(2)] * 3
+    X, labels = sample_gaussian_mixture(rng, size, means, covs, PROPORTIONS)
+    frame = pd.DataFrame(X, columns=["x", "y"])
+    frame.insert(0, "row", np.arange(start, start + size))
+    frame["label"] = labels
+    return frame
+
+
+def test_same_seed_same_file(tmp_path):
+    first, second, other = tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "c.csv"
+
+    assert (
+        write_chunked(first, _make_chunk, 1050, chunksize=200, random_state=3) == 1050
+    )
+    write_chunked(second, _make_chunk, 1050, chunksize=200, random_state=3)
+    write_chunked(other, _make_chunk, 1050, chunksize=200, random_state=4)
+
+    assert first.read_bytes() == second.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
+    frame = pd.read_csv(first)
+    np.testing.assert_array_equal(frame["row"], np.arange(1050))
+
+
+def test_population_counts_match_the_file(tmp_path):
+    path = tmp_path / "data.csv"
+    write_chunked(path, _make_chunk, 1050, chunksize=200, random_state=0)
+
+    counts = population_counts(1050, PROPORTIONS, chunksize=200)
+
+    labels = pd.read_csv(path)["label"]
+    np.testing.assert_array_equal(counts, np.bincount(labels, minlength=3))
+    assert counts.sum() == 1050
+
+
+@pytest.mark.parametrize("size", [1, 7, 100, 1001])
+def test_allocate_is_exact(size):
+    counts = allocate(size, PROPORTIONS)
+
+    assert counts.sum() == size
+    assert np.all(np.abs(counts - np.asarray(PROPORTIONS) * size) < 1)
+
+
+def test_rows_must_be_positive(tmp_path):
+    with pytest.raises(ValueError, match="positive"):
+        write_chunked(tmp_path / "x.csv", _make_chunk, 0)
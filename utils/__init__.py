@@ -1,13 +1,314 @@
-"""Utilities package exposing logging setup for course examples.
+"""Utilities package shared by the course examples.
 
-This package provides a single public helper:
+Public helpers:
 
     from utils import setup_logger
 
-which returns a configured `logging.Logger` instance with a consistent
-format used across all educational scripts. Having this module ensures
+returns a configured `logging.Logger` instance with a consistent
+format used across all educational scripts; `next_stage`, `stage` and
+`end_stages` record wall time, CPU time and peak memory per named stage as
+structured log records and, optionally, a Chrome trace-event file. Having this module ensures
 that Pylance and static analyzers can resolve the import `utils`.
+
+    from utils import load_dataset
+
+reads an example CSV through a memory-mapped `.npy` cache that is refreshed
+when the file changes, dropping a leading `rownames`/`index` column.
+
+    from utils import streaming_correlation, kmo_from_corr
+
+compute the correlation matrix of a CSV file chunk by chunk and derive the
+factorability diagnostics from it, for datasets that do not fit in memory;
+`factorability` returns Bartlett's test, KMO/MSA and the anti-image matrices
+from a single Cholesky factorization of the (given or computed) matrix.
+
+    from utils import CorrelationFactorModel
+
+fits principal, MINRES and ML factor models from a correlation matrix
+computed once (`sweep` fits k = 1..K warm-started and tabulates RMSR,
+chi-square and BIC per k); `rotate_loadings` applies cached varimax/
+quartimax/promax/oblimin rotations to existing loadings without refitting, and
+
+    from utils import parallel_analysis
+
+gives random-data eigenvalue thresholds for factor retention;
+`bootstrap_loadings` adds percentile confidence intervals for the rotated
+loadings, computed on a process pool, and `rolling_factor_loadings` tracks
+loadings and communalities over sliding or expanding windows.
+
+    from utils import FactorScorer
+
+precomputes regression, Bartlett or Anderson-Rubin factor-score
+coefficients from a fitted solution and its scaler once, saves them as
+`.npy` arrays and scores new rows in memory, from CSV or from `.npy` files
+block by block.
+
+    from utils import ModelRegistry, registry_key
+
+stores fitted models (loadings, eigenvalues, scalers, LDA scalings) as
+`.npy`/JSON entries keyed by a hash of the data, features, preprocessing,
+method and hyperparameters, with LRU eviction by size and hit/miss
+statistics; `estimator_state`/`restore_estimators` round-trip fitted
+scikit-learn estimators through that format.
+
+    from utils import fit_pca
+
+runs PCA with a full, randomized, ARPACK or incremental solver chosen from
+the data shape and the number of components requested (`choose_pca_solver`);
+`stream_pca` standardizes and fits an incremental PCA over a CSV file in
+chunks and writes the scores chunk by chunk, within a fixed memory budget.
+
+    from utils import precision_drift
+
+compares the float32 and float64 PCA/FA paths on the same data;
+`load_dataset(..., dtype="float32")`, `CorrelationFactorModel.from_data` and
+`ClassStatistics.from_arrays` keep float32 data single precision while
+accumulating moments in float64.
+
+    from utils import save_discriminant_model, DiscriminantScorer
+
+persist a fitted StandardScaler + LDA/QDA pair as `.npy` arrays and score
+large CSV files chunk by chunk;
+
+    from utils import compare_discriminants
+
+cross-validates LDA and QDA variants on shared folds, fitting each from
+cached per-fold class statistics (`ClassStatistics`, `GaussianDiscriminant`);
+`class_statistics_from_csv` / `class_statistics_from_shards` accumulate the
+same statistics from chunked CSV files and `discriminant_from_statistics`
+builds scikit-learn LDA/QDA estimators from them. `stepwise_discriminant`
+selects variables by Wilks' lambda using sweeps of the scatter matrices, and
+`decision_regions` labels a 2-D grid for boundary plots, evaluating the
+discriminants in closed form only where the class changes.
+
+    from utils import FigureBatch
+
+records figures during an analysis and renders them afterwards on a process
+pool with the Agg canvas, skipping figures whose inputs did not change;
+scripts that plot inline check `plots_enabled()` before importing pyplot.
+`write_chunked` / `sample_gaussian_mixture` back the `fetch_*.py` generators
+at any row count.
+
+Submodules are imported on first use of one of their names (PEP 562), so
+`import utils` stays cheap and a script only pays for the helpers it
+imports: a headless run (`--no-plots`) never loads Matplotlib or seaborn.
+`python -m utils.benchmark --startup` reports the import time of each
+script against a budget.
 """
-from .logger import setup_logger  # re-export for convenience
 
-__all__ = ["setup_logger"]
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .bootstrap import BootstrapResult, bootstrap_loadings
+    from .boundaries import DecisionRegions, decision_regions, plot_decision_regions
+    from .crossval import DiscriminantFolds, compare_discriminants
+    from .datasets import clear_dataset_cache, load_dataset
+    from .diagnostics import (
+        Factorability,
+        bartlett_sphericity_from_corr,
+        factorability,
+        kmo_from_corr,
+    )
+    from .discriminant import (
+        ClassStatistics,
+        GaussianDiscriminant,
+        class_statistics_from_csv,
+        class_statistics_from_shards,
+        discriminant_from_statistics,
+    )
+    from .factor_model import (
+        CorrelationFactorModel,
+        FactorSolution,
+        FactorSweep,
+        extract_loadings,
+        max_identified_factors,
+    )
+    from .factor_scoring import FactorScorer, factor_score_coefficients
+    from .figures import FigureBatch, plots_enabled
+    from .logger import StageRecord, end_stages, next_stage, setup_logger, stage
+    from .parallel_analysis import n_factors_parallel, parallel_analysis
+    from .pca import PCAFit, StreamingPCAResult, choose_pca_solver, fit_pca, stream_pca
+    from .precision import PrecisionDrift, precision_drift, standardize
+    from .registry import (
+        ModelRegistry,
+        RegistryEntry,
+        RegistryStats,
+        estimator_state,
+        registry_key,
+        restore_estimators,
+    )
+    from .rolling import RollingFactorResult, rolling_factor_loadings
+    from .rotation import clear_rotation_cache, rotate_loadings, rotation_cache_info
+    from .scoring import DiscriminantScorer, save_discriminant_model
+    from .stepwise import (
+        StepwiseResult,
+        stepwise_discriminant,
+        stepwise_from_statistics,
+    )
+    from .streaming import (
+        RunningMoments,
+        correlation_eigen,
+        iter_csv_blocks,
+        stream_moments,
+        streaming_correlation,
+    )
+    from .synthetic import sample_gaussian_mixture, write_chunked
+
+# public name -> submodule defining it
+_EXPORTS = {
+    "BootstrapResult": "bootstrap",
+    "bootstrap_loadings": "bootstrap",
+    "DecisionRegions": "boundaries",
+    "decision_regions": "boundaries",
+    "plot_decision_regions": "boundaries",
+    "DiscriminantFolds": "crossval",
+    "compare_discriminants": "crossval",
+    "clear_dataset_cache": "datasets",
+    "load_dataset": "datasets",
+    "bartlett_sphericity_from_corr": "diagnostics",
+    "kmo_from_corr": "diagnostics",
+    "Factorability": "diagnostics",
+    "factorability": "diagnostics",
+    "ClassStatistics": "discriminant",
+    "GaussianDiscriminant": "discriminant",
+    "class_statistics_from_csv": "discriminant",
+    "class_statistics_from_shards": "discriminant",
+    "discriminant_from_statistics": "discriminant",
+    "CorrelationFactorModel": "factor_model",
+    "FactorSolution": "factor_model",
+    "FactorSweep": "factor_model",
+    "extract_loadings": "factor_model",
+    "max_identified_factors": "factor_model",
+    "FactorScorer": "factor_scoring",
+    "factor_score_coefficients": "factor_scoring",
+    "FigureBatch": "figures",
+    "plots_enabled": "figures",
+    "StageRecord": "logger",
+    "end_stages": "logger",
+    "next_stage": "logger",
+    "setup_logger": "logger",
+    "stage": "logger",
+    "n_factors_parallel": "parallel_analysis",
+    "parallel_analysis": "parallel_analysis",
+    "PCAFit": "pca",
+    "choose_pca_solver": "pca",
+    "fit_pca": "pca",
+    "StreamingPCAResult": "pca",
+    "stream_pca": "pca",
+    "PrecisionDrift": "precision",
+    "precision_drift": "precision",
+    "standardize": "precision",
+    "ModelRegistry": "registry",
+    "RegistryEntry": "registry",
+    "RegistryStats": "registry",
+    "estimator_state": "registry",
+    "registry_key": "registry",
+    "restore_estimators": "registry",
+    "RollingFactorResult": "rolling",
+    "rolling_factor_loadings": "rolling",
+    "clear_rotation_cache": "rotation",
+    "rotate_loadings": "rotation",
+    "rotation_cache_info": "rotation",
+    "DiscriminantScorer": "scoring",
+    "save_discriminant_model": "scoring",
+    "StepwiseResult": "stepwise",
+    "stepwise_discriminant": "stepwise",
+    "stepwise_from_statistics": "stepwise",
+    "RunningMoments": "streaming",
+    "correlation_eigen": "streaming",
+    "iter_csv_blocks": "streaming",
+    "stream_moments": "streaming",
+    "streaming_correlation": "streaming",
+    "sample_gaussian_mixture": "synthetic",
+    "write_chunked": "synthetic",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{module_name}", __name__)
+    # Importing the submodule binds it as a package attribute, which would
+    # shadow an export of the same name (`parallel_analysis`); bind all of the
+    # submodule's exports over it.
+    for export, source in _EXPORTS.items():
+        if source == module_name:
+            globals()[export] = getattr(module, export)
+    return globals()[name]
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+__all__ = [
+    "BootstrapResult",
+    "ClassStatistics",
+    "CorrelationFactorModel",
+    "DecisionRegions",
+    "DiscriminantFolds",
+    "DiscriminantScorer",
+    "FactorScorer",
+    "FactorSolution",
+    "FactorSweep",
+    "Factorability",
+    "FigureBatch",
+    "GaussianDiscriminant",
+    "ModelRegistry",
+    "PCAFit",
+    "PrecisionDrift",
+    "RegistryEntry",
+    "RegistryStats",
+    "RollingFactorResult",
+    "RunningMoments",
+    "StageRecord",
+    "StepwiseResult",
+    "StreamingPCAResult",
+    "bartlett_sphericity_from_corr",
+    "bootstrap_loadings",
+    "choose_pca_solver",
+    "class_statistics_from_csv",
+    "class_statistics_from_shards",
+    "clear_dataset_cache",
+    "clear_rotation_cache",
+    "compare_discriminants",
+    "correlation_eigen",
+    "decision_regions",
+    "discriminant_from_statistics",
+    "end_stages",
+    "estimator_state",
+    "extract_loadings",
+    "factor_score_coefficients",
+    "factorability",
+    "fit_pca",
+    "iter_csv_blocks",
+    "kmo_from_corr",
+    "load_dataset",
+    "max_identified_factors",
+    "n_factors_parallel",
+    "next_stage",
+    "parallel_analysis",
+    "plot_decision_regions",
+    "plots_enabled",
+    "precision_drift",
+    "registry_key",
+    "restore_estimators",
+    "rolling_factor_loadings",
+    "rotate_loadings",
+    "rotation_cache_info",
+    "sample_gaussian_mixture",
+    "save_discriminant_model",
+    "setup_logger",
+    "stage",
+    "standardize",
+    "stepwise_discriminant",
+    "stepwise_from_statistics",
+    "stream_moments",
+    "stream_pca",
+    "streaming_correlation",
+    "write_chunked",
+]
@@ -0,0 +1,562 @@
+"""Benchmark harness for the course analysis pipelines.
+
+Usage pattern:
+
+    python -m utils.benchmark                                   # all pipelines, n = 1e3, 1e5, 1e7
+    python -m utils.benchmark --pipelines kuiper_fa marketing_lda --sizes 1000 100000
+    python -m utils.benchmark --output results.json --compare baseline.json
+    python -m utils.benchmark --scripts                         # the example scripts themselves
+    python -m utils.benchmark --startup                         # import time of each script
+    python -m utils.benchmark --precision float32               # data held in float32
+
+Purpose:
+- Run every example pipeline end to end (PCA and FA for the Chapter 4
+  datasets, LDA and QDA for the Chapter 5 datasets) on synthetic data of
+  increasing size, produced by the `fetch_*.py` generators. The scripts
+  read the CSV next to them and include fixed-size extras (bootstraps,
+  factor-count sweeps, cross-validation, saved models), so the size sweep
+  runs condensed versions of their pipelines instead: the same `utils`
+  calls (`load_dataset`, `StandardScaler`, `fit_pca`, `CorrelationFactorModel`
+  with varimax, LDA/QDA) on every numeric column except row identifiers
+  (`ID_COLUMNS`).
+- `--scripts` runs the example scripts themselves, unchanged, on their
+  shipped datasets: each one through `utils.runner.run_example` in a fresh
+  interpreter, with the stage timings it reports through
+  `utils.logger.next_stage`. A script that fails makes the exit code 1, so
+  a broken example cannot pass unnoticed.
+- Record wall time, peak RSS and per-stage timings (load, scale, fit,
+  rotate, plot for the pipelines; the scripts' own stages for `--scripts`)
+  for each case in a JSON results file.
+- Compare a run against a stored baseline and flag cases or stages whose
+  time or memory grew by more than a tolerance; the exit code is 1 when
+  any regression is found, so the comparison can gate CI.
+- `--startup` measures what each analysis script pays before its first
+  line of analysis: its top-level imports run under `python -X importtime`
+  in a fresh interpreter with plots disabled (`MA2003B_NO_PLOTS=1`). The
+  report lists the import time, the heavy modules that got loaded and
+  whether the script fits in `STARTUP_BUDGET`; the exit code is 1 when one
+  does not.
+
+Each case runs in a fresh interpreter so peak RSS is measured per case.
+Datasets are generated once per (dataset, n) into a work directory and
+reused across pipelines and runs. Plots are rendered off-screen (Agg) and
+draw at most `PLOT_MAX_POINTS` points, so the plot stage measures figure
+construction rather than rasterizing millions of markers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .precision import PRECISIONS
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LESSONS = REPO_ROOT / "lessons"
+
+DEFAULT_SIZES = (1_000, 100_000, 10_000_000)
+DEFAULT_TOLERANCE = 0.20
+PLOT_MAX_POINTS = 10_000
+
+# dataset -> generator script (all accept -n and --output)
+GENERATORS = {
+    "educational": "4_Factor_Analysis/code/educational_example/fetch_educational.py",
+    "hospitals": "4_Factor_Analysis/code/hospitals_example/fetch_hospitals.py",
+    "invest": "4_Factor_Analysis/code/invest_example/fetch_invest.py",
+    "kuiper": "4_Factor_Analysis/code/kuiper_example/fetch_kuiper.py",
+    "marketing": "5_Discriminant_Analysis/code/marketing_segmentation/fetch_marketing.py",
+    "quality": "5_Discriminant_Analysis/code/quality_control/fetch_quality.py",
+    "sports": "5_Discriminant_Analysis/code/sports_analytics/fetch_sports.py",
+}
+
+# pipeline -> (dataset, method)
+PIPELINES = {
+    **{
+        f"{name}_{method}": (name, method)
+        for name in ("educational", "hospitals", "invest", "kuiper")
+        for method in ("pca", "fa")
+    },
+    **{
+        f"{name}_{method}": (name, method)
+        for name in ("marketing", "quality", "sports")
+        for method in ("lda", "qda")
+    },
+}
+
+# seconds of top-level imports allowed per script in a headless run
+STARTUP_BUDGET = 1.5
+
+# modules worth naming in the startup report; the first two should never
+# load when plots are disabled
+HEAVY_MODULES = (
+    "matplotlib.pyplot",
+    "seaborn",
+    "sklearn.metrics",
+    "sklearn.model_selection",
+    "sklearn.decomposition",
+    "scipy.optimize",
+    "factor_analyzer",
+)
+PLOT_MODULES = ("matplotlib.pyplot", "seaborn")
+
+# factors extracted / components plotted, as in the scripts
+N_FACTORS = {"educational": 2, "hospitals": 2, "invest": 2, "kuiper": 2}
+
+# numeric columns that identify rows rather than measure anything
+ID_COLUMNS = {"kuiper": ("designation",)}
+
+
+class _StageTimer:
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB (NaN where unavailable)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def dataset_path(work_dir: Path, dataset: str, n: int) -> Path:
+    """Generate (once) and return the CSV for `dataset` with `n` rows."""
+    path = work_dir / f"{dataset}_{n}.csv"
+    if not path.exists():
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])
+            ),
+        }
+        subprocess.run(
+            [
+                sys.executable,
+                str(LESSONS / GENERATORS[dataset]),
+                "-n",
+                str(n),
+                "--output",
+                str(path),
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            env=env,
+        )
+    return path
+
+
+def analysis_scripts() -> list[Path]:
+    """Every example analysis script (the `fetch_*.py` generators excluded)."""
+    return sorted(
+        p for p in LESSONS.glob("*/code/*/*.py") if not p.name.startswith("fetch_")
+    )
+
+
+def _import_block(script: Path) -> str:
+    """The top-level import statements of `script`, as source."""
+    tree = ast.parse(script.read_text())
+    imports = [
+        node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def measure_startup(script: Path) -> dict[str, Any]:
+    """Import time of `script` in a fresh, headless interpreter.
+
+    Parses `-X importtime` output: `import_time` is the sum of the cumulative
+    times of top-level imports, `heavy` the `HEAVY_MODULES` that loaded.
+    """
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])
+        ),
+        "MA2003B_NO_PLOTS": "1",
+        "MPLBACKEND": "Agg",
+    }
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _import_block(script)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=script.parent,
+    )
+    total_us = 0
+    loaded = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        name = name[1:]  # one separator space, then two per nesting level
+        loaded.add(name.strip())
+        if not name.startswith(" "):
+            total_us += int(cumulative)
+    return {
+        "script": str(script.relative_to(REPO_ROOT)),
+        "import_time": total_us / 1e6,
+        "heavy": [module for module in HEAVY_MODULES if module in loaded],
+    }
+
+
+def startup_report(
+    scripts: Sequence[Path], budget: float = STARTUP_BUDGET, log: Any | None = None
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """Measure every script; returns the measurements and budget violations."""
+    results, violations = [], []
+    for script in scripts:
+        result = measure_startup(script)
+        result["within_budget"] = result["import_time"] <= budget
+        results.append(result)
+        if not result["within_budget"]:
+            violations.append(
+                f"{result['script']}: {result['import_time']:.3f}s > {budget:.3f}s"
+            )
+        if log is not None:
+            plots = [m for m in result["heavy"] if m in PLOT_MODULES]
+            log.info(
+                f"{script.name:<22} {result['import_time']:7.3f}s "
+                f"{'ok ' if result['within_budget'] else 'OVER'} "
+                f"heavy: {', '.join(result['heavy']) or '-'}"
+                + (
+                    f" (plotting loaded while headless: {', '.join(plots)})"
+                    if plots
+                    else ""
+                )
+            )
+    return results, violations
+
+
+def _plot(scores: np.ndarray, spectrum: np.ndarray | None = None) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(10, 4))
+    if spectrum is not None:
+        axes[0].plot(np.arange(1, len(spectrum) + 1), spectrum, "o-")
+    step = max(1, len(scores) // PLOT_MAX_POINTS)
+    axes[1].scatter(scores[::step, 0], scores[::step, -1], s=5, alpha=0.5)
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def run_case(
+    pipeline: str, path: Path, cache_dir: Path, precision: str = "float64"
+) -> dict[str, Any]:
+    """Run one pipeline on one CSV in this process and return its timings."""
+    from sklearn.preprocessing import StandardScaler
+
+    from .datasets import load_dataset
+
+    dataset, method = PIPELINES[pipeline]
+    timer = _StageTimer()
+    start = time.perf_counter()
+
+    with timer.stage("load"):
+        frame = load_dataset(path, keep_index=dataset == "invest", cache_root=cache_dir)
+        if dataset == "invest":
+            frame = frame.pct_change().dropna()
+        frame = frame.drop(columns=list(ID_COLUMNS.get(dataset, ())))
+        labels = frame.select_dtypes(exclude="number")
+        X = frame.select_dtypes(include="number").to_numpy(dtype=precision)
+
+    with timer.stage("scale"):
+        X_scaled = StandardScaler().fit_transform(X)
+
+    if method == "pca":
+        from .pca import fit_pca
+
+        with timer.stage("fit"):
+            pca, scores, _ = fit_pca(X_scaled)
+        with timer.stage("plot"):
+            _plot(scores, pca.explained_variance_)
+    elif method == "fa":
+        from .factor_model import CorrelationFactorModel
+
+        with timer.stage("fit"):
+            model = CorrelationFactorModel.from_data(X_scaled)
+            unrotated = model.fit(N_FACTORS[dataset], method="principal")
+        with timer.stage("rotate"):
+            rotated = unrotated.rotate("varimax")
+        with timer.stage("plot"):
+            _plot(rotated.transform(X_scaled), model.eigenvalues)
+    else:
+        from sklearn.discriminant_analysis import (
+            LinearDiscriminantAnalysis,
+            QuadraticDiscriminantAnalysis,
+        )
+
+        y = labels.iloc[:, -1].to_numpy()
+        with timer.stage("fit"):
+            estimator = (
+                LinearDiscriminantAnalysis()
+                if method == "lda"
+                else QuadraticDiscriminantAnalysis()
+            )
+            estimator.fit(X_scaled, y)
+            posteriors = estimator.predict_proba(X_scaled)
+        with timer.stage("plot"):
+            scores = estimator.transform(X_scaled) if method == "lda" else posteriors
+            _plot(scores)
+
+    return {
+        "pipeline": pipeline,
+        "n": len(X),
+        "precision": precision,
+        "wall_time": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": timer.stages,
+    }
+
+
+def run_script_case(script: Path) -> dict[str, Any]:
+    """Run one example script in this process (see `utils.runner`) and return its timings."""
+    from .runner import run_example
+
+    result = run_example(script)
+    stages: dict[str, float] = {}
+    for record in result["stages"]:
+        stages[record["name"]] = stages.get(record["name"], 0.0) + record["wall_time"]
+    return {
+        "pipeline": script.stem,
+        "status": result["status"],
+        "error": result["error"],
+        "wall_time": result["wall_time"],
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages,
+    }
+
+
+def _run_isolated(*case: str) -> dict[str, Any]:
+    """Run a case in a fresh interpreter so its peak RSS is its own."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])
+        ),
+    }
+    completed = subprocess.run(
+        [sys.executable, "-m", "utils.benchmark", *case],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_suite(
+    pipelines: Sequence[str],
+    sizes: Sequence[int],
+    work_dir: Path,
+    log: Any | None = None,
+    precision: str = "float64",
+) -> dict[str, Any]:
+    """Run every (pipeline, n) case and return the results document."""
+    cases = []
+    for n in sizes:
+        for pipeline in pipelines:
+            dataset, _ = PIPELINES[pipeline]
+            path = dataset_path(work_dir, dataset, n)
+            result = _run_isolated(
+                "--case", pipeline, str(path), str(work_dir / "cache"), precision
+            )
+            result["n_requested"] = n
+            cases.append(result)
+            if log is not None:
+                log.info(
+                    f"{pipeline:<16} n={n:<10} {result['wall_time']:8.3f}s "
+                    f"{result['peak_rss_mb']:9.1f} MiB"
+                )
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cases": cases,
+    }
+
+
+def run_scripts(scripts: Sequence[Path], log: Any | None = None) -> dict[str, Any]:
+    """Run every example script (headless) and return the results document."""
+    cases = []
+    for script in scripts:
+        result = _run_isolated("--script-case", str(script))
+        result["n_requested"] = None
+        cases.append(result)
+        if log is not None:
+            line = result["error"] or ""
+            log.info(
+                f"{result['pipeline']:<16} {result['status']:<6} {result['wall_time']:8.3f}s "
+                f"{result['peak_rss_mb']:9.1f} MiB  {line}"
+            )
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cases": cases,
+        "failed": [case["pipeline"] for case in cases if case["status"] != "ok"],
+    }
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[str]:
+    """Regressions of `results` against `baseline` (relative increase > tolerance).
+
+    Checks total wall time, peak RSS and each stage time for every case
+    present in both documents.
+    """
+    reference = {(c["pipeline"], c["n_requested"]): c for c in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        base = reference.get((case["pipeline"], case["n_requested"]))
+        if base is None:
+            continue
+        label = case["pipeline"]
+        if case["n_requested"] is not None:
+            label += f" n={case['n_requested']}"
+        metrics = [
+            ("wall_time", case["wall_time"], base["wall_time"]),
+            ("peak_rss_mb", case["peak_rss_mb"], base["peak_rss_mb"]),
+        ]
+        metrics += [
+            (f"stage {name}", value, base["stages"][name])
+            for name, value in case["stages"].items()
+            if name in base["stages"]
+        ]
+        for metric, value, previous in metrics:
+            if previous > 0 and value > previous * (1 + tolerance):
+                regressions.append(
+                    f"{label}: {metric} {previous:.3f} -> {value:.3f} (+{value / previous - 1:.0%})"
+                )
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["--case"]:
+        # internal: one case in this interpreter, result as a JSON line on stdout
+        pipeline, path, cache_dir, precision = argv[1:5]
+        print(json.dumps(run_case(pipeline, Path(path), Path(cache_dir), precision)))
+        return 0
+    if argv[:1] == ["--script-case"]:
+        # internal: one example script in this interpreter, result as a JSON line
+        print(json.dumps(run_script_case(Path(argv[1]))))
+        return 0
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the course analysis pipelines."
+    )
+    parser.add_argument(
+        "--pipelines", nargs="+", choices=sorted(PIPELINES), default=sorted(PIPELINES)
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        help="where generated datasets are kept (default: a temp dir)",
+    )
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument(
+        "--compare", type=Path, help="baseline results file to check for regressions"
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--precision",
+        choices=PRECISIONS,
+        default="float64",
+        help="dtype of the data matrix (moments are accumulated in float64 either way)",
+    )
+    parser.add_argument(
+        "--scripts",
+        nargs="*",
+        type=Path,
+        metavar="SCRIPT",
+        help="time the given example scripts (default: all) on their own data instead",
+    )
+    parser.add_argument(
+        "--startup",
+        nargs="*",
+        type=Path,
+        metavar="SCRIPT",
+        help="measure headless import time of the given scripts (default: all) instead",
+    )
+    parser.add_argument(
+        "--budget", type=float, default=STARTUP_BUDGET, help="startup budget in seconds"
+    )
+    args = parser.parse_args(argv)
+
+    from .logger import setup_logger
+
+    logger = setup_logger("benchmark")
+    if args.startup is not None:
+        scripts = [path.resolve() for path in args.startup] or analysis_scripts()
+        _, violations = startup_report(scripts, args.budget, log=logger)
+        for line in violations:
+            logger.warning(f"Over startup budget: {line}")
+        return 1 if violations else 0
+
+    if args.scripts is not None:
+        scripts = [path.resolve() for path in args.scripts] or analysis_scripts()
+        results = run_scripts(scripts, log=logger)
+    else:
+        work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="ma2003b-bench-"))
+        work_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Datasets in {work_dir}")
+        results = run_suite(
+            args.pipelines, args.sizes, work_dir, log=logger, precision=args.precision
+        )
+    args.output.write_text(json.dumps(results, indent=2))
+    logger.info(f"Saved results to {args.output}")
+
+    failed = results.get("failed", [])
+    for name in failed:
+        logger.warning(f"Failed: {name}")
+
+    if args.compare is not None:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), args.tolerance
+        )
+        for line in regressions:
+            logger.warning(f"Regression: {line}")
+        if regressions:
+            return 1
+        logger.info(
+            f"No regressions beyond {args.tolerance:.0%} against {args.compare}"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Decision regions of LDA/QDA models for 2-D plots, refined only near boundaries.
+
+Usage pattern:
+
+    from utils import ClassStatistics, decision_regions, plot_decision_regions
+    stats = ClassStatistics.from_arrays(X_scaled, y)
+    regions = decision_regions(stats, bounds=(-4, 4, -4, 4), kind="qda", pair=(0, 1))
+    plot_decision_regions(plt.gca(), regions, cmap="RdYlBu", alpha=0.3)
+
+Purpose:
+- Replace `np.meshgrid` + `model.predict` over every grid point. In two
+  dimensions each class discriminant is a quadratic polynomial
+  a x^2 + 2 b xy + c y^2 + d x + e y + f (a = b = c = 0 for LDA), so it is
+  evaluated directly from six coefficients per class.
+- The grid is labelled coarse to fine: a cell whose corners all get the
+  same class is filled in one step, and only cells that straddle a class
+  change are subdivided. The number of evaluations grows with the length
+  of the boundary, not with the area of the plot.
+- Any pair of features can be drawn from one `ClassStatistics`: a Gaussian
+  restricted to two coordinates keeps the matching entries of the means and
+  scatter matrices, so slicing the statistics gives exactly the model
+  fitted on those two columns.
+- Results are cached in-process, keyed by the discriminant coefficients,
+  bounds and resolution, so redrawing a figure costs nothing.
+
+Regions smaller than a coarse cell that touch none of its corners can be
+missed; raise `coarse` if a model has such islands.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from .discriminant import ClassStatistics, GaussianDiscriminant
+
+DEFAULT_CACHE_SIZE = 64
+
+
+class DecisionRegions(NamedTuple):
+    x: np.ndarray  # grid coordinates along the horizontal axis
+    y: np.ndarray  # grid coordinates along the vertical axis
+    labels: np.ndarray  # class index at each grid node (len(y) x len(x))
+    classes: np.ndarray  # class labels, indexed by `labels`
+    n_evaluated: int  # grid nodes where the discriminants were computed
+
+
+_cache: OrderedDict[tuple[Any, ...], DecisionRegions] = OrderedDict()
+
+
+def _quadratic_terms(
+    model: Any,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Classes and (K x 2 x 2, K x 2, K) coefficients of x'Ax + b'x + c per class."""
+    if isinstance(model, GaussianDiscriminant):
+        classes = model.classes
+        if model.kind == "qda":
+            precisions = model.whitening @ np.swapaxes(model.whitening, 1, 2)
+            return _qda_terms(
+                classes, model.means, precisions, model.log_dets, model.log_priors
+            )
+        coef, intercept = model.coef, model.intercept
+    elif hasattr(model, "rotations_"):
+        # scikit-learn QuadraticDiscriminantAnalysis
+        precisions = np.array(
+            [
+                (R / S) @ R.T
+                for R, S in zip(model.rotations_, model.scalings_, strict=True)
+            ]
+        )
+        log_dets = np.array([np.log(S).sum() for S in model.scalings_])
+        return _qda_terms(
+            model.classes_, model.means_, precisions, log_dets, np.log(model.priors_)
+        )
+    else:
+        # scikit-learn LinearDiscriminantAnalysis
+        classes = model.classes_
+        coef, intercept = np.asarray(model.coef_), np.asarray(model.intercept_)
+        if len(classes) == 2:
+            # binary models store one discriminant: class 1 minus class 0
+            coef = np.vstack([np.zeros_like(coef), coef])
+            intercept = np.r_[0.0, intercept]
+    n_features = coef.shape[1]
+    return (
+        np.asarray(classes),
+        np.zeros((len(classes), n_features, n_features)),
+        np.asarray(coef, dtype=np.float64),
+        np.asarray(intercept, dtype=np.float64),
+    )
+
+
+def _qda_terms(
+    classes: np.ndarray,
+    means: np.ndarray,
+    precisions: np.ndarray,
+    log_dets: np.ndarray,
+    log_priors: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # -1/2 (x - m)' P (x - m) - 1/2 log|S| + log(prior), expanded in x
+    linear = np.einsum("kij,kj->ki", precisions, means)
+    constant = -0.5 * np.einsum("ki,ki->k", means, linear) - 0.5 * log_dets + log_priors
+    return np.asarray(classes), -0.5 * precisions, linear, constant
+
+
+def _label_nodes(
+    terms: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    xs: np.ndarray,
+    ys: np.ndarray,
+) -> np.ndarray:
+    """Class index with the largest discriminant at each (xs[i], ys[i])."""
+    _, A, b, c = terms
+    decision = (
+        A[:, 0, 0, None] * xs**2
+        + 2 * A[:, 0, 1, None] * xs * ys
+        + A[:, 1, 1, None] * ys**2
+        + b[:, 0, None] * xs
+        + b[:, 1, None] * ys
+        + c[:, None]
+    )
+    return np.argmax(decision, axis=0)
+
+
+def _refine(
+    terms: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+    x: np.ndarray,
+    y: np.ndarray,
+    coarse_step: int,
+) -> tuple[np.ndarray, int]:
+    """Label every node of the x/y grid, evaluating only near class changes."""
+    labels = np.full((len(y), len(x)), -1, dtype=np.int64)
+    n_evaluated = 0
+    step = coarse_step
+    while True:
+        unknown = labels[::step, ::step] == -1
+        rows, cols = np.nonzero(unknown)
+        if len(rows):
+            labels[rows * step, cols * step] = _label_nodes(
+                terms, x[cols * step], y[rows * step]
+            )
+            n_evaluated += len(rows)
+        if step == 1:
+            return labels, n_evaluated
+
+        # cells whose four corners agree are filled; their far edges are left
+        # to the neighbouring cell or the next, finer pass
+        nodes = labels[::step, ::step]
+        corners = nodes[:-1, :-1]
+        uniform = (
+            (corners == nodes[1:, :-1])
+            & (corners == nodes[:-1, 1:])
+            & (corners == nodes[1:, 1:])
+        )
+        fill = np.where(uniform, corners, -1).repeat(step, axis=0).repeat(step, axis=1)
+        interior = labels[:-1, :-1]
+        mask = (interior == -1) & (fill != -1)
+        interior[mask] = fill[mask]
+        step //= 2
+
+
+def _terms_digest(terms: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for array in terms[1:]:
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    digest.update(np.asarray(terms[0]).astype(str).tobytes())
+    return digest.hexdigest()
+
+
+def decision_regions(
+    model: Any,
+    bounds: Sequence[float],
+    kind: str = "qda",
+    pair: Sequence[int] = (0, 1),
+    resolution: int = 400,
+    coarse: int = 16,
+    cache: bool = True,
+    **params: Any,
+) -> DecisionRegions:
+    """Class labels over a 2-D grid for plotting decision boundaries.
+
+    Parameters
+    ----------
+    model: `ClassStatistics` (any number of features), or a fitted
+        `GaussianDiscriminant` / scikit-learn LDA or QDA on two features
+    bounds: (x_min, x_max, y_min, y_max) of the plotted area
+    kind: "lda" or "qda", when `model` is `ClassStatistics`
+    pair: the two feature indices to plot, when `model` is `ClassStatistics`
+    resolution: approximate number of grid nodes along each axis
+    coarse: number of cells along each axis on the first, unrefined pass
+    cache: reuse an identical earlier result
+    **params: `shrinkage` / `reg_param`, when `model` is `ClassStatistics`
+    """
+    if isinstance(model, ClassStatistics):
+        index = np.asarray(pair)
+        sliced = ClassStatistics(
+            model.classes,
+            model.counts,
+            model.means[:, index],
+            model.scatter[:, index][:, :, index],
+        )
+        model = GaussianDiscriminant.from_statistics(sliced, kind, **params)
+    terms = _quadratic_terms(model)
+    if terms[2].shape[1] != 2:
+        raise ValueError(
+            "Decision regions need a two-feature model; pass ClassStatistics and `pair`"
+        )
+
+    levels = max(0, int(np.ceil(np.log2(max(resolution, coarse) / coarse))))
+    n_nodes = coarse * 2**levels + 1
+    key = (_terms_digest(terms), tuple(map(float, bounds)), n_nodes, coarse)
+    if cache and key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    x_min, x_max, y_min, y_max = bounds
+    x = np.linspace(x_min, x_max, n_nodes)
+    y = np.linspace(y_min, y_max, n_nodes)
+    labels, n_evaluated = _refine(terms, x, y, 2**levels)
+    labels.setflags(write=False)
+    regions = DecisionRegions(x, y, labels, terms[0], n_evaluated)
+    if cache:
+        _cache[key] = regions
+        while len(_cache) > DEFAULT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return regions
+
+
+def plot_decision_regions(
+    ax: Any, regions: DecisionRegions, cmap: Any | None = None, alpha: float = 0.3
+) -> Any:
+    """Fill the class regions on a matplotlib axis (returns the contour set)."""
+    levels = np.arange(len(regions.classes) + 1) - 0.5
+    return ax.contourf(
+        regions.x, regions.y, regions.labels, levels=levels, cmap=cmap, alpha=alpha
+    )
+
+
+def clear_boundary_cache() -> None:
+    """Drop all cached decision regions."""
+    _cache.clear()
+
+
+__all__ = [
+    "DecisionRegions",
+    "clear_boundary_cache",
+    "decision_regions",
+    "plot_decision_regions",
+]
@@ -0,0 +1,198 @@
+"""Cross-validated LDA/QDA comparisons from cached per-fold statistics.
+
+Usage pattern:
+
+    from utils import compare_discriminants
+    cv_scores = compare_discriminants(X_scaled, y, cv=5)   # folds x {"LDA", "QDA"}
+    cv_scores.mean()
+
+    folds = DiscriminantFolds(X_scaled, y, cv=5)
+    folds.compare({
+        "LDA": ("lda", {}),
+        "LDA shrunk": ("lda", {"shrinkage": 0.2}),
+        "QDA": ("qda", {}),
+        "QDA reg": ("qda", {"reg_param": 0.1}),
+    })
+
+Purpose:
+- Replace back-to-back `cross_val_score` calls that split the data and
+  refit from the rows once per model. The folds are built once (the same
+  `StratifiedKFold` splits `cross_val_score(..., cv=5)` uses) and each fold's
+  class counts, means and scatter matrices are computed in one pass.
+- The training statistics of a fold are the merge of the other folds'
+  statistics, so each LDA/QDA variant is fitted from small K x p x p arrays
+  and only the held-out rows are touched again, to score them. Adding a
+  model variant costs one solve per class and fold, not another pass over
+  the training rows.
+- `standardize=True` rescales each fold with its own training mean and
+  standard deviation (taken from the statistics, not the rows) instead of
+  relying on data standardized once up front.
+
+Folds are evaluated on a thread pool: the work is NumPy linear algebra that
+releases the GIL, and threads share the cached arrays without copying them
+to worker processes.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .discriminant import ClassStatistics, GaussianDiscriminant
+from .precision import as_float_array
+
+DEFAULT_MODELS: dict[str, tuple[str, dict[str, Any]]] = {
+    "LDA": ("lda", {}),
+    "QDA": ("qda", {}),
+}
+
+
+class DiscriminantFolds:
+    """Stratified folds with cached class statistics for repeated LDA/QDA scoring.
+
+    Parameters
+    ----------
+    X: (n x p) feature matrix
+    y: class labels
+    cv: number of stratified folds
+    shuffle, random_state: shuffle rows before splitting (as `StratifiedKFold`)
+    max_workers: threads used to evaluate folds (default: CPU count)
+    """
+
+    def __init__(
+        self,
+        X: np.ndarray | pd.DataFrame,
+        y: np.ndarray | pd.Series,
+        cv: int = 5,
+        shuffle: bool = False,
+        random_state: int | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        from sklearn.model_selection import StratifiedKFold
+
+        X = as_float_array(X)
+        y = np.asarray(y)
+        self.classes = np.unique(y)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        splitter = StratifiedKFold(
+            cv, shuffle=shuffle, random_state=random_state if shuffle else None
+        )
+        self.test_indices = [test for _, test in splitter.split(X, y)]
+        self._test_X = [X[index] for index in self.test_indices]
+        self._test_y = [y[index] for index in self.test_indices]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            fold_stats = list(
+                pool.map(
+                    lambda f: ClassStatistics.from_arrays(
+                        self._test_X[f], self._test_y[f], self.classes
+                    ),
+                    range(self.n_splits),
+                )
+            )
+        self.train_stats = [
+            ClassStatistics.combine(
+                stats for g, stats in enumerate(fold_stats) if g != f
+            )
+            for f in range(self.n_splits)
+        ]
+
+    @property
+    def n_splits(self) -> int:
+        return len(self.test_indices)
+
+    def fold_model(
+        self, fold: int, kind: str = "lda", standardize: bool = False, **params: Any
+    ) -> tuple[GaussianDiscriminant, tuple[np.ndarray, np.ndarray] | None]:
+        """Model fitted on the training part of `fold`, and its (mean, scale) if standardized."""
+        stats = self.train_stats[fold]
+        scaling = None
+        if standardize:
+            mean = stats.grand_mean
+            scale = np.sqrt(np.diag(stats.total_scatter()) / stats.n_obs)
+            scale[scale == 0] = 1.0
+            stats = stats.standardized(mean, scale)
+            scaling = (mean, scale)
+        return GaussianDiscriminant.from_statistics(stats, kind, **params), scaling
+
+    def _fold_accuracy(
+        self, fold: int, kind: str, standardize: bool, params: dict[str, Any]
+    ) -> float:
+        model, scaling = self.fold_model(fold, kind, standardize, **params)
+        X_test = self._test_X[fold]
+        if scaling is not None:
+            X_test = (X_test - scaling[0]) / scaling[1]
+        return float(np.mean(model.predict(X_test) == self._test_y[fold]))
+
+    def score(
+        self, kind: str = "lda", standardize: bool = False, **params: Any
+    ) -> np.ndarray:
+        """Held-out accuracy of one model on every fold."""
+        return (
+            self.compare({kind: (kind, params)}, standardize=standardize)
+            .iloc[:, 0]
+            .to_numpy()
+        )
+
+    def compare(
+        self,
+        models: Mapping[str, tuple[str, dict[str, Any]]] | None = None,
+        standardize: bool = False,
+    ) -> pd.DataFrame:
+        """Held-out accuracy of several models (columns) on every fold (rows).
+
+        Parameters
+        ----------
+        models: name -> (kind, parameters), e.g. `{"QDA reg": ("qda", {"reg_param": 0.1})}`;
+            defaults to plain LDA and QDA
+        standardize: rescale each fold with its own training mean and std
+        """
+        models = DEFAULT_MODELS if models is None else models
+        tasks = [
+            (name, fold, kind, params)
+            for name, (kind, params) in models.items()
+            for fold in range(self.n_splits)
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            accuracies = list(
+                pool.map(
+                    lambda task: self._fold_accuracy(
+                        task[1], task[2], standardize, task[3]
+                    ),
+                    tasks,
+                )
+            )
+        scores = pd.DataFrame(
+            index=pd.RangeIndex(self.n_splits, name="fold"),
+            columns=list(models),
+            dtype=float,
+        )
+        for (name, fold, _, _), accuracy in zip(tasks, accuracies, strict=True):
+            scores.loc[fold, name] = accuracy
+        return scores
+
+
+def compare_discriminants(
+    X: np.ndarray | pd.DataFrame,
+    y: np.ndarray | pd.Series,
+    models: Mapping[str, tuple[str, dict[str, Any]]] | None = None,
+    cv: int = 5,
+    standardize: bool = False,
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """Cross-validated accuracy of LDA/QDA variants on shared stratified folds.
+
+    Returns a (folds x models) DataFrame; with the default models the columns
+    match `cross_val_score(LinearDiscriminantAnalysis(), X, y, cv=cv)` and the
+    same for `QuadraticDiscriminantAnalysis()`.
+    """
+    folds = DiscriminantFolds(X, y, cv=cv, max_workers=max_workers)
+    return folds.compare(models, standardize=standardize)
+
+
+__all__ = ["DEFAULT_MODELS", "DiscriminantFolds", "compare_discriminants"]
@@ -0,0 +1,245 @@
+"""Dataset loading with a columnar binary cache next to each CSV.
+
+Usage pattern:
+
+    from utils import load_dataset
+    df = load_dataset(script_dir / "kuiper.csv")                   # rownames dropped
+    df = load_dataset(script_dir / "invest.csv", keep_index=True)  # rownames -> index
+
+Purpose:
+- Parse each example CSV once. The first read stores its columns as `.npy`
+  files in a `.dataset_cache/<file name>/` folder beside the CSV; later runs
+  memory-map them instead of parsing text again.
+- The float columns are stored together as one column-major block, so the
+  numeric data the analyses use is a zero-copy view of the mapped file.
+  Integer, boolean and text columns get one `.npy` file each (no pickles).
+- Own the handling of a leading row-label column (`rownames`, `index`,
+  `Unnamed: 0`) that the scripts used to strip by hand.
+
+The cache records the CSV's modification time, size and content hash. A
+changed mtime triggers a re-hash, and the cache is rebuilt only when the
+content actually changed. Mapped arrays are read-only; copy the frame
+before modifying values in place.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .precision import float_dtype
+from .streaming import INDEX_COLUMNS
+
+CACHE_DIRNAME = ".dataset_cache"
+CACHE_VERSION = 1
+META_FILE = "meta.json"
+FLOAT_BLOCK = "float_block.npy"
+
+
+def file_digest(path: str | Path, block_size: int = 1 << 20) -> str:
+    """Content hash of a file, read in blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def update_digest(digest: Any, value: Any) -> None:
+    """Feed `value` (arrays, frames and nested dicts/lists of them) to a hashlib digest.
+
+    `Path` values are hashed by the file's content, not by name, so editing a
+    file changes the digest.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        value = value.to_numpy()
+    if isinstance(value, Path):
+        update_digest(digest, ("file", file_digest(value)))
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype.str}{value.shape}".encode())
+        if value.dtype == object:
+            digest.update(repr(value.tolist()).encode())
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(repr(key).encode())
+            update_digest(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"[{len(value)}".encode())
+        for item in value:
+            update_digest(digest, item)
+    else:
+        digest.update(repr(value).encode())
+
+
+def _split_index(frame: pd.DataFrame, keep_index: bool) -> pd.DataFrame:
+    """Drop (or move to the index) a leading row-label column."""
+    if len(frame.columns) and str(frame.columns[0]).lower() in INDEX_COLUMNS:
+        if keep_index:
+            return frame.set_index(frame.columns[0])
+        return frame.iloc[:, 1:]
+    return frame
+
+
+def _cache_dir(path: Path, cache_root: Path | None) -> Path:
+    root = cache_root if cache_root is not None else path.parent / CACHE_DIRNAME
+    return root / path.name
+
+
+def _write_cache(
+    frame: pd.DataFrame, directory: Path, source: dict[str, Any]
+) -> dict[str, Any]:
+    """Store `frame` column by column; replaces any previous cache atomically."""
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{directory.name}.", dir=directory.parent))
+    try:
+        float_columns = [c for c in frame.columns if frame[c].dtype == np.float64]
+        if float_columns:
+            np.save(
+                staging / FLOAT_BLOCK,
+                np.asfortranarray(frame[float_columns].to_numpy()),
+            )
+        columns = []
+        for position, column in enumerate(frame.columns):
+            series = frame[column]
+            entry: dict[str, Any] = {"name": str(column)}
+            if column in float_columns:
+                entry["kind"] = "float"
+            elif series.dtype.kind in "iub":
+                entry["kind"] = "array"
+                np.save(staging / f"col_{position}.npy", series.to_numpy())
+            else:
+                entry["kind"] = "text"
+                missing = series.isna().to_numpy()
+                np.save(
+                    staging / f"col_{position}.npy",
+                    series.astype(str).to_numpy(dtype=str),
+                )
+                if missing.any():
+                    np.save(staging / f"col_{position}.mask.npy", missing)
+                    entry["mask"] = True
+            columns.append(entry)
+
+        meta = {
+            "version": CACHE_VERSION,
+            "source": source,
+            "n_rows": len(frame),
+            "columns": columns,
+        }
+        (staging / META_FILE).write_text(json.dumps(meta, indent=2))
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return meta
+
+
+def _read_cache(directory: Path, meta: dict[str, Any], mmap: bool) -> pd.DataFrame:
+    mode = "r" if mmap else None
+    entries = meta["columns"]
+    float_names = [e["name"] for e in entries if e["kind"] == "float"]
+    if float_names:
+        frame = pd.DataFrame(
+            np.load(directory / FLOAT_BLOCK, mmap_mode=mode),
+            columns=float_names,
+            copy=False,
+        )
+    else:
+        frame = pd.DataFrame(index=pd.RangeIndex(meta["n_rows"]))
+    for position, entry in enumerate(entries):
+        if entry["kind"] == "float":
+            continue
+        values = np.load(directory / f"col_{position}.npy", mmap_mode=mode)
+        if entry["kind"] == "text":
+            values = values.astype(object)
+            if entry.get("mask"):
+                values[np.load(directory / f"col_{position}.mask.npy")] = np.nan
+        frame.insert(position, entry["name"], values)
+    return frame
+
+
+def _source_stat(path: Path) -> dict[str, Any]:
+    stat = path.stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _load_meta(directory: Path) -> dict[str, Any] | None:
+    try:
+        meta = json.loads((directory / META_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == CACHE_VERSION else None
+
+
+def load_dataset(
+    path: str | Path,
+    keep_index: bool = False,
+    cache: bool = True,
+    cache_root: str | Path | None = None,
+    mmap: bool = True,
+    dtype: str | None = None,
+) -> pd.DataFrame:
+    """Load an example CSV, through the binary cache when it is up to date.
+
+    Parameters
+    ----------
+    path: CSV file
+    keep_index: use a leading `rownames`/`index` column as the row index
+        instead of dropping it
+    cache: read and refresh the sidecar cache (False parses the CSV directly)
+    cache_root: folder for caches (default: `.dataset_cache` beside the CSV)
+    mmap: memory-map cached arrays instead of reading them into memory
+    dtype: "float32" to hold the float columns in single precision (see
+        `utils.precision`); the cache itself stays float64
+    """
+    path = Path(path)
+    if dtype is not None:
+        dtype = float_dtype(dtype)
+        frame = load_dataset(path, keep_index, cache, cache_root, mmap)
+        floats = frame.select_dtypes(include="floating").columns
+        return frame.astype(dict.fromkeys(floats, dtype))
+    if not cache:
+        return _split_index(pd.read_csv(path), keep_index)
+
+    directory = _cache_dir(path, Path(cache_root) if cache_root is not None else None)
+    stat = _source_stat(path)
+    meta = _load_meta(directory)
+    if meta is not None:
+        source = meta["source"]
+        if source["mtime_ns"] == stat["mtime_ns"] and source["size"] == stat["size"]:
+            return _split_index(_read_cache(directory, meta, mmap), keep_index)
+        if source["size"] == stat["size"] and source["hash"] == file_digest(path):
+            # touched but unchanged: remember the new mtime and reuse the arrays
+            meta["source"].update(stat)
+            (directory / META_FILE).write_text(json.dumps(meta, indent=2))
+            return _split_index(_read_cache(directory, meta, mmap), keep_index)
+
+    frame = pd.read_csv(path)
+    try:
+        meta = _write_cache(frame, directory, {**stat, "hash": file_digest(path)})
+    except OSError:
+        # read-only checkouts still work, just without the cache
+        return _split_index(frame, keep_index)
+    return _split_index(_read_cache(directory, meta, mmap), keep_index)
+
+
+def clear_dataset_cache(path: str | Path, cache_root: str | Path | None = None) -> None:
+    """Remove the cached arrays of one CSV file."""
+    path = Path(path)
+    directory = _cache_dir(path, Path(cache_root) if cache_root is not None else None)
+    if directory.exists():
+        shutil.rmtree(directory)
+
+
+__all__ = ["clear_dataset_cache", "file_digest", "load_dataset", "update_digest"]
@@ -0,0 +1,171 @@
+"""Factorability diagnostics computed from a correlation matrix.
+
+Usage pattern:
+
+    from utils import factorability
+    diagnostics = factorability(X_scaled)             # or factorability(corr=corr, n_obs=n)
+    diagnostics.chi_square, diagnostics.p_value       # Bartlett's test of sphericity
+    diagnostics.kmo_per_variable, diagnostics.kmo_total
+    diagnostics.anti_image_correlation                # MSA on the diagonal
+
+    from utils import bartlett_sphericity_from_corr, kmo_from_corr
+    chi_square, p_value = bartlett_sphericity_from_corr(corr, n_obs)
+    kmo_per_variable, kmo_total = kmo_from_corr(corr)
+
+`factor_analyzer.calculate_bartlett_sphericity` and `calculate_kmo` need the
+raw observations and each recomputes the correlation matrix; KMO then
+inverts it with a general LU inverse. Both statistics only depend on the
+correlation matrix (and the sample size for Bartlett), so `factorability`
+builds the matrix once (or takes a precomputed one, e.g. from
+`utils.streaming_correlation`), factors it once by Cholesky and derives
+everything from that factor:
+
+- log|R| = 2 sum(log diag L), for Bartlett's chi-square;
+- R^-1 from the same factor (LAPACK `potri`), which gives the partial
+  correlations, the anti-image correlation and covariance matrices and the
+  per-variable and overall MSA, with vectorized sums and no Python loops.
+
+A matrix that is not positive definite fails the factorization and raises
+ValueError. The formulas follow `factor_analyzer` so results match the
+raw-data versions.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import lapack
+from scipy.stats import chi2
+
+
+class Factorability(NamedTuple):
+    chi_square: float  # Bartlett's statistic, -(n - 1 - (2p + 5) / 6) * ln|R|
+    p_value: float  # Bartlett's p-value on p (p - 1) / 2 degrees of freedom
+    kmo_per_variable: np.ndarray  # MSA of each variable (p,)
+    kmo_total: float  # overall MSA
+    anti_image_correlation: np.ndarray  # negated partial correlations, MSA diagonal
+    anti_image_covariance: np.ndarray  # D R^-1 D with D = diag(R^-1)^-1
+    log_det: float  # ln|R|
+    n_obs: int | None  # observations behind R (None: Bartlett not computed)
+
+
+def _cholesky(corr: np.ndarray) -> tuple[np.ndarray, float]:
+    """Lower Cholesky factor of R and ln|R|."""
+    factor, info = lapack.dpotrf(corr, lower=True, clean=True)
+    if info != 0:
+        raise ValueError("Correlation matrix is not positive definite")
+    return factor, 2.0 * float(np.log(np.diag(factor)).sum())
+
+
+def _cholesky_inverse(corr: np.ndarray) -> tuple[np.ndarray, float]:
+    """R^-1 and ln|R| from one Cholesky factorization of R."""
+    factor, log_det = _cholesky(corr)
+    inverse, info = lapack.dpotri(factor, lower=True)
+    if info != 0:
+        raise ValueError("Correlation matrix is singular")
+    # potri fills the lower triangle only
+    inverse = np.tril(inverse) + np.tril(inverse, -1).T
+    return inverse, log_det
+
+
+def _bartlett(log_det: float, n_obs: int, p: int) -> tuple[float, float]:
+    statistic = -log_det * (n_obs - 1 - (2 * p + 5) / 6)
+    degrees_of_freedom = p * (p - 1) / 2
+    return float(statistic), float(chi2.sf(statistic, degrees_of_freedom))
+
+
+def _kmo(corr: np.ndarray, partial: np.ndarray) -> tuple[np.ndarray, float]:
+    """Per-variable and overall MSA from R and the partial correlations."""
+    # off-diagonal sums of squares, column by column
+    corr_sum = np.einsum("ij,ij->j", corr, corr) - np.diag(corr) ** 2
+    partial_sum = np.einsum("ij,ij->j", partial, partial) - np.diag(partial) ** 2
+    kmo_per_variable = corr_sum / (corr_sum + partial_sum)
+    kmo_total = corr_sum.sum() / (corr_sum.sum() + partial_sum.sum())
+    return kmo_per_variable, float(kmo_total)
+
+
+def _correlation(X: np.ndarray | pd.DataFrame) -> np.ndarray:
+    from .precision import as_float_array, blocked_moments
+
+    return blocked_moments(as_float_array(X)).correlation()
+
+
+def factorability(
+    X: np.ndarray | pd.DataFrame | None = None,
+    corr: np.ndarray | None = None,
+    n_obs: int | None = None,
+) -> Factorability:
+    """Bartlett's test, KMO/MSA and anti-image matrices from one factorization.
+
+    Parameters
+    ----------
+    X: raw or standardized observations (n x p); the correlation matrix is
+        accumulated in float64
+    corr: precomputed p x p correlation matrix, instead of `X`
+    n_obs: observations behind `corr` (taken from `X` when given); without
+        it the Bartlett fields are NaN
+    """
+    if (X is None) == (corr is None):
+        raise ValueError("Pass either X or corr")
+    if X is not None:
+        n_obs = len(X) if n_obs is None else n_obs
+        corr = _correlation(X)
+    corr = np.asarray(corr, dtype=np.float64)
+    p = corr.shape[0]
+
+    inverse, log_det = _cholesky_inverse(corr)
+    scale = 1 / np.sqrt(np.diag(inverse))
+    partial = -inverse * np.outer(scale, scale)
+    kmo_per_variable, kmo_total = _kmo(corr, partial)
+
+    anti_image_correlation = -partial
+    np.fill_diagonal(anti_image_correlation, kmo_per_variable)
+    anti_image_covariance = inverse * np.outer(scale**2, scale**2)
+
+    if n_obs is None:
+        chi_square, p_value = np.nan, np.nan
+    else:
+        chi_square, p_value = _bartlett(log_det, n_obs, p)
+    return Factorability(
+        chi_square,
+        p_value,
+        kmo_per_variable,
+        kmo_total,
+        anti_image_correlation,
+        anti_image_covariance,
+        log_det,
+        n_obs,
+    )
+
+
+def bartlett_sphericity_from_corr(corr: np.ndarray, n_obs: int) -> tuple[float, float]:
+    """Bartlett's test of sphericity from a p x p correlation matrix.
+
+    Returns
+    -------
+    (chi_square, p_value) where chi_square = -(n - 1 - (2p + 5) / 6) * ln|R|
+    """
+    corr = np.asarray(corr, dtype=np.float64)
+    _, log_det = _cholesky(corr)
+    return _bartlett(log_det, n_obs, corr.shape[0])
+
+
+def kmo_from_corr(corr: np.ndarray) -> tuple[np.ndarray, float]:
+    """Kaiser-Meyer-Olkin measure of sampling adequacy from a correlation matrix.
+
+    Returns
+    -------
+    (kmo_per_variable, kmo_total), the same pair as `calculate_kmo`
+    """
+    result = factorability(corr=corr)
+    return result.kmo_per_variable, result.kmo_total
+
+
+__all__ = [
+    "Factorability",
+    "bartlett_sphericity_from_corr",
+    "factorability",
+    "kmo_from_corr",
+]
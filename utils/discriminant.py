@@ -0,0 +1,466 @@
+"""Gaussian discriminant models built from per-class sufficient statistics.
+
+Usage pattern:
+
+    from utils import ClassStatistics, GaussianDiscriminant
+    stats = ClassStatistics.from_arrays(X_train, y_train)
+    lda = GaussianDiscriminant.from_statistics(stats, "lda")
+    qda = GaussianDiscriminant.from_statistics(stats, "qda", reg_param=0.1)
+    qda.predict(X_test)
+
+    from utils import class_statistics_from_shards, discriminant_from_statistics
+    stats = class_statistics_from_shards(shard_paths, features, "quality_class")
+    lda = discriminant_from_statistics(stats, "lda", features=features)
+
+Purpose:
+- LDA and QDA depend on the data only through the class counts, class means
+  and class scatter matrices. `ClassStatistics` holds exactly those, and
+  blocks of rows (folds, chunks, shards) are combined with `merge` using the
+  pairwise update for centered scatter, so no pass over the rows is needed
+  to fit on any union of blocks.
+- `GaussianDiscriminant` turns the statistics into the discriminant
+  functions of scikit-learn's `LinearDiscriminantAnalysis` (default solver,
+  or `shrinkage` as with `solver="lsqr"`) and `QuadraticDiscriminantAnalysis`
+  (`reg_param`), with empirical class priors.
+- `class_statistics_from_csv` accumulates the statistics from a CSV read in
+  chunks, and `class_statistics_from_shards` does so for several files on a
+  process pool and merges the results, so training data never has to fit in
+  memory. `discriminant_from_statistics` turns them into fitted scikit-learn
+  estimators that `predict`, `transform` and `save_discriminant_model` accept.
+
+Shrinkage must be a number: the Ledoit-Wolf estimate (`shrinkage="auto"`)
+needs fourth moments of the rows and cannot be derived from these statistics.
+
+Both helpers reproduce scikit-learn's estimates: QDA class covariances over
+n_k - 1 rows, and for `GaussianDiscriminant`'s default LDA a within-class
+covariance pooled over n - K rows, as the "svd" solver has. Since
+`discriminant_from_statistics` also sets fitted attributes directly
+(including the private `_max_components`), `tests/test_discriminant.py`
+checks them against scikit-learn 1.3 to 1.8; 1.9 changed those
+denominators, hence the `scikit-learn<1.9` pin.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .precision import as_float_array, blocked_moments
+from .streaming import DEFAULT_CHUNKSIZE
+
+DISCRIMINANT_KINDS = ("lda", "qda")
+
+
+class ClassStatistics(NamedTuple):
+    classes: np.ndarray  # class labels (K,)
+    counts: np.ndarray  # rows per class (K,)
+    means: np.ndarray  # class means (K x p)
+    scatter: np.ndarray  # centered cross-product matrix per class (K x p x p)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        X: np.ndarray | pd.DataFrame,
+        y: np.ndarray | pd.Series,
+        classes: Sequence | None = None,
+    ) -> ClassStatistics:
+        """Statistics of an in-memory block; `classes` fixes the label order.
+
+        float32 `X` is not copied to float64; means and scatter are still
+        accumulated in float64, one row block of each class at a time.
+        """
+        X = as_float_array(X)
+        y = np.asarray(y)
+        classes = np.unique(y) if classes is None else np.asarray(classes)
+        n_classes, n_features = len(classes), X.shape[1]
+        counts = np.zeros(n_classes, dtype=np.int64)
+        means = np.zeros((n_classes, n_features))
+        scatter = np.zeros((n_classes, n_features, n_features))
+        for k, label in enumerate(classes):
+            moments = blocked_moments(X[y == label])
+            counts[k] = moments.n_obs
+            if counts[k]:
+                means[k], scatter[k] = moments.mean, moments.comoment
+        return cls(classes, counts, means, scatter)
+
+    @classmethod
+    def combine(cls, parts: Iterable[ClassStatistics]) -> ClassStatistics:
+        """Merge the statistics of several disjoint blocks."""
+        parts = iter(parts)
+        total = next(parts)
+        for part in parts:
+            total = total.merge(part)
+        return total
+
+    def with_classes(self, classes: Sequence) -> ClassStatistics:
+        """The same statistics over a superset of labels (absent classes get no rows)."""
+        classes = np.asarray(classes)
+        if np.array_equal(classes, self.classes):
+            return self
+        positions = np.searchsorted(classes, self.classes)
+        if np.any(positions >= len(classes)) or not np.array_equal(
+            classes[positions], self.classes
+        ):
+            raise ValueError("`classes` must include every existing class label")
+        n_classes, n_features = len(classes), self.n_features
+        counts = np.zeros(n_classes, dtype=np.int64)
+        means = np.zeros((n_classes, n_features))
+        scatter = np.zeros((n_classes, n_features, n_features))
+        counts[positions], means[positions], scatter[positions] = (
+            self.counts,
+            self.means,
+            self.scatter,
+        )
+        return ClassStatistics(classes, counts, means, scatter)
+
+    def merge(self, other: ClassStatistics) -> ClassStatistics:
+        """Statistics of the union of two disjoint blocks.
+
+        Blocks that saw different labels are first aligned on the sorted union
+        of their classes.
+        """
+        a, b = self, other
+        if not np.array_equal(a.classes, b.classes):
+            classes = np.union1d(a.classes, b.classes)
+            a, b = a.with_classes(classes), b.with_classes(classes)
+        counts = a.counts + b.counts
+        safe = np.maximum(counts, 1)[:, None]
+        delta = b.means - a.means
+        means = a.means + delta * (b.counts[:, None] / safe)
+        weight = (a.counts * b.counts / safe[:, 0])[:, None, None]
+        scatter = a.scatter + b.scatter + weight * delta[:, :, None] * delta[:, None, :]
+        return ClassStatistics(a.classes, counts, means, scatter)
+
+    @property
+    def n_obs(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def n_features(self) -> int:
+        return self.means.shape[1]
+
+    @property
+    def priors(self) -> np.ndarray:
+        return self.counts / self.n_obs
+
+    @property
+    def grand_mean(self) -> np.ndarray:
+        return self.priors @ self.means
+
+    def within_scatter(self) -> np.ndarray:
+        """Pooled within-class scatter matrix W (p x p)."""
+        return self.scatter.sum(axis=0)
+
+    def total_scatter(self) -> np.ndarray:
+        """Total scatter matrix T = W + B about the grand mean (p x p)."""
+        offsets = self.means - self.grand_mean
+        return self.within_scatter() + (offsets.T * self.counts) @ offsets
+
+    def standardized(self, mean: np.ndarray, scale: np.ndarray) -> ClassStatistics:
+        """Statistics of the rows after `(x - mean) / scale`."""
+        return ClassStatistics(
+            self.classes,
+            self.counts,
+            (self.means - mean) / scale,
+            self.scatter / np.outer(scale, scale),
+        )
+
+
+class GaussianDiscriminant:
+    """Linear or quadratic discriminant functions from `ClassStatistics`.
+
+    Parameters
+    ----------
+    kind: "lda" or "qda"
+    classes: class labels, in model order
+    log_priors: log class priors (K,)
+    coef, intercept: LDA decision `X @ coef.T + intercept`
+    means, whitening, log_dets: QDA class means, per-class p x p matrices
+        with `whitening_k @ whitening_k.T = inverse(cov_k)`, and `log|cov_k|`
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        classes: np.ndarray,
+        log_priors: np.ndarray,
+        coef: np.ndarray | None = None,
+        intercept: np.ndarray | None = None,
+        means: np.ndarray | None = None,
+        whitening: np.ndarray | None = None,
+        log_dets: np.ndarray | None = None,
+    ) -> None:
+        if kind not in DISCRIMINANT_KINDS:
+            raise ValueError(
+                f"Unknown discriminant {kind!r}; use one of {DISCRIMINANT_KINDS}"
+            )
+        self.kind = kind
+        self.classes = np.asarray(classes)
+        self.log_priors = log_priors
+        self.coef = coef
+        self.intercept = intercept
+        self.means = means
+        self.whitening = whitening
+        self.log_dets = log_dets
+
+    @classmethod
+    def from_statistics(
+        cls,
+        stats: ClassStatistics,
+        kind: str = "lda",
+        shrinkage: float | None = None,
+        reg_param: float = 0.0,
+    ) -> GaussianDiscriminant:
+        """Fit from class statistics, as scikit-learn would from the rows.
+
+        Parameters
+        ----------
+        stats: class counts, means and scatter matrices
+        kind: "lda" or "qda"
+        shrinkage: LDA only; None pools the class scatter over n - K degrees
+            of freedom (default solver), a number in [0, 1] shrinks each class
+            covariance towards a scaled identity (`solver="lsqr"`)
+        reg_param: QDA only; blends each class covariance with the identity
+        """
+        kind = kind.lower()
+        if np.any(stats.counts == 0):
+            raise ValueError("Every class needs at least one row")
+        log_priors = np.log(stats.priors)
+        n_features = stats.n_features
+
+        if kind == "lda":
+            if shrinkage is None:
+                cov = stats.within_scatter() / (stats.n_obs - len(stats.classes))
+            else:
+                if isinstance(shrinkage, str):
+                    raise ValueError("shrinkage must be a number between 0 and 1")
+                cov = np.zeros((n_features, n_features))
+                for prior, count, scatter in zip(
+                    stats.priors, stats.counts, stats.scatter, strict=True
+                ):
+                    class_cov = scatter / count
+                    target = np.trace(class_cov) / n_features
+                    cov += prior * (
+                        (1 - shrinkage) * class_cov
+                        + shrinkage * target * np.eye(n_features)
+                    )
+            coef = np.linalg.solve(cov, stats.means.T).T
+            intercept = -0.5 * np.einsum("kp,kp->k", stats.means, coef) + log_priors
+            return cls(kind, stats.classes, log_priors, coef=coef, intercept=intercept)
+
+        if kind != "qda":
+            raise ValueError(
+                f"Unknown discriminant {kind!r}; use one of {DISCRIMINANT_KINDS}"
+            )
+        whitening = np.empty((len(stats.classes), n_features, n_features))
+        log_dets = np.empty(len(stats.classes))
+        for k, (count, scatter) in enumerate(
+            zip(stats.counts, stats.scatter, strict=True)
+        ):
+            eigenvalues, eigenvectors = np.linalg.eigh(scatter / max(count - 1, 1))
+            eigenvalues = (1 - reg_param) * np.clip(eigenvalues, 0, None) + reg_param
+            whitening[k] = eigenvectors / np.sqrt(eigenvalues)
+            log_dets[k] = np.log(eigenvalues).sum()
+        return cls(
+            kind,
+            stats.classes,
+            log_priors,
+            means=stats.means,
+            whitening=whitening,
+            log_dets=log_dets,
+        )
+
+    def decision_function(self, X: np.ndarray | pd.DataFrame) -> np.ndarray:
+        """Log posteriors up to a per-row constant (n x K)."""
+        X = np.asarray(X, dtype=np.float64)
+        if self.kind == "lda":
+            return X @ self.coef.T + self.intercept
+        decision = np.empty((X.shape[0], len(self.classes)))
+        for k, (mean, whiten, log_det) in enumerate(
+            zip(self.means, self.whitening, self.log_dets, strict=True)
+        ):
+            projected = (X - mean) @ whiten
+            decision[:, k] = -0.5 * (
+                np.einsum("ij,ij->i", projected, projected) + log_det
+            )
+        return decision + self.log_priors
+
+    def predict_proba(self, X: np.ndarray | pd.DataFrame) -> np.ndarray:
+        decision = self.decision_function(X)
+        decision -= decision.max(axis=1, keepdims=True)
+        np.exp(decision, out=decision)
+        decision /= decision.sum(axis=1, keepdims=True)
+        return decision
+
+    def predict(self, X: np.ndarray | pd.DataFrame) -> np.ndarray:
+        return self.classes[np.argmax(self.decision_function(X), axis=1)]
+
+
+def class_statistics_from_csv(
+    path: str | Path,
+    features: Sequence[str],
+    target: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    classes: Sequence | None = None,
+) -> ClassStatistics:
+    """Accumulate class statistics from a CSV file read `chunksize` rows at a time.
+
+    Parameters
+    ----------
+    path: CSV file with the feature columns and a class label column
+    features: feature columns, in model order
+    target: class label column
+    chunksize: rows held in memory at once
+    classes: expected labels (default: the sorted labels found in the file)
+
+    Rows with a missing feature or label are skipped.
+    """
+    features = list(features)
+    total: ClassStatistics | None = None
+    for chunk in pd.read_csv(path, usecols=[*features, target], chunksize=chunksize):
+        chunk = chunk.dropna()
+        if chunk.empty:
+            continue
+        part = ClassStatistics.from_arrays(chunk[features], chunk[target], classes)
+        total = part if total is None else total.merge(part)
+    if total is None:
+        raise ValueError(f"No complete rows in {path}")
+    return total
+
+
+def _shard_statistics(args: tuple[Any, ...]) -> ClassStatistics:
+    return class_statistics_from_csv(*args)
+
+
+def class_statistics_from_shards(
+    paths: Sequence[str | Path],
+    features: Sequence[str],
+    target: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    max_workers: int | None = None,
+) -> ClassStatistics:
+    """Accumulate class statistics from several CSV shards in parallel and merge them.
+
+    Each shard is read in chunks by its own worker process; only the small
+    per-shard statistics are sent back. See `class_statistics_from_csv`.
+    """
+    tasks = [(path, list(features), target, chunksize) for path in paths]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers <= 1:
+        return ClassStatistics.combine(map(_shard_statistics, tasks))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return ClassStatistics.combine(pool.map(_shard_statistics, tasks))
+
+
+def discriminant_from_statistics(
+    stats: ClassStatistics,
+    kind: str = "lda",
+    shrinkage: float | None = None,
+    reg_param: float = 0.0,
+    features: Sequence[str] | None = None,
+) -> Any:
+    """Fitted scikit-learn LDA/QDA estimator built from class statistics.
+
+    Parameters
+    ----------
+    stats: class counts, means and scatter matrices
+    kind: "lda" gives the model `LinearDiscriminantAnalysis(solver="eigen",
+        shrinkage=shrinkage)` would fit on the same rows (including
+        `transform` and `explained_variance_ratio_`); "qda" gives
+        `QuadraticDiscriminantAnalysis(reg_param=reg_param)`
+    shrinkage: LDA covariance shrinkage in [0, 1]
+    reg_param: QDA covariance regularization
+    features: column names, so the estimator accepts DataFrames without warnings
+    """
+    from scipy.linalg import eigh
+    from sklearn.discriminant_analysis import (
+        LinearDiscriminantAnalysis,
+        QuadraticDiscriminantAnalysis,
+    )
+
+    kind = kind.lower()
+    if kind not in DISCRIMINANT_KINDS:
+        raise ValueError(
+            f"Unknown discriminant {kind!r}; use one of {DISCRIMINANT_KINDS}"
+        )
+    if np.any(stats.counts == 0):
+        raise ValueError("Every class needs at least one row")
+    n_classes, n_features = len(stats.classes), stats.n_features
+
+    if kind == "lda":
+        if isinstance(shrinkage, str):
+            raise ValueError("shrinkage must be a number between 0 and 1")
+        estimator = LinearDiscriminantAnalysis(solver="eigen", shrinkage=shrinkage)
+        alpha = 0.0 if shrinkage is None else shrinkage
+
+        def shrunk(cov: np.ndarray) -> np.ndarray:
+            return (1 - alpha) * cov + alpha * np.trace(cov) / n_features * np.eye(
+                n_features
+            )
+
+        # within-class covariance as in scikit-learn: prior-weighted class covariances
+        within = sum(
+            prior * shrunk(scatter / count)
+            for prior, count, scatter in zip(
+                stats.priors, stats.counts, stats.scatter, strict=True
+            )
+        )
+        between = shrunk(stats.total_scatter() / stats.n_obs) - within
+        eigenvalues, eigenvectors = eigh(between, within)
+        order = np.argsort(eigenvalues)[::-1]
+        eigenvalues, eigenvectors = eigenvalues[order], eigenvectors[:, order]
+
+        estimator._max_components = min(n_classes - 1, n_features)
+        estimator.explained_variance_ratio_ = (eigenvalues / eigenvalues.sum())[
+            : estimator._max_components
+        ]
+        estimator.scalings_ = eigenvectors
+        estimator.covariance_ = within
+        estimator.coef_ = stats.means @ eigenvectors @ eigenvectors.T
+        estimator.intercept_ = -0.5 * np.diag(stats.means @ estimator.coef_.T) + np.log(
+            stats.priors
+        )
+        if n_classes == 2:
+            # binary models keep a single discriminant, as in scikit-learn
+            estimator.coef_ = np.array(
+                estimator.coef_[1, :] - estimator.coef_[0, :], ndmin=2
+            )
+            estimator.intercept_ = np.array(
+                estimator.intercept_[1] - estimator.intercept_[0], ndmin=1
+            )
+    else:
+        estimator = QuadraticDiscriminantAnalysis(reg_param=reg_param)
+        rotations, scalings = [], []
+        for count, scatter in zip(stats.counts, stats.scatter, strict=True):
+            eigenvalues, eigenvectors = np.linalg.eigh(scatter / max(count - 1, 1))
+            order = np.argsort(eigenvalues)[::-1]
+            rotations.append(eigenvectors[:, order])
+            scalings.append(
+                (1 - reg_param) * np.clip(eigenvalues[order], 0, None) + reg_param
+            )
+        estimator.rotations_ = rotations
+        estimator.scalings_ = scalings
+
+    estimator.classes_ = stats.classes
+    estimator.priors_ = stats.priors
+    estimator.means_ = stats.means
+    estimator.n_features_in_ = n_features
+    if features is not None:
+        estimator.feature_names_in_ = np.asarray(features, dtype=object)
+    return estimator
+
+
+__all__ = [
+    "ClassStatistics",
+    "DISCRIMINANT_KINDS",
+    "GaussianDiscriminant",
+    "class_statistics_from_csv",
+    "class_statistics_from_shards",
+    "discriminant_from_statistics",
+]
@@ -0,0 +1,561 @@
+"""Factor models fitted from a correlation matrix computed once.
+
+Usage pattern:
+
+    from utils import CorrelationFactorModel
+    model = CorrelationFactorModel.from_data(X_scaled)
+    eigenvalues = model.eigenvalues                      # no exploratory fit
+    fa = model.fit(n_factors=2, method="principal")
+    fa_rotated = model.fit(n_factors=2, method="principal", rotation="varimax")
+    sweep = model.sweep(method="minres")                 # k = 1..K, warm-started
+    sweep.table                                          # RMSR, chi-square, BIC per k
+
+Purpose:
+- `FactorAnalyzer.fit(X)` recomputes the correlation matrix from the raw rows
+  on every call, so an explore/unrotated/rotated sequence pays O(n p^2) three
+  times. Here the p x p matrix is built once (from an array, a CSV stream or
+  a precomputed matrix) and every refit costs O(p^3), independent of n.
+- Fits are memoized per (n_factors, method, rotation, rotation kwargs), and
+  rotated fits reuse the cached unrotated extraction through `utils.rotation`.
+- The returned `FactorSolution` mirrors the parts of the `FactorAnalyzer`
+  API used in the course scripts (`loadings_`, `get_communalities()`,
+  `get_eigenvalues()`, `transform()`), so scripts only change how the model
+  is constructed.
+- `sweep` fits k = 1..K factors in one pass, starting each MINRES/ML
+  optimization from the previous solution's uniquenesses (1 - communalities)
+  instead of the SMC cold start, and reports RMSR, the likelihood-ratio
+  chi-square and BIC per k. A warm-started MINRES/ML optimum can differ from
+  `fit`'s SMC-started one in the last digits, so those fits are cached under
+  their own key and neither result depends on which call came first;
+  principal factors ignore the start and share `fit`'s cache entry.
+
+Extraction follows `factor_analyzer` (principal factors, MINRES and ML with
+L-BFGS-B over the uniquenesses, SMC starting values) including its sign and
+factor-ordering conventions; a single factor is oriented so that its
+largest loading is positive.
+"""
+
+from __future__ import annotations
+
+import warnings
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+import scipy as sp
+from scipy.optimize import minimize
+from scipy.stats import chi2
+
+from .precision import as_float_array, blocked_moments
+from .rotation import is_oblique, rotate_loadings
+from .streaming import DEFAULT_CHUNKSIZE, stream_moments
+
+EXTRACTION_METHODS = ("principal", "minres", "uls", "ml", "mle")
+
+
+def _minres_objective(psi: np.ndarray, corr: np.ndarray, n_factors: int) -> float:
+    np.fill_diagonal(corr, 1 - psi)
+    values, vectors = sp.linalg.eigh(corr)
+    values = np.maximum(values[::-1][:n_factors], np.finfo(float).eps * 100)
+    loadings = vectors[:, ::-1][:, :n_factors] * np.sqrt(values)
+    return float(np.sum((corr - loadings @ loadings.T) ** 2))
+
+
+def _minres_loadings(psi: np.ndarray, corr: np.ndarray, n_factors: int) -> np.ndarray:
+    np.fill_diagonal(corr, 1 - psi)
+    values, vectors = np.linalg.eigh(corr)
+    values = np.maximum(values[::-1][:n_factors], 0)
+    return vectors[:, ::-1][:, :n_factors] * np.sqrt(values)
+
+
+def _ml_objective(psi: np.ndarray, corr: np.ndarray, n_factors: int) -> float:
+    scale = 1 / np.sqrt(psi)
+    values = np.linalg.eigvalsh(corr * np.outer(scale, scale))[::-1][n_factors:]
+    return float(-(np.sum(np.log(values) - values) - n_factors + corr.shape[0]))
+
+
+def _ml_loadings(psi: np.ndarray, corr: np.ndarray, n_factors: int) -> np.ndarray:
+    scale = 1 / np.sqrt(psi)
+    values, vectors = np.linalg.eigh(corr * np.outer(scale, scale))
+    values = np.maximum(values[::-1][:n_factors] - 1, 0)
+    loadings = vectors[:, ::-1][:, :n_factors] * np.sqrt(values)
+    return np.sqrt(psi)[:, None] * loadings
+
+
+def smc_uniquenesses(corr: np.ndarray) -> np.ndarray:
+    """Starting uniquenesses 1 - SMC (squared multiple correlations)."""
+    return 1 / np.diag(np.linalg.inv(corr))
+
+
+def extract_loadings(
+    corr: np.ndarray,
+    n_factors: int,
+    method: str = "minres",
+    start: np.ndarray | None = None,
+    bounds: tuple[float, float] = (0.005, 1),
+) -> tuple[np.ndarray, np.ndarray]:
+    """Unrotated loadings for `n_factors` factors of a correlation matrix.
+
+    Parameters
+    ----------
+    corr: p x p correlation matrix
+    n_factors: number of factors to extract
+    method: "principal", "minres" (alias "uls") or "ml" (alias "mle")
+    start: starting uniquenesses for MINRES/ML (defaults to 1 - SMC)
+    bounds: box constraints on the uniquenesses during optimization
+
+    Returns
+    -------
+    (loadings, uniquenesses) where uniquenesses is the optimizer solution for
+    MINRES/ML and 1 - communalities for principal factors
+    """
+    method = method.lower()
+    if method not in EXTRACTION_METHODS:
+        raise ValueError(
+            f"Unknown extraction method {method!r}; use one of {EXTRACTION_METHODS}"
+        )
+    corr = np.array(corr, dtype=np.float64)
+
+    if method == "principal":
+        values, vectors = np.linalg.eigh(corr)
+        values = np.maximum(values[::-1][:n_factors], 0)
+        loadings = vectors[:, ::-1][:, :n_factors] * np.sqrt(values)
+        return loadings, 1 - np.sum(loadings**2, axis=1)
+
+    if start is None:
+        start = smc_uniquenesses(corr)
+    ml = method in ("ml", "mle")
+    result = minimize(
+        _ml_objective if ml else _minres_objective,
+        np.clip(start, *bounds),
+        method="L-BFGS-B",
+        bounds=[bounds] * corr.shape[0],
+        options={"maxiter": 1000},
+        args=(corr.copy(), n_factors),
+    )
+    if not result.success:
+        warnings.warn(f"Failed to converge: {result.message}", stacklevel=2)
+    if ml:
+        return _ml_loadings(result.x, corr, n_factors), result.x
+    return _minres_loadings(result.x, corr.copy(), n_factors), result.x
+
+
+def _align_factors(
+    loadings: np.ndarray,
+    method: str,
+    phi: np.ndarray | None = None,
+    oblique: bool = False,
+) -> tuple[np.ndarray, np.ndarray | None, np.ndarray | None]:
+    """Apply factor_analyzer's sign and ordering conventions.
+
+    Returns (loadings, phi, structure); the structure matrix is only formed
+    for oblique rotations.
+    """
+    structure = None
+    # align loading signs with column sums, as factor_analyzer (and R) do
+    if loadings.shape[1] > 1:
+        signs = np.sign(loadings.sum(axis=0))
+        signs[signs == 0] = 1
+        loadings = loadings * signs
+        if phi is not None:
+            phi = phi * np.outer(signs, signs)
+            if oblique:
+                structure = loadings @ phi
+    # factor_analyzer leaves a single factor's sign to the eigensolver; make
+    # it deterministic by keeping the largest-magnitude loading positive
+    elif loadings.shape[1] == 1:
+        loadings = loadings * np.sign(loadings[np.argmax(np.abs(loadings[:, 0])), 0])
+
+    # order factors by explained variance, except for principal factors
+    if method != "principal":
+        order = np.argsort(np.sum(loadings**2, axis=0))[::-1]
+        loadings = loadings[:, order]
+        if phi is not None:
+            phi = phi[np.ix_(order, order)]
+        if structure is not None:
+            structure = structure[:, order]
+    return loadings, phi, structure
+
+
+def max_identified_factors(n_features: int) -> int:
+    """Largest k with non-negative degrees of freedom, ((p - k)^2 - (p + k)) / 2 >= 0."""
+    p = n_features
+    return max(int(np.floor((2 * p + 1 - np.sqrt(8 * p + 1)) / 2)), 1)
+
+
+def _fit_indices(
+    corr: np.ndarray, loadings: np.ndarray, n_obs: int | None
+) -> dict[str, float]:
+    """RMSR, likelihood-ratio chi-square, p-value and BIC of a k-factor solution.
+
+    The chi-square is the ML discrepancy between R and the implied matrix
+    LL' + diag(1 - h^2) with Bartlett's correction, as `psych::fa` reports it
+    for every extraction method; it needs `n_obs` and is NaN without it.
+    """
+    p, k = loadings.shape
+    common = loadings @ loadings.T
+    residual = corr - common
+    off_diagonal = ~np.eye(p, dtype=bool)
+    rmsr = float(np.sqrt(np.mean(residual[off_diagonal] ** 2)))
+    dof = ((p - k) ** 2 - (p + k)) / 2
+
+    chi_square = p_value = bic = np.nan
+    if n_obs is not None:
+        implied = common.copy()
+        np.fill_diagonal(implied, 1.0)
+        sign_implied, log_det_implied = np.linalg.slogdet(implied)
+        sign_corr, log_det_corr = np.linalg.slogdet(corr)
+        if sign_implied > 0 and sign_corr > 0:
+            discrepancy = (
+                log_det_implied
+                - log_det_corr
+                + np.trace(np.linalg.solve(implied, corr))
+                - p
+            )
+            chi_square = float((n_obs - 1 - (2 * p + 5) / 6 - 2 * k / 3) * discrepancy)
+            if dof > 0:
+                p_value = float(chi2.sf(chi_square, dof))
+            bic = float(chi_square - dof * np.log(n_obs))
+    return {
+        "rmsr": rmsr,
+        "chi_square": chi_square,
+        "dof": dof,
+        "p_value": p_value,
+        "bic": bic,
+    }
+
+
+class FactorSolution:
+    """A fitted factor model, exposing the `FactorAnalyzer` attributes the scripts use."""
+
+    def __init__(
+        self,
+        loadings: np.ndarray,
+        corr: np.ndarray,
+        method: str,
+        rotation: str | None = None,
+        rotation_matrix: np.ndarray | None = None,
+        phi: np.ndarray | None = None,
+        structure: np.ndarray | None = None,
+        mean: np.ndarray | None = None,
+        std: np.ndarray | None = None,
+    ) -> None:
+        self.loadings_ = loadings
+        self.corr_ = corr
+        self.method = method
+        self.rotation = rotation
+        self.rotation_matrix_ = rotation_matrix
+        self.phi_ = phi
+        self.structure_ = structure
+        self.mean_ = mean
+        self.std_ = std
+        self.n_factors = loadings.shape[1]
+
+    def get_communalities(self) -> np.ndarray:
+        return np.sum(self.loadings_**2, axis=1)
+
+    def get_uniquenesses(self) -> np.ndarray:
+        return 1 - self.get_communalities()
+
+    def get_eigenvalues(self) -> tuple[np.ndarray, np.ndarray]:
+        """Original and common-factor eigenvalues, as in `FactorAnalyzer`."""
+        original = np.linalg.eigvalsh(self.corr_)[::-1]
+        reduced = self.corr_.copy()
+        np.fill_diagonal(reduced, self.get_communalities())
+        return original, np.linalg.eigvalsh(reduced)[::-1]
+
+    def get_factor_variance(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Variance, proportional variance and cumulative proportion per factor."""
+        variance = np.sum(self.loadings_**2, axis=0)
+        proportional = variance / self.loadings_.shape[0]
+        return variance, proportional, np.cumsum(proportional)
+
+    def to_arrays(self) -> tuple[dict[str, np.ndarray], dict[str, Any]]:
+        """Arrays and JSON metadata for storage (see `utils.registry`)."""
+        arrays = {"loadings": self.loadings_, "corr": self.corr_}
+        optional = {
+            "rotation_matrix": self.rotation_matrix_,
+            "phi": self.phi_,
+            "structure": self.structure_,
+            "mean": self.mean_,
+            "std": self.std_,
+        }
+        arrays.update(
+            {name: value for name, value in optional.items() if value is not None}
+        )
+        return arrays, {"method": self.method, "rotation": self.rotation}
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: dict[str, np.ndarray], metadata: dict[str, Any]
+    ) -> FactorSolution:
+        """Inverse of `to_arrays`."""
+        return cls(
+            np.asarray(arrays["loadings"]),
+            np.asarray(arrays["corr"]),
+            metadata["method"],
+            rotation=metadata.get("rotation"),
+            rotation_matrix=arrays.get("rotation_matrix"),
+            phi=arrays.get("phi"),
+            structure=arrays.get("structure"),
+            mean=arrays.get("mean"),
+            std=arrays.get("std"),
+        )
+
+    def rotate(self, method: str = "varimax", **kwargs: Any) -> FactorSolution:
+        """Rotated copy of this solution, via the memoized `utils.rotation` engine."""
+        if self.n_factors <= 1:
+            warnings.warn(
+                "No rotation will be performed when the number of factors equals 1.",
+                stacklevel=2,
+            )
+            return FactorSolution(
+                self.loadings_, self.corr_, self.method, mean=self.mean_, std=self.std_
+            )
+
+        method = method.lower()
+        rotated = rotate_loadings(self.loadings_, method, **kwargs)
+        rotation_matrix = rotated.rotation_matrix
+        if method != "promax":
+            rotation_matrix = np.linalg.inv(rotation_matrix).T
+        loadings, phi, structure = _align_factors(
+            rotated.loadings, self.method, rotated.phi, oblique=is_oblique(method)
+        )
+        return FactorSolution(
+            loadings,
+            self.corr_,
+            method=self.method,
+            rotation=method,
+            rotation_matrix=rotation_matrix,
+            phi=phi,
+            structure=structure,
+            mean=self.mean_,
+            std=self.std_,
+        )
+
+    def transform(self, X: np.ndarray | pd.DataFrame) -> np.ndarray:
+        """Regression-method factor scores for the rows of X (float32 X gives float32 scores)."""
+        X = as_float_array(X)
+        mean = X.mean(axis=0, dtype=np.float64) if self.mean_ is None else self.mean_
+        std = X.std(axis=0, dtype=np.float64) if self.std_ is None else self.std_
+        structure = self.structure_ if self.structure_ is not None else self.loadings_
+        weights = np.linalg.solve(self.corr_, structure)
+        return ((X - mean.astype(X.dtype)) / std.astype(X.dtype)) @ weights.astype(
+            X.dtype
+        )
+
+
+class FactorSweep(NamedTuple):
+    table: pd.DataFrame  # rmsr, chi_square, dof, p_value, bic indexed by n_factors
+    solutions: dict[int, FactorSolution]  # unrotated solution per k
+
+
+class CorrelationFactorModel:
+    """Compute the correlation matrix once and fit any number of factor models from it.
+
+    Parameters
+    ----------
+    corr: p x p correlation matrix
+    n_obs: number of observations behind `corr` (needed for fit statistics)
+    mean, std: column means and population standard deviations, used by
+        `FactorSolution.transform`; leave as None when only a matrix is known
+    columns: optional variable names
+    """
+
+    def __init__(
+        self,
+        corr: np.ndarray,
+        n_obs: int | None = None,
+        mean: np.ndarray | None = None,
+        std: np.ndarray | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> None:
+        self.corr = np.asarray(corr, dtype=np.float64)
+        self.n_obs = n_obs
+        self.mean = mean
+        self.std = std
+        self.columns = list(columns) if columns is not None else None
+        self._eigenvalues: np.ndarray | None = None
+        self._fits: dict[tuple[Any, ...], FactorSolution] = {}
+
+    @classmethod
+    def from_data(
+        cls, X: np.ndarray | pd.DataFrame, columns: Sequence[str] | None = None
+    ) -> CorrelationFactorModel:
+        """Build from an in-memory (n x p) array or DataFrame.
+
+        float32 data is not copied to float64: its moments are accumulated in
+        float64 one row block at a time (see `utils.precision`).
+        """
+        if columns is None and isinstance(X, pd.DataFrame):
+            columns = list(X.columns)
+        X = as_float_array(X)
+        if X.dtype == np.float32:
+            moments = blocked_moments(X)
+            return cls(
+                moments.correlation(),
+                n_obs=moments.n_obs,
+                mean=moments.mean,
+                std=moments.std(),
+                columns=columns,
+            )
+        mean = X.mean(axis=0)
+        std = X.std(axis=0)
+        Z = (X - mean) / std
+        corr = (Z.T @ Z) / X.shape[0]
+        np.fill_diagonal(corr, 1.0)
+        return cls(corr, n_obs=X.shape[0], mean=mean, std=std, columns=columns)
+
+    @classmethod
+    def from_csv(
+        cls,
+        path: str | Path,
+        columns: Sequence[str] | None = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+    ) -> CorrelationFactorModel:
+        """Build from a CSV file read in chunks (see `utils.streaming`)."""
+        moments = stream_moments(path, columns=columns, chunksize=chunksize)
+        return cls(
+            moments.correlation(),
+            n_obs=moments.n_obs,
+            mean=moments.mean,
+            std=moments.std(),
+            columns=moments.columns,
+        )
+
+    def to_arrays(self) -> tuple[dict[str, np.ndarray], dict[str, Any]]:
+        """Correlation matrix, moments and eigenvalues for storage (see `utils.registry`)."""
+        arrays = {"corr": self.corr, "eigenvalues": self.eigenvalues}
+        if self.mean is not None:
+            arrays["mean"] = self.mean
+        if self.std is not None:
+            arrays["std"] = self.std
+        n_obs = None if self.n_obs is None else int(self.n_obs)
+        return arrays, {"n_obs": n_obs, "columns": self.columns}
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: dict[str, np.ndarray], metadata: dict[str, Any]
+    ) -> CorrelationFactorModel:
+        """Inverse of `to_arrays`; the eigenvalues are not recomputed."""
+        model = cls(
+            arrays["corr"],
+            n_obs=metadata.get("n_obs"),
+            mean=arrays.get("mean"),
+            std=arrays.get("std"),
+            columns=metadata.get("columns"),
+        )
+        if "eigenvalues" in arrays:
+            model._eigenvalues = np.asarray(arrays["eigenvalues"])
+        return model
+
+    def cache_solution(self, solution: FactorSolution) -> FactorSolution:
+        """Seed the fit cache with an unrotated solution fitted (or stored) elsewhere."""
+        if solution.rotation is not None:
+            raise ValueError(
+                "Only unrotated solutions can be cached; rotations are derived"
+            )
+        self._fits[(solution.n_factors, solution.method, None, ())] = solution
+        return solution
+
+    @property
+    def n_features(self) -> int:
+        return self.corr.shape[0]
+
+    @property
+    def eigenvalues(self) -> np.ndarray:
+        """Eigenvalues of the correlation matrix in descending order."""
+        if self._eigenvalues is None:
+            self._eigenvalues = np.linalg.eigvalsh(self.corr)[::-1]
+        return self._eigenvalues
+
+    def fit(
+        self,
+        n_factors: int,
+        method: str = "minres",
+        rotation: str | None = None,
+        rotation_kwargs: dict[str, Any] | None = None,
+    ) -> FactorSolution:
+        """Fit (or return the cached) factor model for these settings."""
+        rotation_kwargs = dict(rotation_kwargs or {})
+        method = method.lower()
+        rotation = None if rotation is None else rotation.lower()
+        key = (n_factors, method, rotation, tuple(sorted(rotation_kwargs.items())))
+        if key not in self._fits:
+            self._fits[key] = self._fit(n_factors, method, rotation, rotation_kwargs)
+        return self._fits[key]
+
+    def sweep(
+        self, max_factors: int | None = None, method: str = "minres"
+    ) -> FactorSweep:
+        """Fit k = 1..max_factors unrotated models, each warm-started from k - 1.
+
+        Parameters
+        ----------
+        max_factors: largest number of factors (default: the largest identified
+            k, see `max_identified_factors`)
+        method: extraction method, as in `fit`
+
+        Returns
+        -------
+        FactorSweep whose table holds RMSR, chi-square, degrees of freedom,
+        p-value and BIC per k (the last three need `n_obs`); pick k with e.g.
+        `sweep.table["bic"].idxmin()`. Warm-started solutions are cached apart
+        from `fit`'s, so `fit(k)` still returns the SMC-started solution.
+        """
+        method = method.lower()
+        if max_factors is None:
+            max_factors = max_identified_factors(self.n_features)
+        start: np.ndarray | None = None
+        solutions: dict[int, FactorSolution] = {}
+        rows = []
+        for k in range(1, max_factors + 1):
+            key = (k, method, None, ())
+            if start is not None and method != "principal":
+                key += ("warm",)
+            if key not in self._fits:
+                self._fits[key] = self._extract(k, method, start)
+            solution = self._fits[key]
+            solutions[k] = solution
+            rows.append(_fit_indices(self.corr, solution.loadings_, self.n_obs))
+            # adding a factor lowers the uniquenesses; start from the current ones
+            start = solution.get_uniquenesses()
+        table = pd.DataFrame(
+            rows, index=pd.Index(range(1, max_factors + 1), name="n_factors")
+        )
+        return FactorSweep(table, solutions)
+
+    def _fit(
+        self,
+        n_factors: int,
+        method: str,
+        rotation: str | None,
+        rotation_kwargs: dict[str, Any],
+    ) -> FactorSolution:
+        if rotation is not None:
+            # rotate the cached unrotated solution instead of re-extracting
+            return self.fit(n_factors, method).rotate(rotation, **rotation_kwargs)
+
+        return self._extract(n_factors, method)
+
+    def _extract(
+        self, n_factors: int, method: str, start: np.ndarray | None = None
+    ) -> FactorSolution:
+        loadings, _ = extract_loadings(self.corr, n_factors, method=method, start=start)
+        loadings, _, _ = _align_factors(loadings, method)
+        return FactorSolution(
+            loadings, self.corr, method=method, mean=self.mean, std=self.std
+        )
+
+
+__all__ = [
+    "EXTRACTION_METHODS",
+    "CorrelationFactorModel",
+    "FactorSolution",
+    "FactorSweep",
+    "extract_loadings",
+    "max_identified_factors",
+    "smc_uniquenesses",
+]
@@ -0,0 +1,315 @@
+"""Precomputed factor-score coefficients for scoring new observations.
+
+Usage pattern:
+
+    from utils import FactorScorer
+    scorer = FactorScorer.from_solution(fa_rotated, scaler, features, method="bartlett")
+    scorer.save(script_dir / "models" / "invest_fa")
+
+    scorer = FactorScorer.load(script_dir / "models" / "invest_fa")
+    scores = scorer.transform(new_returns)                # raw rows -> factor scores
+    n_rows = scorer.score("returns.csv", "scores.csv", chunksize=500_000)
+    n_rows = scorer.score_npy("returns.npy", "scores.npy")
+
+or, from a shell:
+
+    python -m utils.factor_scoring models/invest_fa returns.csv scores.csv
+
+Purpose:
+- `FactorSolution.transform` solves R W = S and re-derives the
+  standardization on every call. Here the p x k scoring coefficients of the
+  regression (Thurstone), Bartlett or Anderson-Rubin method are computed
+  once, and the training scaler is folded into them, so projecting a batch
+  of raw rows is a single matrix product minus a constant row:
+  ((X - m) / s) W = X (W / s) - (m / s) W.
+- Models are stored as `.npy` arrays plus a `model.json`, as in
+  `utils.scoring`, and loaded without scikit-learn or factor_analyzer.
+- CSV files are read, scored and appended chunk by chunk; `.npy` files are
+  memory-mapped and scored block by block into a memory-mapped output, so
+  memory stays bounded whatever the number of rows. float32 input is scored
+  in float32.
+
+Regression scores match `FactorSolution.transform` (and `FactorAnalyzer`);
+Bartlett and Anderson-Rubin weights follow `psych::factor.scores` and use
+the pattern loadings with uniquenesses 1 - diag(L Phi L').
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .precision import ACCUMULATION_ROWS, as_float_array
+from .streaming import DEFAULT_CHUNKSIZE
+
+MODEL_FILE = "model.json"
+SCORE_METHODS = ("regression", "bartlett", "anderson-rubin")
+
+# lower bound on the uniquenesses, as in the MINRES/ML extraction
+MIN_UNIQUENESS = 0.005
+
+
+def factor_score_coefficients(solution: Any, method: str = "regression") -> np.ndarray:
+    """p x k weights W such that standardized rows Z give scores Z W.
+
+    Parameters
+    ----------
+    solution: fitted `FactorSolution` (or any object with `loadings_`,
+        `corr_` and optionally `phi_`/`structure_`)
+    method: "regression", "bartlett" or "anderson-rubin"
+    """
+    method = method.lower()
+    if method not in SCORE_METHODS:
+        raise ValueError(
+            f"Unknown scoring method {method!r}; use one of {SCORE_METHODS}"
+        )
+    corr = np.asarray(solution.corr_, dtype=np.float64)
+    loadings = np.asarray(solution.loadings_, dtype=np.float64)
+    phi = getattr(solution, "phi_", None)
+    structure = getattr(solution, "structure_", None)
+
+    if method == "regression":
+        return np.linalg.solve(corr, loadings if structure is None else structure)
+
+    common = loadings if phi is None else loadings @ phi
+    uniquenesses = np.clip(1 - np.sum(common * loadings, axis=1), MIN_UNIQUENESS, None)
+    scaled = loadings / uniquenesses[:, None]  # Psi^-1 L
+    if method == "bartlett":
+        return scaled @ np.linalg.inv(loadings.T @ scaled)
+
+    # Anderson-Rubin: Psi^-1 L (L' Psi^-1 R Psi^-1 L)^-1/2, uncorrelated unit-variance scores
+    values, vectors = np.linalg.eigh(scaled.T @ corr @ scaled)
+    return scaled @ (vectors / np.sqrt(values)) @ vectors.T
+
+
+class FactorScorer:
+    """Raw rows -> factor scores with the standardization folded into the weights.
+
+    Parameters
+    ----------
+    features: input column names
+    coefficients: p x k scoring weights for standardized rows
+    mean, scale: standardization applied to the raw features
+    method: scoring method the coefficients were computed with
+    factors: factor (output column) names
+    """
+
+    def __init__(
+        self,
+        features: Sequence[str],
+        coefficients: np.ndarray,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        method: str = "regression",
+        factors: Sequence[str] | None = None,
+    ) -> None:
+        self.features = list(features)
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.method = method
+        n_factors = self.coefficients.shape[1]
+        self.factors = (
+            list(factors)
+            if factors is not None
+            else [f"Factor{i + 1}" for i in range(n_factors)]
+        )
+
+        self.weights = np.ascontiguousarray(self.coefficients / self.scale[:, None])
+        self.offset = (self.mean / self.scale) @ self.coefficients
+        self._weights32 = self.weights.astype(np.float32)
+        self._offset32 = self.offset.astype(np.float32)
+
+    @classmethod
+    def from_solution(
+        cls,
+        solution: Any,
+        scaler: Any = None,
+        features: Sequence[str] | None = None,
+        method: str = "regression",
+    ) -> FactorScorer:
+        """Scorer for a fitted `FactorSolution` and the scaler applied before it.
+
+        Parameters
+        ----------
+        solution: fitted `FactorSolution`
+        scaler: fitted `StandardScaler` (or None) that produced the data the
+            model was fitted on; it is composed with the solution's own
+            column means and standard deviations
+        features: input column names (default: x0, x1, ...)
+        method: "regression", "bartlett" or "anderson-rubin"
+        """
+        coefficients = factor_score_coefficients(solution, method)
+        n_features = coefficients.shape[0]
+        mean, scale = np.zeros(n_features), np.ones(n_features)
+        if solution.mean_ is not None:
+            mean = np.asarray(solution.mean_)
+        if solution.std_ is not None:
+            scale = np.asarray(solution.std_)
+        scaler_mean = getattr(scaler, "mean_", None)
+        scaler_scale = getattr(scaler, "scale_", None)
+        if scaler_scale is not None:
+            mean = mean * scaler_scale
+            scale = scale * scaler_scale
+        if scaler_mean is not None:
+            mean = mean + scaler_mean
+        if features is None:
+            features = [f"x{i}" for i in range(n_features)]
+        return cls(features, coefficients, mean, scale, method=method.lower())
+
+    def save(self, directory: str | Path) -> Path:
+        """Write the coefficients and standardization to `directory` as `.npy` arrays."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "coefficients.npy", self.coefficients)
+        np.save(directory / "scaler_mean.npy", self.mean)
+        np.save(directory / "scaler_scale.npy", self.scale)
+        metadata = {
+            "kind": "factor_scores",
+            "method": self.method,
+            "features": self.features,
+            "factors": self.factors,
+        }
+        (directory / MODEL_FILE).write_text(json.dumps(metadata, indent=2))
+        return directory
+
+    @classmethod
+    def load(cls, directory: str | Path) -> FactorScorer:
+        """Read a scorer written by `save`."""
+        directory = Path(directory)
+        metadata = json.loads((directory / MODEL_FILE).read_text())
+        return cls(
+            metadata["features"],
+            np.load(directory / "coefficients.npy"),
+            np.load(directory / "scaler_mean.npy"),
+            np.load(directory / "scaler_scale.npy"),
+            method=metadata["method"],
+            factors=metadata["factors"],
+        )
+
+    def transform(
+        self, X: np.ndarray | pd.DataFrame, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Factor scores (n x k) for raw feature rows, one matrix product per call."""
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        X = as_float_array(X)
+        if X.dtype == np.float32:
+            weights, offset = self._weights32, self._offset32
+        else:
+            weights, offset = self.weights, self.offset
+        out = np.matmul(X, weights, out=out)
+        out -= offset
+        return out
+
+    def score(
+        self,
+        path: str | Path,
+        output: str | Path | None = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        keep_columns: Sequence[str] = (),
+    ) -> int:
+        """Score every row of a CSV file, writing factor scores chunk by chunk.
+
+        Parameters
+        ----------
+        path: input CSV with (at least) the model's feature columns
+        output: destination CSV (defaults to `<input stem>_factor_scores.csv`)
+        chunksize: rows read, scored and written per step
+        keep_columns: input columns (e.g. a date or instrument id) copied to the output
+
+        Returns
+        -------
+        number of rows scored
+        """
+        path = Path(path)
+        if output is None:
+            output = path.with_name(f"{path.stem}_factor_scores.csv")
+        usecols = list(dict.fromkeys([*keep_columns, *self.features]))
+
+        n_rows = 0
+        for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+            scored = pd.DataFrame(
+                self.transform(chunk[self.features].to_numpy()),
+                columns=self.factors,
+                index=chunk.index,
+            )
+            for i, column in enumerate(keep_columns):
+                scored.insert(i, column, chunk[column])
+            scored.to_csv(
+                output,
+                mode="w" if n_rows == 0 else "a",
+                header=n_rows == 0,
+                index=False,
+            )
+            n_rows += len(chunk)
+        return n_rows
+
+    def score_npy(
+        self,
+        path: str | Path,
+        output: str | Path,
+        block_rows: int = ACCUMULATION_ROWS,
+    ) -> int:
+        """Score an n x p `.npy` file block by block into an n x k `.npy` file.
+
+        Both files are memory-mapped; the scores keep the input's dtype
+        (float32 stays float32). Returns the number of rows scored.
+        """
+        X = np.load(path, mmap_mode="r")
+        if X.ndim != 2 or X.shape[1] != len(self.features):
+            raise ValueError(
+                f"Expected an n x {len(self.features)} array, got shape {X.shape}"
+            )
+        dtype = np.float32 if X.dtype == np.float32 else np.float64
+        scores = np.lib.format.open_memmap(
+            output, mode="w+", dtype=dtype, shape=(X.shape[0], len(self.factors))
+        )
+        for start in range(0, X.shape[0], block_rows):
+            stop = start + block_rows
+            self.transform(X[start:stop], out=scores[start:stop])
+        scores.flush()
+        return X.shape[0]
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Score a CSV or .npy file with saved factor-score coefficients."
+    )
+    parser.add_argument("model_dir", help="folder written by FactorScorer.save")
+    parser.add_argument("input", help="CSV or .npy file to score")
+    parser.add_argument(
+        "output",
+        nargs="?",
+        help="destination file (default: <input>_factor_scores.csv)",
+    )
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument(
+        "--keep", nargs="*", default=[], help="input columns to copy to the output"
+    )
+    args = parser.parse_args(argv)
+
+    scorer = FactorScorer.load(args.model_dir)
+    if Path(args.input).suffix == ".npy":
+        output = args.output or str(
+            Path(args.input).with_name(f"{Path(args.input).stem}_factor_scores.npy")
+        )
+        n_rows = scorer.score_npy(args.input, output, block_rows=args.chunksize)
+    else:
+        n_rows = scorer.score(
+            args.input, args.output, chunksize=args.chunksize, keep_columns=args.keep
+        )
+    print(f"Scored {n_rows} rows")
+
+
+__all__ = ["SCORE_METHODS", "FactorScorer", "factor_score_coefficients"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""Deferred, parallel and incremental rendering of the example figures.
+
+Usage pattern:
+
+    from utils import FigureBatch
+    figures = FigureBatch()
+    figures.add(roc_plot, "roc_curves", figsize=(10, 8),
+                y_true=y_test.to_numpy(), proba=y_prob_qda, classes=qda.classes_,
+                colors=colors, title="QDA ROC Curves")
+    ...
+    figures.render()            # at the end of the script
+
+Purpose:
+- Analysis cells only record what to draw (a `FigureSpec`: output path, plot
+  name and the arrays it needs); nothing is drawn while the analysis runs.
+- `render` draws all recorded figures on a process pool with Matplotlib's
+  Agg canvas (no GUI backend, no `pyplot` state), so saving several 300 dpi
+  figures overlaps instead of running one after another.
+- Each output records a hash of its inputs and of the plot function's source
+  in a `.figures.json` manifest beside it; unchanged figures are not drawn
+  again on the next run.
+
+Run a script with `--no-plots` (or set `MA2003B_NO_PLOTS=1`) to get only the
+numeric results: `add` and `render` then do nothing, and since the plot
+functions import Matplotlib, seaborn and scikit-learn's metrics only when
+they draw, a headless run never loads them.
+
+Plot functions live in this module (see `PLOTS`) so worker processes can
+import them. Workers are forked on Linux only (`fork_context`): on macOS,
+forking after NumPy (Accelerate) and Matplotlib are initialized is unsafe,
+and spawned workers would re-run the calling script, so there (and on
+Windows) figures are drawn in the calling process.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from .datasets import update_digest
+
+MANIFEST_FILE = ".figures.json"
+DEFAULT_DPI = 300
+NO_PLOTS_FLAG = "--no-plots"
+NO_PLOTS_ENV = "MA2003B_NO_PLOTS"
+
+
+def fork_context() -> multiprocessing.context.BaseContext | None:
+    """The "fork" multiprocessing context on Linux, None elsewhere.
+
+    macOS offers fork, but system frameworks (Accelerate, used by NumPy) are
+    not fork-safe once initialized, which is why CPython spawns there.
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def plots_enabled() -> bool:
+    """False when the script was started with `--no-plots` or `MA2003B_NO_PLOTS` is set."""
+    if NO_PLOTS_FLAG in sys.argv[1:]:
+        return False
+    return os.environ.get(NO_PLOTS_ENV, "").lower() not in ("1", "true", "yes")
+
+
+class FigureSpec(NamedTuple):
+    path: Path  # output image
+    plot: str  # name of a function in `PLOTS`
+    figsize: tuple[float, float]
+    dpi: int
+    data: dict[str, Any]  # keyword arguments for the plot function
+
+
+# --- plot functions: each draws on an empty `matplotlib.figure.Figure` ---
+
+
+def class_scatter(
+    fig: Any,
+    points: np.ndarray,
+    labels: np.ndarray,
+    classes: Sequence,
+    colors: Sequence[str],
+    legend_format: str = "{}",
+    centroids: np.ndarray | None = None,
+    regions: Any | None = None,
+    regions_cmap: str = "RdYlBu",
+    regions_alpha: float = 0.3,
+    edgecolors: str | None = None,
+    xlabel: str = "",
+    ylabel: str = "",
+    title: str = "",
+) -> None:
+    """Two-dimensional points colored by class, with optional centroids and regions."""
+    ax = fig.add_subplot()
+    if regions is not None:
+        from .boundaries import plot_decision_regions
+
+        plot_decision_regions(ax, regions, cmap=regions_cmap, alpha=regions_alpha)
+    for i, label in enumerate(classes):
+        mask = labels == label
+        ax.scatter(
+            points[mask, 0],
+            points[mask, 1],
+            c=colors[i],
+            label=legend_format.format(label),
+            alpha=0.7,
+            s=50,
+            edgecolors=edgecolors,
+        )
+    if centroids is not None:
+        for i, label in enumerate(classes):
+            ax.scatter(
+                centroids[i, 0],
+                centroids[i, 1],
+                c=colors[i],
+                marker="x",
+                s=200,
+                linewidth=3,
+                label=f"{label} Centroid",
+            )
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+def grouped_bars(
+    fig: Any,
+    values: np.ndarray,
+    group_labels: Sequence[str],
+    tick_labels: Sequence[str],
+    colors: Sequence[str],
+    width: float = 0.35,
+    alpha: float = 0.8,
+    xlabel: str = "",
+    ylabel: str = "",
+    title: str = "",
+    tick_rotation: float = 0,
+) -> None:
+    """One bar per (group, item): `values` is (groups x items)."""
+    ax = fig.add_subplot()
+    x = np.arange(values.shape[1])
+    for i, (row, label) in enumerate(zip(values, group_labels, strict=True)):
+        offset = (i - (len(values) - 1) / 2) * width
+        ax.bar(x + offset, row, width, label=label, alpha=alpha, color=colors[i])
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.set_xticks(
+        x,
+        tick_labels,
+        rotation=tick_rotation,
+        ha="right" if tick_rotation else "center",
+    )
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+def horizontal_bars(
+    fig: Any,
+    labels: Sequence[str],
+    values: np.ndarray,
+    color: str = "skyblue",
+    xlabel: str = "",
+    ylabel: str = "",
+    title: str = "",
+) -> None:
+    """One horizontal bar per label."""
+    ax = fig.add_subplot()
+    ax.barh(labels, values, color=color)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+
+
+def roc_curves(
+    fig: Any,
+    y_true: np.ndarray,
+    proba: np.ndarray,
+    classes: Sequence,
+    colors: Sequence[str],
+    title: str = "",
+) -> None:
+    """One-vs-rest ROC curve and AUC per class."""
+    from sklearn.metrics import auc, roc_curve
+
+    ax = fig.add_subplot()
+    for i, label in enumerate(classes):
+        fpr, tpr, _ = roc_curve((y_true == label).astype(int), proba[:, i])
+        ax.plot(
+            fpr,
+            tpr,
+            color=colors[i],
+            linewidth=2,
+            label=f"{label} (AUC = {auc(fpr, tpr):.3f})",
+        )
+    ax.plot([0, 1], [0, 1], "k--", linewidth=2)
+    ax.set_xlabel("False Positive Rate")
+    ax.set_ylabel("True Positive Rate")
+    ax.set_title(title)
+    ax.legend(loc="lower right")
+    ax.grid(True, alpha=0.3)
+
+
+def posterior_histograms(
+    fig: Any,
+    proba: np.ndarray,
+    classes: Sequence,
+    colors: Sequence[str],
+    title_format: str = "Posterior Probabilities\n{}",
+    bins: int = 20,
+) -> None:
+    """Histogram of the posterior probability of each class, side by side."""
+    axes = fig.subplots(1, len(classes), squeeze=False)[0]
+    for i, (ax, label) in enumerate(zip(axes, classes, strict=True)):
+        probs = proba[:, i]
+        ax.hist(probs, bins=bins, alpha=0.7, color=colors[i], edgecolor="black")
+        ax.axvline(
+            probs.mean(),
+            color="red",
+            linestyle="--",
+            linewidth=2,
+            label=f"Mean: {probs.mean():.3f}",
+        )
+        ax.set_xlabel("Posterior Probability")
+        ax.set_ylabel("Frequency")
+        ax.set_title(title_format.format(label))
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+
+def confusion_matrices(fig: Any, panels: Sequence[dict[str, Any]]) -> None:
+    """Annotated confusion-matrix heatmaps side by side.
+
+    Each panel has `matrix`, `classes`, `cmap` and `title`.
+    """
+    import seaborn as sns
+
+    axes = fig.subplots(1, len(panels), squeeze=False)[0]
+    for ax, panel in zip(axes, panels, strict=True):
+        sns.heatmap(
+            panel["matrix"],
+            annot=True,
+            fmt="d",
+            cmap=panel["cmap"],
+            xticklabels=panel["classes"],
+            yticklabels=panel["classes"],
+            ax=ax,
+        )
+        ax.set_title(panel["title"])
+        ax.set_ylabel("True Label")
+        ax.set_xlabel("Predicted Label")
+
+
+PLOTS: dict[str, Callable[..., None]] = {
+    "class_scatter": class_scatter,
+    "confusion_matrices": confusion_matrices,
+    "grouped_bars": grouped_bars,
+    "horizontal_bars": horizontal_bars,
+    "posterior_histograms": posterior_histograms,
+    "roc_curves": roc_curves,
+}
+
+
+# --- batch rendering ---
+
+
+def figure_digest(spec: FigureSpec) -> str:
+    """Hash of everything that determines a figure: data, size, dpi and plot code."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(inspect.getsource(PLOTS[spec.plot]).encode())
+    update_digest(digest, (spec.figsize, spec.dpi, spec.data))
+    return digest.hexdigest()
+
+
+def _render(spec: FigureSpec) -> Path:
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=spec.figsize)
+    PLOTS[spec.plot](fig, **spec.data)
+    fig.tight_layout()
+    fig.savefig(spec.path, dpi=spec.dpi, bbox_inches="tight")
+    return spec.path
+
+
+def _read_manifest(directory: Path) -> dict[str, str]:
+    try:
+        return json.loads((directory / MANIFEST_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+class FigureBatch:
+    """Collects figure specs during an analysis and renders them afterwards.
+
+    Parameters
+    ----------
+    dpi: resolution of the saved images
+    max_workers: processes used by `render` (default: CPU count)
+    enabled: record and render figures (default: `plots_enabled()`)
+    """
+
+    def __init__(
+        self,
+        dpi: int = DEFAULT_DPI,
+        max_workers: int | None = None,
+        enabled: bool | None = None,
+    ) -> None:
+        self.dpi = dpi
+        self.max_workers = max_workers
+        self.enabled = plots_enabled() if enabled is None else enabled
+        self.specs: list[FigureSpec] = []
+
+    def add(
+        self,
+        path: str | Path,
+        plot: str,
+        figsize: tuple[float, float] = (10, 8),
+        **data: Any,
+    ) -> None:
+        """Record a figure: `PLOTS[plot](fig, **data)` saved to `path`."""
+        if plot not in PLOTS:
+            raise ValueError(f"Unknown plot {plot!r}; use one of {sorted(PLOTS)}")
+        if not self.enabled:
+            return
+        self.specs.append(FigureSpec(Path(path), plot, tuple(figsize), self.dpi, data))
+
+    def render(self, force: bool = False) -> dict[Path, str]:
+        """Draw every recorded figure whose inputs changed since the last run.
+
+        Returns a mapping of output path to "rendered" or "unchanged".
+        """
+        digests = [figure_digest(spec) for spec in self.specs]
+        manifests: dict[Path, dict[str, str]] = {}
+        status: dict[Path, str] = {}
+        pending = []
+        for spec, digest in zip(self.specs, digests, strict=True):
+            manifest = manifests.setdefault(
+                spec.path.parent, _read_manifest(spec.path.parent)
+            )
+            if (
+                not force
+                and spec.path.exists()
+                and manifest.get(spec.path.name) == digest
+            ):
+                status[spec.path] = "unchanged"
+            else:
+                pending.append(spec)
+
+        workers = min(self.max_workers or os.cpu_count() or 1, len(pending))
+        context = fork_context()
+        if workers > 1 and context is not None:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                rendered = list(pool.map(_render, pending))
+        else:
+            rendered = [_render(spec) for spec in pending]
+
+        for path in rendered:
+            status[path] = "rendered"
+        for spec, digest in zip(self.specs, digests, strict=True):
+            if status.get(spec.path) == "rendered":
+                manifests[spec.path.parent][spec.path.name] = digest
+        for directory, manifest in manifests.items():
+            (directory / MANIFEST_FILE).write_text(
+                json.dumps(manifest, indent=2, sort_keys=True)
+            )
+        self.specs.clear()
+        return status
+
+
+__all__ = [
+    "FigureBatch",
+    "FigureSpec",
+    "PLOTS",
+    "figure_digest",
+    "fork_context",
+    "plots_enabled",
+]
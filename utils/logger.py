@@ -11,50 +11,104 @@ Purpose:
 - Avoid duplicate handlers when modules re-import in interactive sessions
 - Default INFO level to keep notebooks/scripts readable
 
+Stage instrumentation (wall time, CPU time, peak memory per named stage):
+
+    from utils import next_stage, end_stages, stage
+    logger = setup_logger(__name__, trace="trace.json")  # or MA2003B_TRACE=<dir>
+    next_stage("load", logger)          # closes the previous stage, opens this one
+    ...
+    with stage("rotate", logger):       # nested block; also works as a decorator
+        ...
+    end_stages(logger)                  # closes the open stage, writes the trace
+
+- Each finished stage is logged as one `stage name=... wall=... cpu=...
+  peak_bytes=...` line whose fields are also attached to the LogRecord as
+  `record.stage`, so handlers can collect them without parsing text.
+- With a trace path (or `MA2003B_TRACE` naming a folder) the stages are also
+  written as Chrome trace events (`chrome://tracing`, Perfetto) at
+  `end_stages` or interpreter exit.
+- Peak memory is the tracemalloc peak inside the stage when tracemalloc is
+  running (`trace_memory=True` or `MA2003B_TRACE_MEMORY=1`; it slows
+  allocation). Otherwise it is how far the stage raised the process's peak
+  resident set size (`memory=maxrss_growth`): 0 for a stage that stayed
+  below an earlier peak, so it bounds new memory, not the stage's own use.
+
 This file was (re)introduced after being absent in the current worktree so that
 existing imports `from utils import setup_logger` resolve correctly (Pylance / runtime).
 """
+
 from __future__ import annotations
 
+import atexit
+import contextlib
+import json
 import logging
 import os
 import sys
-from typing import Optional
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, NamedTuple
+
+TRACE_ENV = "MA2003B_TRACE"
+TRACE_MEMORY_ENV = "MA2003B_TRACE_MEMORY"
+STAGES = ("load", "standardize", "fit", "rotate", "cv", "plot")
+STAGE_MESSAGE_PREFIX = "stage name="  # start of every stage log line
 
 # Simple colored level names (ANSI) if terminal supports it
 _COLOR_MAP = {
-    "DEBUG": "\x1b[36m",   # Cyan
-    "INFO": "\x1b[32m",    # Green
-    "WARNING": "\x1b[33m", # Yellow
-    "ERROR": "\x1b[31m",   # Red
+    "DEBUG": "\x1b[36m",  # Cyan
+    "INFO": "\x1b[32m",  # Green
+    "WARNING": "\x1b[33m",  # Yellow
+    "ERROR": "\x1b[31m",  # Red
     "CRITICAL": "\x1b[41m",  # Red background
 }
 _RESET = "\x1b[0m"
 
+
 def _supports_color(stream) -> bool:
-    return hasattr(stream, "isatty") and stream.isatty() and os.environ.get("NO_COLOR") is None
+    return (
+        hasattr(stream, "isatty")
+        and stream.isatty()
+        and os.environ.get("NO_COLOR") is None
+    )
+
 
 class _CourseFormatter(logging.Formatter):
     def __init__(self, use_color: bool) -> None:
-        super().__init__("%(asctime)s | %(levelname)s | %(name)s | %(message)s", "%H:%M:%S")
+        super().__init__(
+            "%(asctime)s | %(levelname)s | %(name)s | %(message)s", "%H:%M:%S"
+        )
         self.use_color = use_color
 
     def format(self, record: logging.LogRecord) -> str:  # type: ignore[override]
         original_levelname = record.levelname
         if self.use_color and original_levelname in _COLOR_MAP:
-            record.levelname = f"{_COLOR_MAP[original_levelname]}{original_levelname}{_RESET}"
+            record.levelname = (
+                f"{_COLOR_MAP[original_levelname]}{original_levelname}{_RESET}"
+            )
         try:
             return super().format(record)
         finally:
             record.levelname = original_levelname  # restore to avoid side-effects
 
-def setup_logger(name: Optional[str] = None, level: int = logging.INFO) -> logging.Logger:
+
+def setup_logger(
+    name: str | None = None,
+    level: int = logging.INFO,
+    trace: str | Path | None = None,
+    trace_memory: bool = False,
+) -> logging.Logger:
     """Return a configured logger.
 
     Parameters
     ----------
     name: module or logical component name (defaults to root or provided __name__)
     level: logging level (defaults to INFO)
+    trace: Chrome trace-event JSON file for this logger's stages (default:
+        `<MA2003B_TRACE>/<logger name>.json` when the variable is set)
+    trace_memory: start tracemalloc so stages report their own peak memory
 
     Behavior
     --------
@@ -75,6 +129,203 @@ def setup_logger(name: Optional[str] = None, level: int = logging.INFO) -> loggi
 
     # Propagate disabled to prevent double logging under root
     logger.propagate = False
+
+    if trace is None and os.environ.get(TRACE_ENV):
+        trace = Path(os.environ[TRACE_ENV]) / f"{logger_name}.json"
+    if trace is not None:
+        _TRACE_PATHS[logger_name] = Path(trace)
+    trace_memory = trace_memory or bool(os.environ.get(TRACE_MEMORY_ENV))
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
     return logger
 
-__all__ = ["setup_logger"]
+
+# --- stage instrumentation ---
+
+
+class StageRecord(NamedTuple):
+    name: str
+    logger: str
+    start: float  # seconds since utils.logger was imported
+    wall_time: float  # seconds
+    cpu_time: float  # process CPU seconds (all threads)
+    peak_memory: int | None  # bytes; None when it cannot be measured
+    memory_source: str  # "tracemalloc" (peak inside the stage) or "maxrss_growth"
+    depth: int  # nesting level, 0 for top-level stages
+
+
+_CLOCK_ORIGIN = time.perf_counter()
+_STACK: list[stage] = []
+_OPEN: dict[str, stage] = {}  # sequential stage per logger, see `next_stage`
+_RECORDS: list[StageRecord] = []
+_TRACE_PATHS: dict[str, Path] = {}
+_TRACE_EVENTS: dict[Path, list[dict[str, Any]]] = {}
+
+
+def _max_rss() -> int | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def _emit(logger: logging.Logger, record: StageRecord, fields: dict[str, Any]) -> None:
+    _RECORDS.append(record)
+    peak = "na" if record.peak_memory is None else record.peak_memory
+    extra = "".join(f" {key}={value}" for key, value in fields.items())
+    logger.info(
+        f"{STAGE_MESSAGE_PREFIX}{record.name} wall={record.wall_time:.6f} cpu={record.cpu_time:.6f} "
+        f"peak_bytes={peak} memory={record.memory_source} depth={record.depth}{extra}",
+        extra={"stage": {**record._asdict(), **fields}},
+    )
+    path = _TRACE_PATHS.get(record.logger)
+    if path is not None:
+        _TRACE_EVENTS.setdefault(path, []).append(
+            {
+                "name": record.name,
+                "cat": "stage",
+                "ph": "X",
+                "ts": record.start * 1e6,
+                "dur": record.wall_time * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {
+                    "cpu_time": record.cpu_time,
+                    "peak_memory": record.peak_memory,
+                    "memory_source": record.memory_source,
+                    **fields,
+                },
+            }
+        )
+
+
+class stage(contextlib.ContextDecorator):
+    """Time a named stage: wall time, CPU time and peak memory.
+
+    Parameters
+    ----------
+    name: stage name, conventionally one of `STAGES`
+    logger: logger that receives the record (default: the course logger)
+    fields: extra key/value pairs added to the record, e.g. n_factors=2
+    """
+
+    def __init__(
+        self, name: str, logger: logging.Logger | None = None, **fields: Any
+    ) -> None:
+        self.name = name
+        self.logger = logger if logger is not None else logging.getLogger("ma2003b")
+        self.fields = fields
+        self.record: StageRecord | None = None
+
+    def _recreate_cm(self) -> stage:
+        # a fresh instance per decorated call, so recursion and threads do not share timers
+        return stage(self.name, self.logger, **self.fields)
+
+    def __enter__(self) -> stage:
+        self._peak = 0
+        self._max_rss = None if tracemalloc.is_tracing() else _max_rss()
+        if tracemalloc.is_tracing():
+            # hand the parent the peak reached so far before resetting it for this stage
+            if _STACK:
+                _STACK[-1]._peak = max(
+                    _STACK[-1]._peak, tracemalloc.get_traced_memory()[1]
+                )
+            tracemalloc.reset_peak()
+        self._depth = len(_STACK)
+        _STACK.append(self)
+        self._start = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        wall_time = time.perf_counter() - self._start
+        cpu_time = time.process_time() - self._cpu
+        if self in _STACK:
+            _STACK.remove(self)
+        if tracemalloc.is_tracing():
+            peak: int | None = max(self._peak, tracemalloc.get_traced_memory()[1])
+            if _STACK:
+                _STACK[-1]._peak = max(_STACK[-1]._peak, peak)
+            tracemalloc.reset_peak()
+            source = "tracemalloc"
+        else:
+            # growth of the process high-water mark while the stage ran
+            end_rss = _max_rss()
+            peak = (
+                None
+                if end_rss is None or self._max_rss is None
+                else end_rss - self._max_rss
+            )
+            source = "maxrss_growth"
+        self.record = StageRecord(
+            self.name,
+            self.logger.name,
+            self._start - _CLOCK_ORIGIN,
+            wall_time,
+            cpu_time,
+            peak,
+            source,
+            self._depth,
+        )
+        _emit(self.logger, self.record, self.fields)
+
+
+def next_stage(name: str, logger: logging.Logger | None = None, **fields: Any) -> stage:
+    """Close `logger`'s open sequential stage (if any) and open `name`.
+
+    Suits cell-by-cell scripts: one call at the top of each step, no
+    re-indentation. `end_stages` closes the last one.
+    """
+    opened = stage(name, logger, **fields)
+    previous = _OPEN.pop(opened.logger.name, None)
+    if previous is not None:
+        previous.__exit__(None, None, None)
+    _OPEN[opened.logger.name] = opened.__enter__()
+    return opened
+
+
+def end_stages(logger: logging.Logger | None = None) -> None:
+    """Close the open sequential stage of `logger` (default: of every logger) and write traces."""
+    names = list(_OPEN) if logger is None else [logger.name]
+    for name in names:
+        opened = _OPEN.pop(name, None)
+        if opened is not None:
+            opened.__exit__(None, None, None)
+    write_traces()
+
+
+def write_traces() -> list[Path]:
+    """Write the collected Chrome trace events; returns the files written."""
+    written = []
+    for path, events in _TRACE_EVENTS.items():
+        if not events:
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+        written.append(path)
+    return written
+
+
+def collect_stages() -> list[StageRecord]:
+    """Stage records finished since the last call (and forget them)."""
+    records = list(_RECORDS)
+    _RECORDS.clear()
+    return records
+
+
+atexit.register(end_stages)
+
+__all__ = [
+    "STAGES",
+    "STAGE_MESSAGE_PREFIX",
+    "StageRecord",
+    "collect_stages",
+    "end_stages",
+    "next_stage",
+    "setup_logger",
+    "stage",
+    "write_traces",
+]
@@ -0,0 +1,134 @@
+"""Horn's parallel analysis for factor and component retention.
+
+Usage pattern:
+
+    from utils import parallel_analysis, n_factors_parallel
+    mean_eig, pct_eig = parallel_analysis(n_obs, n_features, n_iter=500)
+    k = n_factors_parallel(observed_eigenvalues, pct_eig)
+
+Purpose:
+- Compare observed correlation eigenvalues with those of random normal data
+  of the same shape; retain the leading factors whose eigenvalue beats the
+  random-data percentile.
+- Each batch of replicates is simulated as one (batch, n, p) array and its
+  correlation eigenvalues come from a single stacked `np.linalg.eigvalsh`
+  call, so there is no Python loop over replicates.
+- Batches are sized to stay under `max_batch_bytes`, counting the simulated
+  (batch, n, p) data, the (batch, p, p) correlation stack and the per-matrix
+  `eigvalsh` workspace; for wide data the correlation stack dominates. With
+  `max_workers > 1` batches are spread over a process pool (useful for large
+  p, where the O(p^3) eigendecompositions dominate); each worker holds one
+  batch at a time, so the pool needs up to `max_workers * max_batch_bytes`.
+
+Every batch draws from its own child of `np.random.SeedSequence(random_state)`,
+so for a given seed and batch size the thresholds do not depend on how many
+workers computed them.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_MAX_BATCH_BYTES = 256 * 1024**2
+
+
+def _random_eigenvalues(
+    seed: np.random.SeedSequence, n_replicates: int, n_obs: int, n_features: int
+) -> np.ndarray:
+    """Descending correlation eigenvalues for a stack of random normal datasets."""
+    rng = np.random.default_rng(seed)
+    data = rng.standard_normal((n_replicates, n_obs, n_features))
+    data -= data.mean(axis=1, keepdims=True)
+    data /= np.sqrt(np.einsum("rij,rij->rj", data, data))[:, None, :]
+    corr = np.matmul(data.transpose(0, 2, 1), data)
+    return np.linalg.eigvalsh(corr)[:, ::-1]
+
+
+def _batch_bytes(n_replicates: int, n_obs: int, n_features: int) -> int:
+    """Peak bytes of `_random_eigenvalues` for one batch.
+
+    Per replicate: the n x p data, the p x p correlation matrix and four
+    length-p vectors (column means, norms and their square roots, the
+    eigenvalues). `eigvalsh` also copies one matrix at a time into a
+    p x p LAPACK buffer with O(p) workspace.
+    """
+    p = n_features
+    per_replicate = n_obs * p + p * p + 4 * p
+    workspace = p * p + 2 * p + 1
+    return 8 * (n_replicates * per_replicate + workspace)
+
+
+def _default_batch_size(n_obs: int, n_features: int, max_batch_bytes: int) -> int:
+    """Largest batch whose `_batch_bytes` fits in `max_batch_bytes` (at least 1)."""
+    fixed = _batch_bytes(0, n_obs, n_features)
+    per_replicate = _batch_bytes(1, n_obs, n_features) - fixed
+    return max(1, (max_batch_bytes - fixed) // per_replicate)
+
+
+def parallel_analysis(
+    n_obs: int,
+    n_features: int,
+    n_iter: int = 500,
+    percentile: float = 95,
+    batch_size: int | None = None,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    max_workers: int = 1,
+    random_state: int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Random-data eigenvalue thresholds for a dataset of shape (n_obs, n_features).
+
+    Parameters
+    ----------
+    n_obs, n_features: shape of the observed dataset
+    n_iter: number of random datasets to simulate
+    percentile: percentile of the random eigenvalues used as threshold
+    batch_size: replicates per stacked eigendecomposition; by default the
+        largest batch that fits in `max_batch_bytes`
+    max_batch_bytes: memory bound for one batch: simulated data, correlation
+        matrices and eigendecomposition workspace (a single replicate is
+        used when even one does not fit)
+    max_workers: worker processes; 1 runs in-process
+    random_state: seed for reproducible thresholds
+
+    Returns
+    -------
+    (mean_eigenvalues, percentile_eigenvalues), each of length n_features
+    """
+    if batch_size is None:
+        batch_size = _default_batch_size(n_obs, n_features, max_batch_bytes)
+    batch_size = min(batch_size, n_iter)
+    sizes = [batch_size] * (n_iter // batch_size)
+    if n_iter % batch_size:
+        sizes.append(n_iter % batch_size)
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+    if max_workers == 1:
+        batches = [
+            _random_eigenvalues(seed, size, n_obs, n_features)
+            for seed, size in zip(seeds, sizes, strict=True)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            batches = list(
+                pool.map(
+                    _random_eigenvalues,
+                    seeds,
+                    sizes,
+                    [n_obs] * len(sizes),
+                    [n_features] * len(sizes),
+                )
+            )
+
+    eigenvalues = np.concatenate(batches, axis=0)
+    return eigenvalues.mean(axis=0), np.percentile(eigenvalues, percentile, axis=0)
+
+
+def n_factors_parallel(observed: np.ndarray, threshold: np.ndarray) -> int:
+    """Number of leading observed eigenvalues that exceed the random-data threshold."""
+    above = np.asarray(observed) > np.asarray(threshold)
+    return int(np.argmin(above)) if not above.all() else int(above.size)
+
+
+__all__ = ["n_factors_parallel", "parallel_analysis"]
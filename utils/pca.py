@@ -0,0 +1,245 @@
+"""PCA with a solver chosen from the data shape and the number of components.
+
+Usage pattern:
+
+    from utils import fit_pca
+    pca, Z, solver = fit_pca(Xs)                      # all components, as PCA()
+    pca, Z, solver = fit_pca(Xs, n_components=10)     # top 10 of a wide matrix
+    pca.explained_variance_, pca.components_          # as with PCA()
+
+Purpose:
+- `PCA()` computes every component with a dense LAPACK SVD. For wide
+  matrices (p in the tens of thousands) where only the leading k are wanted
+  this wastes time and memory; truncated solvers cost roughly O(n p k).
+- `choose_pca_solver` picks one of `PCA_SOLVERS` from n, p and k:
+    - "full": all or most components requested (k >= 80% of min(n, p)), or
+      a small matrix (max(n, p) <= `SMALL_MATRIX`) -- LAPACK is fastest.
+    - "incremental": the matrix is larger than `INCREMENTAL_MIN_BYTES`;
+      `IncrementalPCA` fits it in row batches of about `BATCH_BYTES`, so the
+      SVD never needs a second copy of the whole matrix.
+    - "arpack": very few components (k < 1% of min(n, p)); Lanczos
+      iterations converge in a handful of matrix products.
+    - "randomized": everything else (Halko et al. randomized SVD).
+- Whatever the solver, the returned estimator has the `PCA()` attributes
+  the scripts use, with the same shapes for the same k: `components_`
+  (k x p), `explained_variance_` and `explained_variance_ratio_` (k,), the
+  ratio taken over the total variance of all p columns, and scores (n x k).
+- `stream_pca` runs a standardized PCA on a CSV file that does not fit in
+  memory: one chunked pass accumulates the column means and variances
+  (`stream_moments`), a second standardizes each chunk and feeds it to
+  `IncrementalPCA.partial_fit`, and a third writes the scores chunk by
+  chunk to a `.npy` (memory-mapped) or CSV file. Chunks are sized from
+  `memory_budget`, so peak memory does not grow with the number of rows.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .streaming import iter_csv_blocks, stream_moments
+
+PCA_SOLVERS = ("full", "randomized", "arpack", "incremental")
+
+SMALL_MATRIX = 500
+FULL_FRACTION = 0.8
+ARPACK_FRACTION = 0.01
+INCREMENTAL_MIN_BYTES = 2 * 1024**3
+BATCH_BYTES = 256 * 1024**2
+DEFAULT_MEMORY_BUDGET = 512 * 1024**2
+
+# float64 copies of a chunk alive at once in `stream_pca`: the parsed frame,
+# the standardized block and IncrementalPCA's stacked SVD input
+_CHUNK_COPIES = 4
+
+
+class PCAFit(NamedTuple):
+    model: Any  # fitted PCA / IncrementalPCA
+    scores: np.ndarray  # component scores (n x k)
+    solver: str  # solver that was used
+
+
+def choose_pca_solver(
+    n_samples: int, n_features: int, n_components: int | None = None, itemsize: int = 8
+) -> str:
+    """Solver for an n x p matrix when `n_components` (default: all) are wanted."""
+    rank = min(n_samples, n_features)
+    k = rank if n_components is None else n_components
+    if k >= FULL_FRACTION * rank or max(n_samples, n_features) <= SMALL_MATRIX:
+        return "full"
+    if n_samples * n_features * itemsize > INCREMENTAL_MIN_BYTES:
+        return "incremental"
+    if k < ARPACK_FRACTION * rank:
+        return "arpack"
+    return "randomized"
+
+
+def batch_rows(n_features: int, n_components: int, itemsize: int = 8) -> int:
+    """Rows per `IncrementalPCA` batch: about `BATCH_BYTES`, never fewer than k."""
+    return max(n_components, BATCH_BYTES // max(1, n_features * itemsize))
+
+
+def fit_pca(
+    X: np.ndarray,
+    n_components: int | None = None,
+    solver: str = "auto",
+    random_state: int | None = 0,
+    batch_size: int | None = None,
+) -> PCAFit:
+    """Fit PCA on `X` (already standardized if a correlation PCA is wanted).
+
+    Parameters
+    ----------
+    X: data matrix (n x p)
+    n_components: number of leading components (default: all)
+    solver: "auto" (see `choose_pca_solver`) or one of `PCA_SOLVERS`
+    random_state: seed for the randomized solver and ARPACK's start vector
+    batch_size: rows per batch for "incremental" (default: `batch_rows`)
+    """
+    from sklearn.decomposition import PCA, IncrementalPCA
+
+    X = np.asarray(X)
+    n_samples, n_features = X.shape
+    if solver == "auto":
+        solver = choose_pca_solver(
+            n_samples, n_features, n_components, X.dtype.itemsize
+        )
+    if solver not in PCA_SOLVERS:
+        raise ValueError(
+            f"Unknown PCA solver {solver!r}; use 'auto' or one of {PCA_SOLVERS}"
+        )
+
+    if solver == "incremental":
+        k = min(n_samples, n_features) if n_components is None else n_components
+        batch_size = batch_size or batch_rows(n_features, k, X.dtype.itemsize)
+        model = IncrementalPCA(n_components=k, batch_size=batch_size)
+        model.fit(X)
+        scores = np.vstack(
+            [
+                model.transform(X[start : start + batch_size])
+                for start in range(0, n_samples, batch_size)
+            ]
+        )
+        return PCAFit(model, scores, solver)
+
+    if solver == "arpack" and (
+        n_components is None or n_components >= min(n_samples, n_features)
+    ):
+        # ARPACK cannot return all min(n, p) components
+        solver = "full"
+    model = PCA(n_components=n_components, svd_solver=solver, random_state=random_state)
+    scores = model.fit_transform(X)
+    return PCAFit(model, scores, solver)
+
+
+class StreamingPCAResult(NamedTuple):
+    model: Any  # fitted IncrementalPCA (on standardized columns)
+    columns: list[str]  # variables, in the order of `components_` columns
+    mean: np.ndarray  # column means used to standardize
+    scale: np.ndarray  # column standard deviations (ddof=0, as StandardScaler)
+    n_obs: int  # complete rows used
+    scores_path: Path | None  # file with the n_obs x k scores, if written
+
+
+def stream_pca(
+    path: str | Path,
+    n_components: int,
+    columns: Sequence[str] | None = None,
+    scores_path: str | Path | None = None,
+    chunksize: int | None = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+) -> StreamingPCAResult:
+    """Standardized incremental PCA of a CSV file read in chunks.
+
+    Parameters
+    ----------
+    path: CSV file to analyse
+    n_components: number of leading components
+    columns: numeric columns to use (default: every numeric column)
+    scores_path: where to write the scores; ".npy" gives a memory-mappable
+        array, any other suffix a CSV with PC1..PCk columns
+    chunksize: rows per chunk (default: as many as fit in `memory_budget`)
+    memory_budget: approximate bytes of chunk data held at once
+    """
+    from sklearn.decomposition import IncrementalPCA
+
+    if columns is None:
+        # the numeric columns, from the first rows only
+        columns = list(
+            next(iter_csv_blocks(path, chunksize=1_000, dropna=False)).columns
+        )
+    columns = list(columns)
+    if chunksize is None:
+        chunksize = max(
+            n_components, memory_budget // (_CHUNK_COPIES * 8 * len(columns))
+        )
+
+    # pass 1: means and variances for standardization
+    moments = stream_moments(path, columns=columns, chunksize=chunksize)
+    mean, scale = moments.mean, moments.std(ddof=0)
+    if np.any(scale == 0):
+        raise ValueError("Cannot standardize: at least one column is constant")
+
+    def standardized_blocks() -> Iterator[np.ndarray]:
+        for frame in iter_csv_blocks(path, columns=columns, chunksize=chunksize):
+            if len(frame):
+                yield (frame.to_numpy(dtype=np.float64) - mean) / scale
+
+    # pass 2: partial_fit needs at least k rows, so short chunks (e.g. the
+    # last one, or chunks thinned by dropna) are joined to their neighbour
+    model = IncrementalPCA(n_components=n_components)
+    pending: np.ndarray | None = None
+    for block in standardized_blocks():
+        if pending is None:
+            pending = block
+        elif len(block) < n_components or len(pending) < n_components:
+            pending = np.vstack([pending, block])
+        else:
+            model.partial_fit(pending)
+            pending = block
+    if pending is None or len(pending) < n_components:
+        raise ValueError(f"Need at least {n_components} complete rows in {path}")
+    model.partial_fit(pending)
+
+    # pass 3: scores with the final components, written chunk by chunk
+    if scores_path is not None:
+        scores_path = Path(scores_path)
+        scores_path.parent.mkdir(parents=True, exist_ok=True)
+        names = [f"PC{i + 1}" for i in range(n_components)]
+        if scores_path.suffix == ".npy":
+            out = np.lib.format.open_memmap(
+                scores_path,
+                mode="w+",
+                dtype=np.float64,
+                shape=(moments.n_obs, n_components),
+            )
+            row = 0
+            for block in standardized_blocks():
+                out[row : row + len(block)] = model.transform(block)
+                row += len(block)
+            out.flush()
+            del out
+        else:
+            header = True
+            for block in standardized_blocks():
+                frame = pd.DataFrame(model.transform(block), columns=names)
+                frame.to_csv(
+                    scores_path, mode="w" if header else "a", header=header, index=False
+                )
+                header = False
+
+    return StreamingPCAResult(model, columns, mean, scale, moments.n_obs, scores_path)
+
+
+__all__ = [
+    "PCAFit",
+    "PCA_SOLVERS",
+    "StreamingPCAResult",
+    "choose_pca_solver",
+    "fit_pca",
+    "stream_pca",
+]
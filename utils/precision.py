@@ -0,0 +1,157 @@
+"""Single-precision data with double-precision accumulation, and its drift.
+
+Usage pattern:
+
+    from utils import load_dataset, precision_drift
+    X = load_dataset("kuiper.csv", dtype="float32")      # float columns as float32
+    drift = precision_drift(X.select_dtypes("number"), n_factors=2)
+    drift.max_eigenvalue_error, drift.max_loading_error, drift.memory_ratio
+
+Purpose:
+- For large matrices the PCA/FA/LDA steps are bound by memory bandwidth, so
+  keeping the n x p data in float32 halves both the footprint and the bytes
+  streamed per pass.
+- Only the data is single precision. Means, variances, co-moment and scatter
+  matrices (p x p, small) are accumulated in float64 block by block
+  (`RunningMoments`, `ClassStatistics`), so cancellation in n-term sums does
+  not cost accuracy; eigen-decompositions and rotations run in float64.
+- `precision_drift` runs the standardize -> PCA -> factor analysis path in
+  both precisions on the same data and reports the largest differences in
+  eigenvalues and (sign/order-aligned) loadings, so the float32 path can be
+  adopted with a measured error rather than an assumed one.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .streaming import RunningMoments
+
+PRECISIONS = ("float64", "float32")
+
+# rows cast to float64 at a time when accumulating moments of float32 data
+ACCUMULATION_ROWS = 65_536
+
+
+class PrecisionDrift(NamedTuple):
+    max_eigenvalue_error: float  # max |eig32 - eig64| of the correlation matrix
+    max_relative_eigenvalue_error: float  # same, relative to eig64
+    max_component_error: float  # PCA components, after sign alignment
+    max_loading_error: float  # rotated FA loadings, after order/sign alignment
+    max_score_error: float  # PCA scores
+    memory_ratio: float  # bytes of the float32 data / bytes of the float64 data
+
+
+def float_dtype(
+    precision: str | None = None, like: np.ndarray | None = None
+) -> np.dtype:
+    """dtype for `precision`; by default float32 input stays float32, anything else float64."""
+    if precision is not None:
+        if str(precision) not in PRECISIONS:
+            raise ValueError(
+                f"Unknown precision {precision!r}; use one of {PRECISIONS}"
+            )
+        return np.dtype(precision)
+    if like is not None and like.dtype == np.float32:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def as_float_array(
+    X: np.ndarray | pd.DataFrame, precision: str | None = None
+) -> np.ndarray:
+    """`X` as a float array, without a copy when it already has the wanted dtype."""
+    X = np.asarray(X)
+    return X.astype(float_dtype(precision, X), copy=False)
+
+
+def blocked_moments(
+    X: np.ndarray, block_rows: int = ACCUMULATION_ROWS
+) -> RunningMoments:
+    """Column means and co-moments of `X`, accumulated in float64 one row block at a time."""
+    moments = RunningMoments(X.shape[1])
+    for start in range(0, X.shape[0], block_rows):
+        moments.update(X[start : start + block_rows])
+    return moments
+
+
+def standardize(
+    X: np.ndarray | pd.DataFrame, precision: str | None = None
+) -> np.ndarray:
+    """Columns scaled to mean 0 and unit (population) variance, as StandardScaler.
+
+    The statistics are accumulated in float64; the result has the dtype of
+    `precision` (default: float32 input stays float32).
+    """
+    X = as_float_array(X, precision)
+    moments = blocked_moments(X)
+    mean = moments.mean.astype(X.dtype)
+    std = moments.std(ddof=0)
+    std[std == 0] = 1.0
+    return (X - mean) / std.astype(X.dtype)
+
+
+def _max_aligned_error(a: np.ndarray, b: np.ndarray) -> float:
+    """Largest |a - b| after matching the columns of `a` to `b` (order and sign)."""
+    from .rolling import _match_factors
+
+    return float(np.abs(_match_factors(a, b) - b).max())
+
+
+def precision_drift(
+    X: np.ndarray | pd.DataFrame,
+    n_factors: int = 2,
+    method: str = "principal",
+    rotation: str | None = "varimax",
+    n_components: int | None = None,
+) -> PrecisionDrift:
+    """Compare the float32 and float64 PCA/FA paths on the same data.
+
+    Parameters
+    ----------
+    X: raw (unstandardized) data, n x p
+    n_factors, method, rotation: factor model to compare (see
+        `CorrelationFactorModel.fit`)
+    n_components: PCA components to compare (default: all)
+    """
+    from .factor_model import CorrelationFactorModel
+    from .pca import fit_pca
+
+    X64 = as_float_array(X, "float64")
+    X32 = as_float_array(X, "float32")
+    results = {}
+    for name, data in (("float64", X64), ("float32", X32)):
+        Xs = standardize(data)
+        pca, scores, _ = fit_pca(Xs, n_components=n_components, solver="full")
+        model = CorrelationFactorModel.from_data(Xs)
+        fa = model.fit(n_factors, method=method, rotation=rotation)
+        results[name] = (model.eigenvalues, pca.components_.T, fa.loadings_, scores)
+
+    eig64, comp64, load64, scores64 = results["float64"]
+    eig32, comp32, load32, scores32 = results["float32"]
+    eig_error = np.abs(eig32 - eig64)
+    signs = np.sign(np.sum(comp32 * comp64, axis=0))
+    return PrecisionDrift(
+        max_eigenvalue_error=float(eig_error.max()),
+        max_relative_eigenvalue_error=float(
+            (eig_error / np.abs(eig64).clip(min=1e-12)).max()
+        ),
+        max_component_error=float(np.abs(comp32 * signs - comp64).max()),
+        max_loading_error=_max_aligned_error(load32, load64),
+        max_score_error=float(np.abs(scores32 * signs - scores64).max()),
+        memory_ratio=X32.nbytes / X64.nbytes,
+    )
+
+
+__all__ = [
+    "PRECISIONS",
+    "PrecisionDrift",
+    "as_float_array",
+    "blocked_moments",
+    "float_dtype",
+    "precision_drift",
+    "standardize",
+]
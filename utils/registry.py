@@ -0,0 +1,366 @@
+"""On-disk registry of fitted models, keyed by a hash of what determines them.
+
+Usage pattern:
+
+    from utils import ModelRegistry, registry_key, estimator_state, restore_estimators
+    from utils.registry import REGISTRY_DIRNAME
+    registry = ModelRegistry(script_dir / REGISTRY_DIRNAME)   # ".model_registry"
+    key = registry_key((X, y), features, preprocessing="StandardScaler", method="lda")
+    entry = registry.get_or_fit(key, lambda: estimator_state(scaler=scaler, lda=fit_lda()))
+    lda = restore_estimators(entry.arrays, entry.metadata)["lda"]
+    registry.stats()                                      # hits, misses, evictions, bytes
+
+Purpose:
+- Rerunning a script on unchanged data should not redo its fits. The key
+  hashes the data content, the feature list, the preprocessing, the method
+  and its hyperparameters, so any change to one of them is a miss and
+  anything else is a hit.
+- Entries hold arrays as `.npy` files plus JSON metadata, never pickles, as
+  `utils.scoring` and `utils.datasets` do. `estimator_state` /
+  `restore_estimators` round-trip fitted scikit-learn estimators (scalers,
+  LDA/QDA scalings, means, coefficients) through that format;
+  `CorrelationFactorModel.to_arrays` and `FactorSolution.to_arrays` do the
+  same for factor models.
+- The registry is bounded by `max_bytes`: after each insert the least
+  recently used entries are evicted until it fits. Recency, sizes and the
+  cumulative hit/miss/eviction counts live in an `index.json` that is
+  replaced atomically.
+
+Entries are written to a staging folder and renamed into place, so a reader
+never sees a partial entry; concurrent writers to one registry can lose each
+other's index updates (statistics, recency) but not entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from .datasets import update_digest
+
+REGISTRY_DIRNAME = ".model_registry"
+REGISTRY_VERSION = 1
+INDEX_FILE = "index.json"
+ENTRY_FILE = "entry.json"
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+ModelState = tuple[dict[str, np.ndarray], dict[str, Any]]
+
+
+class RegistryEntry(NamedTuple):
+    key: str
+    arrays: dict[str, np.ndarray]  # name -> array, as passed to `put`
+    metadata: dict[str, Any]  # JSON metadata, as passed to `put`
+    hit: bool  # loaded from disk (False: just fitted and stored)
+
+
+class RegistryStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def registry_key(
+    data: Any,
+    features: Sequence[str] | None = None,
+    preprocessing: Any = None,
+    method: str | None = None,
+    params: dict[str, Any] | None = None,
+) -> str:
+    """Content hash of (data, feature list, preprocessing, method, hyperparameters).
+
+    Parameters
+    ----------
+    data: array, DataFrame, file path (hashed by content) or a tuple of them,
+        e.g. (X, y)
+    features: column names used by the model
+    preprocessing: description of the preprocessing, e.g. "StandardScaler"
+    method: model or extraction method
+    params: hyperparameters (any JSON-like values; `Path` values are hashed
+        by content)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{REGISTRY_VERSION}".encode())
+    # strings here (alone or inside a tuple) are file paths, hashed by content
+    if isinstance(data, str):
+        data = Path(data)
+    elif isinstance(data, tuple):
+        data = tuple(Path(item) if isinstance(item, str) else item for item in data)
+    update_digest(
+        digest, (data, list(features or []), preprocessing, method, dict(params or {}))
+    )
+    return digest.hexdigest()
+
+
+def estimator_state(**estimators: Any) -> ModelState:
+    """Arrays and metadata for fitted scikit-learn estimators, by name.
+
+    Every attribute set by `fit` (anything that is not a constructor
+    parameter) is kept: arrays by name, scalars in the metadata. Restore
+    with `restore_estimators`.
+    """
+    arrays: dict[str, np.ndarray] = {}
+    metadata: dict[str, Any] = {}
+    for name, estimator in estimators.items():
+        params = estimator.get_params(deep=False)
+        attributes: dict[str, Any] = {}
+        for attribute, value in vars(estimator).items():
+            if attribute in params:
+                continue
+            if isinstance(value, np.ndarray):
+                arrays[f"{name}.{attribute}"] = (
+                    value.astype(str) if value.dtype == object else value
+                )
+                attributes[attribute] = {"kind": "array", "dtype": str(value.dtype)}
+            elif (
+                isinstance(value, (list, tuple))
+                and value
+                and all(isinstance(v, np.ndarray) for v in value)
+            ):
+                for i, item in enumerate(value):
+                    arrays[f"{name}.{attribute}.{i}"] = item
+                attributes[attribute] = {"kind": "list", "length": len(value)}
+            else:
+                if isinstance(value, np.generic):
+                    value = value.item()
+                if not (value is None or isinstance(value, (bool, int, float, str))):
+                    raise TypeError(
+                        f"Cannot store {name}.{attribute} of type {type(value).__name__}"
+                    )
+                attributes[attribute] = {"kind": "value", "value": value}
+        metadata[name] = {
+            "class": f"{type(estimator).__module__}.{type(estimator).__qualname__}",
+            "params": params,
+            "attributes": attributes,
+        }
+    return arrays, {"estimators": metadata}
+
+
+def restore_estimators(
+    arrays: dict[str, np.ndarray], metadata: dict[str, Any]
+) -> dict[str, Any]:
+    """Fitted estimators, by name, from `estimator_state` output (or a registry entry).
+
+    Only scikit-learn estimator classes are imported; any other class name in
+    the metadata raises ValueError.
+    """
+    from sklearn.base import BaseEstimator
+
+    estimators = {}
+    for name, record in metadata["estimators"].items():
+        module, _, class_name = record["class"].rpartition(".")
+        if not module.startswith("sklearn."):
+            raise ValueError(
+                f"Refusing to restore {name}: {record['class']} is not a scikit-learn class"
+            )
+        estimator_class = getattr(importlib.import_module(module), class_name, None)
+        if not (
+            isinstance(estimator_class, type)
+            and issubclass(estimator_class, BaseEstimator)
+        ):
+            raise ValueError(
+                f"Refusing to restore {name}: {record['class']} is not a scikit-learn estimator"
+            )
+        estimator = estimator_class(**record["params"])
+        for attribute, stored in record["attributes"].items():
+            if stored["kind"] == "array":
+                value = arrays[f"{name}.{attribute}"]
+                if stored["dtype"] == "object":
+                    value = value.astype(object)
+            elif stored["kind"] == "list":
+                value = [
+                    arrays[f"{name}.{attribute}.{i}"] for i in range(stored["length"])
+                ]
+            else:
+                value = stored["value"]
+            setattr(estimator, attribute, value)
+        estimators[name] = estimator
+    return estimators
+
+
+class ModelRegistry:
+    """Content-addressed store of fitted models with LRU eviction by size.
+
+    Parameters
+    ----------
+    root: registry folder (created on first write)
+    max_bytes: total size of the stored arrays and metadata before the least
+        recently used entries are evicted
+    mmap: memory-map arrays when loading entries
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        mmap: bool = False,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+
+    # --- index ---
+
+    def _read_index(self) -> dict[str, Any]:
+        try:
+            index = json.loads((self.root / INDEX_FILE).read_text())
+        except (OSError, ValueError):
+            index = {}
+        if index.get("version") != REGISTRY_VERSION:
+            index = {
+                "version": REGISTRY_VERSION,
+                "hits": 0,
+                "misses": 0,
+                "evictions": 0,
+                "entries": {},
+            }
+        return index
+
+    def _write_index(self, index: dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        handle, staging = tempfile.mkstemp(prefix=f".{INDEX_FILE}.", dir=self.root)
+        with os.fdopen(handle, "w") as stream:
+            json.dump(index, stream, indent=2)
+        os.replace(staging, self.root / INDEX_FILE)
+
+    def _evict(self, index: dict[str, Any], keep: str) -> None:
+        entries = index["entries"]
+        total = sum(entry["bytes"] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            total -= entries.pop(key)["bytes"]
+            index["evictions"] += 1
+
+    # --- entries ---
+
+    def __contains__(self, key: str) -> bool:
+        return (self.root / key / ENTRY_FILE).exists()
+
+    def __len__(self) -> int:
+        return len(self._read_index()["entries"])
+
+    def get(self, key: str) -> RegistryEntry | None:
+        """The stored entry for `key` (counted as a hit), or None (a miss)."""
+        index = self._read_index()
+        directory = self.root / key
+        try:
+            record = json.loads((directory / ENTRY_FILE).read_text())
+            arrays = {
+                name: np.load(
+                    directory / f"{name}.npy", mmap_mode="r" if self.mmap else None
+                )
+                for name in record["arrays"]
+            }
+        except (OSError, ValueError, KeyError):
+            index["misses"] += 1
+            index["entries"].pop(key, None)
+            self._write_index(index)
+            return None
+
+        index["hits"] += 1
+        entry = index["entries"].setdefault(key, {"bytes": _folder_bytes(directory)})
+        entry["last_used"] = time.time()
+        self._write_index(index)
+        return RegistryEntry(key, arrays, record["metadata"], hit=True)
+
+    def put(
+        self,
+        key: str,
+        arrays: dict[str, np.ndarray],
+        metadata: dict[str, Any] | None = None,
+    ) -> RegistryEntry:
+        """Store arrays and JSON metadata under `key`, then evict down to `max_bytes`."""
+        metadata = dict(metadata or {})
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.root))
+        try:
+            for name, array in arrays.items():
+                np.save(staging / f"{name}.npy", np.asarray(array))
+            record = {
+                "version": REGISTRY_VERSION,
+                "arrays": list(arrays),
+                "metadata": metadata,
+            }
+            (staging / ENTRY_FILE).write_text(json.dumps(record, indent=2))
+            directory = self.root / key
+            if directory.exists():
+                shutil.rmtree(directory)
+            os.replace(staging, directory)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        index = self._read_index()
+        index["entries"][key] = {
+            "bytes": _folder_bytes(directory),
+            "last_used": time.time(),
+        }
+        self._evict(index, keep=key)
+        self._write_index(index)
+        return RegistryEntry(key, dict(arrays), metadata, hit=False)
+
+    def get_or_fit(self, key: str, fit: Callable[[], ModelState]) -> RegistryEntry:
+        """The stored entry for `key`, or the result of `fit()` stored under it.
+
+        `fit` returns (arrays, metadata), e.g. `estimator_state(...)` or
+        `FactorSolution.to_arrays()`.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        arrays, metadata = fit()
+        return self.put(key, arrays, metadata)
+
+    def stats(self) -> RegistryStats:
+        """Cumulative hits, misses and evictions, and the current size."""
+        index = self._read_index()
+        return RegistryStats(
+            hits=index["hits"],
+            misses=index["misses"],
+            evictions=index["evictions"],
+            entries=len(index["entries"]),
+            bytes=sum(entry["bytes"] for entry in index["entries"].values()),
+            max_bytes=self.max_bytes,
+        )
+
+    def clear(self) -> None:
+        """Remove every entry and reset the statistics."""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _folder_bytes(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.iterdir() if path.is_file())
+
+
+__all__ = [
+    "DEFAULT_MAX_BYTES",
+    "REGISTRY_DIRNAME",
+    "ModelRegistry",
+    "RegistryEntry",
+    "RegistryStats",
+    "estimator_state",
+    "registry_key",
+    "restore_estimators",
+]
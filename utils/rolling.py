@@ -0,0 +1,149 @@
+"""Rolling and expanding-window factor models with incremental moments.
+
+Usage pattern:
+
+    from utils import rolling_factor_loadings
+    rolling = rolling_factor_loadings(returns_df, n_factors=2, window=250)
+    rolling.communalities                 # DataFrame: one row per window end
+    rolling.loadings_frame(0)             # Factor 1 loadings over time
+
+Purpose:
+- Track how loadings and communalities drift over time instead of fitting a
+  single static model to the whole sample.
+- The window's mean and co-moment matrix are updated with a rank-1 add for
+  the row entering and a rank-1 downdate for the row leaving (see
+  `RunningMoments.add` / `RunningMoments.remove`), so each step costs
+  O(p^2) for the moments plus the O(p^3) extraction, independent of the
+  window length.
+- MINRES/ML extractions are warm-started from the previous window's
+  uniquenesses, and every solution is matched (factor order and sign) to
+  the previous one so the series do not jump when the eigensolver flips a
+  column.
+
+The moments are recomputed exactly from the window every `resync` steps to
+keep rounding error from the downdates from accumulating.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+from .factor_model import _align_factors, extract_loadings
+from .rotation import rotate_loadings
+from .streaming import RunningMoments
+
+DEFAULT_RESYNC = 500
+
+
+class RollingFactorResult(NamedTuple):
+    index: pd.Index  # label of the last row in each window
+    columns: list[str]  # variable names
+    loadings: np.ndarray  # loadings per window (n_windows x p x k)
+    communalities: pd.DataFrame  # communalities per window (n_windows x p)
+
+    def loadings_frame(self, factor: int) -> pd.DataFrame:
+        """Loadings of one factor (0-based) over time, one column per variable."""
+        return pd.DataFrame(
+            self.loadings[:, :, factor], index=self.index, columns=self.columns
+        )
+
+
+def _match_factors(loadings: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """Reorder and sign-flip the columns of `loadings` to follow `previous`."""
+    congruence = loadings.T @ previous
+    rows, cols = linear_sum_assignment(-np.abs(congruence))
+    matched = np.empty_like(loadings)
+    for row, col in zip(rows, cols, strict=True):
+        sign = -1.0 if congruence[row, col] < 0 else 1.0
+        matched[:, col] = sign * loadings[:, row]
+    return matched
+
+
+def rolling_factor_loadings(
+    X: np.ndarray | pd.DataFrame,
+    n_factors: int,
+    window: int = 250,
+    method: str = "principal",
+    rotation: str | None = "varimax",
+    expanding: bool = False,
+    step: int = 1,
+    columns: Sequence[str] | None = None,
+    resync: int = DEFAULT_RESYNC,
+) -> RollingFactorResult:
+    """Fit a factor model on every window of the rows of X.
+
+    Parameters
+    ----------
+    X: (n x p) observations in time order (rows with NaN must be dropped first)
+    n_factors: number of factors to extract
+    window: rows per window; for an expanding fit, the size of the first window
+    method, rotation: extraction and rotation, as in `CorrelationFactorModel.fit`
+    expanding: grow the window from the first row instead of sliding it
+    step: refit every `step` rows (the moments are still updated row by row)
+    columns: variable names (taken from a DataFrame when not given)
+    resync: recompute the moments from scratch every `resync` refits
+    """
+    index = X.index if isinstance(X, pd.DataFrame) else pd.RangeIndex(len(X))
+    if columns is None:
+        columns = X.columns if isinstance(X, pd.DataFrame) else None
+    X = np.asarray(X, dtype=np.float64)
+    n_obs, n_features = X.shape
+    names = (
+        [str(c) for c in columns]
+        if columns is not None
+        else [f"X{j + 1}" for j in range(n_features)]
+    )
+    if window <= n_features:
+        raise ValueError(f"window must exceed the number of variables ({n_features})")
+    if window > n_obs:
+        raise ValueError(f"window ({window}) is longer than the data ({n_obs} rows)")
+    method = method.lower()
+
+    moments = RunningMoments(n_features).update(X[:window])
+    ends = range(window, n_obs + 1, step)
+    loadings_path = np.empty((len(ends), n_features, n_factors))
+    communalities = np.empty((len(ends), n_features))
+    previous: np.ndarray | None = None
+    uniquenesses: np.ndarray | None = None
+    position = window
+
+    for i, end in enumerate(ends):
+        if i and i % resync == 0:
+            start = 0 if expanding else end - window
+            moments = RunningMoments(n_features).update(X[start:end])
+        else:
+            for t in range(position, end):
+                moments.add(X[t])
+                if not expanding:
+                    moments.remove(X[t - window])
+        position = end
+
+        start_psi = uniquenesses if method != "principal" else None
+        loadings, uniquenesses = extract_loadings(
+            moments.correlation(), n_factors, method=method, start=start_psi
+        )
+        loadings, _, _ = _align_factors(loadings, method)
+        # taken before rotation so they stay valid for oblique solutions
+        communalities[i] = np.sum(loadings**2, axis=1)
+        if rotation is not None and n_factors > 1:
+            loadings = rotate_loadings(loadings, rotation, cache=False).loadings
+        if previous is not None:
+            loadings = _match_factors(loadings, previous)
+        loadings_path[i] = loadings
+        previous = loadings_path[i]
+
+    window_ends = index[np.asarray(ends) - 1]
+    return RollingFactorResult(
+        index=window_ends,
+        columns=names,
+        loadings=loadings_path,
+        communalities=pd.DataFrame(communalities, index=window_ends, columns=names),
+    )
+
+
+__all__ = ["RollingFactorResult", "rolling_factor_loadings"]
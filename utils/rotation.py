@@ -0,0 +1,161 @@
+"""Memoized factor rotations applied to already-extracted loadings.
+
+Usage pattern:
+
+    from utils import rotate_loadings
+    varimax = rotate_loadings(fa_unrotated.loadings_, "varimax")
+    promax = rotate_loadings(fa_unrotated.loadings_, "promax", power=4)
+    varimax.loadings, varimax.rotation_matrix, promax.phi
+
+Purpose:
+- Rotation only needs the p x k unrotated loadings, so comparing varimax,
+  quartimax, promax or oblimin solutions never requires refitting the model.
+- Results are cached in-process, keyed by a hash of the loadings together
+  with the rotation method and its parameters; dashboards that re-request
+  the same rotation get the stored result immediately.
+
+The numerical work is delegated to `factor_analyzer.Rotator`, so every
+rotation it supports is available here. Cached arrays are returned
+read-only; copy them before modifying in place.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+import numpy as np
+from factor_analyzer.rotator import OBLIQUE_ROTATIONS, POSSIBLE_ROTATIONS, Rotator
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class RotationResult(NamedTuple):
+    loadings: np.ndarray
+    rotation_matrix: np.ndarray
+    phi: np.ndarray | None
+
+
+class _RotationCache:
+    """Small LRU cache with hit/miss counters."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[Any, ...], RotationResult] = OrderedDict()
+
+    def get(self, key: tuple[Any, ...]) -> RotationResult | None:
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: tuple[Any, ...], result: RotationResult) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+_cache = _RotationCache()
+
+
+def loadings_digest(loadings: np.ndarray) -> str:
+    """Content hash of a loadings matrix (values, shape and dtype)."""
+    array = np.ascontiguousarray(loadings, dtype=np.float64)
+    digest = hashlib.blake2b(array.tobytes(), digest_size=16)
+    digest.update(str(array.shape).encode())
+    return digest.hexdigest()
+
+
+def _readonly(array: np.ndarray | None) -> np.ndarray | None:
+    if array is not None:
+        array.setflags(write=False)
+    return array
+
+
+def rotate_loadings(
+    loadings: np.ndarray, method: str = "varimax", cache: bool = True, **kwargs: Any
+) -> RotationResult:
+    """Rotate a p x k loadings matrix, reusing a cached result when available.
+
+    Parameters
+    ----------
+    loadings: unrotated factor loadings
+    method: any `factor_analyzer` rotation ("varimax", "quartimax", "promax",
+        "oblimin", "quartimin", "equamax", ...)
+    cache: look up and store the result in the in-process cache; pass False
+        for one-off loadings (e.g. every window of a rolling fit) so they do
+        not evict reusable entries
+    **kwargs: rotation parameters forwarded to `Rotator` (e.g. `power` for
+        promax, `gamma` for oblimin, `normalize`, `max_iter`, `tol`)
+
+    Returns
+    -------
+    RotationResult(loadings, rotation_matrix, phi); `phi` is the factor
+    correlation matrix for oblique rotations and None otherwise
+    """
+    method = method.lower()
+    if method not in POSSIBLE_ROTATIONS:
+        raise ValueError(
+            f"Unknown rotation {method!r}; use one of {POSSIBLE_ROTATIONS}"
+        )
+    if cache:
+        key = (loadings_digest(loadings), method, tuple(sorted(kwargs.items())))
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+
+    rotator = Rotator(method=method, **kwargs)
+    rotated = rotator.fit_transform(np.array(loadings, dtype=np.float64))
+    result = RotationResult(
+        _readonly(np.asarray(rotated)),
+        _readonly(np.asarray(rotator.rotation_)),
+        _readonly(None if rotator.phi_ is None else np.asarray(rotator.phi_)),
+    )
+    if cache:
+        _cache.put(key, result)
+    return result
+
+
+def is_oblique(method: str) -> bool:
+    """Whether a rotation allows correlated factors."""
+    return method.lower() in OBLIQUE_ROTATIONS
+
+
+def rotation_cache_info() -> dict[str, int]:
+    """Hit/miss counters and current size of the rotation cache."""
+    return _cache.info()
+
+
+def clear_rotation_cache() -> None:
+    """Drop all cached rotations and reset the counters."""
+    _cache.clear()
+
+
+__all__ = [
+    "RotationResult",
+    "clear_rotation_cache",
+    "is_oblique",
+    "loadings_digest",
+    "rotate_loadings",
+    "rotation_cache_info",
+]
@@ -0,0 +1,248 @@
+"""Run all example analyses from one entry point on a shared process pool.
+
+Usage pattern:
+
+    python -m utils.runner                              # every example, headless
+    python -m utils.runner --only kuiper_fa quality_lda --max-workers 2
+    python -m utils.runner --plots --output run_report.json --log-dir logs/
+
+Purpose:
+- Replace one interpreter per script: on Linux the scientific stack (NumPy,
+  pandas, SciPy, scikit-learn, factor_analyzer) is imported once in the
+  parent and the workers are forked from it, so each example only pays for
+  its own analysis. Elsewhere (macOS, where forking after NumPy is loaded is
+  unsafe, and Windows) the workers are spawned: each imports the stack once
+  in its initializer and then serves several examples.
+- Each example script runs as a function call (`run_example`) with its own
+  `__main__` namespace, `sys.argv` and captured stdout/stderr. A script that
+  calls `exit(1)` / `sys.exit(2)` (e.g. when its CSV is missing) or raises
+  is reported as failed without stopping the others.
+- Examples run concurrently on at most `max_workers` processes (default:
+  `min(CPU count, DEFAULT_MAX_WORKERS)`) and the outcomes are aggregated into
+  one report: status, wall time, the last output line and the timed stages
+  (`utils.logger.next_stage`) of each example, logged as a table and
+  optionally written as JSON. The exit code is 1 when
+  any example failed.
+
+Plots are off by default (`--no-plots`, see `utils.figures`); with `--plots`
+pyplot uses the Agg backend so `plt.show()` does not block.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+import traceback
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+from .benchmark import REPO_ROOT, analysis_scripts
+from .figures import NO_PLOTS_ENV, NO_PLOTS_FLAG, fork_context
+from .logger import STAGE_MESSAGE_PREFIX, collect_stages, end_stages
+
+DEFAULT_MAX_WORKERS = 4
+
+# imported once before the workers start (or once per worker)
+SHARED_STACK = (
+    "numpy",
+    "pandas",
+    "scipy.linalg",
+    "scipy.optimize",
+    "scipy.stats",
+    "sklearn.decomposition",
+    "sklearn.discriminant_analysis",
+    "sklearn.metrics",
+    "sklearn.model_selection",
+    "sklearn.preprocessing",
+    "factor_analyzer",
+)
+
+# logger name the scripts share (`setup_logger("__main__")`)
+SCRIPT_LOGGER = "ma2003b"
+
+
+def examples() -> dict[str, Path]:
+    """Example name (script stem) -> script path."""
+    return {path.stem: path for path in analysis_scripts()}
+
+
+def load_stack(plots: bool = False) -> None:
+    """Import the shared scientific stack (and Agg pyplot when plotting)."""
+    for module in SHARED_STACK:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(module)
+    if plots:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot  # noqa: F401
+
+
+def run_example(path: Path, plots: bool = False) -> dict[str, Any]:
+    """Run one example script in this process and report how it went."""
+    argv = [str(path)] if plots else [str(path), NO_PLOTS_FLAG]
+    if plots:
+        os.environ.pop(NO_PLOTS_ENV, None)
+    else:
+        os.environ[NO_PLOTS_ENV] = "1"
+    # scripts that still use pyplot must not open windows or block in plt.show()
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    # the scripts' logger holds the stdout it was created with; start fresh so
+    # its output is captured for this example
+    logging.getLogger(SCRIPT_LOGGER).handlers.clear()
+
+    output = io.StringIO()
+    status, error = "ok", None
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    sys.argv = argv
+    sys.path.insert(0, str(path.parent))
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            runpy.run_path(str(path), run_name="__main__")
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            status, error = "failed", f"exit({exc.code})"
+    except Exception as exc:  # noqa: BLE001 - one broken example must not stop the run
+        status, error = "failed", f"{type(exc).__name__}: {exc}"
+        output.write(traceback.format_exc())
+    finally:
+        wall_time = time.perf_counter() - start
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        end_stages()
+        stages = collect_stages()
+        logging.getLogger(SCRIPT_LOGGER).handlers.clear()
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close("all")
+
+    text = output.getvalue()
+    # the stage records logged by end_stages above are not the script's output
+    lines = [
+        line
+        for line in text.splitlines()
+        if line.strip() and STAGE_MESSAGE_PREFIX not in line
+    ]
+    return {
+        "example": path.stem,
+        "script": str(path.relative_to(REPO_ROOT)),
+        "status": status,
+        "error": error,
+        "wall_time": wall_time,
+        "last_line": lines[-1] if lines else "",
+        "stages": [record._asdict() for record in stages],
+        "output": text,
+    }
+
+
+def run_examples(
+    paths: Sequence[Path],
+    max_workers: int | None = None,
+    plots: bool = False,
+    log: Any | None = None,
+) -> dict[str, Any]:
+    """Run the examples on a process pool and return the aggregated report."""
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, DEFAULT_MAX_WORKERS)
+    max_workers = max(1, min(max_workers, len(paths)))
+    start = time.perf_counter()
+
+    context = fork_context()
+    if context is not None:
+        # forked workers inherit the modules imported here
+        load_stack(plots)
+        pool = ProcessPoolExecutor(max_workers, mp_context=context)
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=load_stack,
+            initargs=(plots,),
+        )
+    results = []
+    with pool:
+        futures = {pool.submit(run_example, path, plots): path for path in paths}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if log is not None:
+                line = result["error"] or result["last_line"]
+                log.info(
+                    f"{result['example']:<18} {result['status']:<6} "
+                    f"{result['wall_time']:7.2f}s  {line[:80]}"
+                )
+
+    results.sort(key=lambda result: result["example"])
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "max_workers": max_workers,
+        "plots": plots,
+        "wall_time": time.perf_counter() - start,
+        "example_time": sum(result["wall_time"] for result in results),
+        "failed": [result["example"] for result in results if result["status"] != "ok"],
+        "examples": results,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    available = examples()
+    parser = argparse.ArgumentParser(description="Run the course example analyses.")
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=sorted(available),
+        help="examples to run (default: all)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help=f"worker processes (default: up to {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument("--plots", action="store_true", help="also render the figures")
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    parser.add_argument(
+        "--log-dir", type=Path, help="write each example's output to <example>.log"
+    )
+    args = parser.parse_args(argv)
+
+    from .logger import setup_logger
+
+    logger = setup_logger("runner")
+    paths = [available[name] for name in (args.only or sorted(available))]
+    report = run_examples(paths, args.max_workers, args.plots, log=logger)
+    logger.info(
+        f"{len(paths)} examples in {report['wall_time']:.2f}s on {report['max_workers']} workers "
+        f"({report['example_time']:.2f}s of example time), {len(report['failed'])} failed"
+    )
+
+    if args.log_dir is not None:
+        args.log_dir.mkdir(parents=True, exist_ok=True)
+        for result in report["examples"]:
+            (args.log_dir / f"{result['example']}.log").write_text(result["output"])
+    if args.output is not None:
+        summary = {
+            **report,
+            "examples": [
+                {k: v for k, v in r.items() if k != "output"}
+                for r in report["examples"]
+            ],
+        }
+        args.output.write_text(json.dumps(summary, indent=2))
+        logger.info(f"Saved report to {args.output}")
+    for name in report["failed"]:
+        logger.warning(f"Failed: {name}")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
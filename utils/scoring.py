@@ -0,0 +1,297 @@
+"""Persist fitted discriminant models and score large CSV files in batches.
+
+Usage pattern:
+
+    from utils import save_discriminant_model, DiscriminantScorer
+    save_discriminant_model(script_dir / "models" / "marketing_lda", scaler, lda, features)
+
+    scorer = DiscriminantScorer.load(script_dir / "models" / "marketing_lda")
+    n_rows = scorer.score("customers.csv", "predictions.csv", chunksize=500_000)
+
+or, from a shell:
+
+    python -m utils.scoring models/marketing_lda customers.csv predictions.csv
+
+Purpose:
+- Keep the `StandardScaler` + LDA/QDA pair trained in the Chapter 5 scripts
+  instead of discarding it at the end of the run.
+- Store parameters as plain `.npy` arrays plus a small `model.json`, never
+  pickles, so a saved model can be inspected and loaded without running
+  arbitrary code or matching the scikit-learn version that trained it.
+- Score with NumPy only: each CSV chunk is standardized and turned into
+  posterior probabilities with a few matrix products, and the predictions
+  are appended to the output file chunk by chunk, so memory stays bounded
+  by `chunksize` whatever the size of the input.
+
+Posterior probabilities match `predict_proba` of the scikit-learn models
+(`solver="svd"` or `"lsqr"`/`"eigen"` for LDA; any `reg_param` for QDA).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .streaming import DEFAULT_CHUNKSIZE
+
+MODEL_FILE = "model.json"
+MODEL_KINDS = ("lda", "qda")
+
+
+def _model_kind(model: Any) -> str:
+    name = type(model).__name__
+    if name == "LinearDiscriminantAnalysis":
+        return "lda"
+    if name == "QuadraticDiscriminantAnalysis":
+        return "qda"
+    raise TypeError(f"Unsupported model {name}; expected an LDA or QDA estimator")
+
+
+def save_discriminant_model(
+    directory: str | Path,
+    scaler: Any,
+    model: Any,
+    features: Sequence[str],
+) -> Path:
+    """Write a fitted scaler + LDA/QDA model to `directory` as `.npy` arrays.
+
+    Parameters
+    ----------
+    directory: destination folder (created if needed, files overwritten)
+    scaler: fitted `StandardScaler` applied before the model
+    model: fitted `LinearDiscriminantAnalysis` or `QuadraticDiscriminantAnalysis`
+    features: input column names, in the order the scaler expects them
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    kind = _model_kind(model)
+    n_features = len(features)
+
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    np.save(
+        directory / "scaler_mean.npy", np.zeros(n_features) if mean is None else mean
+    )
+    np.save(
+        directory / "scaler_scale.npy", np.ones(n_features) if scale is None else scale
+    )
+    classes = np.asarray(model.classes_)
+    # keep integer/string labels as they are; object arrays would need pickling
+    np.save(
+        directory / "classes.npy",
+        classes.astype(str) if classes.dtype == object else classes,
+    )
+
+    if kind == "lda":
+        np.save(directory / "coef.npy", np.asarray(model.coef_, dtype=np.float64))
+        np.save(
+            directory / "intercept.npy", np.asarray(model.intercept_, dtype=np.float64)
+        )
+    else:
+        np.save(directory / "means.npy", np.asarray(model.means_, dtype=np.float64))
+        np.save(directory / "priors.npy", np.asarray(model.priors_, dtype=np.float64))
+        # per-class arrays can differ in rank, so they are stored one file each
+        for i, (rotation, scaling) in enumerate(
+            zip(model.rotations_, model.scalings_, strict=True)
+        ):
+            np.save(
+                directory / f"rotation_{i}.npy", np.asarray(rotation, dtype=np.float64)
+            )
+            np.save(
+                directory / f"scaling_{i}.npy", np.asarray(scaling, dtype=np.float64)
+            )
+
+    metadata = {
+        "kind": kind,
+        "features": list(map(str, features)),
+        "n_classes": len(model.classes_),
+    }
+    (directory / MODEL_FILE).write_text(json.dumps(metadata, indent=2))
+    return directory
+
+
+def _softmax(decision: np.ndarray) -> np.ndarray:
+    decision = decision - decision.max(axis=1, keepdims=True)
+    np.exp(decision, out=decision)
+    decision /= decision.sum(axis=1, keepdims=True)
+    return decision
+
+
+class DiscriminantScorer:
+    """Scaler + LDA/QDA posterior computation from saved `.npy` parameters.
+
+    Parameters
+    ----------
+    kind: "lda" or "qda"
+    features: input column names
+    classes: class labels, in model order
+    mean, scale: standardization applied to the raw features
+    params: model arrays (`coef`, `intercept` for LDA; `means`, `priors`,
+        `rotations`, `scalings` for QDA)
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        features: Sequence[str],
+        classes: np.ndarray,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        **params: Any,
+    ) -> None:
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"Unknown model kind {kind!r}; use one of {MODEL_KINDS}")
+        self.kind = kind
+        self.features = list(features)
+        self.classes = np.asarray(classes)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.params = params
+
+        if kind == "qda":
+            # fold each class's whitening into one p x r matrix and its log-det
+            # into a constant so scoring a chunk is one matmul per class
+            # (scikit-learn stores `scalings_` with `reg_param` already applied)
+            self._qda_terms = [
+                (rotation * scaling**-0.5, np.sum(np.log(scaling)))
+                for rotation, scaling in zip(
+                    params["rotations"], params["scalings"], strict=True
+                )
+            ]
+
+    @classmethod
+    def load(cls, directory: str | Path) -> DiscriminantScorer:
+        """Read a model written by `save_discriminant_model`."""
+        directory = Path(directory)
+        metadata = json.loads((directory / MODEL_FILE).read_text())
+        kind = metadata["kind"]
+        params: dict[str, Any] = {}
+        if kind == "lda":
+            params["coef"] = np.load(directory / "coef.npy")
+            params["intercept"] = np.load(directory / "intercept.npy")
+        else:
+            n_classes = metadata["n_classes"]
+            params["means"] = np.load(directory / "means.npy")
+            params["priors"] = np.load(directory / "priors.npy")
+            params["rotations"] = [
+                np.load(directory / f"rotation_{i}.npy") for i in range(n_classes)
+            ]
+            params["scalings"] = [
+                np.load(directory / f"scaling_{i}.npy") for i in range(n_classes)
+            ]
+        return cls(
+            kind,
+            metadata["features"],
+            np.load(directory / "classes.npy"),
+            np.load(directory / "scaler_mean.npy"),
+            np.load(directory / "scaler_scale.npy"),
+            **params,
+        )
+
+    def decision_function(self, X: np.ndarray | pd.DataFrame) -> np.ndarray:
+        """Unnormalized log posteriors (n x n_classes) for raw feature rows."""
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        Z = (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+        if self.kind == "lda":
+            return Z @ self.params["coef"].T + self.params["intercept"]
+
+        decision = np.empty((Z.shape[0], len(self.classes)))
+        log_priors = np.log(self.params["priors"])
+        for i, (whiten, log_det) in enumerate(self._qda_terms):
+            projected = (Z - self.params["means"][i]) @ whiten
+            decision[:, i] = -0.5 * (
+                np.einsum("ij,ij->i", projected, projected) + log_det
+            )
+        return decision + log_priors
+
+    def predict_proba(self, X: np.ndarray | pd.DataFrame) -> np.ndarray:
+        decision = self.decision_function(X)
+        if self.kind == "lda" and len(self.classes) == 2:
+            # binary LDA stores a single discriminant, as in scikit-learn
+            positive = 1 / (1 + np.exp(-decision[:, 0]))
+            return np.column_stack([1 - positive, positive])
+        return _softmax(decision)
+
+    def predict(self, X: np.ndarray | pd.DataFrame) -> np.ndarray:
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def score(
+        self,
+        path: str | Path,
+        output: str | Path | None = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        keep_columns: Sequence[str] = (),
+    ) -> int:
+        """Score every row of a CSV file, writing predictions chunk by chunk.
+
+        Parameters
+        ----------
+        path: input CSV with (at least) the model's feature columns
+        output: destination CSV (defaults to `<input stem>_scored.csv`)
+        chunksize: rows read, scored and written per step
+        keep_columns: input columns (e.g. a customer id) copied to the output
+
+        Returns
+        -------
+        number of rows scored
+        """
+        path = Path(path)
+        output = (
+            Path(output)
+            if output is not None
+            else path.with_name(f"{path.stem}_scored.csv")
+        )
+        usecols = list(dict.fromkeys([*keep_columns, *self.features]))
+        proba_columns = [f"proba_{label}" for label in self.classes]
+
+        n_rows = 0
+        for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+            proba = self.predict_proba(chunk[self.features])
+            scored = pd.DataFrame(proba, columns=proba_columns, index=chunk.index)
+            scored.insert(0, "predicted", self.classes[np.argmax(proba, axis=1)])
+            for i, column in enumerate(keep_columns):
+                scored.insert(i, column, chunk[column])
+            scored.to_csv(
+                output,
+                mode="w" if n_rows == 0 else "a",
+                header=n_rows == 0,
+                index=False,
+            )
+            n_rows += len(chunk)
+        return n_rows
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Score a CSV file with a saved LDA/QDA model."
+    )
+    parser.add_argument("model_dir", help="folder written by save_discriminant_model")
+    parser.add_argument("input", help="CSV file to score")
+    parser.add_argument(
+        "output", nargs="?", help="destination CSV (default: <input>_scored.csv)"
+    )
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument(
+        "--keep", nargs="*", default=[], help="input columns to copy to the output"
+    )
+    args = parser.parse_args(argv)
+
+    n_rows = DiscriminantScorer.load(args.model_dir).score(
+        args.input, args.output, chunksize=args.chunksize, keep_columns=args.keep
+    )
+    print(f"Scored {n_rows} rows")
+
+
+__all__ = ["DiscriminantScorer", "save_discriminant_model"]
+
+
+if __name__ == "__main__":
+    main()
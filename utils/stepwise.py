@@ -0,0 +1,235 @@
+"""Stepwise discriminant feature selection with Wilks' lambda.
+
+Usage pattern:
+
+    from utils import stepwise_discriminant
+    result = stepwise_discriminant(X_train, y_train, direction="forward")
+    result.selected          # chosen columns, in order of entry
+    result.history           # one row per step: action, variable, F, p-value, lambda
+
+Purpose:
+- Classical stepwise discriminant analysis (as in SPSS/SAS STEPDISC): at each
+  step the variable with the largest F-to-enter joins the model if its
+  p-value is below `p_enter`, and (in "backward" and "both" modes) the
+  variable with the smallest F-to-remove leaves if its p-value is above
+  `p_remove`.
+- Works from the within-class and total scatter matrices only, so it never
+  refits a classifier. Both matrices are kept swept on the variables in the
+  model: entering or removing a variable is one rank-one sweep, and the
+  partial Wilks' lambda of every candidate is a ratio of two diagonal
+  entries. A full selection over p variables costs O(p^3) arithmetic.
+- `stepwise_from_statistics` runs on `ClassStatistics`, e.g. accumulated from
+  a chunked CSV with `class_statistics_from_csv`.
+
+Adding a variable to a model with q variables has partial lambda L and
+F = (1 - L) / L * (n - K - q) / (K - 1) on (K - 1, n - K - q) degrees of
+freedom; removal uses the same formula with q - 1 other variables.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import f as f_distribution
+
+from .discriminant import ClassStatistics
+
+DIRECTIONS = ("forward", "backward", "both")
+
+# variables whose variance given the model falls below this fraction of their
+# total variance are treated as collinear and never entered
+TOLERANCE = 1e-8
+
+
+class StepwiseResult(NamedTuple):
+    selected: list[str]  # variables in the final model, in order of entry
+    history: pd.DataFrame  # step, action, variable, F, p_value, wilks_lambda
+    wilks_lambda: float  # Wilks' lambda of the final model
+
+
+def _sweep(A: np.ndarray, k: int, reverse: bool = False) -> None:
+    """Sweep (or reverse sweep) symmetric matrix `A` in place on pivot `k`."""
+    pivot = A[k, k]
+    column = A[:, k].copy()
+    A -= np.outer(column, column) / pivot
+    A[:, k] = A[k, :] = (-column if reverse else column) / pivot
+    A[k, k] = -1.0 / pivot
+
+
+class _SweptScatter:
+    """Within and total scatter swept on the variables currently in the model."""
+
+    def __init__(self, within: np.ndarray, total: np.ndarray) -> None:
+        self.W = np.array(within, dtype=np.float64)
+        self.T = np.array(total, dtype=np.float64)
+        self.total_variance = np.diag(self.T).copy()
+        self.in_model = np.zeros(len(self.W), dtype=bool)
+
+    def enter(self, j: int) -> None:
+        _sweep(self.W, j)
+        _sweep(self.T, j)
+        self.in_model[j] = True
+
+    def remove(self, j: int) -> None:
+        _sweep(self.W, j, reverse=True)
+        _sweep(self.T, j, reverse=True)
+        self.in_model[j] = False
+
+    def enter_lambdas(self) -> np.ndarray:
+        """Partial lambda of each candidate given the model (NaN if in model or collinear)."""
+        w, t = np.diag(self.W), np.diag(self.T)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            partial = w / t
+        usable = ~self.in_model & (w > TOLERANCE * self.total_variance)
+        return np.where(usable, partial, np.nan)
+
+    def remove_lambdas(self) -> np.ndarray:
+        """Partial lambda of each model variable given the others (NaN outside the model)."""
+        # a swept pivot holds -1 / (conditional variance given the other model variables)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            partial = np.diag(self.T) / np.diag(self.W)
+        return np.where(self.in_model, partial, np.nan)
+
+
+def _f_statistic(
+    partial: np.ndarray, n_obs: int, n_classes: int, n_other: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """F statistic and p-value for partial lambdas given `n_other` model variables."""
+    df1, df2 = n_classes - 1, n_obs - n_classes - n_other
+    F = (1 - partial) / partial * df2 / df1
+    return F, f_distribution.sf(F, df1, df2)
+
+
+def stepwise_from_statistics(
+    stats: ClassStatistics,
+    columns: Sequence[str] | None = None,
+    direction: str = "forward",
+    p_enter: float = 0.05,
+    p_remove: float = 0.10,
+    max_features: int | None = None,
+) -> StepwiseResult:
+    """Stepwise selection from class statistics.
+
+    Parameters
+    ----------
+    stats: class counts, means and scatter matrices
+    columns: variable names (default: "x0", "x1", ...)
+    direction: "forward" (start empty, only add), "backward" (start full,
+        only remove) or "both" (forward steps, each followed by removal of
+        variables that no longer meet `p_remove`)
+    p_enter: largest p-value of F-to-enter for a variable to be added
+    p_remove: smallest p-value of F-to-remove for a variable to be dropped
+        (keep `p_remove >= p_enter` in "both" mode so a variable cannot cycle)
+    max_features: stop adding once this many variables are in the model
+    """
+    direction = direction.lower()
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction {direction!r}; use one of {DIRECTIONS}")
+    n_features = stats.n_features
+    columns = [f"x{j}" for j in range(n_features)] if columns is None else list(columns)
+    max_features = n_features if max_features is None else max_features
+    n_obs, n_classes = stats.n_obs, len(stats.classes)
+
+    swept = _SweptScatter(stats.within_scatter(), stats.total_scatter())
+    order: list[int] = []
+    wilks = 1.0
+    history = []
+
+    def log(action: str, j: int, F: float, p_value: float) -> None:
+        history.append(
+            {
+                "step": len(history) + 1,
+                "action": action,
+                "variable": columns[j],
+                "F": F,
+                "p_value": p_value,
+                "wilks_lambda": wilks,
+            }
+        )
+
+    def try_remove() -> bool:
+        nonlocal wilks
+        if not order:
+            return False
+        partial = swept.remove_lambdas()
+        F, p_values = _f_statistic(partial, n_obs, n_classes, len(order) - 1)
+        j = int(np.nanargmin(F))
+        if p_values[j] <= p_remove:
+            return False
+        swept.remove(j)
+        order.remove(j)
+        wilks /= partial[j]
+        log("remove", j, float(F[j]), float(p_values[j]))
+        return True
+
+    def try_enter() -> bool:
+        nonlocal wilks
+        if len(order) >= max_features:
+            return False
+        partial = swept.enter_lambdas()
+        if np.all(np.isnan(partial)):
+            return False
+        F, p_values = _f_statistic(partial, n_obs, n_classes, len(order))
+        j = int(np.nanargmax(F))
+        if p_values[j] >= p_enter:
+            return False
+        swept.enter(j)
+        order.append(j)
+        wilks *= partial[j]
+        log("enter", j, float(F[j]), float(p_values[j]))
+        return True
+
+    if direction == "backward":
+        for j in range(n_features):
+            partial = swept.enter_lambdas()
+            if not np.isnan(partial[j]):
+                swept.enter(j)
+                order.append(j)
+                wilks *= partial[j]
+        while len(order) > 1 and try_remove():
+            pass
+        while len(order) > max_features:
+            # drop the weakest variables beyond the requested size
+            partial = swept.remove_lambdas()
+            F, p_values = _f_statistic(partial, n_obs, n_classes, len(order) - 1)
+            j = int(np.nanargmin(F))
+            swept.remove(j)
+            order.remove(j)
+            wilks /= partial[j]
+            log("remove", j, float(F[j]), float(p_values[j]))
+    else:
+        for _ in range(4 * n_features):  # guards against enter/remove cycles
+            if not try_enter():
+                break
+            if direction == "both":
+                while len(order) > 1 and try_remove():
+                    pass
+
+    history_frame = pd.DataFrame(
+        history, columns=["step", "action", "variable", "F", "p_value", "wilks_lambda"]
+    )
+    return StepwiseResult([columns[j] for j in order], history_frame, float(wilks))
+
+
+def stepwise_discriminant(
+    X: np.ndarray | pd.DataFrame,
+    y: np.ndarray | pd.Series,
+    direction: str = "forward",
+    p_enter: float = 0.05,
+    p_remove: float = 0.10,
+    max_features: int | None = None,
+    columns: Sequence[str] | None = None,
+) -> StepwiseResult:
+    """Stepwise discriminant selection on in-memory data (see `stepwise_from_statistics`)."""
+    if columns is None and isinstance(X, pd.DataFrame):
+        columns = list(X.columns)
+    stats = ClassStatistics.from_arrays(X, y)
+    return stepwise_from_statistics(
+        stats, columns, direction, p_enter, p_remove, max_features
+    )
+
+
+__all__ = ["StepwiseResult", "stepwise_discriminant", "stepwise_from_statistics"]
@@ -0,0 +1,223 @@
+"""Out-of-core moment accumulation for large course datasets.
+
+Usage pattern:
+
+    from utils import streaming_correlation
+    corr, n_obs = streaming_correlation("returns.csv", chunksize=250_000)
+
+Purpose:
+- Read a CSV in chunks so files larger than RAM can be analysed
+- Keep running means and co-moments, merging chunks with the pairwise update
+  of Chan, Golub and LeVeque (Welford's update generalized to blocks)
+- Return the correlation matrix that PCA, Factor Analysis, Bartlett's test and
+  KMO need, without ever holding the raw rows in memory
+
+Only one chunk (``chunksize`` x p values) and two p x p accumulators live in
+memory at any time.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Leading columns that hold row labels rather than measurements
+INDEX_COLUMNS = ("rownames", "index", "unnamed: 0")
+
+
+class RunningMoments:
+    """Running mean and co-moment matrix for a stream of observation blocks.
+
+    Parameters
+    ----------
+    n_features: number of columns in every block
+    columns: optional column labels carried along for reporting
+
+    Notes
+    -----
+    Each block is reduced to its own mean and centered cross-product matrix,
+    then merged with the running totals:
+
+        delta = mean_b - mean_a
+        M = M_a + M_b + outer(delta, delta) * n_a * n_b / n
+
+    which is numerically stable and lets independent accumulators (one per
+    file or worker) be combined with :meth:`merge`.
+    """
+
+    def __init__(self, n_features: int, columns: Sequence[str] | None = None) -> None:
+        self.n_features = int(n_features)
+        self.columns = list(columns) if columns is not None else None
+        self.n_obs = 0
+        self.mean = np.zeros(self.n_features)
+        self.comoment = np.zeros((self.n_features, self.n_features))
+
+    def update(self, block: np.ndarray) -> RunningMoments:
+        """Fold a (rows x n_features) block into the running moments."""
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim != 2 or block.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected a 2-D block with {self.n_features} columns, got shape {block.shape}"
+            )
+        if block.shape[0] == 0:
+            return self
+
+        block_mean = block.mean(axis=0)
+        centered = block - block_mean
+        self._combine(block.shape[0], block_mean, centered.T @ centered)
+        return self
+
+    def merge(self, other: RunningMoments) -> RunningMoments:
+        """Combine another accumulator (e.g. from a different shard) into this one."""
+        if other.n_features != self.n_features:
+            raise ValueError("Cannot merge moments with different numbers of features")
+        if other.n_obs:
+            self._combine(other.n_obs, other.mean, other.comoment)
+        return self
+
+    def add(self, row: np.ndarray) -> RunningMoments:
+        """Fold a single observation in (rank-1 Welford update)."""
+        row = np.asarray(row, dtype=np.float64)
+        self.n_obs += 1
+        delta = row - self.mean
+        self.mean = self.mean + delta / self.n_obs
+        self.comoment = self.comoment + np.outer(delta, row - self.mean)
+        return self
+
+    def remove(self, row: np.ndarray) -> RunningMoments:
+        """Take a previously added observation back out (rank-1 downdate).
+
+        Used by sliding windows: the row leaving the window is removed instead
+        of recomputing the moments of the remaining rows.
+        """
+        row = np.asarray(row, dtype=np.float64)
+        if self.n_obs <= 1:
+            self.n_obs = 0
+            self.mean = np.zeros(self.n_features)
+            self.comoment = np.zeros((self.n_features, self.n_features))
+            return self
+        old_mean = self.mean
+        self.n_obs -= 1
+        self.mean = old_mean + (old_mean - row) / self.n_obs
+        self.comoment = self.comoment - np.outer(row - self.mean, row - old_mean)
+        return self
+
+    def _combine(self, n_b: int, mean_b: np.ndarray, comoment_b: np.ndarray) -> None:
+        n_a = self.n_obs
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (n_b / n)
+        self.comoment = (
+            self.comoment + comoment_b + np.outer(delta, delta) * (n_a * n_b / n)
+        )
+        self.n_obs = n
+
+    def covariance(self, ddof: int = 1) -> np.ndarray:
+        """Covariance matrix with divisor ``n_obs - ddof``."""
+        if self.n_obs - ddof <= 0:
+            raise ValueError("Not enough observations to estimate a covariance matrix")
+        return self.comoment / (self.n_obs - ddof)
+
+    def std(self, ddof: int = 0) -> np.ndarray:
+        """Per-column standard deviation (population by default, like StandardScaler)."""
+        return np.sqrt(np.diag(self.covariance(ddof=ddof)))
+
+    def correlation(self) -> np.ndarray:
+        """Pearson correlation matrix of everything seen so far."""
+        scale = np.sqrt(np.diag(self.comoment))
+        if np.any(scale == 0):
+            raise ValueError("Correlation undefined: at least one column is constant")
+        corr = self.comoment / np.outer(scale, scale)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+
+def iter_csv_blocks(
+    path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dropna: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """Yield numeric chunks of a CSV file.
+
+    Parameters
+    ----------
+    path: CSV file to read
+    columns: columns to keep; defaults to every numeric column after dropping
+        a leading row-label column (``rownames``/``index``)
+    chunksize: rows per chunk
+    dropna: drop rows with any missing value (listwise deletion)
+    """
+    reader = pd.read_csv(path, usecols=columns, chunksize=chunksize)
+    selected: list[str] | None = list(columns) if columns is not None else None
+    for chunk in reader:
+        if selected is None:
+            frame = chunk
+            if frame.columns[0].lower() in INDEX_COLUMNS:
+                frame = frame.iloc[:, 1:]
+            selected = list(frame.select_dtypes(include="number").columns)
+        frame = chunk[selected]
+        if dropna:
+            frame = frame.dropna()
+        yield frame
+
+
+def stream_moments(
+    path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dropna: bool = True,
+) -> RunningMoments:
+    """Accumulate running moments over a CSV file read in chunks."""
+    moments: RunningMoments | None = None
+    for frame in iter_csv_blocks(
+        path, columns=columns, chunksize=chunksize, dropna=dropna
+    ):
+        if moments is None:
+            moments = RunningMoments(frame.shape[1], columns=frame.columns)
+        moments.update(frame.to_numpy(dtype=np.float64))
+    if moments is None or moments.n_obs == 0:
+        raise ValueError(f"No complete numeric rows found in {path}")
+    return moments
+
+
+def streaming_correlation(
+    path: str | Path,
+    columns: Sequence[str] | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dropna: bool = True,
+) -> tuple[np.ndarray, int]:
+    """Return ``(correlation_matrix, n_obs)`` for a CSV file read in chunks.
+
+    The pair is exactly what the correlation-based steps need: pass the matrix
+    to ``FactorAnalyzer(is_corr_matrix=True)`` or :func:`correlation_eigen`, and
+    both to :func:`utils.diagnostics.bartlett_sphericity_from_corr`.
+    """
+    moments = stream_moments(path, columns=columns, chunksize=chunksize, dropna=dropna)
+    return moments.correlation(), moments.n_obs
+
+
+def correlation_eigen(corr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """PCA of a correlation matrix: eigenvalues (descending) and components.
+
+    Components are returned row-wise, matching ``sklearn.decomposition.PCA``'s
+    ``components_`` layout, so ``components[:2]`` are the PC1/PC2 loadings.
+    """
+    values, vectors = np.linalg.eigh(np.asarray(corr, dtype=np.float64))
+    order = np.argsort(values)[::-1]
+    return values[order], vectors[:, order].T
+
+
+__all__ = [
+    "DEFAULT_CHUNKSIZE",
+    "RunningMoments",
+    "correlation_eigen",
+    "iter_csv_blocks",
+    "stream_moments",
+    "streaming_correlation",
+]
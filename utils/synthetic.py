@@ -0,0 +1,137 @@
+"""Chunked synthetic data generation for the course datasets.
+
+Usage pattern:
+
+    from utils import write_chunked, sample_gaussian_mixture
+
+    def make_chunk(rng, start, size):
+        X, labels = sample_gaussian_mixture(rng, size, means, covs, proportions)
+        ...
+        return pd.DataFrame(...)
+
+    n_rows = write_chunked(data_file, make_chunk, n=100_000_000, random_state=42)
+    counts = population_counts(n_rows, proportions)   # rows per population
+
+Purpose:
+- Let every `fetch_*.py` generator take a row count `n`, from the small
+  classroom default up to load-testing sizes, with the same code path.
+- Rows are produced and appended to the CSV `chunksize` at a time, so only
+  one chunk is ever held in memory.
+- Population membership is assigned for a whole chunk at once (exact
+  proportions, then shuffled) and each population is drawn with a single
+  vectorized call, so there is no per-row Python loop.
+
+Chunk k draws from child k of `np.random.SeedSequence(random_state)`: a given
+(seed, n, chunksize) always produces the same file. `make_chunk` is called in
+row order, so generators with a time dimension (e.g. price paths) may carry
+state from one chunk to the next.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+ChunkFactory = Callable[[np.random.Generator, int, int], pd.DataFrame]
+
+
+def allocate(size: int, proportions: Sequence[float]) -> np.ndarray:
+    """Split `size` rows into integer counts matching `proportions` (largest remainder)."""
+    proportions = np.asarray(proportions, dtype=np.float64)
+    proportions = proportions / proportions.sum()
+    exact = proportions * size
+    counts = np.floor(exact).astype(np.int64)
+    remainder = size - counts.sum()
+    if remainder:
+        counts[np.argsort(exact - counts)[::-1][:remainder]] += 1
+    return counts
+
+
+def sample_populations(
+    rng: np.random.Generator, size: int, proportions: Sequence[float]
+) -> np.ndarray:
+    """Population index for `size` rows: exact proportions, in random order."""
+    labels = np.repeat(np.arange(len(proportions)), allocate(size, proportions))
+    return rng.permutation(labels)
+
+
+def population_counts(
+    n: int, proportions: Sequence[float], chunksize: int = DEFAULT_CHUNKSIZE
+) -> np.ndarray:
+    """Rows per population in a `write_chunked` file labelled by `sample_populations`.
+
+    Every chunk is allocated on its own, so the totals are the sum of the
+    per-chunk allocations; no need to read the file back.
+    """
+    sizes = np.minimum(chunksize, n - np.arange(0, n, chunksize))
+    return sum(allocate(int(size), proportions) for size in sizes)
+
+
+def sample_gaussian_mixture(
+    rng: np.random.Generator,
+    size: int,
+    means: Sequence[np.ndarray],
+    covs: Sequence[np.ndarray],
+    proportions: Sequence[float],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Draw `size` rows from a mixture of multivariate normal populations.
+
+    Returns
+    -------
+    (X, labels): the (size x p) sample and the population index of each row
+    """
+    labels = sample_populations(rng, size, proportions)
+    X = np.empty((size, len(means[0])))
+    for k, (mean, cov) in enumerate(zip(means, covs, strict=True)):
+        mask = labels == k
+        X[mask] = rng.multivariate_normal(mean, cov, size=int(mask.sum()))
+    return X, labels
+
+
+def write_chunked(
+    path: str | Path,
+    make_chunk: ChunkFactory,
+    n: int,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    random_state: int | None = None,
+) -> int:
+    """Generate `n` rows with `make_chunk(rng, start, size)` and append them to a CSV.
+
+    Parameters
+    ----------
+    path: destination CSV (overwritten)
+    make_chunk: returns the DataFrame for rows `start .. start + size - 1`
+    n: total number of rows
+    chunksize: rows generated and written per step
+    random_state: seed for reproducible output
+
+    Returns
+    -------
+    number of rows written
+    """
+    if n <= 0:
+        raise ValueError("n must be a positive number of rows")
+    n_chunks = -(-n // chunksize)
+    seeds = np.random.SeedSequence(random_state).spawn(n_chunks)
+    for k, seed in enumerate(seeds):
+        start = k * chunksize
+        frame = make_chunk(
+            np.random.default_rng(seed), start, min(chunksize, n - start)
+        )
+        frame.to_csv(path, mode="w" if k == 0 else "a", header=k == 0, index=False)
+    return n
+
+
+__all__ = [
+    "DEFAULT_CHUNKSIZE",
+    "allocate",
+    "population_counts",
+    "sample_gaussian_mixture",
+    "sample_populations",
+    "write_chunked",
+]